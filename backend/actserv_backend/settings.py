@@ -9,6 +9,7 @@ from datetime import timedelta
 from pathlib import Path
 
 import dj_database_url
+from corsheaders.defaults import default_headers
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -140,6 +141,10 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 STORAGES = {
+    # Uploads and export files. Django has no implicit default once STORAGES is set.
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },
@@ -158,6 +163,23 @@ ALLOWED_UPLOAD_CONTENT_TYPES = [
     ).split(',')
 ]
 MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))  # 10MB per file
+# Resumable uploads (forms/uploads.py): largest PUT body per chunk, where partial
+# files are kept (local disk; defaults to <tmp>/actserv-uploads) and for how long
+UPLOAD_CHUNK_MAX_SIZE = int(os.environ.get('UPLOAD_CHUNK_MAX_SIZE', 1024 * 1024))  # 1MB
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR', '')
+UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 60 * 60))
+# Post-upload processing (forms/processing.py): longer side of preview images in
+# pixels, and how long pdfinfo / pdftoppm may run on one file (seconds)
+UPLOAD_PREVIEW_MAX_SIZE = int(os.environ.get('UPLOAD_PREVIEW_MAX_SIZE', 800))
+UPLOAD_PROCESSING_TIMEOUT = int(os.environ.get('UPLOAD_PROCESSING_TIMEOUT', 60))
+# Direct-to-storage transfers (forms/transfers.py): the class that signs upload and
+# download URLs, and how long a download URL stays valid (seconds)
+UPLOAD_TRANSFER_BACKEND = os.environ.get('UPLOAD_TRANSFER_BACKEND', 'forms.transfers.LocalSignedTransfers')
+UPLOAD_DOWNLOAD_URL_TTL = int(os.environ.get('UPLOAD_DOWNLOAD_URL_TTL', 5 * 60))
+
+# ===== FORM VALIDATION =====
+# Compiled per-form validation plans kept in each worker (see forms/validation.py)
+FORM_VALIDATION_PLAN_CACHE_SIZE = int(os.environ.get('FORM_VALIDATION_PLAN_CACHE_SIZE', 256))
 
 # ===== CELERY =====
 _redis_url = os.environ.get('REDIS_URL', '').strip()
@@ -174,14 +196,97 @@ if not _redis_url:
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
 
+# CPU-heavy upload processing gets its own queue, served by a worker started with
+# `-Q uploads --concurrency N` so it cannot starve e-mail and export tasks
+CELERY_TASK_ROUTES = {
+    'forms.tasks.process_upload_stage': {'queue': 'uploads'},
+    'forms.tasks.verify_direct_upload': {'queue': 'uploads'},
+}
+
 # ── Periodic tasks (Celery Beat) ────────────────────────────────────────────
 CELERY_BEAT_SCHEDULE = {
     'check-escalating-alerts': {
         'task': 'notifications.tasks.check_escalating_alerts',
         'schedule': timedelta(hours=24),  # run every 24 hours
     },
+    'relay-outbox': {
+        'task': 'forms.tasks.relay_outbox',
+        'schedule': timedelta(seconds=5),
+    },
+    'dispatch-email-queue': {
+        'task': 'notifications.tasks.dispatch_email_queue',
+        'schedule': timedelta(minutes=1),  # safety net; queueing code also triggers a dispatch
+    },
+    'expire-export-jobs': {
+        'task': 'forms.tasks.expire_export_jobs',
+        'schedule': timedelta(hours=1),
+    },
+    'expire-upload-sessions': {
+        'task': 'forms.tasks.expire_upload_sessions',
+        'schedule': timedelta(hours=1),
+    },
+    'collect-blobs': {
+        'task': 'forms.tasks.collect_blobs',
+        'schedule': timedelta(hours=24),
+    },
 }
 
+# Transactional outbox (forms/outbox.py). Without a broker there is no beat,
+# so eager/dev mode relays each message as soon as its transaction commits.
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_RELAY_ON_COMMIT = not _redis_url
+
+# Escalation sweep: submissions per chunk task, and per checkpointed batch inside a chunk
+ESCALATION_CHUNK_SIZE = int(os.environ.get('ESCALATION_CHUNK_SIZE', 1000))
+ESCALATION_BATCH_SIZE = int(os.environ.get('ESCALATION_BATCH_SIZE', 250))
+
+# ===== CACHE =====
+# Shared Redis cache in production (public form schemas, validation-plan
+# invalidation, throttling); per-process locmem in dev / tests.
+if _redis_url:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL', _redis_url),
+            'KEY_PREFIX': 'actserv',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
+# Public form schemas are invalidated on every Form/Field save; the TTL only
+# bounds how long an unused schema lingers.
+FORM_SCHEMA_CACHE_TIMEOUT = int(os.environ.get('FORM_SCHEMA_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Rows fetched per round trip by submission exports (forms/exports.py)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+# Seconds a background export (forms/export_jobs.py) stays downloadable
+EXPORT_JOB_TTL = int(os.environ.get('EXPORT_JOB_TTL', 24 * 60 * 60))
+
+# Bulk submission ingest (forms/ingest.py): rows per INSERT and per request
+BULK_INGEST_CHUNK_SIZE = int(os.environ.get('BULK_INGEST_CHUNK_SIZE', 1000))
+BULK_INGEST_MAX_ROWS = int(os.environ.get('BULK_INGEST_MAX_ROWS', 10_000))
+
+# Most submissions one bulk status change may touch (forms/services.py)
+BULK_STATUS_MAX_ROWS = int(os.environ.get('BULK_STATUS_MAX_ROWS', 1000))
+
+# Per-user unread notification counters (notifications/counters.py). Fan-out
+# and mark-read keep them current; the TTL bounds any drift.
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = int(os.environ.get('NOTIFICATION_UNREAD_CACHE_TIMEOUT', 5 * 60))
+
+# Live notification stream (notifications/streams.py). Celery workers signal
+# the ASGI processes through Redis pub/sub; without Redis, signals stay
+# in-process (eager Celery fans out inside the web process).
+NOTIFICATION_PUBSUB_URL = os.environ.get('NOTIFICATION_PUBSUB_URL', _redis_url)
+NOTIFICATION_STREAM_HEARTBEAT = int(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', 15))
+# Idle streams re-read the database every this many heartbeats, so a lost
+# signal delays delivery by at most about a minute rather than indefinitely.
+NOTIFICATION_STREAM_RECHECK_EVERY = int(os.environ.get('NOTIFICATION_STREAM_RECHECK_EVERY', 4))
+
 # Ensure Redis broker is configured in production
 if not DEBUG and not _redis_url:
     raise RuntimeError('REDIS_URL environment variable must be set in production')
@@ -192,6 +297,8 @@ CORS_ALLOWED_ORIGINS = [
     for o in os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 ]
 CORS_ALLOW_CREDENTIALS = True
+# The dashboard's notification stream resumes with Last-Event-ID (notifications/streams.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'last-event-id')
 
 # Warn if CORS is still pointing at localhost in production
 if not DEBUG and any('localhost' in o for o in CORS_ALLOWED_ORIGINS):
@@ -264,6 +371,13 @@ ADMIN_NOTIFICATION_EMAILS = [
     for e in os.environ.get('ADMIN_NOTIFICATION_EMAILS', 'admin@actserv.local').split(',')
 ]
 
+# Batching dispatcher (notifications/mail.py)
+EMAIL_DISPATCH_BATCH_SIZE = int(os.environ.get('EMAIL_DISPATCH_BATCH_SIZE', 100))  # messages per SMTP connection
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+EMAIL_RETRY_BACKOFF = int(os.environ.get('EMAIL_RETRY_BACKOFF', 60))  # seconds, doubled per attempt
+# Only used by django.core.mail.backends.filebased.EmailBackend
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'sent_emails'))
+
 # ===== LOGGING =====
 
 # Security settings (enabled for production)
@@ -0,0 +1,146 @@
+# backend/benchmarks/bench_escalation.py
+"""
+Escalation sweep: the legacy per-submission loop vs the set-based engine in
+notifications/escalation.py.
+
+Run from backend/:
+    python benchmarks/bench_escalation.py [--sizes 10000 100000] [--staff 3] [--legacy-limit 10000]
+
+Uses a throwaway in-memory SQLite database, so it never touches db.sqlite3.
+Emails are counted (queued, for the engine) rather than sent. The legacy loop is skipped above
+--legacy-limit rows because it issues several queries per submission.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'actserv_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils.timezone import localtime, now  # noqa: E402
+
+from forms.models import Form, Submission  # noqa: E402
+from notifications.escalation import run_escalations  # noqa: E402
+from notifications.models import EscalationReminder, EscalationRun, NotificationMessage, QueuedEmail  # noqa: E402
+from notifications.services import fan_out  # noqa: E402
+from notifications.tasks import ESCALATION_THRESHOLDS  # noqa: E402
+from users.models import CustomUser  # noqa: E402
+
+
+def legacy_escalate(send_email):
+    """The pre-engine check_escalating_alerts loop (per-row queries), kept here for comparison."""
+    today = localtime().date()
+    processed = 0
+    submissions = Submission.objects.filter(
+        due_date__isnull=False, is_deleted=False,
+    ).exclude(status__in=['rejected', 'approved']).select_related('form', 'submitted_by')
+
+    for sub in submissions:
+        days_overdue = (today - sub.due_date).days
+        if days_overdue < 5:
+            continue
+        chosen_level, chosen_title, chosen_body = 0, '', ''
+        for threshold_days, level, title, body in ESCALATION_THRESHOLDS:
+            if days_overdue >= threshold_days:
+                chosen_level, chosen_title, chosen_body = level, title, body
+        if sub.escalation_level >= chosen_level:
+            continue
+        if chosen_level >= 3 and sub.penalty_applied_at is None:
+            sub.penalty_applied_at = now()
+            sub.save(update_fields=['penalty_applied_at', 'updated_at'])
+        recipients = [sub.submitted_by] if sub.submitted_by else []
+        recipients.extend(CustomUser.objects.filter(is_staff=True))
+        fan_out(
+            user_ids=[user.pk for user in recipients], type='submission', title=f'[Escalation] {chosen_title}',
+            body=f'Form: {sub.form.name}\nDays overdue: {days_overdue}\n\n{chosen_body}',
+            related_submission_id=sub.pk,
+        )
+        sub.escalation_level = chosen_level
+        sub.last_reminder_sent_at = now()
+        sub.save(update_fields=['escalation_level', 'last_reminder_sent_at', 'updated_at'])
+        if sub.submitted_by and sub.submitted_by.email:
+            send_email(sub.submitted_by.email)
+        processed += 1
+    return processed
+
+
+def seed(size, staff_count):
+    EscalationRun.objects.all().delete()
+    EscalationReminder.objects.all().delete()
+    QueuedEmail.objects.all().delete()
+    NotificationMessage.objects.all().delete()
+    Submission.objects.all().delete()
+    CustomUser.objects.all().delete()
+    for i in range(staff_count):
+        CustomUser.objects.create_user(username=f'staff{i}', email=f'staff{i}@bench.local',
+                                       password='x', is_staff=True)
+    member = CustomUser.objects.create_user(username='member', email='member@bench.local', password='x')
+    form = Form.objects.filter(slug='bench').first() or Form.objects.create(name='Bench', slug='bench', schema={})
+
+    today = localtime().date()
+    batch = []
+    for i in range(size):
+        # Spread due dates over 0-20 days overdue so every level is exercised
+        batch.append(Submission(
+            form=form, schema_version=1, responses={}, submitted_by=member,
+            due_date=today - timedelta(days=i % 21),
+        ))
+        if len(batch) == 5000:
+            Submission.objects.bulk_create(batch)
+            batch = []
+    Submission.objects.bulk_create(batch)
+
+
+def measure(label, fn):
+    emails = []
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    # Emails are only counted: the legacy loop reports them, the engine queues them
+    with patch('notifications.mail.request_dispatch'), connection.execute_wrapper(count_query):
+        start = time.perf_counter()
+        processed = fn(emails.append)
+        elapsed = time.perf_counter() - start
+    email_count = len(emails) + QueuedEmail.objects.count()
+    print(f'  {label:<22} {processed:>8,} escalated  {len(queries):>8,} queries  '
+          f'{email_count:>8,} emails  {elapsed:8.2f}s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--staff', type=int, default=3)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--legacy-limit', type=int, default=10_000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    for size in args.sizes:
+        print(f'{size:,} submissions, {args.staff} staff')
+        before = None
+        if size <= args.legacy_limit:
+            seed(size, args.staff)
+            before = measure('legacy (per row)', legacy_escalate)
+        seed(size, args.staff)
+        after = measure('set-based engine', lambda _send: run_escalations(chunk_size=args.chunk_size))
+        if before:
+            print(f'  speed-up: {before / after:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
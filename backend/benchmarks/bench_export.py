@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_export.py
+"""
+Submission export: materialising every row (what paging /api/submissions/
+amounts to) vs the streaming export in forms/exports.py.
+
+Run from backend/:
+    python benchmarks/bench_export.py [--sizes 1000 20000 100000] [--format csv]
+
+Uses a throwaway in-memory SQLite database, so it never touches db.sqlite3.
+Peak memory is measured with tracemalloc, which only sees Python allocations.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'actserv_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from forms.exports import SubmissionExport  # noqa: E402
+from forms.models import Field, Form, Submission  # noqa: E402
+from forms.serializers import SubmissionSerializer  # noqa: E402
+
+
+def seed(size):
+    Submission.all_objects.all().delete()
+    form = Form.objects.filter(slug='bench').first()
+    if form is None:
+        form = Form.objects.create(name='Bench', slug='bench', schema={})
+        for order, key in enumerate(['full_name', 'id_number', 'email', 'phone', 'notes']):
+            Field.objects.create(form=form, key=key, label=key.title(), field_type='text', order=order)
+    batch = []
+    for i in range(size):
+        batch.append(Submission(form=form, schema_version=form.schema_version, responses={
+            'full_name': f'Member {i}', 'id_number': f'{i:08d}', 'email': f'm{i}@bench.local',
+            'phone': f'+2547{i:08d}', 'notes': 'x' * 80,
+        }))
+        if len(batch) == 5000:
+            Submission.objects.bulk_create(batch)
+            batch = []
+    Submission.objects.bulk_create(batch)
+    return form
+
+
+def materialised(form):
+    rows = Submission.objects.filter(form=form).select_related('form', 'submitted_by').prefetch_related('files')
+    return len(SubmissionSerializer(rows, many=True).data)
+
+
+def streamed(form, file_format):
+    return sum(len(chunk) for chunk in SubmissionExport(form=form, file_format=file_format, filters={}).chunks())
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'  {label:<22} peak {peak / 2**20:8.1f} MiB  {elapsed:8.2f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 20_000, 100_000])
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson', 'xlsx'])
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    for size in args.sizes:
+        form = seed(size)
+        print(f'{size:,} submissions')
+        measure('materialised', lambda: materialised(form))
+        measure(f'streamed {args.format}', lambda: streamed(form, args.format))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_ingest.py
+"""
+Batch onboarding: one SubmissionSerializer + create_submission per row (what
+POSTing each record to /api/submissions/ amounts to, minus HTTP and
+throttling) vs the bulk ingest in forms/ingest.py.
+
+Run from backend/:
+    python benchmarks/bench_ingest.py [--sizes 1000 10000]
+
+Uses a throwaway in-memory SQLite database, so it never touches db.sqlite3.
+The outbox relay is switched off so neither side pays for notifications.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'actserv_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from forms.ingest import ingest_submissions  # noqa: E402
+from forms.models import Field, Form, Submission  # noqa: E402
+from forms.serializers import SubmissionSerializer  # noqa: E402
+from forms.services import create_submission  # noqa: E402
+
+KEYS = ['full_name', 'id_number', 'email', 'phone', 'notes']
+
+
+def setup_form():
+    form = Form.objects.create(name='Bench', slug='bench', schema={})
+    for order, key in enumerate(KEYS):
+        Field.objects.create(form=form, key=key, label=key.title(), field_type='text',
+                             required=key != 'notes', order=order)
+    form.refresh_from_db()
+    return form
+
+
+def rows(size):
+    return [
+        {'responses': {
+            'full_name': f'Member {i}', 'id_number': f'{i:08d}', 'email': f'm{i}@bench.local',
+            'phone': f'+2547{i:08d}', 'notes': 'x' * 80,
+        }, 'client_identifier': f'P-{i}'}
+        for i in range(size)
+    ]
+
+
+def one_by_one(form, payload):
+    for row in payload:
+        serializer = SubmissionSerializer(data={'form': form.pk, **row})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        create_submission(form=data['form'], responses=data['responses'],
+                          client_identifier=data.get('client_identifier', ''))
+
+
+def bulk(form, payload):
+    result = ingest_submissions(form=form, rows=payload)
+    assert result.rejected == 0
+
+
+def measure(label, fn):
+    Submission.all_objects.all().delete()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f'  {label:<14} {elapsed:8.2f}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000])
+    args = parser.parse_args()
+
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    call_command('migrate', verbosity=0)
+    form = setup_form()
+    for size in args.sizes:
+        payload = rows(size)
+        print(f'{size:,} rows')
+        measure('one by one', lambda: one_by_one(form, payload))
+        measure('bulk ingest', lambda: bulk(form, payload))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_search.py
+"""
+Submission search: a substring scan over responses (what admin search_fields
+amounts to) vs the indexed search in forms/search.py.
+
+Run from backend/:
+    python benchmarks/bench_search.py [--sizes 10000 100000] [--queries 50]
+
+Uses a throwaway in-memory SQLite database, so it measures the
+SubmissionSearchTerm fallback. PostgreSQL uses the GIN-indexed tsvector
+column instead.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'actserv_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from forms.ingest import ingest_submissions  # noqa: E402
+from forms.models import Field, Form, Submission  # noqa: E402
+from forms.search import search_submissions  # noqa: E402
+
+NAMES = ['Wanjiru', 'Kamau', 'Otieno', 'Achieng', 'Mwangi', 'Njeri', 'Kiprop', 'Chebet', 'Odhiambo', 'Wafula']
+
+
+def seed(form, size, start):
+    rng = random.Random(start)
+    rows = [
+        {'responses': {
+            'full_name': f'{rng.choice(NAMES)} {rng.choice(NAMES)}', 'id_number': f'{i:08d}',
+            'phone': f'07{i:08d}', 'notes': 'Walk-in client, documents verified at branch',
+        }, 'client_identifier': f'P-{i}'}
+        for i in range(start, start + size)
+    ]
+    for offset in range(0, size, 10_000):
+        ingest_submissions(form=form, rows=rows[offset:offset + 10_000])
+
+
+def scan(q):
+    return list(Submission.objects.filter(responses__icontains=q)[:20])
+
+
+def measure(label, fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    elapsed = (time.perf_counter() - start) / len(queries)
+    print(f'  {label:<14} {elapsed * 1000:8.2f} ms/query')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    settings.OUTBOX_RELAY_ON_COMMIT = False
+    settings.BULK_INGEST_MAX_ROWS = 10_000
+    call_command('migrate', verbosity=0)
+    form = Form.objects.create(name='Bench', slug='bench', schema={})
+    for order, key in enumerate(['full_name', 'id_number', 'phone', 'notes']):
+        Field.objects.create(form=form, key=key, label=key.replace('_', ' ').title(), field_type='text', order=order)
+    form.refresh_from_db()
+
+    seeded = 0
+    for size in args.sizes:
+        seed(form, size - seeded, seeded)
+        seeded = size
+        rng = random.Random(size)
+        ids = [f'{rng.randrange(size):08d}' for _ in range(args.queries)]
+        print(f'{size:,} submissions')
+        measure('scan', scan, ids)
+        measure('search', search_submissions, ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# backend/benchmarks/bench_validation.py
+"""
+Submission validation throughput: legacy per-request ORM validation vs the
+compiled, cached plan in forms/validation.py.
+
+Run from backend/:
+    python benchmarks/bench_validation.py [--fields 25] [--iterations 2000]
+
+Uses a throwaway in-memory SQLite database, so it never touches db.sqlite3.
+"""
+import argparse
+import datetime
+import decimal
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'actserv_backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.exceptions import ValidationError as DjangoValidationError  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.core.validators import EmailValidator  # noqa: E402
+
+from forms.models import Field, Form  # noqa: E402
+from forms.validation import clear_validation_plans, get_validation_plan  # noqa: E402
+
+FIELD_TYPES = ['text', 'number', 'email', 'date']
+SAMPLE_VALUES = {'text': 'Jane Doe', 'number': '2500.50', 'email': 'jane@example.com', 'date': '1990-01-31'}
+
+
+def legacy_validate(form, responses):
+    """The pre-plan SubmissionSerializer.validate body, kept here for comparison."""
+    required = form.fields.filter(required=True).exclude(field_type='file').values_list('key', flat=True)
+    missing = [key for key in required if key not in responses]
+    if missing:
+        return missing
+    for field in form.fields.exclude(field_type='file'):
+        if field.key not in responses:
+            continue
+        value = responses[field.key]
+        if field.field_type == 'number':
+            try:
+                decimal.Decimal(str(value))
+            except (decimal.InvalidOperation, ValueError):
+                return field.key
+        elif field.field_type == 'email':
+            try:
+                EmailValidator()(value)
+            except DjangoValidationError:
+                return field.key
+        elif field.field_type == 'date':
+            try:
+                datetime.date.fromisoformat(value)
+            except (ValueError, TypeError):
+                return field.key
+    return None
+
+
+def plan_validate(form, responses):
+    return get_validation_plan(form).validate(responses)
+
+
+def build_form(field_count):
+    form = Form.objects.create(name='Bench', slug='bench', schema={'version': 1})
+    responses = {}
+    for i in range(field_count):
+        field_type = FIELD_TYPES[i % len(FIELD_TYPES)]
+        key = f'field_{i}'
+        Field.objects.create(form=form, key=key, label=key, field_type=field_type, required=True, order=i)
+        responses[key] = SAMPLE_VALUES[field_type]
+    return form, responses
+
+
+def measure(label, fn, form, responses, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        assert not fn(form, responses)
+    elapsed = time.perf_counter() - start
+    rate = iterations / elapsed
+    print(f'{label:<28} {rate:>12,.0f} validations/sec  ({elapsed * 1000:.1f} ms total)')
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--fields', type=int, default=25)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    call_command('migrate', verbosity=0)
+    form, responses = build_form(args.fields)
+    clear_validation_plans()
+
+    print(f'{args.fields} fields, {args.iterations} iterations')
+    before = measure('legacy (ORM per request)', legacy_validate, form, responses, args.iterations)
+    after = measure('compiled plan (warm)', plan_validate, form, responses, args.iterations)
+    print(f'speed-up: {after / before:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
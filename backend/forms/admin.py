@@ -1,10 +1,58 @@
 # ===== backend/forms/admin.py =====
 import json
 
+from django import forms as django_forms
 from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from django.forms.models import BaseInlineFormSet
 from django.utils.html import format_html
 
-from .models import Field, FileUpload, Form, Submission
+from .conditions import check_condition_graph
+from .models import (
+    ExportJob, Field, FileUpload, Form, OutboxMessage, Submission, SubmissionBatch, SubmissionStatusEvent,
+    StoredBlob, UploadSession,
+)
+from .services import bulk_update_submission_status
+from .transfers import get_transfers
+
+
+class FieldInlineFormSet(BaseInlineFormSet):
+    """Reject conditional_required rules that would make fields depend on each other in a loop."""
+
+    def clean(self):
+        super().clean()
+        definitions = [
+            (form.cleaned_data['key'], form.cleaned_data.get('validation'))
+            for form in self.forms
+            if form.cleaned_data.get('key') and not form.cleaned_data.get('DELETE')
+        ]
+        try:
+            check_condition_graph(definitions)
+        except ValueError as exc:
+            raise ValidationError(str(exc))
+
+
+class FieldAdminForm(django_forms.ModelForm):
+    """Same cycle check as the inline, for edits made on the standalone Field page."""
+
+    class Meta:
+        model = Field
+        fields = '__all__'
+
+    def clean(self):
+        cleaned = super().clean()
+        form = cleaned.get('form')
+        if form is not None and cleaned.get('key'):
+            siblings = Field.objects.filter(form=form).exclude(pk=self.instance.pk)
+            try:
+                check_condition_graph([
+                    (cleaned['key'], cleaned.get('validation')),
+                    *siblings.values_list('key', 'validation'),
+                ])
+            except ValueError as exc:
+                raise ValidationError(str(exc))
+        return cleaned
 
 
 class FieldInline(admin.TabularInline):
@@ -14,17 +62,55 @@ class FieldInline(admin.TabularInline):
     have to navigate to a separate screen to see what fields a form has.
     """
     model = Field
+    formset = FieldInlineFormSet
     extra = 1
     fields = ('order', 'key', 'label', 'field_type', 'required', 'options', 'validation')
     ordering = ('order',)
 
 
+def _file_link(upload):
+    """
+    The preview (processing.py) linking to the full file, or a plain link
+    until the preview exists. Both are signed URLs (transfers.py).
+    """
+    if not upload.file:
+        return '—'
+    if not upload.is_verified:
+        return format_html('{} (awaiting verification)', upload.file.name)
+    transfers = get_transfers()
+    file_url = transfers.download_url(upload.file.name)
+    preview = (upload.meta or {}).get('preview')
+    if preview:
+        return format_html(
+            '<a href="{}" target="_blank"><img src="{}" alt="{}" style="max-height: 160px"></a>',
+            file_url, transfers.download_url(preview), upload.original_filename or upload.file.name,
+        )
+    return format_html('<a href="{}" target="_blank">{}</a>', file_url, upload.file.name)
+
+
 class FileUploadInline(admin.TabularInline):
     model = FileUpload
     extra = 0
-    readonly_fields = ('field_key', 'file', 'uploaded_at', 'meta')
+    fields = ('field_key', 'file_link', 'uploaded_at', 'meta')
+    readonly_fields = fields
     can_delete = False
 
+    @admin.display(description='File')
+    def file_link(self, obj):
+        return _file_link(obj)
+
+
+class SubmissionStatusEventInline(admin.TabularInline):
+    """Read-only audit trail of status transitions."""
+    model = SubmissionStatusEvent
+    extra = 0
+    fields = ('created_at', 'from_status', 'to_status', 'changed_by')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Form)
 class FormAdmin(admin.ModelAdmin):
@@ -32,45 +118,52 @@ class FormAdmin(admin.ModelAdmin):
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
     list_filter = ('is_active', 'created_at')
-    readonly_fields = ('id', 'schema_version', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'schema_version', 'current_snapshot', 'submission_count', 'created_at', 'updated_at')
     inlines = [FieldInline]
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('fields', 'submissions')
+        return super().get_queryset(request).annotate(field_total=Count('fields'))
 
-    @admin.display(description='Fields')
+    @admin.display(description='Fields', ordering='field_total')
     def field_count(self, obj):
-        return obj.fields.count()
-
-    @admin.display(description='Submissions')
-    def submission_count(self, obj):
-        return obj.submissions.count()
+        return obj.field_total
 
 
 @admin.register(Field)
 class FieldAdmin(admin.ModelAdmin):
+    form = FieldAdminForm
     list_display = ('label', 'key', 'field_type', 'form', 'required', 'order')
     search_fields = ('label', 'key', 'form__name')
     list_filter = ('field_type', 'required', 'form')
     ordering = ('form', 'order')
 
 
+def _bulk_status(request, queryset, new_status):
+    """Apply the status through the same service as the REST API (transition table + audit rows)."""
+    try:
+        result = bulk_update_submission_status(submissions=queryset, new_status=new_status, changed_by=request.user)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return
+    messages.success(request, f'{len(result.updated)} submission(s) marked as {new_status}.')
+    if result.not_allowed:
+        reasons = ' '.join(sorted({reason for _, _, reason in result.not_allowed}))
+        messages.warning(request, f'{len(result.not_allowed)} submission(s) skipped. {reasons}')
+
+
 @admin.action(description='Mark selected submissions as reviewed')
 def mark_reviewed(modeladmin, request, queryset):
-    updated = queryset.update(status='reviewed')
-    messages.success(request, f'{updated} submission(s) marked as reviewed.')
+    _bulk_status(request, queryset, 'reviewed')
 
 
 @admin.action(description='Mark selected submissions as approved')
 def mark_approved(modeladmin, request, queryset):
-    updated = queryset.update(status='approved')
-    messages.success(request, f'{updated} submission(s) marked as approved.')
+    _bulk_status(request, queryset, 'approved')
 
 
 @admin.action(description='Mark selected submissions as rejected')
 def mark_rejected(modeladmin, request, queryset):
-    updated = queryset.update(status='rejected')
-    messages.success(request, f'{updated} submission(s) marked as rejected.')
+    _bulk_status(request, queryset, 'rejected')
 
 
 @admin.register(Submission)
@@ -81,13 +174,14 @@ class SubmissionAdmin(admin.ModelAdmin):
     )
     search_fields = ('id', 'client_identifier', 'form__name', 'submitted_by__email')
     list_filter = ('status', 'form', 'created_at')
-    readonly_fields = ('id', 'form', 'submitted_by', 'schema_version', 'created_at', 'pretty_responses')
+    # Status changes go through the actions, which apply the state machine and audit trail
+    readonly_fields = ('id', 'form', 'submitted_by', 'status', 'schema_version', 'created_at', 'pretty_responses')
     actions = [mark_reviewed, mark_approved, mark_rejected]
-    inlines = [FileUploadInline]
+    inlines = [FileUploadInline, SubmissionStatusEventInline]
     autocomplete_fields = ('form', 'submitted_by')
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('form', 'submitted_by')
+        return super().get_queryset(request).select_related('form', 'submitted_by', 'schema_snapshot')
 
     # Show 'responses' as pretty-printed JSON, not a raw textarea
     fields = (
@@ -101,19 +195,77 @@ class SubmissionAdmin(admin.ModelAdmin):
 
     @admin.display(description='Responses')
     def pretty_responses(self, obj):
-        formatted = json.dumps(obj.responses, indent=2, ensure_ascii=False)
+        # Label answers with the field set the submission was made against,
+        # not whatever the form looks like today.
+        if obj.schema_snapshot is not None:
+            labels = {f['key']: f['label'] for f in obj.schema_snapshot.fields}
+            responses = {
+                f'{labels[key]} ({key})' if key in labels else key: value
+                for key, value in obj.responses.items()
+            }
+        else:
+            responses = obj.responses
+        formatted = json.dumps(responses, indent=2, ensure_ascii=False)
         return format_html('<pre style="white-space:pre-wrap;">{}</pre>', formatted)
 
 
 @admin.register(FileUpload)
 class FileUploadAdmin(admin.ModelAdmin):
     list_display = ('submission', 'field_key', 'file_link', 'uploaded_at')
-    search_fields = ('field_key', 'submission__id')
+    search_fields = ('field_key', 'submission__id', 'blob__sha256')
     list_filter = ('uploaded_at',)
-    readonly_fields = ('uploaded_at',)
+    readonly_fields = ('uploaded_at', 'blob')
 
     @admin.display(description='File')
     def file_link(self, obj):
-        if obj.file:
-            return format_html('<a href="{}" target="_blank">{}</a>', obj.file.url, obj.file.name)
-        return '—'
\ No newline at end of file
+        return _file_link(obj)
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('task', 'dedup_key', 'status', 'attempts', 'available_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'task')
+    search_fields = ('dedup_key',)
+    readonly_fields = ('task', 'args', 'dedup_key', 'attempts', 'last_error', 'created_at', 'sent_at')
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('form', 'file_format', 'status', 'rows_written', 'total_rows', 'requested_by', 'created_at', 'expires_at')
+    list_filter = ('status', 'file_format')
+    list_select_related = ('form', 'requested_by')
+    readonly_fields = (
+        'form', 'requested_by', 'file_format', 'filters', 'status', 'total_rows', 'rows_written',
+        'file', 'file_size', 'error', 'created_at', 'started_at', 'finished_at', 'expires_at',
+    )
+
+
+@admin.register(SubmissionBatch)
+class SubmissionBatchAdmin(admin.ModelAdmin):
+    list_display = ('form', 'source', 'created_count', 'rejected_count', 'submitted_by', 'created_at', 'notified_at')
+    list_filter = ('form',)
+    list_select_related = ('form', 'submitted_by')
+    search_fields = ('source',)
+    readonly_fields = (
+        'form', 'submitted_by', 'source', 'created_count', 'rejected_count', 'created_at', 'notified_at',
+    )
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = (
+        'original_filename', 'submission', 'uploaded_by', 'method', 'status', 'received', 'total_size', 'expires_at',
+    )
+    list_filter = ('status', 'method')
+    list_select_related = ('uploaded_by',)
+    readonly_fields = (
+        'submission', 'uploaded_by', 'field_key', 'original_filename', 'content_type', 'total_size',
+        'received', 'method', 'status', 'file_upload', 'created_at', 'updated_at', 'expires_at',
+    )
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at', 'updated_at')
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'file', 'size', 'ref_count', 'created_at', 'updated_at')
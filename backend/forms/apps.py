@@ -6,4 +6,5 @@ class FormsConfig(AppConfig):
     name = 'forms'
 
     def ready(self):
+        import forms.checks  # noqa: F401
         import forms.signals  # noqa: F401
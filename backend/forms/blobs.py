@@ -0,0 +1,141 @@
+# backend/forms/blobs.py
+"""
+Content-addressed file storage.
+
+The same ID document or payslip is often attached to several submissions.
+Each distinct file content is therefore stored once, as a ``StoredBlob``
+keyed by its SHA-256. Every ``FileUpload`` points at a blob and shares its
+storage name.
+
+- Multipart uploads are hashed while they stream in (``HashingUploadHandler``
+  in parsers.py). Chunked uploads are hashed from their spool file on
+  completion. When the digest is already known, nothing is written to
+  storage and the spooled copy is simply discarded.
+- ``ref_count`` changes in the same transaction that creates or deletes a
+  FileUpload. The blob row is locked while that happens, so
+  ``collect_blobs`` cannot delete a blob that is being reused.
+- ``collect_blobs`` (Celery beat) deletes blobs nothing refers to, together
+  with their previews (processing.py).
+  ``manage.py dedupe_uploads`` moves uploads from before content
+  addressing onto blobs and removes their duplicate copies.
+"""
+import hashlib
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import FileUpload, StoredBlob, Submission
+from .processing import preview_name, schedule_processing
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def hash_file(content) -> tuple[str, int]:
+    """SHA-256 hex digest and size of a Django File, read in blocks from the start."""
+    digest = hashlib.sha256()
+    size = 0
+    content.seek(0)
+    for block in content.chunks(HASH_BLOCK_SIZE):
+        digest.update(block)
+        size += len(block)
+    content.seek(0)
+    return digest.hexdigest(), size
+
+
+def _reference(sha256: str) -> StoredBlob | None:
+    blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is not None:
+        StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+        blob.ref_count += 1
+    return blob
+
+
+def store_blob(content, *, sha256: str | None = None, size: int | None = None) -> StoredBlob:
+    """
+    The blob for ``content`` (a Django File), with one more reference.
+    Content is only written to storage if its digest is new. Pass ``sha256``
+    and ``size`` when they were computed while the file streamed in.
+    """
+    if sha256 is None or size is None:
+        sha256, size = hash_file(content)
+
+    with transaction.atomic():
+        blob = _reference(sha256)
+        if blob is not None:
+            return blob
+        blob = StoredBlob(sha256=sha256, size=size, ref_count=1)
+        blob.file.save(content.name or sha256, content, save=False)
+        try:
+            with transaction.atomic():
+                blob.save(force_insert=True)
+        except IntegrityError:
+            # Another upload of the same content won the race; keep theirs
+            blob.file.delete(save=False)
+            blob = _reference(sha256)
+            if blob is None:
+                raise
+    logger.info('Stored blob %s (%d bytes)', sha256, size)
+    return blob
+
+
+def release_blob(blob_id) -> None:
+    """Drop one reference; the file stays until ``collect_blobs`` runs."""
+    StoredBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+
+
+def create_file_upload(*, submission: Submission, field_key: str, content, filename: str,
+                       content_type: str = '', sha256: str | None = None, size: int | None = None,
+                       meta: dict | None = None) -> FileUpload:
+    """
+    Attach ``content`` to ``submission``, storing it only if it is not
+    already stored, and queue its post-upload processing.
+    """
+    with transaction.atomic():
+        blob = store_blob(content, sha256=sha256, size=size)
+        upload = FileUpload.objects.create(
+            submission=submission, field_key=field_key, blob=blob, file=blob.file.name,
+            original_filename=filename, content_type=content_type, file_size=blob.size, meta=meta,
+        )
+        schedule_processing(upload)
+    return upload
+
+
+def collect_blobs() -> int:
+    """Delete unreferenced blobs and their files; returns the count."""
+    collected = 0
+    for blob_id in StoredBlob.objects.filter(ref_count=0).values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(pk=blob_id, ref_count=0).first()
+            if blob is None or FileUpload.objects.filter(blob=blob).exists():
+                continue
+            names, storage = [blob.file.name, preview_name(blob.sha256)], blob.file.storage
+            blob.delete()
+            transaction.on_commit(lambda names=names, storage=storage: [storage.delete(name) for name in names])
+        collected += 1
+    if collected:
+        logger.info('Collected %d unreferenced blob(s)', collected)
+    return collected
+
+
+def adopt_file_upload(upload: FileUpload) -> bool:
+    """
+    Move a FileUpload from before content addressing onto a blob. Its file
+    becomes the blob if the content is new. Otherwise it is deleted in favour
+    of the existing copy. Returns True if a duplicate copy was removed.
+    """
+    with upload.file.open('rb') as content:
+        sha256, size = hash_file(content)
+
+    with transaction.atomic():
+        blob = _reference(sha256)
+        duplicate = blob is not None
+        if blob is None:
+            blob = StoredBlob.objects.create(sha256=sha256, size=size, ref_count=1, file=upload.file.name)
+        old_name = upload.file.name
+        FileUpload.objects.filter(pk=upload.pk).update(blob=blob, file=blob.file.name, file_size=size)
+        if duplicate and old_name != blob.file.name:
+            transaction.on_commit(lambda: upload.file.storage.delete(old_name))
+    return duplicate
@@ -0,0 +1,28 @@
+# backend/forms/checks.py
+"""
+System checks (``manage.py check``, run on every ``runserver``/``migrate``).
+
+With a broker configured, outbox messages are only published by the
+``relay-outbox`` beat entry (or ``manage.py relay_outbox --loop``). Without
+one, submissions, exports, uploads and status changes commit normally but
+nothing downstream ever runs, and no error is raised anywhere.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+RELAY_TASK = 'forms.tasks.relay_outbox'
+
+
+@register()
+def check_outbox_relay(app_configs, **kwargs):
+    if getattr(settings, 'OUTBOX_RELAY_ON_COMMIT', False):
+        return []  # eager/dev mode: each commit relays its own messages
+    schedule = getattr(settings, 'CELERY_BEAT_SCHEDULE', None) or {}
+    if any(entry.get('task') == RELAY_TASK for entry in schedule.values()):
+        return []
+    return [Error(
+        'Outbox messages are never published: OUTBOX_RELAY_ON_COMMIT is off and '
+        f'CELERY_BEAT_SCHEDULE has no {RELAY_TASK} entry.',
+        hint='Schedule forms.tasks.relay_outbox and run `celery beat`, or set OUTBOX_RELAY_ON_COMMIT.',
+        id='forms.E001',
+    )]
@@ -0,0 +1,132 @@
+# backend/forms/conditions.py
+"""
+Server-side evaluation of ``conditional_required`` rules.
+
+A rule lives in a field's ``validation`` JSON and mirrors the frontend's
+``evaluateConditional`` in FormRenderer.tsx:
+
+    {"conditional_required": {"depends_on": "income", "operator": "gt",
+                              "value": 100000, "message": "..."}}
+
+A list of such objects is also accepted; the field is then required when any
+of them holds. Rules are compiled into a dependency graph (depends_on -> field)
+and stored in topological order on the validation plan, so each rule is
+evaluated exactly once per submission and the work is linear in the number
+of rules. Cycles are rejected when fields are saved (``check_condition_graph``).
+"""
+import operator
+from dataclasses import dataclass
+from graphlib import CycleError, TopologicalSorter
+
+NUMERIC_OPERATORS = {
+    'gt':  operator.gt,
+    'gte': operator.ge,
+    'lt':  operator.lt,
+    'lte': operator.le,
+}
+EQUALITY_OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+}
+OPERATORS = frozenset(NUMERIC_OPERATORS) | frozenset(EQUALITY_OPERATORS)
+
+
+def _as_number(value) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_string(value) -> str:
+    # Match JavaScript's String(): booleans are lower-case, null/undefined are ''
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+@dataclass(frozen=True, slots=True)
+class ConditionalRule:
+    target: str
+    depends_on: str
+    operator: str
+    value: object
+    message: str | None = None
+
+    def applies(self, responses: dict) -> bool:
+        """True when ``target`` is required given the submitted ``responses``."""
+        dependent = responses.get(self.depends_on)
+        compare = NUMERIC_OPERATORS.get(self.operator)
+        if compare is not None:
+            left, right = _as_number(dependent), _as_number(self.value)
+            return left is not None and right is not None and compare(left, right)
+        return EQUALITY_OPERATORS[self.operator](_as_string(dependent), _as_string(self.value))
+
+    def error_message(self) -> str:
+        return self.message or f"Field '{self.target}' is required when '{self.depends_on}' {self.operator} {self.value}."
+
+
+def parse_conditions(key: str, rules: dict | None) -> list[ConditionalRule]:
+    """Read ``conditional_required`` from a field's validation JSON (ValueError if malformed)."""
+    raw = (rules or {}).get('conditional_required') if isinstance(rules, dict) else None
+    if not raw:
+        return []
+    if isinstance(raw, dict):
+        raw = [raw]
+    if not isinstance(raw, list):
+        raise ValueError('conditional_required must be an object or a list of objects.')
+
+    parsed = []
+    for condition in raw:
+        if not isinstance(condition, dict) or not condition.get('depends_on'):
+            raise ValueError('conditional_required needs a depends_on field key.')
+        op = condition.get('operator', 'eq')
+        if op not in OPERATORS:
+            raise ValueError(f'Unknown conditional operator "{op}". Choose from: {sorted(OPERATORS)}')
+        parsed.append(ConditionalRule(
+            target=key,
+            depends_on=str(condition['depends_on']),
+            operator=op,
+            value=condition.get('value'),
+            message=condition.get('message'),
+        ))
+    return parsed
+
+
+def order_conditions(rules: list[ConditionalRule]) -> tuple[ConditionalRule, ...]:
+    """
+    Sort rules so a field's own rules come after those of the fields it
+    depends on. Raises ``graphlib.CycleError`` if the dependencies loop.
+    """
+    graph: dict[str, set[str]] = {}
+    by_target: dict[str, list[ConditionalRule]] = {}
+    for rule in rules:
+        graph.setdefault(rule.target, set()).add(rule.depends_on)
+        by_target.setdefault(rule.target, []).append(rule)
+
+    ordered = []
+    for key in TopologicalSorter(graph).static_order():
+        ordered.extend(by_target.get(key, ()))
+    return tuple(ordered)
+
+
+def check_condition_graph(definitions) -> None:
+    """
+    Validate the ``conditional_required`` rules of a whole field set.
+
+    ``definitions`` is an iterable of ``(key, validation)`` pairs. Raises
+    ValueError describing the cycle if one field ends up depending on itself.
+    """
+    rules = []
+    for key, validation in definitions:
+        rules.extend(parse_conditions(key, validation))
+    try:
+        order_conditions(rules)
+    except CycleError as exc:
+        # graphlib lists the cycle dependency-first; reverse it to read "field -> depends_on"
+        cycle = ' -> '.join(reversed(exc.args[1]))
+        raise ValueError(f'conditional_required rules form a cycle: {cycle}') from exc
@@ -0,0 +1,161 @@
+# backend/forms/export_jobs.py
+"""
+Background submission exports.
+
+``start_export_job`` validates the request, records an ``ExportJob`` and
+queues ``forms.tasks.run_export_job`` through the outbox, all in one
+transaction. The worker runs the same SubmissionExport the streaming endpoint
+uses. It writes the output to a temporary file and then saves it to the
+configured storage.
+
+Every ``PROGRESS_EVERY`` rows it stores ``rows_written``. That write is
+conditional on the job still being 'running', so it doubles as the
+cancellation check. The requester is notified when the job completes or
+fails. ``expire_export_jobs`` (Celery beat) deletes files whose
+``expires_at`` has passed.
+"""
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import outbox
+from .exports import SubmissionExport, parse_filters
+from .models import ExportJob, Form
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds a finished export is kept
+FILTER_PARAMS = ('status', 'created_after', 'created_before')
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class ExportCancelled(Exception):
+    """The job left the 'running' state while the worker was writing it."""
+
+
+def ttl_setting() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'EXPORT_JOB_TTL', DEFAULT_TTL))
+
+
+def start_export_job(*, form: Form, requested_by, params) -> ExportJob:
+    """Validate ``params`` like the streaming endpoint does and queue the job; raises ValueError."""
+    filters = {name: params[name] for name in FILTER_PARAMS if params.get(name)}
+    export = SubmissionExport.from_request(form, {**filters, 'file_format': params.get('file_format', 'csv')})
+
+    with transaction.atomic():
+        job = ExportJob.objects.create(
+            form=form,
+            requested_by=requested_by,
+            file_format=export.file_format,
+            filters=filters,
+            expires_at=now() + ttl_setting(),
+        )
+        outbox.enqueue('forms.tasks.run_export_job', str(job.pk), dedup_key=f'export-job:{job.pk}')
+
+    logger.info('Export job %s queued for form %s by %s', job.pk, form.slug, requested_by)
+    return job
+
+
+def cancel_export_job(job: ExportJob) -> ExportJob:
+    """Stop a queued or running job; raises ValueError if it has already finished."""
+    cancelled = ExportJob.objects.filter(pk=job.pk, status__in=ACTIVE_STATUSES).update(
+        status='cancelled', finished_at=now(),
+    )
+    job.refresh_from_db()
+    if not cancelled:
+        raise ValueError(f'Export job is already {job.status}.')
+    logger.info('Export job %s cancelled', job.pk)
+    return job
+
+
+def _notify(job: ExportJob, title: str, body: str) -> None:
+    from notifications.services import fan_out
+
+    fan_out(user_ids=[job.requested_by_id], type='system', title=title, body=body)
+
+
+def _record_progress(job_id):
+    def record(rows_written: int) -> None:
+        still_running = ExportJob.objects.filter(pk=job_id, status='running').update(rows_written=rows_written)
+        if not still_running:
+            raise ExportCancelled(job_id)
+    return record
+
+
+def run_export_job(job_id) -> ExportJob | None:
+    """Write the export for ``job_id``; a job that is no longer queued is left alone."""
+    # Claiming with a conditional UPDATE makes a repeated outbox delivery a no-op
+    claimed = ExportJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=now())
+    if not claimed:
+        logger.info('Export job %s is not queued — skipping', job_id)
+        return None
+
+    job = ExportJob.objects.select_related('form').get(pk=job_id)
+    export = SubmissionExport(
+        form=job.form,
+        file_format=job.file_format,
+        filters=parse_filters(job.filters),
+        on_progress=_record_progress(job.pk),
+    )
+    try:
+        total = export.queryset().count()
+        ExportJob.objects.filter(pk=job.pk).update(total_rows=total)
+
+        with tempfile.TemporaryFile() as spool:
+            for chunk in export.chunks():
+                spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            name = f'{job.form.slug}-{job.pk}.{job.file_format}'
+            job.file.save(name, File(spool, name=name), save=False)
+
+        finished = now()
+        completed = ExportJob.objects.filter(pk=job.pk, status='running').update(
+            status='completed', file=job.file.name, file_size=size,
+            finished_at=finished, expires_at=finished + ttl_setting(),
+        )
+        if not completed:
+            raise ExportCancelled(job.pk)
+    except ExportCancelled:
+        if job.file:
+            job.file.delete(save=False)
+        logger.info('Export job %s stopped: no longer running', job.pk)
+        job.refresh_from_db()
+        return job
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='failed', error=f'{type(exc).__name__}: {exc}'[:2000], finished_at=now(),
+        )
+        job.refresh_from_db()
+        _notify(job, 'Export failed', f'Your export of "{job.form.name}" could not be completed.')
+        return job
+
+    job.refresh_from_db()
+    _notify(
+        job, 'Export ready',
+        f'Your {job.file_format.upper()} export of "{job.form.name}" ({job.rows_written} rows) '
+        f'is ready to download until {job.expires_at:%Y-%m-%d %H:%M}.',
+    )
+    logger.info('Export job %s completed: %d rows, %d bytes', job.pk, job.rows_written, size)
+    return job
+
+
+def expire_export_jobs() -> int:
+    """Delete files of jobs past ``expires_at`` and mark them expired; returns the count."""
+    expired = 0
+    due = ExportJob.objects.filter(expires_at__lt=now()).exclude(status='expired')
+    for job in due.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        expired += ExportJob.objects.filter(pk=job.pk).exclude(status='expired').update(
+            status='expired', file='',
+        )
+    if expired:
+        logger.info('Expired %d export job(s)', expired)
+    return expired
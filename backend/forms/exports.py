@@ -0,0 +1,271 @@
+# backend/forms/exports.py
+"""
+Streaming submission exports (GET /api/forms/<slug>/submissions/export/).
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)``, which is a
+server-side cursor on PostgreSQL, and are written straight into the output
+format. Output is handed on in ~64 KiB pieces, so memory stays flat whether
+a form has a thousand submissions or millions.
+
+Columns are fixed metadata plus one column per field key, taken from the
+live fields and then every schema snapshot, newest first. Keys that only
+older versions of the form used still get a column.
+
+Submitted text goes into CSV and XLSX cells as text, never as a formula:
+a value starting with ``=``, ``+``, ``-``, ``@``, a tab or a carriage
+return gets a leading apostrophe, unless it is a plain number. NDJSON is
+not opened by spreadsheet apps and is written unchanged.
+
+``SubmissionExport.stream()`` is an async iterator: each chunk is built in the
+request's worker thread and handed over one at a time (``iterate_in_thread``).
+Exports too large for one request run as background ExportJobs (export_jobs.py).
+"""
+import csv
+import io
+import json
+import re
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Field, Form, FormSchemaSnapshot, Submission
+from .xlsx import XlsxStreamWriter
+
+DEFAULT_CHUNK_SIZE = 2000
+FLUSH_BYTES = 64 * 1024
+XLSX_FLUSH_ROWS = 500
+PROGRESS_EVERY = 1000  # rows between on_progress calls
+
+# (output column, values_list lookup)
+METADATA_COLUMNS = (
+    ('submission_id', 'id'),
+    ('status', 'status'),
+    ('schema_version', 'schema_version'),
+    ('client_identifier', 'client_identifier'),
+    ('submitted_by', 'submitted_by__email'),
+    ('created_at', 'created_at'),
+    ('due_date', 'due_date'),
+)
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+_ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+_PLAIN_NUMBER = re.compile(r'[-+]?\d+(\.\d+)?')
+
+
+def chunk_size_setting() -> int:
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def field_columns(form: Form) -> list[str]:
+    """Every field key the form has used: live fields first, then older snapshots."""
+    keys = dict.fromkeys(
+        Field.objects.filter(form=form).order_by('order', 'key').values_list('key', flat=True)
+    )
+    snapshots = (
+        FormSchemaSnapshot.objects.filter(form=form)
+        .order_by('-schema_version')
+        .values_list('fields', flat=True)
+    )
+    for fields in snapshots:
+        for field in sorted(fields, key=lambda f: (f.get('order', 0), f['key'])):
+            keys.setdefault(field['key'])
+    return list(keys)
+
+
+def _parse_moment(value: str, name: str) -> datetime:
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'{name} must be an ISO date or datetime.')
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_filters(params) -> dict:
+    """
+    Query-string filters as ORM lookups:
+    ``status`` (comma separated), ``created_after`` (inclusive),
+    ``created_before`` (exclusive). Raises ValueError on bad input.
+    """
+    lookups = {}
+    if params.get('status'):
+        statuses = [s.strip() for s in params['status'].split(',') if s.strip()]
+        valid = {choice for choice, _ in Submission.STATUS_CHOICES}
+        invalid = sorted(set(statuses) - valid)
+        if invalid:
+            raise ValueError(f'Invalid status {", ".join(invalid)}. Choose from: {sorted(valid)}')
+        lookups['status__in'] = statuses
+    if params.get('created_after'):
+        lookups['created_at__gte'] = _parse_moment(params['created_after'], 'created_after')
+    if params.get('created_before'):
+        lookups['created_at__lt'] = _parse_moment(params['created_before'], 'created_before')
+    return lookups
+
+
+def _text(value: str) -> str:
+    """Keep spreadsheet apps from evaluating ``value`` as a formula (CSV injection)."""
+    if value.startswith(FORMULA_PREFIXES) and not _PLAIN_NUMBER.fullmatch(value):
+        return "'" + value
+    return value
+
+
+def _cell(value):
+    """Flatten a response value for a spreadsheet cell."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return _text('; '.join(str(item) for item in value))
+    if isinstance(value, dict):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, str):
+        return _text(value)
+    return value
+
+
+def _metadata(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '' if value is None else _text(str(value))
+
+
+async def iterate_in_thread(iterator):
+    """
+    Drive a sync iterator from async code, one item per worker-thread hop.
+    Under ASGI a StreamingHttpResponse needs an async iterator; given a sync
+    one, Django reads it into a list before sending.
+    """
+    pull = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            item = await pull(iterator, None)
+            if item is None:
+                return
+            yield item
+    finally:
+        # A client that disconnects mid-stream must not leave a cursor or file open
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+@dataclass
+class SubmissionExport:
+    form: Form
+    file_format: str
+    filters: dict
+    gzip: bool = False
+    # Called with the running row count every PROGRESS_EVERY rows and at the end
+    on_progress: Callable[[int], None] | None = None
+
+    @classmethod
+    def from_request(cls, form: Form, params, accept_encoding: str = '') -> 'SubmissionExport':
+        file_format = params.get('file_format', 'csv').lower()
+        if file_format not in FORMATS:
+            raise ValueError(f'Unsupported file_format. Choose from: {sorted(FORMATS)}')
+        # XLSX is already deflated; compressing it again only costs CPU
+        gzip = file_format != 'xlsx' and bool(_ACCEPTS_GZIP.search(accept_encoding))
+        return cls(form=form, file_format=file_format, filters=parse_filters(params), gzip=gzip)
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.file_format][0]
+
+    @property
+    def filename(self) -> str:
+        return f'{self.form.slug}-submissions-{timezone.localdate():%Y%m%d}.{FORMATS[self.file_format][1]}'
+
+    def queryset(self):
+        return Submission.objects.filter(form=self.form, **self.filters)
+
+    def rows(self):
+        lookups = [lookup for _, lookup in METADATA_COLUMNS] + ['responses']
+        rows = (
+            self.queryset()
+            .order_by('created_at', 'id')
+            .values_list(*lookups)
+            .iterator(chunk_size=chunk_size_setting())
+        )
+        return rows if self.on_progress is None else self._counted(rows)
+
+    def _counted(self, rows):
+        count = 0
+        for count, row in enumerate(rows, start=1):
+            yield row
+            if count % PROGRESS_EVERY == 0:
+                self.on_progress(count)
+        self.on_progress(count)
+
+    def _csv(self):
+        columns = field_columns(self.form)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _ in METADATA_COLUMNS] + columns)
+        for *metadata, responses in self.rows():
+            responses = responses or {}
+            writer.writerow([_metadata(v) for v in metadata] + [_cell(responses.get(key)) for key in columns])
+            if buffer.tell() >= FLUSH_BYTES:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def _ndjson(self):
+        names = [name for name, _ in METADATA_COLUMNS]
+        buffer = io.StringIO()
+        for *metadata, responses in self.rows():
+            record = dict(zip(names, metadata), responses=responses)
+            buffer.write(json.dumps(record, cls=DjangoJSONEncoder))
+            buffer.write('\n')
+            if buffer.tell() >= FLUSH_BYTES:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def _xlsx(self):
+        columns = field_columns(self.form)
+        writer = XlsxStreamWriter([name for name, _ in METADATA_COLUMNS] + columns, sheet_name='Submissions')
+        pending = 0
+        for *metadata, responses in self.rows():
+            responses = responses or {}
+            writer.write_row([_metadata(v) for v in metadata] + [_cell(responses.get(key)) for key in columns])
+            pending += 1
+            if pending >= XLSX_FLUSH_ROWS:
+                # Deflate holds data back, so take() may legitimately be empty
+                chunk = writer.take()
+                if chunk:
+                    yield chunk
+                pending = 0
+        yield writer.close()
+
+    def chunks(self):
+        """Sync generator of encoded (and optionally gzipped) output."""
+        chunks = getattr(self, f'_{self.file_format}')()
+        if not self.gzip:
+            yield from (chunk for chunk in chunks if chunk)
+            return
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def stream(self):
+        return iterate_in_thread(self.chunks())
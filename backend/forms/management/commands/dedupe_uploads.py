@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from forms.blobs import adopt_file_upload, collect_blobs
+from forms.models import FileUpload
+
+
+class Command(BaseCommand):
+    help = 'Move uploads from before content addressing onto shared blobs, deleting duplicate copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Uploads fetched per query')
+
+    def handle(self, *args, **options):
+        uploads = FileUpload.objects.filter(blob__isnull=True).exclude(file='').order_by('pk')
+        adopted = duplicates = reclaimed = missing = 0
+        last_pk = None
+        while True:
+            batch = uploads if last_pk is None else uploads.filter(pk__gt=last_pk)
+            batch = list(batch.only('pk', 'file', 'file_size')[:options['batch_size']])
+            if not batch:
+                break
+            for upload in batch:
+                try:
+                    duplicate = adopt_file_upload(upload)
+                except FileNotFoundError:
+                    missing += 1
+                    continue
+                adopted += 1
+                if duplicate:
+                    duplicates += 1
+                    reclaimed += upload.file_size or 0
+            last_pk = batch[-1].pk
+
+        collected = collect_blobs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Adopted {adopted} upload(s): {duplicates} duplicate copies removed '
+            f'({reclaimed} bytes), {missing} missing file(s), {collected} unreferenced blob(s) collected'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from forms.models import Submission
+from forms.search import index_submissions
+
+
+class Command(BaseCommand):
+    help = 'Build search documents for submissions (backfill, or rebuild after changing the tokenizer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Submissions per transaction')
+        parser.add_argument('--form', default=None, help='Only this form (slug)')
+        parser.add_argument('--missing', action='store_true', help='Only submissions without a document')
+
+    def handle(self, *args, **options):
+        submissions = Submission.all_objects.order_by('pk')
+        if options['form']:
+            submissions = submissions.filter(form__slug=options['form'])
+        if options['missing']:
+            submissions = submissions.filter(search_document__isnull=True)
+
+        indexed = 0
+        last_pk = None
+        # Keyset batches: each one is a single short transaction
+        while True:
+            batch = submissions if last_pk is None else submissions.filter(pk__gt=last_pk)
+            batch = list(batch.only('pk', 'form_id', 'schema_snapshot_id', 'client_identifier', 'responses')
+                         [:options['batch_size']])
+            if not batch:
+                break
+            indexed += index_submissions(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Indexed {indexed} submission(s)…')
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} submission(s)'))
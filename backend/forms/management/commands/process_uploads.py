@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from forms.models import FileUpload
+from forms.processing import STAGES, stages_for
+from forms.tasks import process_upload_stage
+
+
+class Command(BaseCommand):
+    help = 'Queue post-upload processing (checksum, page count, preview) for uploads that have not had it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stage', choices=sorted(STAGES), help='Only this stage')
+        parser.add_argument('--retry', action='store_true', help='Also re-run stages recorded as skipped or failed')
+        parser.add_argument('--batch-size', type=int, default=500, help='Uploads fetched per query')
+
+    def handle(self, *args, **options):
+        settled = {'done'} if options['retry'] else {'done', 'skipped', 'failed'}
+        uploads = FileUpload.objects.exclude(file='').order_by('pk')
+        queued = 0
+        last_pk = None
+        while True:
+            batch = uploads if last_pk is None else uploads.filter(pk__gt=last_pk)
+            batch = list(batch.only('pk', 'content_type', 'meta')[:options['batch_size']])
+            if not batch:
+                break
+            for upload in batch:
+                outcomes = (upload.meta or {}).get('stages', {})
+                for stage in stages_for(upload.content_type):
+                    if options['stage'] not in (None, stage) or outcomes.get(stage, {}).get('status') in settled:
+                        continue
+                    process_upload_stage.delay(str(upload.pk), stage)
+                    queued += 1
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f'Queued {queued} processing stage(s)'))
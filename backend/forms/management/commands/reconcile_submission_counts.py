@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from forms.models import Form, Submission
+
+
+def live_submission_count():
+    """Correlated subquery counting a form's non-deleted submissions."""
+    counts = (
+        Submission.all_objects.filter(form_id=OuterRef('pk'), is_deleted=False)
+        .order_by().values('form_id').annotate(n=Count('pk')).values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = 'Recompute Form.submission_count from the submissions table and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Form.objects.annotate(actual=live_submission_count())
+            .filter(~Q(submission_count=F('actual')))
+            .values_list('slug', 'submission_count', 'actual')
+        )
+        for slug, stored, actual in drifted:
+            self.stdout.write(f'{slug}: stored {stored}, actual {actual}')
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All submission counts are accurate'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} form(s) drifted — dry run, nothing changed'))
+            return
+
+        # One UPDATE for the drifted forms only
+        updated = (
+            Form.objects.filter(slug__in=[slug for slug, _, _ in drifted])
+            .update(submission_count=live_submission_count())
+        )
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {updated} form(s)'))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from forms.outbox import purge_sent, relay_outbox
+
+
+class Command(BaseCommand):
+    help = 'Publish pending transactional-outbox messages to Celery'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep relaying until interrupted')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between passes with --loop')
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help='Also delete sent messages older than this many days')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            purged = purge_sent(older_than_days=options['purge_days'])
+            self.stdout.write(f'Purged {purged} sent message(s)')
+
+        while True:
+            result = relay_outbox(batch_size=options['batch_size'])
+            if result.published or result.failed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Published {result.published} message(s), {result.failed} failed'
+                ))
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:41
+
+import hashlib
+import json
+import uuid
+
+import django.db.models.deletion
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+
+SNAPSHOT_FIELD_ATTRS = (
+    'key', 'label', 'field_type', 'required', 'options',
+    'validation', 'order', 'placeholder', 'help_text',
+)
+
+
+def snapshot_existing_forms(apps, schema_editor):
+    """Record each form's current fields as the snapshot for its current version."""
+    Form = apps.get_model('forms', 'Form')
+    Field = apps.get_model('forms', 'Field')
+    FormSchemaSnapshot = apps.get_model('forms', 'FormSchemaSnapshot')
+    Submission = apps.get_model('forms', 'Submission')
+
+    for form in Form.objects.all().iterator():
+        fields = list(
+            Field.objects.filter(form_id=form.pk)
+            .order_by('order', 'key')
+            .values(*SNAPSHOT_FIELD_ATTRS)
+        )
+        canonical = json.dumps(fields, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+        snapshot = FormSchemaSnapshot.objects.create(
+            form_id=form.pk, schema_version=form.schema_version,
+            schema_hash=hashlib.sha256(canonical.encode()).hexdigest(), fields=fields,
+        )
+        Form.objects.filter(pk=form.pk).update(current_snapshot=snapshot)
+        # Only submissions made at the current version are known to match these fields
+        Submission.objects.filter(
+            form_id=form.pk, schema_version=form.schema_version,
+        ).update(schema_snapshot=snapshot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0005_add_deadline_escalation_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSchemaSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('schema_version', models.IntegerField()),
+                ('schema_hash', models.CharField(help_text='SHA-256 of the canonical field JSON', max_length=64)),
+                ('fields', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schema_snapshots', to='forms.form')),
+            ],
+            options={
+                'ordering': ['form', '-schema_version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='form',
+            name='current_snapshot',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forms.formschemasnapshot'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='schema_snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='forms.formschemasnapshot'),
+        ),
+        migrations.RunPython(snapshot_existing_forms, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='formschemasnapshot',
+            constraint=models.UniqueConstraint(fields=('form', 'schema_version'), name='uniq_form_schema_version'),
+        ),
+    ]
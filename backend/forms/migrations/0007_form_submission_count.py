@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:43
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_submission_counts(apps, schema_editor):
+    Form = apps.get_model('forms', 'Form')
+    Submission = apps.get_model('forms', 'Submission')
+    live_counts = (
+        Submission.objects.filter(form_id=OuterRef('pk'), is_deleted=False)
+        .order_by().values('form_id').annotate(n=Count('pk')).values('n')
+    )
+    Form.objects.update(submission_count=Coalesce(
+        Subquery(live_counts, output_field=IntegerField()), Value(0),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0006_form_schema_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='submission_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_submission_counts, migrations.RunPython.noop),
+    ]
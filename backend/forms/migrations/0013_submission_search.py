@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = 'forms_submissionsearchdocument'
+
+
+def add_search_vector(apps, schema_editor):
+    # tsvector and GIN only exist on PostgreSQL; other databases search the
+    # SubmissionSearchTerm table instead (forms/search.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"ALTER TABLE {TABLE} ADD COLUMN vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('simple', values_text), 'A') || "
+        f"setweight(to_tsvector('simple', labels_text), 'B')) STORED"
+    )
+    schema_editor.execute(f'CREATE INDEX submission_search_vector_idx ON {TABLE} USING gin (vector)')
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'ALTER TABLE {TABLE} DROP COLUMN vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0012_submission_batches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSearchDocument',
+            fields=[
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='forms.submission')),
+                ('values_text', models.TextField(blank=True)),
+                ('labels_text', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubmissionSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='forms.submission')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'submission'], name='search_term_idx')],
+            },
+        ),
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -1,8 +1,13 @@
 # ===== backend/forms/models.py =====
+import os
 import uuid
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+
+from .validators import check_field_definition
 
 
 class SoftDeleteManager(models.Manager):
@@ -18,7 +23,16 @@ class Form(models.Model):
     description = models.TextField(blank=True)
     schema = models.JSONField()
     schema_version = models.IntegerField(default=1)
+    # Snapshot of the field set at schema_version (kept in sync by services.sync_schema_snapshot)
+    current_snapshot = models.ForeignKey(
+        'FormSchemaSnapshot', on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='+', editable=False,
+    )
     is_active = models.BooleanField(default=True, db_index=True)
+    # Denormalized count of live (not soft-deleted) submissions. Maintained with
+    # F() updates by services.create_submission / Submission.soft_delete;
+    # `manage.py reconcile_submission_counts` repairs any drift.
+    submission_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -60,11 +74,44 @@ class Field(models.Model):
     def __str__(self) -> str:
         return f'{self.form.name} - {self.label}'
 
+    def clean(self):
+        try:
+            check_field_definition(
+                key=self.key, field_type=self.field_type,
+                options=self.options, rules=self.validation,
+            )
+        except ValueError as exc:
+            raise ValidationError({'validation': str(exc)})
+
     class Meta:
         unique_together = ('form', 'key')
         ordering = ['order']
 
 
+class FormSchemaSnapshot(models.Model):
+    """
+    Canonical copy of a form's field set at one schema_version.
+
+    Once a submission references a snapshot it never changes, so old
+    submissions can be rendered against the exact fields they were made with.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    form = models.ForeignKey(Form, related_name='schema_snapshots', on_delete=models.CASCADE)
+    schema_version = models.IntegerField()
+    schema_hash = models.CharField(max_length=64, help_text='SHA-256 of the canonical field JSON')
+    fields = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'{self.form.name} v{self.schema_version}'
+
+    class Meta:
+        ordering = ['form', '-schema_version']
+        constraints = [
+            models.UniqueConstraint(fields=['form', 'schema_version'], name='uniq_form_schema_version'),
+        ]
+
+
 class Submission(models.Model):
     STATUS_CHOICES = [
         ('submitted', 'Submitted'),
@@ -93,6 +140,10 @@ class Submission(models.Model):
     )
     client_identifier = models.CharField(max_length=200, blank=True, null=True)
     schema_version = models.IntegerField()
+    schema_snapshot = models.ForeignKey(
+        FormSchemaSnapshot, on_delete=models.PROTECT,
+        null=True, blank=True, related_name='submissions',
+    )
     responses = models.JSONField()
     status = models.CharField(
         max_length=50, choices=STATUS_CHOICES, default='submitted', db_index=True
@@ -115,11 +166,27 @@ class Submission(models.Model):
     objects = SoftDeleteManager()
     all_objects = models.Manager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the status as loaded so the pre/post_save signals can detect
+        # a transition without re-querying the row.
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
     def soft_delete(self):
+        from django.db import transaction
         from django.utils.timezone import now
+        if self.is_deleted:
+            return
         self.is_deleted = True
         self.deleted_at = now()
-        self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+        with transaction.atomic():
+            self.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+            Form.objects.filter(pk=self.form_id, submission_count__gt=0).update(
+                submission_count=models.F('submission_count') - 1,
+            )
 
     def __str__(self) -> str:
         return f'Submission {self.id} for {self.form.name}'
@@ -129,16 +196,234 @@ class Submission(models.Model):
         indexes = [
             models.Index(fields=['form', 'status']),
             models.Index(fields=['submitted_by', 'created_at']),
+            # Exports stream a form's submissions in created_at order
+            models.Index(fields=['form', 'created_at'], name='submission_form_created_idx'),
         ]
 
 
+class SubmissionStatusEvent(models.Model):
+    """Append-only audit trail: one row per actual Submission.status transition."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submission = models.ForeignKey(
+        Submission, related_name='status_events', on_delete=models.CASCADE
+    )
+    from_status = models.CharField(max_length=50, blank=True)
+    to_status = models.CharField(max_length=50)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='+',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Status events are append-only and cannot be modified.')
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f'{self.submission_id}: {self.from_status} -> {self.to_status}'
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['submission', 'created_at']),
+        ]
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task call recorded in the same transaction as the change that
+    caused it (transactional outbox). ``forms.outbox.relay_outbox`` publishes
+    pending rows and marks them sent, so delivery is at-least-once and the
+    request path never talks to the broker.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.CharField(max_length=255, help_text='Dotted Celery task name')
+    args = models.JSONField(default=list, blank=True)
+    # One message per logical event, however many times the writer retries
+    dedup_key = models.CharField(max_length=255, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f'{self.task} [{self.dedup_key}] ({self.status})'
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_pending_idx'),
+        ]
+
+
+class ExportJob(models.Model):
+    """
+    A submission export written to storage in the background (forms/export_jobs.py),
+    for exports too large to stream within one HTTP request. The file is
+    deleted and the job marked expired once ``expires_at`` passes.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    form = models.ForeignKey(Form, related_name='export_jobs', on_delete=models.CASCADE)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs',
+    )
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    # Raw filter parameters (status, created_after, created_before), re-parsed by the worker
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/%Y/%m/%d/', blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    @property
+    def progress(self) -> int:
+        """Percentage of rows written (0-100)."""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, self.rows_written * 100 // self.total_rows)
+
+    def __str__(self) -> str:
+        return f'{self.form.name} export ({self.file_format}, {self.status})'
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', 'created_at'], name='export_job_owner_idx'),
+            models.Index(fields=['expires_at'], name='export_job_expiry_idx'),
+        ]
+
+
+class SubmissionSearchDocument(models.Model):
+    """
+    Search text for one submission (forms/search.py): the normalised response
+    values and the labels of the fields they answer. On PostgreSQL the
+    migration adds a generated, GIN-indexed ``vector`` tsvector column over
+    these two columns.
+    """
+    submission = models.OneToOneField(
+        Submission, primary_key=True, related_name='search_document', on_delete=models.CASCADE,
+    )
+    values_text = models.TextField(blank=True)
+    labels_text = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'Search document for {self.submission_id}'
+
+
+class SubmissionSearchTerm(models.Model):
+    """
+    Inverted index used instead of tsvector on databases other than
+    PostgreSQL (SQLite in development and tests): one row per distinct term.
+    """
+    submission = models.ForeignKey(Submission, related_name='search_terms', on_delete=models.CASCADE)
+    term = models.CharField(max_length=64)
+    # 2 for response values, 1 for field labels (mirrors tsvector weights A/B)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'submission'], name='search_term_idx'),
+        ]
+
+
+class SubmissionBatch(models.Model):
+    """
+    One bulk ingest (forms/ingest.py): the valid rows become Submissions and
+    admins get a single notification for the whole batch.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    form = models.ForeignKey(Form, related_name='submission_batches', on_delete=models.PROTECT)
+    submitted_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='submission_batches',
+    )
+    # Free-text origin supplied by the caller, e.g. a partner file name
+    source = models.CharField(max_length=200, blank=True)
+    created_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the notification task; doubles as its guard against repeat delivery
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self) -> str:
+        return f'{self.form.name} batch of {self.created_count} ({self.created_at:%Y-%m-%d %H:%M})'
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'submission batches'
+
+
+def blob_path(instance, filename):
+    """``blobs/ab/cd/<sha256><ext>``: two fan-out levels keep directories small."""
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    return f'blobs/{instance.sha256[:2]}/{instance.sha256[2:4]}/{instance.sha256}{extension}'
+
+
+class StoredBlob(models.Model):
+    """
+    One stored copy of some file content, shared by every FileUpload with the
+    same SHA-256 (forms/blobs.py). ``ref_count`` is the number of those
+    uploads; unreferenced blobs are deleted by ``collect_blobs``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_path)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.sha256[:12]}… ({self.size} bytes, {self.ref_count} reference(s))'
+
+    class Meta:
+        indexes = [models.Index(fields=['ref_count', 'updated_at'], name='stored_blob_gc_idx')]
+
+
 class FileUpload(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     submission = models.ForeignKey(
         Submission, related_name='files', on_delete=models.CASCADE
     )
     field_key = models.CharField(max_length=150)
+    # Same storage name as blob.file; rows from before content addressing have no blob
     file = models.FileField(upload_to='uploads/%Y/%m/%d/')
+    blob = models.ForeignKey(
+        StoredBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='uploads',
+    )
     uploaded_at = models.DateTimeField(auto_now_add=True)
     original_filename = models.CharField(max_length=255, blank=True)
     content_type = models.CharField(max_length=100, blank=True)
@@ -148,5 +433,59 @@ class FileUpload(models.Model):
     def __str__(self) -> str:
         return f'File for {self.submission.id} ({self.field_key})'
 
+    @property
+    def is_verified(self) -> bool:
+        """False for a direct upload whose content the worker has not type-checked yet."""
+        meta = self.meta or {}
+        return 'detected_type' in meta or 'declared_type' not in meta
+
     class Meta:
-        ordering = ['-uploaded_at']
\ No newline at end of file
+        ordering = ['-uploaded_at']
+
+
+class UploadSession(models.Model):
+    """
+    An upload of one file to a submission (forms/uploads.py). ``chunked``:
+    chunks are appended to a spool file on local disk, and completing the
+    session moves that file into storage. ``direct``: the client sends the
+    file to a signed storage URL (forms/transfers.py). Either way,
+    completing the session creates the ``FileUpload``.
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
+        ('expired', 'Expired'),
+        ('rejected', 'Rejected'),  # direct upload whose content failed the type check
+    ]
+    METHOD_CHOICES = [
+        ('chunked', 'Chunked through the API'),
+        ('direct', 'Direct to storage'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submission = models.ForeignKey(Submission, related_name='upload_sessions', on_delete=models.CASCADE)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions',
+    )
+    field_key = models.CharField(max_length=150)
+    original_filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    # Declared up front so oversize files are refused before any bytes arrive
+    total_size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default='chunked')
+    file_upload = models.OneToOneField(
+        FileUpload, null=True, blank=True, on_delete=models.SET_NULL, related_name='upload_session',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f'Upload of {self.original_filename} ({self.received}/{self.total_size} bytes, {self.status})'
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'expires_at'], name='upload_session_expiry_idx')]
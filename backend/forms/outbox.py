@@ -0,0 +1,121 @@
+# backend/forms/outbox.py
+"""
+Transactional outbox.
+
+``enqueue`` records a Celery task call as an ``OutboxMessage`` inside the
+caller's transaction, so the message exists if and only if the change that
+caused it committed. ``relay_outbox`` (Celery beat task ``forms.tasks.relay_outbox``
+or ``manage.py relay_outbox``) publishes pending rows in batches and marks
+them sent. A crash between publishing and marking means a row is published
+again: delivery is at-least-once, and consumers must tolerate repeats.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_RETRY_BACKOFF = 30  # seconds; doubled after every failed publish, capped at an hour
+MAX_RETRY_BACKOFF = 60 * 60
+
+
+def enqueue(task: str, *args, dedup_key: str) -> OutboxMessage:
+    """
+    Record a call to ``task(*args)``. Calling it again with the same
+    ``dedup_key`` is a no-op that returns the existing row.
+    """
+    message, created = OutboxMessage.objects.get_or_create(
+        dedup_key=dedup_key,
+        defaults={'task': task, 'args': list(args)},
+    )
+    if created and getattr(settings, 'OUTBOX_RELAY_ON_COMMIT', False):
+        # No beat in eager/dev mode: relay as soon as the transaction commits
+        transaction.on_commit(relay_outbox)
+    return message
+
+
+@dataclass
+class RelayResult:
+    batches: int = 0
+    published: int = 0
+    failed: int = 0
+
+
+def publish(message: OutboxMessage) -> None:
+    # The row id doubles as the Celery task id, so a re-published message
+    # can be recognised by consumers and in monitoring
+    if message.task not in current_app.tasks:
+        # Outside a worker (on-commit relay in dev) autodiscovery has not run yet
+        current_app.loader.import_default_modules()
+    current_app.tasks[message.task].apply_async(args=message.args, task_id=str(message.pk))
+
+
+def relay_batch(batch_size: int, result: RelayResult) -> int:
+    """Publish one batch of due messages; returns how many rows were claimed."""
+    timestamp = now()
+    backoff = getattr(settings, 'OUTBOX_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+    with transaction.atomic():
+        # skip_locked: concurrent relays take disjoint batches, so no row is
+        # published twice by two relays at once
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=timestamp)
+            .order_by('created_at')[:batch_size]
+        )
+        published, failed = [], []
+        for message in messages:
+            try:
+                # Savepoint: with eager Celery the task runs right here, and a
+                # failing task must not break the rest of the batch
+                with transaction.atomic():
+                    publish(message)
+            except Exception as exc:
+                message.attempts += 1
+                message.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+                delay = min(backoff * 2 ** (message.attempts - 1), MAX_RETRY_BACKOFF)
+                message.available_at = timestamp + timedelta(seconds=delay)
+                failed.append(message)
+                logger.warning("Outbox message %s (%s) not published: %s", message.pk, message.task, exc)
+            else:
+                published.append(message.pk)
+
+        if published:
+            OutboxMessage.objects.filter(pk__in=published).update(
+                status='sent', sent_at=now(), attempts=F('attempts') + 1,
+            )
+        if failed:
+            OutboxMessage.objects.bulk_update(failed, ['attempts', 'last_error', 'available_at'])
+
+    result.published += len(published)
+    result.failed += len(failed)
+    return len(messages)
+
+
+def relay_outbox(*, batch_size: int | None = None, max_batches: int | None = None) -> RelayResult:
+    """Publish pending messages batch by batch until none are due (or ``max_batches``)."""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    result = RelayResult()
+    while max_batches is None or result.batches < max_batches:
+        claimed = relay_batch(batch_size, result)
+        if not claimed:
+            break
+        result.batches += 1
+        if claimed < batch_size:
+            break
+    return result
+
+
+def purge_sent(*, older_than_days: int) -> int:
+    """Delete sent messages older than ``older_than_days``; returns the count."""
+    cutoff = now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxMessage.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,128 @@
+# backend/forms/parsers.py
+import codecs
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import BaseParser, MultiPartParser
+
+from .filetypes import SNIFF_BYTES, describe, is_allowed, not_allowed_message, sniff
+from .ingest import max_rows_setting
+from .uploads import max_upload_size_setting
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON: one object per line, parsed into a list.
+    The body is read line by line, so it is never held as one string, and
+    reading stops at the first row past ``BULK_INGEST_MAX_ROWS``.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        reader = codecs.getreader(encoding)(stream)
+        limit = max_rows_setting()
+        rows = []
+        for number, line in enumerate(reader, start=1):
+            if not line.strip():
+                continue
+            if len(rows) == limit:
+                raise ParseError(f'A batch may contain at most {limit} rows.')
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'Line {number} is not valid JSON: {exc}')
+        return rows
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spools every uploaded file to a temporary file, never to worker memory,
+    and computes its SHA-256 as the chunks arrive. The result is set on the
+    file as ``sha256`` (see blobs.py).
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class FileTypeNotAllowed(APIException):
+    status_code = 400
+    default_code = 'file_type_not_allowed'
+
+
+class FileTooLarge(APIException):
+    status_code = 413
+    default_code = 'file_too_large'
+
+
+class CheckedUploadHandler(HashingUploadHandler):
+    """
+    ``HashingUploadHandler`` that also checks each file while it streams in.
+    The type is sniffed from the first ``SNIFF_BYTES`` (filetypes.py) and the
+    running size is held to ``MAX_UPLOAD_SIZE``. Raising stops the multipart
+    parser at once, so the rest of the request body is never read. Completed
+    files get ``content_type`` set to the detected type, and ``meta`` for
+    ``FileUpload.meta``.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b''
+        self.detected_type = None
+        self.size = 0
+
+    def _reject(self, exc):
+        self.file.close()  # deletes the temporary file
+        raise exc
+
+    def _check_type(self):
+        self.detected_type = sniff(self.head)
+        if not is_allowed(self.detected_type):
+            self._reject(FileTypeNotAllowed(not_allowed_message(self.detected_type)))
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        max_size = max_upload_size_setting()
+        if self.size > max_size:
+            self._reject(FileTooLarge(
+                f'File "{self.file_name}" exceeds maximum size of {max_size // (1024 * 1024)}MB.'
+            ))
+        if self.detected_type is None:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self._check_type()
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.detected_type is None:
+            self._check_type()  # files shorter than SNIFF_BYTES
+        file = super().file_complete(file_size)
+        file.meta = {
+            'detected_type': self.detected_type, 'declared_type': self.content_type or '',
+            **describe(file, self.detected_type),
+        }
+        file.content_type = self.detected_type
+        return file
+
+
+class CheckedMultiPartParser(MultiPartParser):
+    """multipart/form-data whose files go through ``CheckedUploadHandler``."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']._request
+        request.upload_handlers = [CheckedUploadHandler(request)]
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,231 @@
+# backend/forms/processing.py
+"""
+Post-upload processing.
+
+Reviewers should not need to open a full-resolution scan just to see what was
+attached. Each new ``FileUpload`` therefore goes through a few stages:
+
+- ``checksum``: SHA-256 of the stored file goes into ``meta['sha256']``. For
+  content-addressed uploads it must match the blob digest, so a damaged
+  file shows up as a failure.
+- ``pages`` (PDFs only): the page count goes into ``meta['pages']``. It comes
+  from ``pdfinfo`` if poppler is installed, otherwise from the plain-syntax
+  scan in filetypes.py.
+- ``preview`` (images and PDFs): a JPEG at most ``UPLOAD_PREVIEW_MAX_SIZE``
+  pixels on its longer side, from Pillow for images and from ``pdftoppm``
+  for the first page of a PDF. Its storage name goes into ``meta['preview']``.
+  Previews are named after the content digest, so uploads that share a blob
+  share a preview.
+
+``create_file_upload`` (blobs.py) queues one outbox message per stage in the
+upload's own transaction. Each message becomes its own
+``forms.tasks.process_upload_stage`` task, which is routed to the ``uploads``
+queue. A dedicated worker with a fixed ``--concurrency`` serves that queue,
+so decoding runs in a bounded pool of processes and never in a web worker.
+A stage that fails is retried on its own. Only after the last retry is it
+recorded as failed.
+
+Each stage's outcome goes into ``meta['stages'][<stage>]``. A stage already
+``done`` is not run again, because outbox delivery is at-least-once. A stage
+whose tool is not installed is recorded as ``skipped``.
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.timezone import now
+
+from . import filetypes
+from .models import FileUpload
+
+logger = logging.getLogger(__name__)
+
+PROCESS_TASK = 'forms.tasks.process_upload_stage'
+DEFAULT_PREVIEW_MAX_SIZE = 800
+DEFAULT_TOOL_TIMEOUT = 60
+HASH_BLOCK_SIZE = 64 * 1024
+PREVIEW_QUALITY = 80
+IMAGE_TYPES = ('image/png', 'image/jpeg', 'image/gif')
+_PDFINFO_PAGES = re.compile(r'^Pages:\s+(\d+)\s*$', re.MULTILINE)
+
+
+class StageSkipped(Exception):
+    """A stage that cannot run here, e.g. because the tool it needs is not installed."""
+
+
+def preview_max_size_setting() -> int:
+    return getattr(settings, 'UPLOAD_PREVIEW_MAX_SIZE', DEFAULT_PREVIEW_MAX_SIZE)
+
+
+def tool_timeout_setting() -> int:
+    return getattr(settings, 'UPLOAD_PROCESSING_TIMEOUT', DEFAULT_TOOL_TIMEOUT)
+
+
+def preview_name(sha256: str) -> str:
+    return f'previews/{sha256[:2]}/{sha256}.jpg'
+
+
+def stages_for(content_type: str) -> list[str]:
+    content_type = filetypes.normalise(content_type)
+    if content_type == 'application/pdf':
+        return ['checksum', 'pages', 'preview']
+    if content_type in IMAGE_TYPES:
+        return ['checksum', 'preview']
+    return ['checksum']
+
+
+def schedule_processing(upload: FileUpload) -> None:
+    """Queue every stage for ``upload``; call inside the transaction that created it."""
+    from .outbox import enqueue
+
+    for stage in stages_for(upload.content_type):
+        enqueue(PROCESS_TASK, str(upload.pk), stage, dedup_key=f'upload-stage:{upload.pk}:{stage}')
+
+
+@contextmanager
+def local_path(field_file):
+    """A filesystem path for a stored file, downloaded to a temporary file if the storage is remote."""
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(field_file.name)[1]) as tmp:
+        with field_file.open('rb') as source:
+            for block in source.chunks(HASH_BLOCK_SIZE):
+                tmp.write(block)
+        tmp.flush()
+        yield tmp.name
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while block := source.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _run_tool(name: str, *args: str) -> str:
+    executable = shutil.which(name)
+    if executable is None:
+        raise StageSkipped(f'{name} is not installed')
+    result = subprocess.run(
+        [executable, *args], capture_output=True, check=True, text=True, timeout=tool_timeout_setting(),
+    )
+    return result.stdout
+
+
+def _checksum(upload: FileUpload, path: str) -> dict:
+    sha256 = _file_digest(path)
+    if upload.blob_id and sha256 != upload.blob.sha256:
+        raise ValueError(f'Stored file {upload.file.name} does not match digest {upload.blob.sha256}')
+    return {'sha256': sha256}
+
+
+def _pages(upload: FileUpload, path: str) -> dict:
+    try:
+        match = _PDFINFO_PAGES.search(_run_tool('pdfinfo', path))
+        if match:
+            return {'pages': int(match.group(1))}
+    except StageSkipped:
+        pass
+    with open(path, 'rb') as source:
+        found = filetypes.describe(source, 'application/pdf')
+    if not found:
+        raise StageSkipped('no page count (install poppler-utils for compressed PDFs)')
+    return found
+
+
+def _render_image(path: str, target: str, max_size: int) -> None:
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise StageSkipped('Pillow is not installed') from None
+    with Image.open(path) as image:
+        image.draft('RGB', (max_size, max_size))  # JPEG: decode at a reduced scale
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_size, max_size))
+        image.convert('RGB').save(target, 'JPEG', quality=PREVIEW_QUALITY, optimize=True)
+
+
+def _render_pdf(path: str, target: str, max_size: int) -> None:
+    prefix = target.removesuffix('.jpg')
+    _run_tool('pdftoppm', '-jpeg', '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(max_size), path, prefix)
+
+
+def _preview(upload: FileUpload, path: str) -> dict:
+    sha256 = upload.blob.sha256 if upload.blob_id else _file_digest(path)
+    name = preview_name(sha256)
+    if default_storage.exists(name):  # same content, already rendered for another upload
+        return {'preview': name}
+
+    render = _render_pdf if filetypes.normalise(upload.content_type) == 'application/pdf' else _render_image
+    with tempfile.TemporaryDirectory() as workdir:
+        target = os.path.join(workdir, 'preview.jpg')
+        render(path, target, preview_max_size_setting())
+        with open(target, 'rb') as rendered:
+            name = default_storage.save(name, File(rendered))
+    return {'preview': name}
+
+
+STAGES = {
+    'checksum': _checksum,
+    'pages': _pages,
+    'preview': _preview,
+}
+
+
+def _record(upload_id, stage: str, status: str, updates: dict | None = None, detail: str = '') -> None:
+    # Stages of one upload finish concurrently: lock the row and merge, so
+    # no stage overwrites another's keys
+    with transaction.atomic():
+        upload = FileUpload.objects.select_for_update().filter(pk=upload_id).first()
+        if upload is None:
+            return
+        meta = dict(upload.meta or {})
+        meta.update(updates or {})
+        outcome = {'status': status, 'at': now().isoformat()}
+        if detail:
+            outcome['detail'] = detail[:500]
+        meta['stages'] = {**meta.get('stages', {}), stage: outcome}
+        FileUpload.objects.filter(pk=upload_id).update(meta=meta)
+
+
+def record_failure(upload_id, stage: str, exc: Exception) -> None:
+    """Mark ``stage`` failed once its task has run out of retries."""
+    _record(upload_id, stage, 'failed', detail=f'{type(exc).__name__}: {exc}')
+
+
+def run_stage(upload_id, stage: str) -> str:
+    """
+    Run one stage for one upload and record its outcome. Returns the
+    outcome: ``done``, ``skipped``, or ``unchanged`` for a stage already done
+    (or an upload since deleted). Raises on failure, so the task can retry.
+    """
+    if stage not in STAGES:
+        raise ValueError(f'Unknown processing stage "{stage}"')
+    upload = FileUpload.objects.select_related('blob').filter(pk=upload_id).first()
+    if upload is None or (upload.meta or {}).get('stages', {}).get(stage, {}).get('status') == 'done':
+        return 'unchanged'
+
+    try:
+        with local_path(upload.file) as path:
+            updates = STAGES[stage](upload, path)
+    except StageSkipped as skipped:
+        logger.info('Upload %s: %s stage skipped (%s)', upload_id, stage, skipped)
+        _record(upload_id, stage, 'skipped', detail=str(skipped))
+        return 'skipped'
+    _record(upload_id, stage, 'done', updates)
+    return 'done'
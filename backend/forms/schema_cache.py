@@ -0,0 +1,134 @@
+# backend/forms/schema_cache.py
+"""
+Pre-serialized public form schemas, served from the Django cache.
+
+Three keys per slug:
+    forms:schema:gen:<slug>                     -> generation token
+    forms:schema:slug:<slug>                    -> (schema_version, etag, generation)
+    forms:schema:<slug>:<version>:<generation>  -> (etag, JSON bytes)
+
+The pointer and generation are read together, so conditional GETs are
+answered with a 304 after a single cache round trip; the body key is only
+read when the client needs the payload. Form and Field saves (see
+signals.py) replace the generation token and drop both keys. A build reads
+the token before it reads the form, so one that raced an edit writes
+entries under an old token, and those are never served.
+"""
+import hashlib
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .models import Form
+
+
+@dataclass(frozen=True, slots=True)
+class CachedSchema:
+    schema_version: int
+    etag: str
+    body: bytes | None = None
+
+
+def _pointer_key(slug: str) -> str:
+    return f'forms:schema:slug:{slug}'
+
+
+def _body_key(slug: str, schema_version: int, generation: str) -> str:
+    return f'forms:schema:{slug}:{schema_version}:{generation}'
+
+
+def _generation_key(slug: str) -> str:
+    return f'forms:schema:gen:{slug}'
+
+
+def _owner_key(form_id) -> str:
+    # Remembers which slug a form was last cached under, so a rename can drop it
+    return f'forms:schema:form:{form_id}'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'FORM_SCHEMA_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def _generation(slug: str) -> str:
+    key = _generation_key(slug)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def build_public_schema(slug: str) -> CachedSchema | None:
+    """Serialize an active form and store it in the cache; None if it doesn't exist."""
+    from .serializers import PublicFormSerializer
+
+    generation = _generation(slug)  # before the read, so a concurrent edit outdates this build
+    form = Form.objects.filter(slug=slug, is_active=True).prefetch_related('fields').first()
+    if form is None:
+        return None
+
+    body = JSONRenderer().render(PublicFormSerializer(form).data)
+    entry = CachedSchema(schema_version=form.schema_version, etag=make_etag(body), body=body)
+    timeout = _timeout()
+    cache.set_many({
+        _body_key(slug, entry.schema_version, generation): (entry.etag, body),
+        _pointer_key(slug): (entry.schema_version, entry.etag, generation),
+        _owner_key(form.pk): slug,
+    }, timeout=timeout)
+    return entry
+
+
+def _current_pointer(slug: str) -> tuple | None:
+    # (schema_version, etag, generation), if built under the current generation
+    found = cache.get_many([_pointer_key(slug), _generation_key(slug)])
+    pointer = found.get(_pointer_key(slug))
+    if pointer is None or len(pointer) != 3 or pointer[2] != found.get(_generation_key(slug)):
+        return None
+    return pointer
+
+
+def get_schema_etag(slug: str) -> CachedSchema | None:
+    """Version and ETag only (one cache read) — enough to answer If-None-Match."""
+    pointer = _current_pointer(slug)
+    if pointer is None:
+        return None
+    schema_version, etag, _ = pointer
+    return CachedSchema(schema_version=schema_version, etag=etag)
+
+
+def get_public_schema(slug: str) -> CachedSchema | None:
+    """Return the cached schema for ``slug``, building it on a miss."""
+    pointer = _current_pointer(slug)
+    if pointer is not None:
+        schema_version, _, generation = pointer
+        cached = cache.get(_body_key(slug, schema_version, generation))
+        if cached is not None:
+            etag, body = cached
+            return CachedSchema(schema_version=schema_version, etag=etag, body=body)
+    return build_public_schema(slug)
+
+
+def invalidate_public_schema(form) -> None:
+    """Drop cached schemas for ``form`` under its current and previously cached slug."""
+    slugs = {form.slug}
+    previous = cache.get(_owner_key(form.pk))
+    if previous:
+        slugs.add(previous)
+
+    # A new token first: builds already under way then write entries nobody reads
+    cache.set_many({_generation_key(slug): uuid.uuid4().hex for slug in slugs}, timeout=None)
+    keys = [_owner_key(form.pk)]
+    for slug in slugs:
+        pointer = cache.get(_pointer_key(slug))
+        keys.append(_pointer_key(slug))
+        if pointer is not None and len(pointer) == 3:
+            keys.append(_body_key(slug, pointer[0], pointer[2]))
+    cache.delete_many(keys)
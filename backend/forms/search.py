@@ -0,0 +1,228 @@
+# backend/forms/search.py
+"""
+Submission search (GET /api/submissions/search/?q=).
+
+Every submission has a ``SubmissionSearchDocument`` with two texts. One is
+its response values and client identifier. The other is the labels of the
+fields those values answer, taken from the submission's own schema snapshot,
+so later label edits never make the index stale. Text is normalised to
+lowercase alphanumeric terms. Digits are also indexed joined together, so
+"0712 345 678" is found by "0712345678".
+
+- PostgreSQL: a generated ``tsvector`` column (values weight A, labels weight
+  B) under a GIN index, queried with prefix matching and ranked by
+  ``ts_rank``. The column and index are created by migration 0013.
+- Other databases (SQLite in development and tests): the same terms are
+  stored in ``SubmissionSearchTerm`` and prefix-matched through its
+  ``(term, submission)`` index, ranked by the summed term weights.
+
+Documents are written with the submission: ``create_submission``, bulk
+ingest and admin edits all call ``index_submissions``. Run
+``manage.py index_submissions`` to backfill.
+"""
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Field, FormSchemaSnapshot, Submission, SubmissionSearchDocument, SubmissionSearchTerm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_QUERY_TERMS = 8
+MAX_TERM_LENGTH = 64
+MAX_DOCUMENT_TERMS = 500
+VALUE_WEIGHT, LABEL_WEIGHT = 2, 1
+# Digit runs at least this long are also indexed joined up (IDs, phone numbers)
+MIN_JOINED_DIGITS = 6
+# Submission ids per IN (...) list in the term fallback (SQLite caps bound parameters)
+CANDIDATE_CHUNK_SIZE = 500
+# Shorter query words match whole terms only: a one- or two-character prefix
+# matches a large share of the index
+MIN_PREFIX_LENGTH = 3
+
+_TERM = re.compile(r'[^\W_]+')
+
+
+def terms(text: str) -> list[str]:
+    """Lowercase alphanumeric terms of ``text``, plus its digits joined if there are enough."""
+    found = [term[:MAX_TERM_LENGTH] for term in _TERM.findall(text.lower())]
+    digits = ''.join(ch for ch in text if ch.isdigit())
+    if len(digits) >= MIN_JOINED_DIGITS and digits not in found:
+        found.append(digits[:MAX_TERM_LENGTH])
+    return found
+
+
+def _flatten(value):
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    elif value is not None and value != '':
+        yield str(value)
+
+
+def _unique(items) -> list[str]:
+    return list(dict.fromkeys(items))[:MAX_DOCUMENT_TERMS]
+
+
+def uses_tsvector() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def _labels_by_submission(submissions) -> dict:
+    """``{schema_snapshot_id or form_id: {key: label}}`` in at most two queries."""
+    snapshot_ids = {s.schema_snapshot_id for s in submissions if s.schema_snapshot_id}
+    labels = {
+        pk: {field['key']: field.get('label', '') for field in fields}
+        for pk, fields in FormSchemaSnapshot.objects.filter(pk__in=snapshot_ids).values_list('pk', 'fields')
+    }
+    live_form_ids = {s.form_id for s in submissions if not s.schema_snapshot_id}
+    for form_id, key, label in Field.objects.filter(form_id__in=live_form_ids).values_list('form_id', 'key', 'label'):
+        labels.setdefault(form_id, {})[key] = label
+    return labels
+
+
+@dataclass
+class _Document:
+    submission_id: object
+    values: list[str]
+    labels: list[str]
+
+
+def build_documents(submissions) -> list[_Document]:
+    labels = _labels_by_submission(submissions)
+    documents = []
+    for submission in submissions:
+        field_labels = labels.get(submission.schema_snapshot_id or submission.form_id, {})
+        responses = submission.responses if isinstance(submission.responses, dict) else {}
+        values, label_terms = [], []
+        for text in _flatten([submission.client_identifier, responses]):
+            values.extend(terms(text))
+        for key, value in responses.items():
+            if next(_flatten(value), None) is not None:
+                label_terms.extend(terms(field_labels.get(key) or key.replace('_', ' ')))
+        documents.append(_Document(submission.pk, _unique(values), _unique(label_terms)))
+    return documents
+
+
+def index_submissions(submissions, *, replace: bool = True) -> int:
+    """
+    Write search documents for ``submissions`` (model instances). Pass
+    ``replace=False`` for submissions created in this transaction, which
+    have nothing to replace. Returns the number indexed.
+    """
+    submissions = list(submissions)
+    if not submissions:
+        return 0
+    documents = build_documents(submissions)
+    ids = [document.submission_id for document in documents]
+
+    with transaction.atomic(savepoint=False):
+        if replace:
+            SubmissionSearchDocument.objects.filter(submission_id__in=ids).delete()
+            if not uses_tsvector():
+                SubmissionSearchTerm.objects.filter(submission_id__in=ids).delete()
+        SubmissionSearchDocument.objects.bulk_create([
+            SubmissionSearchDocument(
+                submission_id=document.submission_id,
+                values_text=' '.join(document.values), labels_text=' '.join(document.labels),
+            )
+            for document in documents
+        ])
+        if not uses_tsvector():
+            rows = []
+            for document in documents:
+                weights = dict.fromkeys(document.labels, LABEL_WEIGHT) | dict.fromkeys(document.values, VALUE_WEIGHT)
+                rows.extend(
+                    SubmissionSearchTerm(submission_id=document.submission_id, term=term, weight=weight)
+                    for term, weight in weights.items()
+                )
+            SubmissionSearchTerm.objects.bulk_create(rows, batch_size=1000)
+    return len(documents)
+
+
+def query_terms(q: str) -> list[str]:
+    """The terms of a search string; raises ValueError if there are none."""
+    found = _unique(terms(q))[:MAX_QUERY_TERMS]
+    if not found:
+        raise ValueError('Search query must contain at least one letter or digit.')
+    return found
+
+
+def _tsvector_matches(scope, words, limit):
+    # Terms are [^\W_]+ only, so they are safe inside a tsquery string
+    tsquery = ' & '.join(f'{word}:*' if len(word) >= MIN_PREFIX_LENGTH else word for word in words)
+    table = SubmissionSearchDocument._meta.db_table
+    return list(
+        SubmissionSearchDocument.objects
+        .filter(submission__in=scope)
+        .filter(RawSQL(f"{table}.vector @@ to_tsquery('simple', %s)", (tsquery,), output_field=BooleanField()))
+        .annotate(rank=RawSQL(f"ts_rank({table}.vector, to_tsquery('simple', %s))", (tsquery,),
+                              output_field=FloatField()))
+        .order_by('-rank', '-submission__created_at')
+        .values_list('submission_id', 'rank')[:limit]
+    )
+
+
+def _term_matches(scope, words, limit):
+    # Each word is a prefix range scan of the (term, submission) index. Joining
+    # the scope in SQL instead makes SQLite drive the query from the scope and
+    # scan every submission, so candidates are intersected here and only then
+    # checked against the scope. Longest words first: they match the fewest rows.
+    ranks = None
+    for word in sorted(words, key=len, reverse=True):
+        if len(word) >= MIN_PREFIX_LENGTH:
+            rows = SubmissionSearchTerm.objects.filter(term__gte=word, term__lt=word + '\U0010ffff')
+        else:
+            rows = SubmissionSearchTerm.objects.filter(term=word)
+        if ranks is not None and len(ranks) <= CANDIDATE_CHUNK_SIZE:
+            rows = rows.filter(submission_id__in=list(ranks))
+        found = defaultdict(int)
+        for submission_id, weight in rows.values_list('submission_id', 'weight'):
+            found[submission_id] += weight
+        ranks = found if ranks is None else {pk: ranks[pk] + weight for pk, weight in found.items() if pk in ranks}
+        if not ranks:
+            return []
+
+    by_rank = defaultdict(list)
+    for pk, rank in ranks.items():
+        by_rank[rank].append(pk)
+    ranked = []
+    for rank in sorted(by_rank, reverse=True):
+        ids = by_rank[rank]
+        in_scope = []
+        for offset in range(0, len(ids), CANDIDATE_CHUNK_SIZE):
+            in_scope.extend(scope.filter(pk__in=ids[offset:offset + CANDIDATE_CHUNK_SIZE])
+                            .values_list('pk', 'created_at'))
+        in_scope.sort(key=lambda row: row[1], reverse=True)
+        ranked.extend((pk, rank) for pk, _ in in_scope[:limit - len(ranked)])
+        if len(ranked) >= limit:
+            break
+    return ranked
+
+
+def search_submissions(q: str, *, scope=None, limit: int = DEFAULT_LIMIT) -> list[tuple[Submission, float]]:
+    """
+    Best matches for ``q`` within ``scope`` (a Submission queryset; live
+    submissions by default), as ``(submission, rank)``, best first. Every
+    query term must match as a prefix. Raises ValueError for an empty query.
+    """
+    words = query_terms(q)
+    scope = Submission.objects.all() if scope is None else scope
+    limit = max(1, min(limit, MAX_LIMIT))
+    matches = _tsvector_matches if uses_tsvector() else _term_matches
+    ranked = matches(scope, words, limit)
+
+    by_id = Submission.objects.select_related('form', 'submitted_by').prefetch_related('files').in_bulk(
+        [pk for pk, _ in ranked]
+    )
+    return [(by_id[pk], float(rank)) for pk, rank in ranked if pk in by_id]
@@ -1,11 +1,13 @@
 # ===== backend/forms/serializers.py =====
 from rest_framework import serializers
-from django.core.validators import EmailValidator
-from django.core.exceptions import ValidationError as DjangoValidationError
-import datetime
-import decimal
 
-from .models import Field, FileUpload, Form, Submission
+from .models import ExportJob, Field, FileUpload, Form, Submission, UploadSession
+from .conditions import check_condition_graph
+from .transfers import get_transfers
+from .transitions import submission_states
+from .uploads import chunk_max_size_setting, upload_target
+from .validation import get_validation_plan
+from .validators import check_field_definition
 
 
 class FieldSerializer(serializers.ModelSerializer):
@@ -14,88 +16,188 @@ class FieldSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'form')
 
+    def validate(self, attrs):
+        """Reject options/validation rules that could not be compiled into a validator."""
+        def current(name, default=None):
+            return attrs.get(name, getattr(self.instance, name, default))
+
+        key, rules = current('key', ''), current('validation')
+        try:
+            check_field_definition(
+                key=key, field_type=current('field_type', 'text'),
+                options=current('options'), rules=rules,
+            )
+            # Cycle detection needs the sibling fields' rules, with this one swapped in
+            check_condition_graph([(key, rules), *self._sibling_definitions()])
+        except ValueError as exc:
+            raise serializers.ValidationError({'validation': str(exc)})
+        return attrs
+
+    def _sibling_definitions(self):
+        if self.instance is not None:
+            siblings = Field.objects.filter(form_id=self.instance.form_id).exclude(pk=self.instance.pk)
+        else:
+            view = self.context.get('view')
+            form_slug = getattr(view, 'kwargs', {}).get('form_slug')
+            if not form_slug:
+                return []
+            siblings = Field.objects.filter(form__slug=form_slug)
+        return siblings.exclude(validation__isnull=True).values_list('key', 'validation')
+
 
 class FormSerializer(serializers.ModelSerializer):
     fields = FieldSerializer(many=True, read_only=True)  # pyrefly: ignore
-    submission_count = serializers.IntegerField(read_only=True, default=0)
+    submission_count = serializers.SerializerMethodField()
 
     class Meta:  # pyrefly: ignore
         model = Form
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'schema_version')
 
+    def get_submission_count(self, obj) -> int:
+        # Exact aggregate when the view annotated it, otherwise the denormalized counter
+        return getattr(obj, 'exact_submission_count', obj.submission_count)
+
+
+class PublicFormSerializer(FormSerializer):
+    """Form definition as served to the public (cached per schema version — no live counts)."""
+    submission_count = None
+
+
+def _absolute(serializer, url: str) -> str:
+    request = serializer.context.get('request')
+    return request.build_absolute_uri(url) if request else url
+
 
 class FileUploadSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField(
+        help_text='Signed URL; valid for UPLOAD_DOWNLOAD_URL_TTL seconds. Null until a direct upload is verified',
+    )
+    preview_url = serializers.SerializerMethodField(help_text='Downscaled JPEG, once processing has made one')
+
     class Meta:  # pyrefly: ignore
         model = FileUpload
-        fields = '__all__'
+        # No raw ``file``: its storage URL would bypass verification; download_url is the only way in
+        fields = [
+            'id', 'submission', 'field_key', 'blob', 'uploaded_at', 'original_filename', 'content_type',
+            'file_size', 'meta', 'download_url', 'preview_url',
+        ]
         read_only_fields = ('id', 'uploaded_at', 'original_filename', 'content_type', 'file_size')
 
+    def get_download_url(self, obj) -> str | None:
+        if not obj.file or not obj.is_verified:
+            return None
+        filename = obj.original_filename or obj.file.name.rsplit('/', 1)[-1]
+        return _absolute(self, get_transfers().download_url(obj.file.name, filename=filename))
+
+    def get_preview_url(self, obj) -> str | None:
+        preview = (obj.meta or {}).get('preview')
+        return _absolute(self, get_transfers().download_url(preview)) if preview else None
+
+
+class UploadSessionStartSerializer(serializers.Serializer):
+    field_key = serializers.CharField(max_length=150)
+    filename = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    size = serializers.IntegerField(min_value=1, help_text='Total file size in bytes')
+    method = serializers.ChoiceField(
+        choices=UploadSession.METHOD_CHOICES, default='chunked',
+        help_text='"direct" sends the whole file to a signed storage URL instead of chunks to the API',
+    )
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+    upload = serializers.SerializerMethodField()
+    file = FileUploadSerializer(source='file_upload', read_only=True)
+
+    class Meta:  # pyrefly: ignore
+        model = UploadSession
+        fields = [
+            'id', 'submission', 'field_key', 'original_filename', 'content_type', 'total_size',
+            'received', 'chunk_size', 'method', 'upload', 'status', 'file', 'created_at', 'expires_at',
+        ]
+        read_only_fields = fields
+
+    def get_chunk_size(self, obj) -> int:
+        """Largest chunk the server accepts per PUT."""
+        return chunk_max_size_setting()
+
+    def get_upload(self, obj) -> dict | None:
+        """Direct uploads: where to send the file (method, url, headers, expires_at)."""
+        target = upload_target(obj)
+        if target is not None:
+            target['url'] = _absolute(self, target['url'])
+        return target
+
+
+def _summarise_errors(missing: list[str], field_errors: dict[str, list[str]]) -> list[str]:
+    """Flatten per-field errors into readable messages, missing fields first."""
+    summary = []
+    if missing:
+        summary.append(f"Missing required fields: {', '.join(missing)}")
+    for key, messages in field_errors.items():
+        if key not in missing:
+            summary.extend(messages)
+    return summary
+
 
 class SubmissionSerializer(serializers.ModelSerializer):
     files = FileUploadSerializer(many=True, read_only=True)
+    # Optional on input: the version the client rendered, checked against the
+    # form's current version. Always overwritten with the form's version on save.
+    schema_version = serializers.IntegerField(required=False)
+    # Statuses the requesting user may move this submission to (forms/transitions.py)
+    allowed_transitions = serializers.SerializerMethodField()
 
     class Meta:  # pyrefly: ignore
         model = Submission
         fields = '__all__'
         read_only_fields = (
             'id', 'created_at', 'updated_at',
-            'submitted_by', 'schema_version', 'status',
+            'submitted_by', 'schema_snapshot', 'status',
         )
 
     def validate(self, attrs):
         """
         Validate submission payload against the Form's field definitions.
         - Ensures required fields are present.
-        - Performs basic type validation for number, email, and date fields.
+        - Validates every field type plus the min/max/length/regex rules in
+          ``Field.validation`` (see forms/validators.py), collecting all errors.
         - Rejects submissions where the client's schema version is stale.
         """
         form: Form = attrs.get('form')
         responses: dict = attrs.get('responses', {})
-        client_schema_version = attrs.get('schema_version')
+        # Only used for the staleness check below; the stored version always comes from the form
+        client_schema_version = attrs.pop('schema_version', None)
 
         if form is None:
             return attrs
 
-        # --- Required fields check ---
-        required_fields = (
-            form.fields.filter(required=True).exclude(field_type='file').values_list('key', flat=True)
-        )
-        missing = [key for key in required_fields if key not in responses]
-        if missing:
-            raise serializers.ValidationError({"responses": f"Missing required fields: {', '.join(missing)}"})
-
-        # --- Type validation for each provided field (excluding file) ---
-        for field in form.fields.exclude(field_type='file'):
-            key = field.key
-            if key not in responses:
-                continue  # optional or missing (already checked required above)
-            value = responses[key]
-            if field.field_type == 'number':
-                try:
-                    decimal.Decimal(str(value))
-                except (decimal.InvalidOperation, ValueError):
-                    raise serializers.ValidationError({"responses": f"Field '{key}' must be a number."})
-            elif field.field_type == 'email':
-                validator = EmailValidator()
-                try:
-                    validator(value)
-                except DjangoValidationError:
-                    raise serializers.ValidationError({"responses": f"Field '{key}' must be a valid email address."})
-            elif field.field_type == 'date':
-                try:
-                    datetime.date.fromisoformat(value)
-                except (ValueError, TypeError):
-                    raise serializers.ValidationError({"responses": f"Field '{key}' must be an ISO date (YYYY-MM-DD)."})
-            # Add more type checks as needed (e.g., dropdown, checkbox) – omitted for brevity.
+        # Field rules come from a plan compiled once per (form, schema_version),
+        # so a warm form is validated without any further queries.
+        plan = get_validation_plan(form)
+
+        # --- Required fields and per-type/rule checks, all errors in one pass ---
+        field_errors = plan.validate(responses)
+        if field_errors:
+            raise serializers.ValidationError({
+                "responses": _summarise_errors([key for key in field_errors if key not in responses], field_errors),
+                "field_errors": field_errors,
+            })
 
         # --- Schema version consistency ---
-        # The client should not manually send schema_version; we enforce that if present it matches.
+        # Clients may echo the schema_version they rendered; if they do, it must still be current.
         if client_schema_version is not None and client_schema_version != form.schema_version:
             raise serializers.ValidationError({"schema_version": "Submission schema version is outdated. Please refresh the form schema."})
 
         return attrs
 
+    def get_allowed_transitions(self, obj) -> list[str]:
+        request = self.context.get('request')
+        user = request.user if request and request.user.is_authenticated else None
+        return submission_states.next_states(obj, changed_by=user)
+
     def create(self, validated_data):
         """
         Snapshot the form's current schema_version at submission time.
@@ -103,4 +205,75 @@ class SubmissionSerializer(serializers.ModelSerializer):
         """
         form: Form = validated_data['form']
         validated_data['schema_version'] = form.schema_version
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class SubmissionSearchResultSerializer(SubmissionSerializer):
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+
+
+class SubmissionBatchResultSerializer(serializers.Serializer):
+    """Response of the bulk ingest endpoint (forms/ingest.py IngestResult)."""
+    batch = serializers.UUIDField(source='batch.pk', allow_null=True, default=None)
+    created = serializers.IntegerField()
+    rejected = serializers.IntegerField()
+    results = serializers.ListField(
+        child=serializers.DictField(),
+        help_text='One entry per input row: {"index", "id"} when stored, {"index", "errors"} when rejected',
+    )
+
+
+class BulkStatusUpdateSerializer(serializers.Serializer):
+    """Request body of POST /api/submissions/bulk-status/: a target status plus ids or a filter."""
+    status = serializers.ChoiceField(choices=Submission.STATUS_CHOICES)
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filter = serializers.DictField(
+        child=serializers.CharField(), required=False,
+        help_text='form (slug), status (comma separated), created_after, created_before',
+    )
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either "ids" or "filter", not both.')
+        return attrs
+
+
+class BulkStatusResultSerializer(serializers.Serializer):
+    status = serializers.CharField()
+    updated = serializers.ListField(child=serializers.UUIDField())
+    unchanged = serializers.ListField(child=serializers.UUIDField())
+    not_allowed = serializers.SerializerMethodField()
+    not_found = serializers.ListField(child=serializers.UUIDField())
+
+    def get_not_allowed(self, obj) -> list[dict]:
+        return [{'id': str(pk), 'status': current, 'reason': reason} for pk, current, reason in obj.not_allowed]
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    form = serializers.SlugRelatedField(slug_field='slug', queryset=Form.objects.all())
+    filters = serializers.DictField(
+        child=serializers.CharField(), required=False,
+        help_text='Optional status (comma separated), created_after, created_before',
+    )
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:  # pyrefly: ignore
+        model = ExportJob
+        fields = [
+            'id', 'form', 'file_format', 'filters', 'status', 'total_rows', 'rows_written',
+            'progress', 'file_size', 'error', 'download_url',
+            'created_at', 'started_at', 'finished_at', 'expires_at',
+        ]
+        read_only_fields = [
+            'id', 'status', 'total_rows', 'rows_written', 'file_size', 'error',
+            'created_at', 'started_at', 'finished_at', 'expires_at',
+        ]
+
+    def get_download_url(self, obj) -> str | None:
+        if obj.status != 'completed':
+            return None
+        from django.urls import reverse
+        url = reverse('export-job-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -3,53 +3,228 @@
 Service layer for forms app business logic.
 Extracted from views/serializers for testability and separation of concerns.
 """
+import hashlib
+import json
 import logging
+from dataclasses import dataclass, field
 
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
 
-from .models import Form, Submission
+from . import outbox
+from .models import Field, Form, FormSchemaSnapshot, Submission, SubmissionStatusEvent
+from .search import index_submissions
+from .transitions import STATUSES, submission_states
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BULK_STATUS_MAX_ROWS = 1000
+
+# Field attributes that make up a form's schema (ids are deliberately left out:
+# deleting and re-adding an identical field is not a schema change)
+SNAPSHOT_FIELD_ATTRS = (
+    'key', 'label', 'field_type', 'required', 'options',
+    'validation', 'order', 'placeholder', 'help_text',
+)
+
+
+def lock_form_schema(form: Form) -> Form:
+    """Lock ``form``'s row and refresh its schema version from it; call inside a transaction.
+
+    ``sync_schema_snapshot`` takes the same lock before deciding whether the
+    draft snapshot is unused and may be rewritten in place, so a submission
+    stamped here can never end up pointing at a schema it was not made with.
+    """
+    form.schema_version, form.current_snapshot_id = (
+        Form.objects.select_for_update().filter(pk=form.pk)
+        .values_list('schema_version', 'current_snapshot_id').get()
+    )
+    return form
+
 
 def create_submission(*, form: Form, responses: dict, submitted_by=None, client_identifier: str = '') -> Submission:
-    """Create a submission with schema version snapshot and trigger notifications."""
-    from notifications.tasks import notify_admin_new_submission
+    """Create a submission with schema version snapshot and trigger notifications.
 
+    The admin notification is written to the outbox in the same transaction
+    and published by the relay, so this never waits on (or loses a message
+    to) the Celery broker.
+    """
     with transaction.atomic():
+        lock_form_schema(form)
         submission = Submission.objects.create(
             form=form,
             responses=responses,
             submitted_by=submitted_by,
             client_identifier=client_identifier,
             schema_version=form.schema_version,
+            schema_snapshot_id=form.current_snapshot_id,
+        )
+        Form.objects.filter(pk=form.pk).update(submission_count=F('submission_count') + 1)
+        index_submissions([submission], replace=False)
+        outbox.enqueue(
+            'notifications.tasks.notify_admin_new_submission', str(submission.id),
+            dedup_key=f'submission-created:{submission.id}',
         )
 
     logger.info(
         'Submission %s created for form "%s" by %s',
         submission.id, form.name, submitted_by or 'anonymous',
     )
-
-    try:
-        notify_admin_new_submission.delay(str(submission.id))
-    except Exception:
-        logger.exception('Failed to queue notification for submission %s', submission.id)
-
     return submission
 
 
-def update_submission_status(*, submission: Submission, new_status: str) -> Submission:
-    """Update submission status with validation and audit logging."""
-    valid_statuses = [s[0] for s in Submission.STATUS_CHOICES]
-    if new_status not in valid_statuses:
-        raise ValueError(f'Invalid status. Choose from: {valid_statuses}')
+def update_submission_status(*, submission: Submission, new_status: str, changed_by=None) -> Submission:
+    """Move a submission to ``new_status`` if the state machine allows it; raises ValueError otherwise.
+
+    The SubmissionStatusEvent audit row is written by the post_save signal;
+    ``changed_by`` is recorded on it. Setting the current status again is a no-op.
+    """
+    if new_status not in STATUSES:
+        raise ValueError(f'Invalid status. Choose from: {list(STATUSES)}')
+    if new_status == submission.status:
+        return submission
+    error = submission_states.check(submission, new_status, changed_by)
+    if error:
+        raise ValueError(error)
 
     old_status = submission.status
-    submission.status = new_status
-    submission.save(update_fields=['status', 'updated_at'])
+    # No savepoint: this is one UPDATE plus its audit row, and the caller's
+    # transaction (if any) is the unit that should roll back
+    with transaction.atomic(savepoint=False):
+        submission.status = new_status
+        submission._status_changed_by = changed_by
+        submission._status_event = None
+        submission.save(update_fields=['status', 'updated_at'])
+        if submission._status_event is not None:
+            submission_states.run_effects([submission._status_event])
 
     logger.info(
         'Submission %s status changed: %s -> %s',
         submission.id, old_status, new_status,
     )
     return submission
+
+
+@dataclass
+class BulkStatusResult:
+    status: str
+    updated: list = field(default_factory=list)
+    # Already in the target status: nothing to do, no audit row
+    unchanged: list = field(default_factory=list)
+    # (id, current status, reason) for submissions the state machine refused to move
+    not_allowed: list = field(default_factory=list)
+    # Requested ids that matched no live submission (filled in by the caller)
+    not_found: list = field(default_factory=list)
+
+
+def bulk_update_submission_status(*, submissions, new_status: str, changed_by=None) -> BulkStatusResult:
+    """
+    Move every submission in the ``submissions`` queryset to ``new_status``
+    where the state machine allows it, using one UPDATE and one audit INSERT.
+
+    The selection is read under a row lock, so the statuses recorded as
+    ``from_status`` are the ones the UPDATE replaces. Raises ValueError for an
+    unknown status or a selection larger than ``BULK_STATUS_MAX_ROWS``.
+    """
+    if new_status not in STATUSES:
+        raise ValueError(f'Invalid status. Choose from: {list(STATUSES)}')
+    limit = getattr(settings, 'BULK_STATUS_MAX_ROWS', DEFAULT_BULK_STATUS_MAX_ROWS)
+
+    result = BulkStatusResult(status=new_status)
+    with transaction.atomic():
+        current = list(submissions.order_by().select_for_update(of=('self',))[:limit + 1])
+        if len(current) > limit:
+            raise ValueError(f'At most {limit} submissions can be updated at once; narrow the selection.')
+
+        moving = []
+        for submission in current:
+            if submission.status == new_status:
+                result.unchanged.append(submission.pk)
+                continue
+            error = submission_states.check(submission, new_status, changed_by)
+            if error:
+                result.not_allowed.append((submission.pk, submission.status, error))
+            else:
+                moving.append(submission)
+
+        if moving:
+            result.updated = [submission.pk for submission in moving]
+            Submission.objects.filter(pk__in=result.updated).update(status=new_status, updated_at=now())
+            # A queryset update sends no post_save signal, so the audit rows are written here
+            events = SubmissionStatusEvent.objects.bulk_create([
+                SubmissionStatusEvent(
+                    submission_id=submission.pk, from_status=submission.status,
+                    to_status=new_status, changed_by=changed_by,
+                )
+                for submission in moving
+            ])
+            submission_states.run_effects(events)
+
+    logger.info(
+        'Bulk status -> %s by %s: %d updated, %d unchanged, %d not allowed',
+        new_status, changed_by, len(result.updated), len(result.unchanged), len(result.not_allowed),
+    )
+    return result
+
+
+def canonical_fields(form_id) -> list[dict]:
+    """The form's fields as plain dicts in a stable order."""
+    return list(
+        Field.objects.filter(form_id=form_id)
+        .order_by('order', 'key')
+        .values(*SNAPSHOT_FIELD_ATTRS)
+    )
+
+
+def schema_hash(fields: list[dict]) -> str:
+    canonical = json.dumps(fields, sort_keys=True, separators=(',', ':'), cls=DjangoJSONEncoder)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def sync_schema_snapshot(form_id) -> FormSchemaSnapshot | None:
+    """
+    Record the form's current field set, bumping ``schema_version`` if it changed.
+
+    - Identical field sets (same hash) are a no-op.
+    - If no submission uses the current version yet, its snapshot is still a
+      draft and is rewritten in place — building a form field by field in the
+      admin does not burn through versions.
+    - Otherwise ``schema_version`` is incremented with an F() expression and a
+      new immutable snapshot is stored, all under a row lock on the form.
+    """
+    with transaction.atomic():
+        form = Form.objects.select_for_update().filter(pk=form_id).first()
+        if form is None:
+            return None
+
+        fields = canonical_fields(form_id)
+        digest = schema_hash(fields)
+        latest = FormSchemaSnapshot.objects.filter(form_id=form_id).order_by('-schema_version').first()
+        if latest is not None and latest.schema_hash == digest:
+            return latest
+
+        in_use = latest is not None and Submission.all_objects.filter(
+            form_id=form_id, schema_version=latest.schema_version,
+        ).exists()
+
+        if latest is not None and not in_use:
+            latest.schema_hash = digest
+            latest.fields = fields
+            latest.save(update_fields=['schema_hash', 'fields'])
+            snapshot = latest
+        else:
+            if in_use:
+                Form.objects.filter(pk=form_id).update(schema_version=F('schema_version') + 1)
+                form.refresh_from_db(fields=['schema_version'])
+            snapshot = FormSchemaSnapshot.objects.create(
+                form_id=form_id, schema_version=form.schema_version,
+                schema_hash=digest, fields=fields,
+            )
+
+        Form.objects.filter(pk=form_id).update(current_snapshot=snapshot)
+
+    logger.info('Form %s schema is now version %d (%s)', form_id, snapshot.schema_version, digest[:12])
+    return snapshot
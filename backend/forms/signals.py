@@ -1,24 +1,132 @@
 # backend/forms/signals.py
 import logging
+from functools import partial
 
-from django.db.models.signals import pre_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Submission
+from .blobs import release_blob
+from .models import Field, FileUpload, Form, Submission, SubmissionStatusEvent
+from .schema_cache import invalidate_public_schema
+from .services import sync_schema_snapshot
+from .validation import invalidate_validation_plan
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(pre_save, sender=Submission)
-def log_submission_status_change(sender, instance, **kwargs):
-    """Log submission status transitions for audit trail."""
-    if instance.pk:
-        try:
-            old = Submission.all_objects.get(pk=instance.pk)
-            if old.status != instance.status:
-                logger.info(
-                    'Submission %s status changed: %s -> %s',
-                    instance.pk, old.status, instance.status,
-                )
-        except Submission.DoesNotExist:
-            pass
+def log_submission_status_change(sender, instance, update_fields=None, **kwargs):
+    """
+    Detect status transitions from the status recorded when the row was
+    loaded (Submission.from_db) — no extra SELECT on the write path.
+    """
+    old_status = getattr(instance, '_loaded_status', None)
+    status_written = update_fields is None or 'status' in update_fields
+    instance._status_transition = (
+        (old_status, instance.status)
+        if instance.pk and old_status is not None and status_written and old_status != instance.status
+        else None
+    )
+    if instance._status_transition:
+        logger.info(
+            'Submission %s status changed: %s -> %s',
+            instance.pk, old_status, instance.status,
+        )
+
+
+@receiver(post_save, sender=Submission)
+def record_submission_status_event(sender, instance, **kwargs):
+    """Write the audit row for a transition detected in pre_save, then reset the baseline."""
+    transition = getattr(instance, '_status_transition', None)
+    if transition:
+        from_status, to_status = transition
+        instance._status_event = SubmissionStatusEvent.objects.create(
+            submission=instance, from_status=from_status, to_status=to_status,
+            changed_by=getattr(instance, '_status_changed_by', None),
+        )
+        instance._status_transition = None
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Submission)
+def decrement_count_on_hard_delete(sender, instance, **kwargs):
+    """Soft deletes already decremented the counter; hard deletes of live rows must too."""
+    if instance.is_deleted:
+        return
+    Form.objects.filter(pk=instance.form_id, submission_count__gt=0).update(
+        submission_count=F('submission_count') - 1,
+    )
+
+
+@receiver(post_delete, sender=FileUpload)
+def release_blob_on_delete(sender, instance, **kwargs):
+    """The blob file stays until collect_blobs finds it unreferenced."""
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+def invalidate_plan_on_field_change(sender, instance, **kwargs):
+    """
+    Field edits (API or admin) change the form's schema, so the snapshot is
+    synced straight away. ``sync_schema_snapshot`` keeps the form row locked
+    until the transaction commits and rewrites its new draft in place, so an
+    admin save of a form with N inline fields still makes one new version
+    rather than N. Cached plans and schemas are dropped now and again after
+    the commit, since a reader may rebuild them from the old schema while
+    the edit is still uncommitted.
+    """
+    if isinstance(kwargs.get('origin'), Form):
+        return  # the whole form is being deleted; nothing left to snapshot
+    form = instance.form if Field.form.is_cached(instance) else None
+    snapshot = sync_schema_snapshot(instance.form_id)
+    if snapshot is not None and form is not None:
+        _apply_snapshot(form, snapshot)
+    _invalidate_schema_caches(instance.form_id, form)
+
+    # One post-commit invalidation per form however many fields change. Every
+    # change registers a callback, so rolling back a savepoint only drops its
+    # own; whichever runs first does the work
+    _pending_invalidations().add(instance.form_id)
+    transaction.on_commit(partial(_invalidate_after_commit, instance.form_id))
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_delete, sender=Form)
+def invalidate_schema_on_form_change(sender, instance, created=False, **kwargs):
+    if created:
+        snapshot = sync_schema_snapshot(instance.pk)
+        if snapshot is not None:
+            _apply_snapshot(instance, snapshot)
+    invalidate_public_schema(instance)
+
+
+def _pending_invalidations() -> set:
+    # Form ids with a post-commit invalidation still to run, per connection
+    connection = transaction.get_connection()
+    if not hasattr(connection, 'pending_schema_invalidations'):
+        connection.pending_schema_invalidations = set()
+    return connection.pending_schema_invalidations
+
+
+def _invalidate_schema_caches(form_id, form=None):
+    invalidate_validation_plan(form_id)
+    form = form if form is not None else Form.objects.filter(pk=form_id).first()
+    if form is not None:
+        invalidate_public_schema(form)
+
+
+def _invalidate_after_commit(form_id):
+    pending = _pending_invalidations()
+    if form_id in pending:
+        pending.discard(form_id)
+        _invalidate_schema_caches(form_id)
+
+
+def _apply_snapshot(form, snapshot):
+    """Keep an in-memory Form in step with the version bump done by the service."""
+    form.schema_version = snapshot.schema_version
+    form.current_snapshot_id = snapshot.pk
@@ -0,0 +1,83 @@
+# backend/forms/tasks.py
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def relay_outbox(batch_size: int | None = None) -> str:
+    """Publish pending OutboxMessage rows (scheduled by Celery Beat)."""
+    from .outbox import relay_outbox as relay
+
+    result = relay(batch_size=batch_size)
+    if result.published or result.failed:
+        logger.info("Outbox relay: %d published, %d failed", result.published, result.failed)
+    return f"Published {result.published} outbox message(s)"
+
+
+@shared_task
+def run_export_job(job_id: str) -> str:
+    """Write one ExportJob to storage (queued through the outbox by start_export_job)."""
+    from .export_jobs import run_export_job as run
+
+    job = run(job_id)
+    if job is None:
+        return f"Export job {job_id} skipped"
+    return f"Export job {job_id} {job.status}"
+
+
+@shared_task
+def expire_export_jobs() -> str:
+    """Delete expired export files (scheduled by Celery Beat)."""
+    from .export_jobs import expire_export_jobs as expire
+
+    return f"Expired {expire()} export job(s)"
+
+
+@shared_task
+def expire_upload_sessions() -> str:
+    """Delete partial files of abandoned chunked uploads (scheduled by Celery Beat)."""
+    from .uploads import expire_upload_sessions as expire
+
+    return f"Expired {expire()} upload session(s)"
+
+
+@shared_task
+def collect_blobs() -> str:
+    """Delete stored files no upload refers to any more (scheduled by Celery Beat)."""
+    from .blobs import collect_blobs as collect
+
+    return f"Collected {collect()} blob(s)"
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def process_upload_stage(self, upload_id: str, stage: str) -> str:
+    """Run one post-upload stage (queued through the outbox by create_file_upload; see processing.py)."""
+    from .processing import record_failure, run_stage
+
+    try:
+        outcome = run_stage(upload_id, stage)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.error("Upload %s: %s stage failed: %s", upload_id, stage, exc)
+            record_failure(upload_id, stage, exc)
+            return f"Upload {upload_id}: {stage} failed"
+        logger.warning("Upload %s: %s stage failed, retrying: %s", upload_id, stage, exc)
+        raise self.retry(exc=exc, countdown=60 * 2 ** self.request.retries)
+    return f"Upload {upload_id}: {stage} {outcome}"
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def verify_direct_upload(self, upload_id: str) -> str:
+    """Type-check and store a file sent straight to storage (queued by complete_direct_upload)."""
+    from .uploads import verify_direct_upload as verify
+
+    try:
+        return f"Direct upload {upload_id} {verify(upload_id)}"
+    except FileNotFoundError:
+        return f"Direct upload {upload_id}: staged file is gone"
+    except Exception as exc:
+        logger.warning("Direct upload %s not verified, retrying: %s", upload_id, exc)
+        raise self.retry(exc=exc, countdown=60 * 2 ** self.request.retries)
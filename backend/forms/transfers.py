@@ -0,0 +1,133 @@
+# backend/forms/transfers.py
+"""
+Signed, time-limited URLs for moving file bytes without the API in between.
+
+Gunicorn workers serving the API should handle metadata only. Clients send
+file bytes straight to storage, and fetch them from it, using URLs signed
+here. ``get_transfers`` returns the backend named by
+``UPLOAD_TRANSFER_BACKEND``:
+
+- ``LocalSignedTransfers`` (the default) works with the local
+  FileSystemStorage. URLs point at ``forms.views.signed_transfer``, a plain
+  Django view. The token is signed with ``SECRET_KEY`` and names one object,
+  one operation and an expiry time; it is the only credential checked. An
+  upload token also names its upload session, and the view refuses the PUT
+  once that session is no longer active.
+- An object-store backend subclasses ``SignedTransfers``. ``upload_target``
+  and ``download_url`` return the store's own presigned URLs (e.g. boto3's
+  ``generate_presigned_url``) and ``size`` reads its object metadata.
+  Nothing else changes.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'forms.transfers.LocalSignedTransfers'
+DEFAULT_DOWNLOAD_TTL = 5 * 60
+COPY_BLOCK_SIZE = 64 * 1024
+SIGNING_SALT = 'forms.transfers'
+
+
+def download_ttl_setting() -> int:
+    return getattr(settings, 'UPLOAD_DOWNLOAD_URL_TTL', DEFAULT_DOWNLOAD_TTL)
+
+
+def get_transfers() -> 'SignedTransfers':
+    return import_string(getattr(settings, 'UPLOAD_TRANSFER_BACKEND', DEFAULT_BACKEND))()
+
+
+class SignedTransfers:
+    """Issues URLs that read or write one object in ``storage`` until they expire."""
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def upload_target(self, name: str, *, size: int, content_type: str, expires_in: int,
+                      session_id: str = '') -> dict:
+        """
+        How to send the bytes of ``name``: ``{'method', 'url', 'headers'}``.
+        ``session_id`` is the upload session the URL is for.
+        """
+        raise NotImplementedError
+
+    def download_url(self, name: str, *, filename: str = '', expires_in: int | None = None) -> str:
+        """A URL that serves ``name``; as an attachment called ``filename`` if given."""
+        raise NotImplementedError
+
+    def size(self, name: str) -> int | None:
+        """Size of the stored object from its metadata, or None if nothing is there yet."""
+        if not self.storage.exists(name):
+            return None
+        return self.storage.size(name)
+
+    def delete(self, name: str) -> None:
+        self.storage.delete(name)
+
+
+class TransferDenied(Exception):
+    """A token that is forged, expired or used for another operation (HTTP 403)."""
+
+
+class _LimitedReader:
+    # Reads at most ``length`` bytes, so a client cannot send more than it signed for
+    def __init__(self, stream, length: int):
+        self.stream, self.remaining = stream, length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        block = self.stream.read(size)
+        self.remaining -= len(block)
+        return block
+
+
+class LocalSignedTransfers(SignedTransfers):
+    """Signed tokens for the local filesystem, served by ``forms.views.signed_transfer``."""
+
+    def _url(self, grant: dict, expires_in: int) -> str:
+        grant['exp'] = int(time.time()) + expires_in
+        token = signing.dumps(grant, salt=SIGNING_SALT, compress=True)
+        return reverse('signed-transfer', kwargs={'token': token})
+
+    def upload_target(self, name: str, *, size: int, content_type: str, expires_in: int,
+                      session_id: str = '') -> dict:
+        url = self._url({'op': 'put', 'name': name, 'size': size, 'session': session_id}, expires_in)
+        return {'method': 'PUT', 'url': url, 'headers': {'Content-Type': content_type or 'application/octet-stream'}}
+
+    def download_url(self, name: str, *, filename: str = '', expires_in: int | None = None) -> str:
+        expires_in = download_ttl_setting() if expires_in is None else expires_in
+        return self._url({'op': 'get', 'name': name, 'filename': filename}, expires_in)
+
+    def verify(self, token: str, op: str) -> dict:
+        """The grant signed into ``token``; raises TransferDenied unless it allows ``op`` now."""
+        try:
+            grant = signing.loads(token, salt=SIGNING_SALT)
+        except signing.BadSignature:
+            raise TransferDenied('Invalid signature.') from None
+        if grant.get('op') != op:
+            raise TransferDenied('This URL does not allow that method.')
+        if grant.get('exp', 0) < time.time():
+            raise TransferDenied('This URL has expired.')
+        return grant
+
+    def receive(self, grant: dict, stream, length: int) -> None:
+        """Store ``length`` bytes from ``stream`` as the granted object, replacing an earlier attempt."""
+        if length != grant['size']:
+            raise ValueError(f'Content-Length must be {grant["size"]}.')
+        name = grant['name']
+        self.storage.delete(name)
+        saved = self.storage.save(name, File(_LimitedReader(stream, length), name=os.path.basename(name)))
+        if saved != name or self.storage.size(name) != length:
+            # A concurrent PUT for the same object, or the body ended early
+            self.storage.delete(saved)
+            raise ValueError('Upload was interrupted; send the file again.')
+
+    def open(self, grant: dict):
+        return self.storage.open(grant['name'], 'rb')
@@ -0,0 +1,107 @@
+# backend/forms/transitions.py
+"""
+The Submission.status state machine.
+
+``submission_states`` is declared once from a ``{status: allowed next
+statuses}`` table, precomputed as a map of frozensets so each check is a
+dict lookup. A bulk change locks its selected rows and runs ``check`` on
+each one, then moves the rows that passed with one UPDATE.
+
+Two kinds of hook can be registered on the machine:
+
+- Guards (``@submission_states.guard('approved')``) veto a single
+  transition. A guard is called with the submission and the acting user and
+  returns an error message or None. Guards run for each row, in memory, so
+  they must not query.
+- Effects (``@submission_states.effect``) run once per write, in the same
+  transaction, with every ``SubmissionStatusEvent`` that write produced. A
+  single change and a bulk change both use this one batched path.
+
+Every status write goes through ``services.update_submission_status`` or
+``services.bulk_update_submission_status``, and both enforce the machine.
+"""
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+
+from . import outbox
+from .models import Submission
+
+Guard = Callable[[Submission, object], str | None]
+Effect = Callable[[list], None]
+
+
+class StateMachine:
+    def __init__(self, states: Iterable[str], transitions: dict[str, Iterable[str]]):
+        self.states = tuple(states)
+        unknown = {s for pair in transitions.items() for s in (pair[0], *pair[1])} - set(self.states)
+        if unknown:
+            raise ValueError(f'Unknown states in transition table: {sorted(unknown)}')
+        self.allowed: dict[str, frozenset[str]] = {
+            state: frozenset(transitions.get(state, ())) for state in self.states
+        }
+        self._guards: dict[str, list[Guard]] = defaultdict(list)
+        self._effects: list[Effect] = []
+
+    def guard(self, *targets: str):
+        """Register ``fn(submission, changed_by) -> error | None`` for moves into ``targets``."""
+        def register(fn: Guard) -> Guard:
+            for target in targets:
+                self._guards[target].append(fn)
+            return fn
+        return register
+
+    def effect(self, fn: Effect) -> Effect:
+        """Register ``fn(events)``, called inside each write's transaction with its status events."""
+        self._effects.append(fn)
+        return fn
+
+    def can_transition(self, from_status: str, to_status: str) -> bool:
+        return to_status in self.allowed.get(from_status, ())
+
+    def check(self, submission: Submission, to_status: str, changed_by=None) -> str | None:
+        """Why ``submission`` may not move to ``to_status``; None if it may."""
+        if not self.can_transition(submission.status, to_status):
+            return f'Cannot move a submission from {submission.status} to {to_status}.'
+        for guard in self._guards.get(to_status, ()):
+            error = guard(submission, changed_by)
+            if error:
+                return error
+        return None
+
+    def next_states(self, submission: Submission, changed_by=None) -> list[str]:
+        """The statuses ``submission`` may move to now, in declaration order."""
+        allowed = self.allowed.get(submission.status, ())
+        return [
+            state for state in self.states
+            if state in allowed and self.check(submission, state, changed_by) is None
+        ]
+
+    def run_effects(self, events: list) -> None:
+        if not events:
+            return
+        for effect in self._effects:
+            effect(events)
+
+
+STATUSES = tuple(choice for choice, _ in Submission.STATUS_CHOICES)
+
+submission_states = StateMachine(STATUSES, {
+    'submitted': ('reviewed', 'approved', 'rejected'),
+    'reviewed': ('approved', 'rejected'),
+    'approved': (),
+    'rejected': ('reviewed',),  # reopened on appeal
+})
+
+# Statuses the submitter is told about
+NOTIFY_SUBMITTER_ON = frozenset({'approved', 'rejected'})
+
+
+@submission_states.effect
+def notify_submitters(events) -> None:
+    """Queue one outbox message for every submitter-facing change in this write."""
+    event_ids = [str(event.pk) for event in events if event.to_status in NOTIFY_SUBMITTER_ON]
+    if event_ids:
+        outbox.enqueue(
+            'notifications.tasks.notify_status_changes', event_ids,
+            dedup_key=f'status-events:{event_ids[0]}',
+        )
@@ -0,0 +1,384 @@
+# backend/forms/uploads.py
+"""
+Resumable, chunked file uploads.
+
+A single multipart POST to /api/submissions/<id>/upload/ must start over if
+the connection drops. Mobile clients on slow links use a session instead:
+
+1. ``start_upload`` records an ``UploadSession``. The declared size and
+   content type are checked against ``MAX_UPLOAD_SIZE`` and
+   ``ALLOWED_UPLOAD_CONTENT_TYPES`` before any bytes are sent.
+2. ``write_chunk`` copies one request body (at most ``UPLOAD_CHUNK_MAX_SIZE``)
+   to the session's spool file under ``UPLOAD_SPOOL_DIR``, in
+   ``COPY_BLOCK_SIZE`` blocks at the given offset. The first block is
+   sniffed (filetypes.py), and a disallowed type cancels the session before
+   anything is written. ``received`` only advances through a conditional
+   UPDATE, so a chunk sent twice is harmless. After a dropped connection the
+   client asks for ``received`` and carries on from there.
+3. ``complete_upload`` records the detected type with page or pixel
+   metadata. It then hashes the spool file and creates the ``FileUpload``
+   on its content-addressed blob (blobs.py). New content is handed to
+   storage, which FileSystemStorage does by moving the file rather than
+   copying it. Known content is not stored again.
+
+Direct uploads (``method='direct'``) keep file bytes away from the API
+workers entirely:
+
+1. ``start_upload`` runs the same checks. The session then carries a signed
+   upload URL for its staged object, ``incoming/<session id><ext>``
+   (transfers.py).
+2. The client PUTs the whole file to that URL: to the object store, or to
+   ``signed_transfer`` with the local stand-in, which stores it through
+   ``receive_direct_upload`` only while the session is still active.
+3. ``complete_direct_upload`` is the completion callback. It checks the
+   object's size from storage metadata and registers the ``FileUpload`` on
+   the staged object, without a blob yet. It also queues
+   ``verify_direct_upload``.
+4. ``verify_direct_upload`` runs on a worker. It sniffs and hashes the
+   object and moves the upload onto its blob, then queues processing
+   (processing.py). Content of a disallowed type is deleted with its
+   ``FileUpload``, and the session becomes ``rejected``.
+
+``expire_upload_sessions`` (Celery beat) deletes spool files and staged
+objects of sessions that were abandoned before ``expires_at``.
+"""
+import logging
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils.timezone import now
+
+from .blobs import create_file_upload, hash_file, store_blob
+from .filetypes import SNIFF_BYTES, inspect, is_allowed, normalise, not_allowed_message, sniff
+from .models import FileUpload, Submission, UploadSession
+from .outbox import enqueue
+from .processing import schedule_processing
+from .transfers import get_transfers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+DEFAULT_CHUNK_MAX_SIZE = 1024 * 1024
+DEFAULT_TTL = 24 * 60 * 60  # seconds an unfinished upload may be resumed
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """The file or chunk is over the configured limit (HTTP 413)."""
+
+
+class UploadClosed(ValueError):
+    """Bytes sent for a session that is no longer active (HTTP 409)."""
+
+
+class UploadOffsetMismatch(ValueError):
+    """A chunk did not start where the session left off (HTTP 409)."""
+
+    def __init__(self, session: UploadSession):
+        self.received = session.received
+        super().__init__(f'Upload is at offset {session.received}; resume from there.')
+
+
+def max_upload_size_setting() -> int:
+    return getattr(settings, 'MAX_UPLOAD_SIZE', DEFAULT_MAX_UPLOAD_SIZE)
+
+
+def chunk_max_size_setting() -> int:
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', DEFAULT_CHUNK_MAX_SIZE)
+
+
+def ttl_setting() -> timedelta:
+    return timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', DEFAULT_TTL))
+
+
+def spool_dir_setting() -> Path:
+    configured = getattr(settings, 'UPLOAD_SPOOL_DIR', '')
+    return Path(configured or Path(tempfile.gettempdir()) / 'actserv-uploads')
+
+
+def spool_path(session: UploadSession) -> Path:
+    return spool_dir_setting() / f'{session.pk}.part'
+
+
+def staged_name(session: UploadSession) -> str:
+    """Storage name a direct upload is sent to, before it moves onto a blob."""
+    return f'incoming/{session.pk}{os.path.splitext(session.original_filename)[1].lower()}'
+
+
+def upload_target(session: UploadSession) -> dict | None:
+    """Signed URL (with method and headers) for the bytes of an active direct upload."""
+    expires_in = int((session.expires_at - now()).total_seconds())
+    if session.method != 'direct' or session.status != 'active' or expires_in <= 0:
+        return None
+    target = get_transfers().upload_target(
+        staged_name(session), size=session.total_size, content_type=session.content_type, expires_in=expires_in,
+        session_id=str(session.pk),
+    )
+    return {**target, 'expires_at': session.expires_at}
+
+
+def _open_direct_session(session_id) -> UploadSession:
+    session = UploadSession.objects.filter(pk=session_id or None, method='direct').first()
+    if session is None:
+        raise UploadClosed('This URL is not for an upload session; start a new upload.')
+    try:
+        _check_active(session)
+    except ValueError as e:
+        raise UploadClosed(str(e)) from None
+    return session
+
+
+def receive_direct_upload(grant: dict, stream, length: int) -> None:
+    """
+    Store the body of a local signed PUT (``LocalSignedTransfers.receive``)
+    while the session it was signed for is active. Raises UploadClosed
+    otherwise, and ValueError if the body is not the signed size.
+    """
+    session = _open_direct_session(grant.get('session'))
+    transfers = get_transfers()
+    transfers.receive(grant, stream, length)
+    # Completed, cancelled or expired while the body streamed in: unless a
+    # FileUpload still points at them, the bytes belong to nothing
+    session.refresh_from_db()
+    if session.status != 'active' and not FileUpload.objects.filter(file=grant['name']).exists():
+        transfers.delete(grant['name'])
+        raise UploadClosed(f'Upload is {session.status}.')
+
+
+def _discard_received(session: UploadSession) -> None:
+    if session.method == 'direct':
+        get_transfers().delete(staged_name(session))
+    else:
+        spool_path(session).unlink(missing_ok=True)
+
+
+def check_upload(*, filename: str, content_type: str, size: int) -> None:
+    """Raise UploadTooLarge or ValueError if this file may not be uploaded."""
+    max_size = max_upload_size_setting()
+    if size > max_size:
+        raise UploadTooLarge(f'File "{filename}" exceeds maximum size of {max_size // (1024 * 1024)}MB.')
+    if not is_allowed(content_type):
+        raise ValueError(not_allowed_message(content_type))
+
+
+def start_upload(*, submission: Submission, uploaded_by, field_key: str, filename: str,
+                 content_type: str, total_size: int, method: str = 'chunked') -> UploadSession:
+    """Open a session for one file; raises ValueError (or UploadTooLarge)."""
+    if total_size < 1:
+        raise ValueError('File size must be at least 1 byte.')
+    check_upload(filename=filename, content_type=content_type, size=total_size)
+
+    session = UploadSession.objects.create(
+        submission=submission, uploaded_by=uploaded_by, field_key=field_key,
+        original_filename=filename, content_type=content_type, total_size=total_size,
+        method=method, expires_at=now() + ttl_setting(),
+    )
+    if method == 'chunked':
+        path = spool_path(session)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    logger.info('Upload session %s started for submission %s (%s, %d bytes)',
+                session.pk, submission.pk, filename, total_size)
+    return session
+
+
+def _check_active(session: UploadSession) -> None:
+    if session.status != 'active':
+        raise ValueError(f'Upload is {session.status}.')
+    if session.expires_at <= now():
+        raise ValueError('Upload has expired; start a new one.')
+
+
+def _check_first_block(session: UploadSession, block: bytes) -> None:
+    # The declared type was only the client's word; the content decides
+    detected = sniff(block[:SNIFF_BYTES])
+    if not is_allowed(detected):
+        cancel_upload(session)
+        raise ValueError(not_allowed_message(detected))
+
+
+def write_chunk(session: UploadSession, *, offset: int, length: int, stream) -> UploadSession:
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``. Bytes that
+    arrive before the stream ends early are kept, and ValueError is raised so
+    the client resumes from ``received``.
+    """
+    _check_active(session)
+    if session.method != 'chunked':
+        raise ValueError('This is a direct upload; send the file to its upload URL.')
+    if offset != session.received:
+        raise UploadOffsetMismatch(session)
+    if length < 1:
+        raise ValueError('Chunk is empty.')
+    chunk_max = chunk_max_size_setting()
+    if length > chunk_max:
+        raise UploadTooLarge(f'Chunks may be at most {chunk_max} bytes.')
+    if offset + length > session.total_size:
+        raise UploadTooLarge(f'Chunk runs past the declared size of {session.total_size} bytes.')
+
+    written = 0
+    with open(spool_path(session), 'r+b') as spool:
+        spool.seek(offset)
+        while written < length:
+            block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            if offset == 0 and written == 0:
+                _check_first_block(session, block)
+            spool.write(block)
+            written += len(block)
+
+    # Two requests for the same offset write the same bytes; only one advances the session
+    advanced = UploadSession.objects.filter(pk=session.pk, status='active', received=offset).update(
+        received=offset + written, updated_at=now(),
+    )
+    session.refresh_from_db()
+    if not advanced:
+        raise UploadOffsetMismatch(session)
+    if written < length:
+        raise ValueError(f'Chunk ended after {written} of {length} bytes; resume from offset {session.received}.')
+    return session
+
+
+class _SpooledFile(File):
+    # temporary_file_path() lets FileSystemStorage move the spool into place
+    # (file_move_safe) instead of reading it back; other storages stream chunks()
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+
+def complete_upload(session: UploadSession) -> FileUpload:
+    """Store the assembled file and create its FileUpload. Completing twice returns the same row."""
+    if session.status == 'completed' and session.file_upload_id:
+        return session.file_upload
+    if session.method == 'direct':
+        return complete_direct_upload(session)
+    _check_active(session)
+    if session.received != session.total_size:
+        raise ValueError(f'Upload is incomplete: {session.received} of {session.total_size} bytes received.')
+
+    path = spool_path(session)
+    with open(path, 'rb') as spool:
+        meta = inspect(spool, declared_type=session.content_type)
+        if not is_allowed(meta['detected_type']):
+            # First chunks shorter than SNIFF_BYTES are only fully sniffed here
+            cancel_upload(session)
+            raise ValueError(not_allowed_message(meta['detected_type']))
+        with transaction.atomic():
+            claimed = UploadSession.objects.filter(pk=session.pk, status='active').update(status='completed')
+            if not claimed:
+                session.refresh_from_db()
+                raise ValueError(f'Upload is {session.status}.')
+            file_upload = create_file_upload(
+                submission=session.submission, field_key=session.field_key,
+                content=_SpooledFile(spool, name=session.original_filename),
+                filename=session.original_filename, content_type=meta['detected_type'], meta=meta,
+            )
+            UploadSession.objects.filter(pk=session.pk).update(file_upload=file_upload, updated_at=now())
+    path.unlink(missing_ok=True)  # already gone if storage moved it into a new blob
+
+    session.refresh_from_db()
+    logger.info('Upload session %s completed as file %s', session.pk, file_upload.pk)
+    return file_upload
+
+
+def cancel_upload(session: UploadSession) -> UploadSession:
+    """Abandon an active session and delete what was received; raises ValueError otherwise."""
+    cancelled = UploadSession.objects.filter(pk=session.pk, status='active').update(status='cancelled')
+    session.refresh_from_db()
+    if not cancelled:
+        raise ValueError(f'Upload is already {session.status}.')
+    _discard_received(session)
+    return session
+
+
+def complete_direct_upload(session: UploadSession) -> FileUpload:
+    """
+    Completion callback of a direct upload: register the ``FileUpload`` from
+    storage metadata alone and queue ``verify_direct_upload``.
+    """
+    if session.status == 'completed' and session.file_upload_id:
+        return session.file_upload
+    _check_active(session)
+    name = staged_name(session)
+    size = get_transfers().size(name)
+    if size != session.total_size:
+        received = 'nothing' if size is None else f'{size} bytes'
+        raise ValueError(f'Upload is incomplete: storage has {received} of {session.total_size} bytes.')
+
+    with transaction.atomic():
+        claimed = UploadSession.objects.filter(pk=session.pk, status='active').update(status='completed')
+        if not claimed:
+            session.refresh_from_db()
+            raise ValueError(f'Upload is {session.status}.')
+        # Typed as declared, and not downloadable, until verify_direct_upload
+        # has sniffed the content (FileUpload.is_verified)
+        file_upload = FileUpload.objects.create(
+            submission=session.submission, field_key=session.field_key, file=name,
+            original_filename=session.original_filename, content_type=normalise(session.content_type),
+            file_size=size, meta={'declared_type': session.content_type},
+        )
+        UploadSession.objects.filter(pk=session.pk).update(file_upload=file_upload, received=size, updated_at=now())
+        enqueue('forms.tasks.verify_direct_upload', str(file_upload.pk), dedup_key=f'direct-upload:{file_upload.pk}')
+
+    session.refresh_from_db()
+    logger.info('Direct upload %s registered as file %s', session.pk, file_upload.pk)
+    return file_upload
+
+
+def _reject_direct_upload(upload: FileUpload, reason: str) -> None:
+    name, storage = upload.file.name, upload.file.storage
+    with transaction.atomic():
+        UploadSession.objects.filter(file_upload=upload).update(status='rejected', updated_at=now())
+        upload.delete()
+        transaction.on_commit(lambda: storage.delete(name))
+    logger.warning('Direct upload %s rejected: %s', upload.pk, reason)
+
+
+def verify_direct_upload(upload_id) -> str:
+    """
+    Worker side of a direct upload: type-check and hash the staged object,
+    move the upload onto its blob and queue processing. Returns ``done``,
+    ``rejected``, or ``unchanged`` if it was already verified (or deleted).
+    """
+    upload = FileUpload.objects.filter(pk=upload_id, blob__isnull=True).first()
+    if upload is None:
+        return 'unchanged'
+    staged = upload.file.name
+    with upload.file.open('rb') as content:
+        meta = inspect(content, declared_type=upload.meta.get('declared_type', ''))
+        if not is_allowed(meta['detected_type']):
+            _reject_direct_upload(upload, not_allowed_message(meta['detected_type']))
+            return 'rejected'
+        sha256, size = hash_file(content)
+        with transaction.atomic():
+            if not FileUpload.objects.select_for_update().filter(pk=upload.pk, blob__isnull=True).exists():
+                return 'unchanged'
+            blob = store_blob(content, sha256=sha256, size=size)
+            upload.blob, upload.file, upload.content_type = blob, blob.file.name, meta['detected_type']
+            FileUpload.objects.filter(pk=upload.pk).update(
+                blob=blob, file=blob.file.name, content_type=meta['detected_type'], file_size=size, meta=meta,
+            )
+            schedule_processing(upload)
+            if staged != blob.file.name:
+                transaction.on_commit(lambda: upload.file.storage.delete(staged))
+    logger.info('Direct upload file %s verified as blob %s', upload.pk, sha256)
+    return 'done'
+
+
+def expire_upload_sessions() -> int:
+    """Delete received bytes of active sessions past ``expires_at``; returns the count."""
+    expired = 0
+    due = UploadSession.objects.filter(status='active', expires_at__lt=now())
+    for session in due.iterator():
+        if UploadSession.objects.filter(pk=session.pk, status='active').update(status='expired'):
+            _discard_received(session)
+            expired += 1
+    if expired:
+        logger.info('Expired %d upload session(s)', expired)
+    return expired
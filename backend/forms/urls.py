@@ -2,11 +2,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import FieldViewSet, FormViewSet, SubmissionViewSet
+from .views import (
+    ExportJobViewSet, FieldViewSet, FormViewSet, SubmissionViewSet, UploadSessionViewSet, signed_transfer,
+)
 
 router = DefaultRouter()
 router.register(r'forms', FormViewSet, basename='form')
 router.register(r'submissions', SubmissionViewSet, basename='submission')
+router.register(r'exports', ExportJobViewSet, basename='export-job')
+router.register(r'uploads', UploadSessionViewSet, basename='upload-session')
 
 # Nested: /api/forms/<form_slug>/fields/
 # Allows admin to add/edit/remove fields on a specific form via the API
@@ -17,4 +21,6 @@ field_router.register(r'fields', FieldViewSet, basename='form-field')
 urlpatterns = [
     path('', include(router.urls)),
     path('forms/<slug:form_slug>/', include(field_router.urls)),
+    # Signed upload/download URLs of the local storage stand-in (forms/transfers.py)
+    path('transfers/<str:token>/', signed_transfer, name='signed-transfer'),
 ]
\ No newline at end of file
@@ -0,0 +1,155 @@
+# backend/forms/validation.py
+"""
+Compiled validation plans for submission payloads.
+
+A plan is built once per ``(form.id, schema_version)`` from the form's field
+rows and kept in a process-local LRU. Validating a submission against a warm
+plan never touches the database — the only shared lookup is a generation
+token in the Django cache, replaced whenever a field is edited so that every
+worker drops its stale copy.
+"""
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from graphlib import CycleError
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .conditions import ConditionalRule, order_conditions, parse_conditions
+from .validators import FieldValidator, build_field_validator
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ValidationPlan:
+    """Immutable, precompiled description of what a valid payload looks like."""
+    form_id: str
+    schema_version: int
+    required_keys: tuple[str, ...]
+    checks: tuple[FieldValidator, ...]
+    # conditional_required rules in dependency (topological) order
+    conditions: tuple[ConditionalRule, ...] = ()
+
+    def _missing(self, responses: dict) -> dict[str, str]:
+        """Map each missing required key to its error; every rule is evaluated once."""
+        missing = {key: 'This field is required.' for key in self.required_keys if key not in responses}
+        for rule in self.conditions:
+            if rule.target not in responses and rule.target not in missing and rule.applies(responses):
+                missing[rule.target] = rule.error_message()
+        return missing
+
+    def missing(self, responses: dict) -> list[str]:
+        return list(self._missing(responses))
+
+    def validate(self, responses: dict) -> dict[str, list[str]]:
+        """
+        Check every field in a single pass and return ``{key: [messages]}``.
+        An empty dict means the payload is valid.
+        """
+        errors: dict[str, list[str]] = {key: [message] for key, message in self._missing(responses).items()}
+        for validator in self.checks:
+            if validator.key not in responses:
+                continue
+            messages = validator(responses[validator.key])
+            if messages:
+                errors[validator.key] = messages
+        return errors
+
+
+def compile_plan(form) -> ValidationPlan:
+    """Build a plan from the form's field rows (one query)."""
+    required = []
+    checks = []
+    conditions = []
+    for key, field_type, is_required, options, rules in (
+        form.fields.values_list('key', 'field_type', 'required', 'options', 'validation')
+    ):
+        conditions.extend(parse_conditions(key, rules))
+        validator = build_field_validator(key=key, field_type=field_type, options=options, rules=rules)
+        if validator is None:
+            continue  # file fields are uploaded separately, never part of `responses`
+        if is_required:
+            required.append(key)
+        checks.append(validator)
+
+    try:
+        ordered_conditions = order_conditions(conditions)
+    except CycleError:
+        # Cycles are rejected when fields are saved; this only guards rows
+        # written behind the API's back. Fall back to declaration order.
+        logger.warning('conditional_required cycle in form %s; evaluating in field order', form.pk)
+        ordered_conditions = tuple(conditions)
+
+    return ValidationPlan(
+        form_id=str(form.pk),
+        schema_version=form.schema_version,
+        required_keys=tuple(required),
+        checks=tuple(checks),
+        conditions=ordered_conditions,
+    )
+
+
+# ── Process-local LRU with cross-worker invalidation ─────────────────────────
+
+_plans: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+
+def _generation_key(form_id) -> str:
+    return f'forms:validation-plan-gen:{form_id}'
+
+
+def _generation(form_id) -> str:
+    # A random token rather than a counter: a counter recreated after an
+    # eviction restarts at a value some worker's stale plan may still carry
+    key = _generation_key(form_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)  # another worker may have added first
+    return generation
+
+
+def _max_plans() -> int:
+    return getattr(settings, 'FORM_VALIDATION_PLAN_CACHE_SIZE', 256)
+
+
+def get_validation_plan(form) -> ValidationPlan:
+    """Return the compiled plan for ``form``, compiling it on a cache miss."""
+    lru_key = (str(form.pk), form.schema_version)
+    generation = _generation(form.pk)
+
+    with _lock:
+        cached = _plans.get(lru_key)
+        if cached is not None and cached[0] == generation:
+            _plans.move_to_end(lru_key)
+            return cached[1]
+
+    plan = compile_plan(form)
+
+    with _lock:
+        _plans[lru_key] = (generation, plan)
+        _plans.move_to_end(lru_key)
+        while len(_plans) > _max_plans():
+            _plans.popitem(last=False)
+    return plan
+
+
+def invalidate_validation_plan(form_id) -> None:
+    """Drop the plan locally and replace the shared generation so other workers do too."""
+    cache.set(_generation_key(form_id), uuid.uuid4().hex, timeout=None)
+
+    form_id = str(form_id)
+    with _lock:
+        for lru_key in [k for k in _plans if k[0] == form_id]:
+            del _plans[lru_key]
+
+
+def clear_validation_plans() -> None:
+    """Empty the local LRU (used by tests and benchmarks)."""
+    with _lock:
+        _plans.clear()
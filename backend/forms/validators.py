@@ -0,0 +1,262 @@
+# backend/forms/validators.py
+"""
+Pluggable per-field-type validators for submission responses.
+
+Each ``Field.field_type`` maps to a ``FieldValidator`` subclass in
+``FIELD_VALIDATORS``. A validator is built once per field when a validation
+plan is compiled: option lists become frozensets and regexes in
+``Field.validation`` are compiled up front, so checking a value is cheap.
+
+Supported ``Field.validation`` rules:
+    min / max               numeric bounds (number, currency), ISO date bounds (date)
+    min_length / max_length string length, or number of selections (checkbox)
+    regex                   pattern the whole value must match (string types)
+    message                 optional override for rule-violation messages
+    conditional_required    see forms/conditions.py
+
+Register a validator for a new field type with ``@register_field_validator``.
+"""
+import datetime
+import decimal
+import re
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import EmailValidator
+
+from .conditions import parse_conditions
+
+FIELD_VALIDATORS: dict[str, type['FieldValidator']] = {}
+
+# Field types that never appear in `responses` (files go through /upload/)
+SKIPPED_FIELD_TYPES = frozenset({'file'})
+
+_email_validator = EmailValidator()
+_PHONE_RE = re.compile(r'^\+?[0-9][0-9 ()\-]*$')
+
+
+def register_field_validator(*field_types: str):
+    """Class decorator registering a FieldValidator for one or more field types."""
+    def decorator(cls):
+        for field_type in field_types:
+            FIELD_VALIDATORS[field_type] = cls
+        return cls
+    return decorator
+
+
+def option_values(options) -> frozenset[str]:
+    """Normalise ``Field.options`` (list of strings or {value, label} dicts) to a frozenset."""
+    if not options:
+        return frozenset()
+    values = set()
+    for option in options:
+        if isinstance(option, dict):
+            option = option.get('value')
+        if option is not None:
+            values.add(str(option))
+    return frozenset(values)
+
+
+def _optional_int(value) -> int | None:
+    return None if value is None else int(value)
+
+
+class InvalidValue(Exception):
+    """Raised by ``FieldValidator.coerce`` with a user-facing message."""
+
+
+class FieldValidator:
+    """
+    Base validator: coerces the raw value, then applies the field's
+    ``validation`` rules. Subclasses override ``coerce`` and may set
+    ``supports_length`` / ``supports_bounds``.
+    """
+    supports_length = False
+    supports_bounds = False
+
+    def __init__(self, *, key: str, options=None, rules: dict | None = None):
+        self.key = key
+        self.options = option_values(options)
+        rules = rules or {}
+        self.message = rules.get('message')
+        self.min_length = _optional_int(rules.get('min_length')) if self.supports_length else None
+        self.max_length = _optional_int(rules.get('max_length')) if self.supports_length else None
+        self.minimum = self.parse_bound(rules.get('min')) if self.supports_bounds else None
+        self.maximum = self.parse_bound(rules.get('max')) if self.supports_bounds else None
+        pattern = rules.get('regex')
+        self.regex = re.compile(pattern) if pattern and self.supports_length else None
+
+    def parse_bound(self, bound):
+        return bound
+
+    def coerce(self, value):
+        return value
+
+    def __call__(self, value) -> list[str]:
+        try:
+            value = self.coerce(value)
+        except InvalidValue as exc:
+            return [f"Field '{self.key}' {exc}"]
+        return self.check_rules(value)
+
+    def check_rules(self, value) -> list[str]:
+        errors = []
+        if self.min_length is not None and len(value) < self.min_length:
+            errors.append(self.message or f"Field '{self.key}' must have at least {self.min_length} characters.")
+        if self.max_length is not None and len(value) > self.max_length:
+            errors.append(self.message or f"Field '{self.key}' must have at most {self.max_length} characters.")
+        if self.regex is not None and not self.regex.fullmatch(value):
+            errors.append(self.message or f"Field '{self.key}' has an invalid format.")
+        if self.minimum is not None and value < self.minimum:
+            errors.append(self.message or f"Field '{self.key}' must be at least {self.minimum}.")
+        if self.maximum is not None and value > self.maximum:
+            errors.append(self.message or f"Field '{self.key}' must be at most {self.maximum}.")
+        return errors
+
+
+@register_field_validator('text', 'textarea')
+class TextValidator(FieldValidator):
+    supports_length = True
+
+    def coerce(self, value):
+        # API clients often send ID numbers and the like as JSON numbers
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if not isinstance(value, str):
+            raise InvalidValue('must be text.')
+        return value
+
+
+@register_field_validator('email')
+class EmailFieldValidator(TextValidator):
+    def coerce(self, value):
+        value = super().coerce(value)
+        try:
+            _email_validator(value)
+        except DjangoValidationError:
+            raise InvalidValue('must be a valid email address.')
+        return value
+
+
+@register_field_validator('phone')
+class PhoneValidator(TextValidator):
+    def coerce(self, value):
+        value = super().coerce(value).strip()
+        digits = sum(ch.isdigit() for ch in value)
+        # E.164 numbers carry at most 15 digits
+        if not _PHONE_RE.match(value) or not 7 <= digits <= 15:
+            raise InvalidValue('must be a valid phone number.')
+        return value
+
+
+@register_field_validator('number')
+class NumberValidator(FieldValidator):
+    supports_bounds = True
+
+    def parse_bound(self, bound):
+        return None if bound is None else decimal.Decimal(str(bound))
+
+    def coerce(self, value):
+        if isinstance(value, bool):
+            raise InvalidValue('must be a number.')
+        try:
+            number = decimal.Decimal(str(value).strip())
+        except (decimal.InvalidOperation, ValueError):
+            raise InvalidValue('must be a number.')
+        if not number.is_finite():
+            raise InvalidValue('must be a number.')
+        return number
+
+
+@register_field_validator('currency')
+class CurrencyValidator(NumberValidator):
+    def coerce(self, value):
+        if isinstance(value, str):
+            value = value.replace(',', '')
+        try:
+            amount = super().coerce(value)
+        except InvalidValue:
+            raise InvalidValue('must be a monetary amount.')
+        if amount.as_tuple().exponent < -2:
+            raise InvalidValue('must have at most 2 decimal places.')
+        return amount
+
+
+@register_field_validator('date')
+class DateValidator(FieldValidator):
+    supports_bounds = True
+
+    def parse_bound(self, bound):
+        return None if bound is None else datetime.date.fromisoformat(str(bound))
+
+    def coerce(self, value):
+        try:
+            return datetime.date.fromisoformat(value)
+        except (ValueError, TypeError):
+            raise InvalidValue('must be an ISO date (YYYY-MM-DD).')
+
+
+@register_field_validator('dropdown')
+class DropdownValidator(FieldValidator):
+    def coerce(self, value):
+        if isinstance(value, (dict, list)):
+            raise InvalidValue('must be a single option.')
+        if self.options and str(value) not in self.options:
+            raise InvalidValue('must be one of the available options.')
+        return value
+
+
+@register_field_validator('checkbox')
+class CheckboxValidator(FieldValidator):
+    """
+    Without options a checkbox is a single boolean; with options it is a
+    multi-select whose value is a list of option values.
+    """
+    supports_length = True
+    _BOOLEAN_STRINGS = frozenset({'true', 'false', 'on', 'off', '1', '0'})
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if not self.options:
+            self.min_length = self.max_length = self.regex = None
+
+    def coerce(self, value):
+        if not self.options:
+            if isinstance(value, bool) or str(value).lower() in self._BOOLEAN_STRINGS:
+                return value
+            raise InvalidValue('must be true or false.')
+        if not isinstance(value, list):
+            raise InvalidValue('must be a list of options.')
+        if any(str(item) not in self.options for item in value):
+            raise InvalidValue('must only contain available options.')
+        return value
+
+    def check_rules(self, value) -> list[str]:
+        errors = []
+        if self.min_length is not None and len(value) < self.min_length:
+            errors.append(self.message or f"Field '{self.key}' requires at least {self.min_length} selection(s).")
+        if self.max_length is not None and len(value) > self.max_length:
+            errors.append(self.message or f"Field '{self.key}' allows at most {self.max_length} selection(s).")
+        return errors
+
+
+def check_field_definition(*, key: str, field_type: str, options=None, rules=None) -> None:
+    """Raise ValueError if a field's options/validation rules cannot be compiled."""
+    if rules is not None and not isinstance(rules, dict):
+        raise ValueError('validation must be a JSON object.')
+    if options is not None and not isinstance(options, list):
+        raise ValueError('options must be a JSON list.')
+    parse_conditions(key, rules)
+    try:
+        build_field_validator(key=key, field_type=field_type, options=options, rules=rules)
+    except re.error as exc:
+        raise ValueError(f'Invalid regex: {exc}') from exc
+    except (decimal.InvalidOperation, TypeError, ValueError) as exc:
+        raise ValueError(f'Invalid min/max bound: {exc}') from exc
+
+
+def build_field_validator(*, key: str, field_type: str, options=None, rules=None) -> FieldValidator | None:
+    """Instantiate the registered validator for ``field_type`` (None for skipped types)."""
+    if field_type in SKIPPED_FIELD_TYPES:
+        return None
+    validator_cls = FIELD_VALIDATORS.get(field_type, FieldValidator)
+    return validator_cls(key=key, options=options, rules=rules)
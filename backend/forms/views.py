@@ -2,29 +2,72 @@
 import logging
 from typing import cast
 
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.parsers import FormParser, JSONParser
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import Count, Q
+from django.shortcuts import get_object_or_404
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse,
+)
+from django.views.decorators.http import require_http_methods
 
-from .models import Field, FileUpload, Form, Submission
+from .blobs import create_file_upload
+from .export_jobs import cancel_export_job, start_export_job
+from .exports import FORMATS, SubmissionExport, iterate_in_thread, parse_filters
+from .ingest import ingest_submissions
+from .models import ExportJob, Field, Form, Submission, UploadSession
+from .parsers import CheckedMultiPartParser, NDJSONParser
 from .permissions import IsAdminUserOrReadOnly
+from .search import DEFAULT_LIMIT, MAX_LIMIT, index_submissions, search_submissions
+from .schema_cache import get_public_schema, get_schema_etag
 from .serializers import (
+    BulkStatusResultSerializer,
+    BulkStatusUpdateSerializer,
+    ExportJobSerializer,
     FieldSerializer,
     FileUploadSerializer,
     FormSerializer,
+    SubmissionBatchResultSerializer,
+    SubmissionSearchResultSerializer,
     SubmissionSerializer,
+    UploadSessionSerializer,
+    UploadSessionStartSerializer,
+)
+from .services import bulk_update_submission_status, create_submission, update_submission_status
+from .transfers import LocalSignedTransfers, TransferDenied, get_transfers
+from .uploads import (
+    UploadClosed,
+    UploadOffsetMismatch,
+    UploadTooLarge,
+    cancel_upload,
+    complete_upload,
+    receive_direct_upload,
+    start_upload,
+    write_chunk,
 )
-from .services import create_submission, update_submission_status
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_etags(header: str) -> set[str]:
+    return {tag.strip() for tag in header.split(',')}
+
+
+def _schema_response(response, schema):
+    response['ETag'] = schema.etag
+    response['X-Schema-Version'] = str(schema.schema_version)
+    # Shared caches may keep it, but must revalidate so schema edits show up at once
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
+
 class FormViewSet(viewsets.ModelViewSet):
     # Disable throttling for public read endpoints
     throttle_classes = []
@@ -40,20 +83,118 @@ class FormViewSet(viewsets.ModelViewSet):
     lookup_field = 'slug'
     permission_classes = [IsAdminUserOrReadOnly]
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Staff get the live form (inactive forms, submission counts). Everyone
+        else is served pre-serialized JSON from the schema cache, with a strong
+        ETag so repeat loads can be answered with 304 Not Modified.
+        """
+        if request.user.is_authenticated and request.user.is_staff:
+            return super().retrieve(request, *args, **kwargs)
+
+        slug = kwargs[self.lookup_field]
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            pointer = get_schema_etag(slug)
+            if pointer is not None and pointer.etag in _parse_etags(if_none_match):
+                return _schema_response(HttpResponseNotModified(), pointer)
+
+        schema = get_public_schema(slug)
+        if schema is None:
+            raise Http404
+        if if_none_match and schema.etag in _parse_etags(if_none_match):
+            return _schema_response(HttpResponseNotModified(), schema)
+        return _schema_response(HttpResponse(schema.body, content_type='application/json'), schema)
+
     def get_queryset(self):
-        qs = Form.objects.prefetch_related('fields').annotate(submission_count=Count('submissions'))
+        # submission_count is a denormalized column; the exact aggregate (a
+        # GROUP BY over the submissions table) is only run for staff who ask
+        # for it with ?exact_counts=true.
+        qs = Form.objects.prefetch_related('fields')
         # request.user is typed as AbstractBaseUser by django-stubs, which lacks
         # is_staff. We import CustomUser for the cast so Pyrefly resolves it correctly.
         from users.models import CustomUser
         user = cast(CustomUser | None, self.request.user if self.request.user.is_authenticated else None)
         if not (user and user.is_staff):
-            qs = qs.filter(is_active=True)
+            return qs.filter(is_active=True)
+        if self.request.query_params.get('exact_counts', '').lower() in ('1', 'true', 'yes'):
+            # Meta.ordering does not survive the GROUP BY; restate it so pages stay stable
+            qs = qs.annotate(
+                exact_submission_count=Count('submissions', filter=Q(submissions__is_deleted=False)),
+            ).order_by('-created_at', 'id')
         return qs
 
     def perform_create(self, serializer):
         form = serializer.save()
         logger.info('Form created: %s (slug=%s) by %s', form.name, form.slug, self.request.user)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='file_format', type=OpenApiTypes.STR, enum=['csv', 'ndjson', 'xlsx'],
+                             description='Output format (default csv)'),
+            OpenApiParameter(name='status', type=OpenApiTypes.STR,
+                             description='Comma-separated statuses to include'),
+            OpenApiParameter(name='created_after', type=OpenApiTypes.STR,
+                             description='ISO date/datetime, inclusive'),
+            OpenApiParameter(name='created_before', type=OpenApiTypes.STR,
+                             description='ISO date/datetime, exclusive'),
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY},
+    )
+    @action(detail=True, methods=['get'], url_path='submissions/export', permission_classes=[IsAdminUser])
+    def export_submissions(self, request, slug=None):
+        """Stream every submission of this form as CSV, NDJSON or XLSX (see exports.py)."""
+        form = self.get_object()
+        try:
+            export = SubmissionExport.from_request(
+                form, request.query_params, accept_encoding=request.headers.get('Accept-Encoding', ''),
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(export.stream(), content_type=export.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{export.filename}"'
+        response['Vary'] = 'Accept-Encoding'
+        if export.gzip:
+            response['Content-Encoding'] = 'gzip'
+        logger.info('Export of form %s (%s) started by %s', form.slug, export.file_format, request.user)
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='source', type=OpenApiTypes.STR,
+                             description='Where the batch came from, e.g. the partner file name'),
+        ],
+        request={
+            'application/json': {'type': 'array', 'items': {'type': 'object'}},
+            'application/x-ndjson': OpenApiTypes.BINARY,
+        },
+        responses={201: SubmissionBatchResultSerializer, 400: SubmissionBatchResultSerializer},
+    )
+    @action(detail=True, methods=['post'], url_path='submissions/bulk', permission_classes=[IsAdminUser],
+            parser_classes=[JSONParser, NDJSONParser])
+    def bulk_submissions(self, request, slug=None):
+        """
+        Create many submissions at once from a JSON array or NDJSON body (see ingest.py).
+        Returns per-row results; 400 only if no row could be stored.
+        """
+        form = self.get_object()
+        if not isinstance(request.data, list):
+            return Response({'detail': 'Expected a JSON array or NDJSON body of rows.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = ingest_submissions(
+                form=form, rows=request.data, submitted_by=request.user,
+                source=request.query_params.get('source', ''),
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            SubmissionBatchResultSerializer(result).data,
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_400_BAD_REQUEST,
+        )
+
 
 @extend_schema(parameters=[
     OpenApiParameter(name='form_slug', type=OpenApiTypes.STR, location=OpenApiParameter.PATH, description='Slug of the parent Form'),
@@ -76,6 +217,21 @@ class FieldViewSet(viewsets.ModelViewSet):
 from rest_framework.throttling import AnonRateThrottle
 
 
+def _upload_denied(request, submission):
+    """Only the submitter or an admin may upload files to a submission."""
+    if not request.user.is_authenticated:
+        return Response(
+            {'detail': 'Authentication required to upload files.'},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if submission.submitted_by != request.user and not getattr(request.user, 'is_staff', False):
+        return Response(
+            {'detail': 'You can only upload files to your own submissions.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+    return None
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class SubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = SubmissionSerializer
@@ -91,7 +247,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action == 'create':
             return [AllowAny()]
-        if self.action == 'upload_file':
+        if self.action in ('upload_file', 'start_upload'):
             return [IsAuthenticated()]
         return [IsAdminUser()]
 
@@ -106,26 +262,48 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         # Set the instance so DRF returns the created object
         serializer.instance = submission
 
+    def perform_update(self, serializer):
+        submission = serializer.save()
+        index_submissions([submission])
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, required=True,
+                             description='Words or numbers to find; every term must match (as a prefix)'),
+            OpenApiParameter(name='form', type=OpenApiTypes.STR, description='Form slug'),
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, description='Comma-separated statuses'),
+            OpenApiParameter(name='limit', type=OpenApiTypes.INT,
+                             description=f'Results to return (default {DEFAULT_LIMIT}, max {MAX_LIMIT})'),
+        ],
+        responses=SubmissionSearchResultSerializer(many=True),
+    )
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """Ranked search over response values and field labels (see search.py)."""
+        params = request.query_params
+        scope = Submission.objects.all()
+        try:
+            if params.get('form'):
+                scope = scope.filter(form__slug=params['form'])
+            scope = scope.filter(**parse_filters({'status': params.get('status', '')}))
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+            found = search_submissions(params.get('q', ''), scope=scope, limit=limit)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        for submission, rank in found:
+            submission.search_rank = rank
+        results = [submission for submission, _ in found]
+        serializer = SubmissionSearchResultSerializer(results, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
     @action(detail=True, methods=['post'], url_path='upload',
-            parser_classes=[MultiPartParser, FormParser])
+            parser_classes=[CheckedMultiPartParser, FormParser])
     def upload_file(self, request, pk=None):
         submission = self.get_object()
-
-        # Ownership check: only the submitter or admin can upload files
-        if request.user.is_authenticated:
-            is_owner = submission.submitted_by == request.user
-            is_admin = getattr(request.user, 'is_staff', False)
-            if not is_owner and not is_admin:
-                return Response(
-                    {'detail': 'You can only upload files to your own submissions.'},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
-        else:
-            # Anonymous users cannot upload files
-            return Response(
-                {'detail': 'Authentication required to upload files.'},
-                status=status.HTTP_401_UNAUTHORIZED,
-            )
+        denied = _upload_denied(request, submission)
+        if denied:
+            return denied
 
         files = request.FILES.getlist('file')
         field_key = request.data.get('field_key', '')
@@ -135,37 +313,240 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         if not field_key:
             return Response({'detail': 'field_key is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        from django.conf import settings as django_settings
-        max_size = getattr(django_settings, 'MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
-        allowed_types = getattr(django_settings, 'ALLOWED_UPLOAD_CONTENT_TYPES', [])
-
+        # Size and type (sniffed from the content) were checked by CheckedUploadHandler as the files streamed in
         created = []
         for f in files:
-            if f.size > max_size:
-                return Response(
-                    {'detail': f'File "{f.name}" exceeds maximum size of {max_size // (1024 * 1024)}MB.'},
-                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                )
-            if allowed_types and (f.content_type or '') not in allowed_types:
-                return Response(
-                    {'detail': f'File type "{f.content_type}" is not allowed. Accepted: {", ".join(allowed_types)}'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            fu = FileUpload.objects.create(
-                submission=submission, field_key=field_key, file=f,
-                original_filename=f.name, content_type=f.content_type or '', file_size=f.size,
+            fu = create_file_upload(
+                submission=submission, field_key=field_key, content=f, filename=f.name,
+                content_type=f.content_type, sha256=f.sha256, size=f.size, meta=f.meta,
             )
-            created.append(FileUploadSerializer(fu).data)
+            created.append(FileUploadSerializer(fu, context={'request': request}).data)
 
         logger.info('%d file(s) uploaded to submission %s (field=%s)', len(created), submission.id, field_key)
         return Response(created, status=status.HTTP_201_CREATED)
 
+    @extend_schema(request=UploadSessionStartSerializer, responses={201: UploadSessionSerializer})
+    @action(detail=True, methods=['post'], url_path='uploads')
+    def start_upload(self, request, pk=None):
+        """Open a resumable upload (see uploads.py); send the bytes to /api/uploads/<id>/chunk/."""
+        submission = self.get_object()
+        denied = _upload_denied(request, submission)
+        if denied:
+            return denied
+
+        serializer = UploadSessionStartSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = start_upload(
+                submission=submission, uploaded_by=request.user,
+                field_key=serializer.validated_data['field_key'],
+                filename=serializer.validated_data['filename'],
+                content_type=serializer.validated_data['content_type'],
+                total_size=serializer.validated_data['size'],
+                method=serializer.validated_data['method'],
+            )
+        except UploadTooLarge as e:
+            return Response({'detail': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(session, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['patch'], url_path='status', permission_classes=[IsAdminUser])
     def update_status(self, request, pk=None):
-        submission = self.get_queryset().select_for_update().get(pk=pk)
         new_status = request.data.get('status')
         try:
-            submission = update_submission_status(submission=submission, new_status=new_status)
+            # The row lock keeps the status the state machine checks current until the UPDATE
+            with transaction.atomic():
+                submission = get_object_or_404(Submission.objects.select_for_update(), pk=pk)
+                submission = update_submission_status(
+                    submission=submission, new_status=new_status, changed_by=request.user,
+                )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(SubmissionSerializer(submission, context=self.get_serializer_context()).data)
+
+    @extend_schema(request=BulkStatusUpdateSerializer, responses=BulkStatusResultSerializer)
+    @action(detail=False, methods=['post'], url_path='bulk-status', permission_classes=[IsAdminUser])
+    def bulk_status(self, request):
+        """
+        Move many submissions to one status, by ``ids`` or by ``filter``.
+        Submissions whose current status does not allow the move are reported, not changed.
+        """
+        serializer = BulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        submissions = Submission.objects.all()
+        try:
+            if 'ids' in data:
+                submissions = submissions.filter(pk__in=data['ids'])
+            else:
+                criteria = dict(data['filter'])
+                if criteria.get('form'):
+                    submissions = submissions.filter(form__slug=criteria['form'])
+                submissions = submissions.filter(**parse_filters(criteria))
+            result = bulk_update_submission_status(
+                submissions=submissions, new_status=data['status'], changed_by=request.user,
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = {*result.updated, *result.unchanged, *(pk for pk, *_ in result.not_allowed)}
+        result.not_found = [pk for pk in dict.fromkeys(data.get('ids', ())) if pk not in found]
+        return Response(BulkStatusResultSerializer(result).data)
+
+
+def _file_chunks(field_file):
+    with field_file.open('rb') as handle:
+        yield from handle.chunks()
+
+
+class ExportJobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                       mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Background exports (see export_jobs.py). POST queues a job and returns 202.
+    Poll GET /api/exports/<id>/ for progress, then fetch /download/.
+    Staff only see their own jobs.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user).select_related('form')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = {
+            **serializer.validated_data.get('filters', {}),
+            'file_format': serializer.validated_data.get('file_format', 'csv'),
+        }
+        try:
+            job = start_export_job(
+                form=serializer.validated_data['form'], requested_by=request.user, params=params,
+            )
         except ValueError as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        return Response(SubmissionSerializer(submission).data)
\ No newline at end of file
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(request=None, responses=ExportJobSerializer)
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        try:
+            job = cancel_export_job(self.get_object())
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(job).data)
+
+    @extend_schema(responses={(200, 'application/octet-stream'): OpenApiTypes.BINARY})
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != 'completed' or not job.file:
+            return Response({'detail': f'Export job is {job.status}.'}, status=status.HTTP_409_CONFLICT)
+
+        response = StreamingHttpResponse(
+            iterate_in_thread(_file_chunks(job.file)), content_type=FORMATS[job.file_format][0],
+        )
+        filename = f'{job.form.slug}-submissions-{job.created_at:%Y%m%d}.{job.file_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if job.file_size is not None:
+            response['Content-Length'] = str(job.file_size)
+        return response
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Resumable uploads (see uploads.py), opened with POST /api/submissions/<id>/uploads/.
+    PUT each chunk's raw bytes to /chunk/?offset=N, then POST /complete/.
+    GET shows ``received``, the offset to resume from. DELETE abandons the
+    upload. Users only see their own uploads.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(uploaded_by=self.request.user).select_related('file_upload')
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            cancel_upload(self.get_object())
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(
+        request={'application/offset+octet-stream': OpenApiTypes.BINARY},
+        parameters=[OpenApiParameter(name='offset', type=OpenApiTypes.INT, required=True,
+                                     description='Byte offset of this chunk; must equal `received`')],
+        responses=UploadSessionSerializer,
+    )
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        session = self.get_object()
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response({'detail': 'offset must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        length = request.META.get('CONTENT_LENGTH')
+        if not length:
+            return Response({'detail': 'Content-Length is required.'}, status=status.HTTP_411_LENGTH_REQUIRED)
+
+        try:
+            # request.stream reads the socket as we go; request.data / request.body would buffer the chunk
+            session = write_chunk(session, offset=offset, length=int(length), stream=request.stream)
+        except UploadOffsetMismatch as e:
+            return Response({'detail': str(e), 'received': e.received}, status=status.HTTP_409_CONFLICT)
+        except UploadTooLarge as e:
+            return Response({'detail': str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(session).data)
+
+    @extend_schema(request=None, responses={201: FileUploadSerializer})
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        try:
+            file_upload = complete_upload(self.get_object())
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(FileUploadSerializer(file_upload, context={'request': request}).data,
+                        status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'PUT'])
+def signed_transfer(request, token):
+    """
+    Local stand-in for an object store's signed URLs (transfers.py). The
+    signed token is the only credential: no session, JWT or DRF machinery
+    runs, and with an object-store backend this view is not used at all.
+    """
+    transfers = get_transfers()
+    if not isinstance(transfers, LocalSignedTransfers):
+        raise Http404
+    try:
+        grant = transfers.verify(token, 'put' if request.method == 'PUT' else 'get')
+    except TransferDenied as e:
+        return JsonResponse({'detail': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+    if request.method == 'PUT':
+        length = request.META.get('CONTENT_LENGTH')
+        if not length:
+            return JsonResponse({'detail': 'Content-Length is required.'}, status=status.HTTP_411_LENGTH_REQUIRED)
+        try:
+            # Read from the socket in blocks; request.body would buffer the whole file
+            receive_direct_upload(grant, request, int(length))
+        except UploadClosed as e:
+            return JsonResponse({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except ValueError as e:
+            return JsonResponse({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        stored = transfers.open(grant)
+    except FileNotFoundError:
+        raise Http404 from None
+    filename = grant.get('filename', '')
+    return FileResponse(stored, as_attachment=bool(filename), filename=filename or grant['name'].rsplit('/', 1)[-1])
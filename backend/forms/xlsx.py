@@ -0,0 +1,142 @@
+# backend/forms/xlsx.py
+"""
+Minimal streaming XLSX writer (standard library only).
+
+An .xlsx file is a zip of XML parts. ``zipfile`` can write entries to a
+non-seekable stream, using data descriptors instead of seeking back to patch
+in sizes. So rows are deflated as they are written, and ``take()`` hands back
+whatever bytes are ready. Only one row batch is ever held in memory. The
+workbook parts that list the sheets are written last. A sheet that reaches
+Excel's row limit is closed and continued on a new one.
+
+Cells are inline strings or numbers; no styles, formulas or shared strings.
+"""
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+MAX_ROWS = 1_048_576  # per sheet, header included
+MAX_CELL_CHARS = 32_767
+
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_SHEET_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = b'</sheetData></worksheet>'
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"'
+    ' Target="xl/workbook.xml"/></Relationships>'
+)
+
+
+class _Sink:
+    """Write-only file object; ``zipfile`` treats it as unseekable."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = _ILLEGAL_XML.sub('', '' if value is None else str(value))[:MAX_CELL_CHARS]
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+class XlsxStreamWriter:
+
+    def __init__(self, header: list[str], *, sheet_name: str = 'Sheet'):
+        self.header = header
+        self.sheet_name = sheet_name[:28]  # leaves room for a " N" suffix within Excel's 31
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, mode='w', compression=zipfile.ZIP_DEFLATED)
+        self._sheets = 0
+        self._entry = None
+        self._rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self) -> None:
+        if self._entry is not None:
+            self._entry.write(_SHEET_TAIL)
+            self._entry.close()
+        self._sheets += 1
+        # force_zip64: the entry's size is unknown up front and may pass 4 GiB
+        self._entry = self._zip.open(f'xl/worksheets/sheet{self._sheets}.xml', mode='w', force_zip64=True)
+        self._entry.write(_SHEET_HEAD)
+        self._rows = 0
+        self._write(self.header)
+
+    def _write(self, values) -> None:
+        self._entry.write(('<row>' + ''.join(_cell(value) for value in values) + '</row>').encode())
+        self._rows += 1
+
+    def write_row(self, values) -> None:
+        if self._rows >= MAX_ROWS:
+            self._new_sheet()
+        self._write(values)
+
+    def take(self) -> bytes:
+        """Bytes of the file produced since the last call."""
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        """Finish the workbook; returns the remaining bytes."""
+        self._entry.write(_SHEET_TAIL)
+        self._entry.close()
+
+        names = [self.sheet_name] + [f'{self.sheet_name} {n}' for n in range(2, self._sheets + 1)]
+        sheets = ''.join(
+            f'<sheet name={quoteattr(name)} sheetId="{n}" r:id="rId{n}"/>'
+            for n, name in enumerate(names, start=1)
+        )
+        relationships = ''.join(
+            f'<Relationship Id="rId{n}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>'
+            for n in range(1, self._sheets + 1)
+        )
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in range(1, self._sheets + 1)
+        )
+        self._zip.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+            ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ))
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}</Relationships>'
+        ))
+        self._zip.writestr('_rels/.rels', _RELS)
+        self._zip.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml"'
+            ' ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            f'{overrides}</Types>'
+        ))
+        self._zip.close()
+        return self._sink.take()
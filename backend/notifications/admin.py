@@ -1,10 +1,64 @@
 # backend/notifications/admin.py
 from django.contrib import admin
-from .models import Notification
+from django.db.models import Count
+
+from .models import EscalationChunk, EscalationRun, Notification, NotificationMessage, QueuedEmail
+
+
+@admin.register(NotificationMessage)
+class NotificationMessageAdmin(admin.ModelAdmin):
+    list_display = ('title', 'type', 'related_submission', 'receipt_count', 'created_at')
+    list_filter = ('type', 'created_at')
+    search_fields = ('title', 'body')
+    readonly_fields = ('created_at',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(receipt_total=Count('receipts'))
+
+    @admin.display(description='Recipients', ordering='receipt_total')
+    def receipt_count(self, obj):
+        return obj.receipt_total
+
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'type', 'user', 'is_read', 'created_at')
-    list_filter = ('type', 'is_read', 'created_at')
-    search_fields = ('title', 'message', 'user__email')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    list_display = ('message', 'user', 'is_read', 'created_at')
+    list_filter = ('message__type', 'is_read', 'created_at')
+    search_fields = ('message__title', 'user__email')
+    list_select_related = ('message', 'user')
+    raw_id_fields = ('message',)
+    readonly_fields = ('created_at',)
+
+
+class EscalationChunkInline(admin.TabularInline):
+    model = EscalationChunk
+    extra = 0
+    can_delete = False
+    fields = ('index', 'status', 'start_after', 'end_at', 'last_processed_id', 'escalated_count', 'attempts', 'updated_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EscalationRun)
+class EscalationRunAdmin(admin.ModelAdmin):
+    list_display = ('run_date', 'status', 'chunk_count', 'escalated_count', 'created_at', 'completed_at')
+    list_filter = ('status',)
+    readonly_fields = ('run_date', 'status', 'staff_ids', 'chunk_count', 'escalated_count', 'created_at', 'completed_at')
+    inlines = [EscalationChunkInline]
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('attempts', 'last_error', 'claimed_at', 'created_at', 'sent_at')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        from django.utils.timezone import now
+        updated = queryset.exclude(status='sent').update(status='queued', next_attempt_at=now(), attempts=0)
+        self.message_user(request, f'{updated} email(s) re-queued.')
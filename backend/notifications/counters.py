@@ -0,0 +1,58 @@
+# backend/notifications/counters.py
+"""
+Per-user unread notification counts, kept in the Django cache.
+
+    notifications:unread:<user_id>  -> int
+
+A miss is filled from the database (one indexed COUNT on
+``notif_user_read_idx``). Fan-out increments the counters of users who have
+one, after the transaction commits. Mark-all-read sets the counter to zero,
+and marking a single receipt drops it. Any drift, for example from a race
+between a miss and a concurrent increment, is bounded by
+``NOTIFICATION_UNREAD_CACHE_TIMEOUT``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+
+def _key(user_id) -> str:
+    return f'notifications:unread:{user_id}'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 5 * 60)
+
+
+def unread_count(user_id) -> int:
+    count = cache.get(_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(_key(user_id), count, timeout=_timeout())
+    return count
+
+
+def _increment(counts: dict) -> None:
+    for user_id, delta in counts.items():
+        try:
+            cache.incr(_key(user_id), delta)
+        except ValueError:
+            # Not cached: the next read counts from the database
+            pass
+
+
+def increment_unread(counts: dict) -> None:
+    """Add ``{user_id: new_receipts}`` to cached counters once the transaction commits."""
+    if counts:
+        transaction.on_commit(lambda: _increment(counts))
+
+
+def reset_unread(user_id) -> None:
+    """Every receipt is read: the count is known without a query."""
+    transaction.on_commit(lambda: cache.set(_key(user_id), 0, timeout=_timeout()))
+
+
+def invalidate_unread(user_id) -> None:
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
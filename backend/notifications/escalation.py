@@ -0,0 +1,288 @@
+# backend/notifications/escalation.py
+"""
+Set-based escalation engine behind ``tasks.check_escalating_alerts``.
+
+The target escalation level is computed in SQL (a CASE over ``due_date``
+against the run date's thresholds), so only submissions whose stored
+``escalation_level`` is below their target are ever read. Each batch is then
+applied with one UPDATE per level, one penalty UPDATE and a bulk fan-out of
+notifications (one shared message per submission, one receipt per user).
+
+A daily sweep is an ``EscalationRun`` split into keyset chunks by submission
+id (``plan_chunks``). Chunks are processed independently — in-process by
+``run_escalations`` or fanned out as a Celery chord by the task — and commit
+a checkpoint with every batch, so a crashed run resumes where it stopped.
+``EscalationReminder`` rows are the idempotency key per (submission, level):
+a retried batch never notifies anyone twice.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils.timezone import localtime, now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_BATCH_SIZE = 250
+
+# Statuses that no longer need chasing
+CLOSED_STATUSES = ('rejected', 'approved')
+
+
+def chunk_size_setting() -> int:
+    return getattr(settings, 'ESCALATION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def batch_size_setting() -> int:
+    return getattr(settings, 'ESCALATION_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+
+def escalation_thresholds():
+    from .tasks import ESCALATION_THRESHOLDS
+    return ESCALATION_THRESHOLDS
+
+
+def target_level_expression(today: date) -> Case:
+    """CASE mapping ``due_date`` to the highest threshold crossed as of ``today``."""
+    whens = [
+        When(due_date__lte=today - timedelta(days=threshold_days), then=Value(level))
+        for threshold_days, level, _, _ in sorted(escalation_thresholds(), reverse=True)
+    ]
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def pending_escalations(today: date):
+    """Open submissions whose stored escalation level is behind their target."""
+    from forms.models import Submission
+
+    return (
+        Submission.objects
+        .filter(due_date__isnull=False, is_deleted=False)
+        .exclude(status__in=CLOSED_STATUSES)
+        .annotate(target_level=target_level_expression(today))
+        .filter(escalation_level__lt=F('target_level'))
+    )
+
+
+@dataclass
+class EscalationContext:
+    """State shared by every batch of one run."""
+    today: date
+    timestamp: object
+    staff_ids: list = field(default_factory=list)
+    run_id: object = None
+
+    @classmethod
+    def for_run(cls, run) -> 'EscalationContext':
+        to_pk = get_user_model()._meta.pk.to_python
+        staff_ids = [to_pk(pk) for pk in run.staff_ids]
+        return cls(today=run.run_date, timestamp=now(), staff_ids=staff_ids, run_id=run.pk)
+
+
+def escalate_chunk(rows: list[dict], context: EscalationContext) -> int:
+    """
+    Apply escalations for ``rows`` (dicts from ``pending_escalations().values(...)``)
+    in one transaction. Returns the number of submissions escalated.
+
+    Levels and penalties are always brought up to date; notifications and
+    emails only go out for (submission, level) pairs that have no
+    ``EscalationReminder`` yet.
+    """
+    from forms.models import Submission
+    from .mail import queue_emails, request_dispatch
+    from .models import EscalationReminder
+    from .services import Outgoing, fan_out_many
+    from .tasks import escalation_email
+
+    if not rows:
+        return 0
+
+    levels = {level: (title, body) for _, level, title, body in escalation_thresholds()}
+    ids_by_level = defaultdict(list)
+    for row in rows:
+        ids_by_level[row['target_level']].append(row['id'])
+
+    with transaction.atomic():
+        for level, ids in ids_by_level.items():
+            # The escalation_level guard keeps a concurrent/retried run from double-applying
+            Submission.objects.filter(pk__in=ids, escalation_level__lt=level).update(
+                escalation_level=level,
+                last_reminder_sent_at=context.timestamp,
+                updated_at=context.timestamp,
+            )
+
+        penalty_ids = [row['id'] for row in rows if row['target_level'] >= 3]
+        if penalty_ids:
+            penalised = Submission.objects.filter(
+                pk__in=penalty_ids, penalty_applied_at__isnull=True,
+            ).update(penalty_applied_at=context.timestamp)
+            if penalised:
+                logger.debug("Penalty applied to %d submission(s)", penalised)
+
+        already_sent = set(
+            EscalationReminder.objects
+            .filter(submission_id__in=[row['id'] for row in rows])
+            .values_list('submission_id', 'level')
+        )
+        rows = [row for row in rows if (row['id'], row['target_level']) not in already_sent]
+        # The unique (submission, level) constraint is the backstop if two workers race
+        EscalationReminder.objects.bulk_create([
+            EscalationReminder(submission_id=row['id'], level=row['target_level'], run_id=context.run_id)
+            for row in rows
+        ])
+
+        outgoing = []
+        for row in rows:
+            title, body = levels[row['target_level']]
+            days_overdue = (context.today - row['due_date']).days
+            message = (
+                f'Form: {row["form__name"]}\n'
+                f'Submission: {row["id"]}\n'
+                f'Due date: {row["due_date"]}\n'
+                f'Days overdue: {days_overdue}\n\n'
+                f'{body}'
+            )
+            recipients = list(context.staff_ids)
+            if row['submitted_by_id']:
+                recipients.append(row['submitted_by_id'])
+            outgoing.append(Outgoing(
+                type='submission',
+                title=f'[Escalation] {title}',
+                body=message,
+                user_ids=recipients,
+                related_submission_id=row['id'],
+            ))
+        # One shared message per submission, one receipt per recipient
+        fan_out_many(outgoing)
+
+        emails = []
+        for row in rows:
+            if not row['submitted_by__email']:
+                continue
+            title, body = levels[row['target_level']]
+            subject, message = escalation_email(
+                row['form__name'], str(row['id']), title, body,
+                str(row['due_date']), (context.today - row['due_date']).days,
+            )
+            emails.append((subject, message, [row['submitted_by__email']]))
+        if emails:
+            # Queued in the same transaction; sent in batches once it commits
+            queue_emails(emails)
+            request_dispatch()
+
+    return sum(len(ids) for ids in ids_by_level.values())
+
+
+ROW_FIELDS = ('id', 'target_level', 'due_date', 'form__name', 'submitted_by_id', 'submitted_by__email')
+
+
+# ── Runs and chunks ─────────────────────────────────────────────────────────
+
+def plan_chunks(run, *, chunk_size: int) -> list:
+    """Split the run's candidates into keyset ranges of ``chunk_size`` ids."""
+    from .models import EscalationChunk
+
+    ids = pending_escalations(run.run_date).order_by('pk').values_list('pk', flat=True)
+    chunks = []
+    start_after = None
+    while True:
+        remaining = ids if start_after is None else ids.filter(pk__gt=start_after)
+        # The chunk_size-th id closes a full chunk; otherwise the last one closes the tail
+        end_at = remaining[chunk_size - 1:chunk_size].first() or remaining.order_by('-pk').first()
+        if end_at is None:
+            break
+        chunks.append(EscalationChunk(run=run, index=len(chunks), start_after=start_after, end_at=end_at))
+        start_after = end_at
+    EscalationChunk.objects.bulk_create(chunks)
+    return chunks
+
+
+def start_run(*, chunk_size: int | None = None):
+    """
+    Get or create today's run and return it with the ids of its unfinished
+    chunks. A new run is planned; an interrupted one is resumed as is.
+    """
+    from .models import EscalationRun
+
+    User = get_user_model()
+    with transaction.atomic():
+        run, created = EscalationRun.objects.get_or_create(
+            run_date=localtime().date(),
+            defaults={'staff_ids': [str(pk) for pk in User.objects.filter(is_staff=True).values_list('pk', flat=True)]},
+        )
+        # Serialise concurrent triggers so only one of them plans the chunks
+        run = EscalationRun.objects.select_for_update().get(pk=run.pk)
+        if created:
+            chunks = plan_chunks(run, chunk_size=chunk_size or chunk_size_setting())
+            run.chunk_count = len(chunks)
+            run.save(update_fields=['chunk_count'])
+            logger.info("Escalation run %s planned with %d chunk(s)", run.run_date, run.chunk_count)
+        elif run.status == 'running':
+            logger.info("Resuming escalation run %s", run.run_date)
+        pending = list(run.chunks.filter(status='pending').values_list('pk', flat=True))
+    return run, pending
+
+
+def process_chunk(chunk_id, *, batch_size: int | None = None) -> int:
+    """Escalate one chunk, committing a checkpoint after every batch."""
+    from .models import EscalationChunk
+
+    chunk = EscalationChunk.objects.select_related('run').get(pk=chunk_id)
+    if chunk.status == 'completed':
+        return 0
+    EscalationChunk.objects.filter(pk=chunk.pk).update(attempts=F('attempts') + 1)
+
+    context = EscalationContext.for_run(chunk.run)
+    candidates = (
+        pending_escalations(context.today)
+        .filter(pk__lte=chunk.end_at)
+        .order_by('pk')
+        .values(*ROW_FIELDS)
+    )
+    batch_size = batch_size or batch_size_setting()
+    cursor = chunk.last_processed_id or chunk.start_after
+    escalated = 0
+    while True:
+        page = candidates if cursor is None else candidates.filter(pk__gt=cursor)
+        rows = list(page[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            count = escalate_chunk(rows, context)
+            cursor = rows[-1]['id']
+            EscalationChunk.objects.filter(pk=chunk.pk).update(
+                last_processed_id=cursor,
+                escalated_count=F('escalated_count') + count,
+            )
+        escalated += count
+
+    EscalationChunk.objects.filter(pk=chunk.pk).update(status='completed')
+    return escalated
+
+
+def finish_run(run_id):
+    """Mark the run completed once every chunk is; returns the run."""
+    from .models import EscalationRun
+
+    run = EscalationRun.objects.get(pk=run_id)
+    if run.status != 'completed' and not run.chunks.filter(status='pending').exists():
+        run.escalated_count = run.chunks.aggregate(total=Sum('escalated_count'))['total'] or 0
+        run.status = 'completed'
+        run.completed_at = now()
+        run.save(update_fields=['escalated_count', 'status', 'completed_at'])
+        logger.info("Escalation run %s completed: %d escalated", run.run_date, run.escalated_count)
+    return run
+
+
+def run_escalations(*, chunk_size: int | None = None) -> int:
+    """Run (or resume) today's sweep in this process; returns the run's escalation count."""
+    run, pending = start_run(chunk_size=chunk_size)
+    for chunk_id in pending:
+        process_chunk(chunk_id)
+    return finish_run(run.pk).escalated_count
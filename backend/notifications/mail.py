@@ -0,0 +1,188 @@
+# backend/notifications/mail.py
+"""
+Batching mail dispatcher.
+
+Code that wants to send email queues a ``QueuedEmail`` row (``queue_email`` /
+``queue_emails``) — ideally inside the transaction that produced it — and
+calls ``request_dispatch()``. ``dispatch_queued_emails`` drains due rows in
+batches: each batch is claimed, sent over ONE backend connection
+(``get_connection()`` + ``send_messages``) and settled per message, so a
+rejected address is retried with backoff on its own while the rest of the
+batch is marked sent.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+from smtplib import SMTPDataError, SMTPRecipientsRefused, SMTPSenderRefused
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF = 60  # seconds; doubled after every failed attempt
+# Errors that reject one message but leave the SMTP session usable
+MESSAGE_ERRORS = (SMTPRecipientsRefused, SMTPSenderRefused, SMTPDataError)
+# A row left in 'sending' this long belongs to a dead worker and is reclaimed
+STALE_CLAIM_AFTER = timedelta(minutes=10)
+
+
+def _setting(name: str, default: int) -> int:
+    return getattr(settings, name, default)
+
+
+def _from_email() -> str:
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@actserv.local')
+
+
+def queue_email(*, subject: str, body: str, recipients: list[str], from_email: str = '') -> QueuedEmail:
+    return QueuedEmail.objects.create(
+        subject=subject, body=body, recipients=list(recipients), from_email=from_email,
+    )
+
+
+def queue_emails(messages) -> list[QueuedEmail]:
+    """Queue many ``(subject, body, recipients)`` tuples with one INSERT."""
+    return QueuedEmail.objects.bulk_create([
+        QueuedEmail(subject=subject, body=body, recipients=list(recipients))
+        for subject, body, recipients in messages
+    ])
+
+
+def request_dispatch() -> None:
+    """Ask a worker to drain the queue once the current transaction commits."""
+    from .tasks import dispatch_email_queue
+
+    def _enqueue():
+        try:
+            dispatch_email_queue.delay()
+        except Exception:
+            # The rows are safely queued; the periodic dispatch will pick them up
+            logger.exception("Could not enqueue email dispatch")
+
+    transaction.on_commit(_enqueue)
+
+
+@dataclass
+class DispatchResult:
+    batches: int = 0
+    sent: int = 0
+    retrying: int = 0
+    failed: int = 0
+
+
+def claim_batch(batch_size: int) -> list[QueuedEmail]:
+    """Atomically mark up to ``batch_size`` due rows as 'sending' and return them."""
+    timestamp = now()
+    due = (
+        Q(status='queued', next_attempt_at__lte=timestamp)
+        | Q(status='sending', claimed_at__lt=timestamp - STALE_CLAIM_AFTER)
+    )
+    with transaction.atomic():
+        # skip_locked lets several dispatchers drain the queue side by side
+        ids = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('next_attempt_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        QueuedEmail.objects.filter(pk__in=ids).update(
+            status='sending', claimed_at=timestamp, attempts=F('attempts') + 1,
+        )
+    return list(QueuedEmail.objects.filter(pk__in=ids))
+
+
+def send_batch(emails: list[QueuedEmail], connection=None) -> tuple[list, dict]:
+    """
+    Send ``emails`` over a single connection. Returns ``(sent_ids, {id: error})``.
+
+    A message the server rejects is recorded and skipped; any other error
+    means the session is gone, so it is reopened once for the remainder.
+    """
+    connection = connection or get_connection(fail_silently=False)
+    sent, errors = [], {}
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("Could not open mail connection: %s", exc)
+        return sent, {email.pk: exc for email in emails}
+
+    try:
+        for position, email in enumerate(emails):
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or _from_email(),
+                to=email.recipients,
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+                sent.append(email.pk)
+            except MESSAGE_ERRORS as exc:
+                errors[email.pk] = exc
+            except Exception as exc:
+                errors[email.pk] = exc
+                connection.close()
+                try:
+                    connection.open()
+                except Exception as reopen_exc:
+                    logger.warning("Mail connection lost: %s", reopen_exc)
+                    errors.update((rest.pk, reopen_exc) for rest in emails[position + 1:])
+                    break
+    finally:
+        connection.close()
+    return sent, errors
+
+
+def settle_batch(emails: list[QueuedEmail], sent: list, errors: dict, result: DispatchResult) -> None:
+    timestamp = now()
+    if sent:
+        QueuedEmail.objects.filter(pk__in=sent).update(
+            status='sent', sent_at=timestamp, claimed_at=None, last_error='',
+        )
+        result.sent += len(sent)
+
+    max_attempts = _setting('EMAIL_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    backoff = _setting('EMAIL_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+    retried = []
+    for email in emails:
+        exc = errors.get(email.pk)
+        if exc is None:
+            continue
+        email.last_error = f'{type(exc).__name__}: {exc}'[:2000]
+        email.claimed_at = None
+        if email.attempts >= max_attempts:
+            email.status = 'failed'
+            result.failed += 1
+            logger.error("Giving up on email %s to %s: %s", email.pk, email.recipients, email.last_error)
+        else:
+            email.status = 'queued'
+            email.next_attempt_at = timestamp + timedelta(seconds=backoff * 2 ** (email.attempts - 1))
+            result.retrying += 1
+        retried.append(email)
+    if retried:
+        QueuedEmail.objects.bulk_update(retried, ['status', 'last_error', 'claimed_at', 'next_attempt_at'])
+
+
+def dispatch_queued_emails(*, batch_size: int | None = None, max_batches: int | None = None) -> DispatchResult:
+    """Drain due emails batch by batch until the queue is empty (or ``max_batches``)."""
+    batch_size = batch_size or _setting('EMAIL_DISPATCH_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    result = DispatchResult()
+    while max_batches is None or result.batches < max_batches:
+        emails = claim_batch(batch_size)
+        if not emails:
+            break
+        sent, errors = send_batch(emails)
+        settle_batch(emails, sent, errors, result)
+        result.batches += 1
+    return result
@@ -0,0 +1,34 @@
+# backend/notifications/mail_backends.py
+"""
+Stand-in email backends for tests and local development.
+
+``RecordingEmailBackend`` behaves like Django's locmem backend (messages land
+in ``django.core.mail.outbox``) but also counts opened connections and can be
+told to reject particular recipients, which is what the dispatcher's batching
+and per-message retry tests need. For a file on disk instead, use Django's
+``django.core.mail.backends.filebased.EmailBackend`` with ``EMAIL_FILE_PATH``.
+"""
+from smtplib import SMTPRecipientsRefused
+
+from django.core.mail.backends.locmem import EmailBackend
+
+
+class RecordingEmailBackend(EmailBackend):
+    connections_opened = 0
+    fail_recipients: set[str] = set()
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.connections_opened = 0
+        cls.fail_recipients = set()
+
+    def open(self):
+        type(self).connections_opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            refused = {address: (550, b'rejected') for address in message.to if address in self.fail_recipients}
+            if refused and not self.fail_silently:
+                raise SMTPRecipientsRefused(refused)
+        return super().send_messages(messages)
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:52
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0008_submission_status_events'),
+        ('notifications', '0003_notification_notif_user_read_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscalationRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('run_date', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=20)),
+                ('staff_ids', models.JSONField(default=list)),
+                ('chunk_count', models.PositiveIntegerField(default=0)),
+                ('escalated_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-run_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EscalationReminder',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('level', models.PositiveSmallIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='escalation_reminders', to='forms.submission')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminders', to='notifications.escalationrun')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('submission', 'level'), name='uniq_escalation_reminder')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EscalationChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('index', models.PositiveIntegerField()),
+                ('start_after', models.UUIDField(blank=True, null=True)),
+                ('end_at', models.UUIDField()),
+                ('last_processed_id', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('escalated_count', models.PositiveIntegerField(default=0)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='notifications.escalationrun')),
+            ],
+            options={
+                'ordering': ['run', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('run', 'index'), name='uniq_escalation_chunk_index')],
+            },
+        ),
+    ]
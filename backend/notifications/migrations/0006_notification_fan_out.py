@@ -0,0 +1,116 @@
+# Split Notification into a shared NotificationMessage (content, stored once)
+# and per-user Notification receipts (user, message, is_read, created_at).
+
+import hashlib
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def split_messages(apps, schema_editor):
+    """Rows from the same fan-out have identical content: give them one shared message."""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationMessage = apps.get_model('notifications', 'NotificationMessage')
+
+    message_ids = {}
+    pending = []
+    rows = (
+        Notification.objects.order_by('created_at')
+        .values_list('id', 'type', 'title', 'message', 'related_submission_id', 'created_at')
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    for pk, type_, title, body, submission_id, created_at in rows:
+        # Hash the body so the lookup table stays small on large tables
+        key = (type_, title, hashlib.sha256(body.encode()).digest(), submission_id)
+        message_id = message_ids.get(key)
+        if message_id is None:
+            message = NotificationMessage.objects.create(
+                type=type_, title=title, body=body, related_submission_id=submission_id,
+            )
+            # auto_now_add ignores the value passed in; keep the original time
+            NotificationMessage.objects.filter(pk=message.pk).update(created_at=created_at)
+            message_id = message_ids[key] = message.pk
+        pending.append(Notification(pk=pk, notification_message_id=message_id))
+        if len(pending) >= BATCH_SIZE:
+            Notification.objects.bulk_update(pending, ['notification_message'])
+            pending = []
+    if pending:
+        Notification.objects.bulk_update(pending, ['notification_message'])
+
+
+def join_messages(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    for receipt in Notification.objects.select_related('notification_message').iterator(chunk_size=BATCH_SIZE):
+        message = receipt.notification_message
+        Notification.objects.filter(pk=receipt.pk).update(
+            type=message.type,
+            title=message.title,
+            message=message.body,
+            related_submission_id=message.related_submission_id,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms', '0009_outbox_messages'),
+        ('notifications', '0005_queued_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationMessage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('submission', 'New Submission'), ('approval', 'Approval Required'), ('rejection', 'Submission Rejected'), ('system', 'System Notification')], max_length=50)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('related_submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='forms.submission')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='notification_message',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationmessage'),
+        ),
+        # Reversible only while the old columns still accept defaults
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(default='system', max_length=50, choices=[('submission', 'New Submission'), ('approval', 'Approval Required'), ('rejection', 'Submission Rejected'), ('system', 'System Notification')]),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(split_messages, join_messages),
+        migrations.RemoveField(model_name='notification', name='type'),
+        migrations.RemoveField(model_name='notification', name='title'),
+        migrations.RemoveField(model_name='notification', name='message'),
+        migrations.RemoveField(model_name='notification', name='related_submission'),
+        migrations.RenameField(model_name='notification', old_name='notification_message', new_name='message'),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationmessage'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Key the notification cursor on a sequence number allocated in commit order
+# (ReceiptSequence) instead of (created_at, id).
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def number_receipts(apps, schema_editor):
+    """Existing receipts are all committed: number them in their old cursor order."""
+    Notification = apps.get_model('notifications', 'Notification')
+    ReceiptSequence = apps.get_model('notifications', 'ReceiptSequence')
+
+    seq = 0
+    pending = []
+    for pk in Notification.objects.order_by('created_at', 'id').values_list('id', flat=True).iterator(
+            chunk_size=BATCH_SIZE):
+        seq += 1
+        pending.append(Notification(pk=pk, seq=seq))
+        if len(pending) >= BATCH_SIZE:
+            Notification.objects.bulk_update(pending, ['seq'])
+            pending = []
+    if pending:
+        Notification.objects.bulk_update(pending, ['seq'])
+    ReceiptSequence.objects.create(pk=1, last_value=seq)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notification_cursor_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='seq',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(number_receipts, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='notification',
+            name='seq',
+            field=models.BigIntegerField(editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'seq'], name='notif_user_seq_idx'),
+        ),
+    ]
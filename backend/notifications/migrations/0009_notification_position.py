@@ -0,0 +1,53 @@
+# Position receipts by (writing transaction, sequence number) so fan-outs on
+# PostgreSQL no longer queue on the single ReceiptSequence row.
+
+from django.db import migrations, models
+
+SEQUENCE = 'notification_receipt_seq'
+
+
+def create_sequence(apps, schema_editor):
+    # Sequences only exist on PostgreSQL; other databases keep ReceiptSequence
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Notification = apps.get_model('notifications', 'Notification')
+    ReceiptSequence = apps.get_model('notifications', 'ReceiptSequence')
+    highest = max(
+        Notification.objects.aggregate(highest=models.Max('seq'))['highest'] or 0,
+        ReceiptSequence.objects.filter(pk=1).values_list('last_value', flat=True).first() or 0,
+    )
+    schema_editor.execute(f'CREATE SEQUENCE {SEQUENCE} START WITH {highest + 1}')
+
+
+def drop_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Notification = apps.get_model('notifications', 'Notification')
+    ReceiptSequence = apps.get_model('notifications', 'ReceiptSequence')
+    highest = Notification.objects.aggregate(highest=models.Max('seq'))['highest'] or 0
+    ReceiptSequence.objects.update_or_create(pk=1, defaults={'last_value': highest})
+    schema_editor.execute(f'DROP SEQUENCE IF EXISTS {SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notification_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='txid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_user_seq_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'txid', 'seq'], name='notif_user_position_idx'),
+        ),
+        migrations.RunPython(create_sequence, drop_sequence),
+    ]
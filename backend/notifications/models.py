@@ -1,29 +1,228 @@
 import uuid
-from django.db import models
+from django.db import connections, models
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django.conf import settings
+from django.utils import timezone
 
-class Notification(models.Model):
+class NotificationMessage(models.Model):
+    """
+    The content of a notification, stored once however many users receive it.
+    Each recipient gets a lightweight ``Notification`` receipt pointing here.
+    """
     NOTIFICATION_TYPES = [
         ('submission', 'New Submission'),
         ('approval', 'Approval Required'),
         ('rejection', 'Submission Rejected'),
         ('system', 'System Notification'),
     ]
-    
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     type = models.CharField(max_length=50, choices=NOTIFICATION_TYPES)
     title = models.CharField(max_length=255)
-    message = models.TextField()
+    body = models.TextField()
     related_submission = models.ForeignKey('forms.Submission', on_delete=models.CASCADE, null=True, blank=True)
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.type}: {self.title}"
+
+
+# Oldest transaction id still in flight: everything below it has committed or rolled back
+VISIBILITY_HORIZON = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+
+
+class NotificationQuerySet(models.QuerySet):
+    """
+    Receipts in position order. A position is ``(txid, seq)``: the id of the
+    transaction that wrote the receipt, then its number from the receipt
+    sequence. See ``notifications.services.fan_out_many``.
+    """
+
+    def settled(self):
+        """
+        Only receipts that nothing can ever be inserted before. On PostgreSQL
+        that means receipts written below the visibility horizon, so a
+        transaction that commits late still lands after every cursor already
+        handed out. SQLite allows one writer at a time, so there every
+        committed receipt is settled.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return self
+        return self.filter(txid__lt=RawSQL(VISIBILITY_HORIZON, ()))
+
+    # The redundant bound on txid keeps each a range scan of notif_user_position_idx
+    def after(self, position: tuple[int, int]):
+        txid, seq = position
+        return self.filter(Q(txid__gt=txid) | Q(seq__gt=seq), txid__gte=txid)
+
+    def before(self, position: tuple[int, int]):
+        txid, seq = position
+        return self.filter(Q(txid__lt=txid) | Q(seq__lt=seq), txid__lte=txid)
+
+    def oldest_first(self):
+        return self.order_by('txid', 'seq')
+
+    def newest_first(self):
+        return self.order_by('-txid', '-seq')
+
+
+class Notification(models.Model):
+    """
+    Per-user receipt for a NotificationMessage: who got it and whether they
+    have read it. Create these through ``notifications.services.fan_out``.
+    """
+    NOTIFICATION_TYPES = NotificationMessage.NOTIFICATION_TYPES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    message = models.ForeignKey(NotificationMessage, on_delete=models.CASCADE, related_name='receipts')
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    # (txid, seq) is the receipt's position, the pagination and stream cursor
+    # (NotificationQuerySet). txid is 0 on databases other than PostgreSQL.
+    txid = models.BigIntegerField(default=0, editable=False)
+    seq = models.BigIntegerField(editable=False)
+
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read'], name='notif_user_read_idx'),
+            # Keyset pagination: WHERE user = ? AND (txid, seq) < (?, ?)
+            models.Index(fields=['user', 'txid', 'seq'], name='notif_user_position_idx'),
         ]
-    
+
+    def __str__(self):
+        return f"{self.message} -> {self.user_id}"
+
+
+class ReceiptSequence(models.Model):
+    """
+    Hands out ``Notification.seq`` numbers on databases without sequences
+    (SQLite in development and tests), which only allow one writer at a
+    time anyway. PostgreSQL uses the ``notification_receipt_seq`` sequence
+    instead, which never blocks a concurrent fan-out.
+    """
+    last_value = models.BigIntegerField(default=0)
+
     def __str__(self):
-        return f"{self.type}: {self.title}"
\ No newline at end of file
+        return f"Receipt sequence at {self.last_value}"
+
+
+class EscalationRun(models.Model):
+    """
+    One daily escalation sweep. The candidate set is split into keyset chunks
+    (``EscalationChunk``) that workers process independently; a run that dies
+    midway is resumed, not restarted, the next time the sweep is triggered.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run_date = models.DateField(unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    # Captured once so every chunk notifies the same staff, whichever worker runs it
+    staff_ids = models.JSONField(default=list)
+    chunk_count = models.PositiveIntegerField(default=0)
+    escalated_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-run_date']
+
+    def __str__(self) -> str:
+        return f"Escalation run {self.run_date} ({self.status})"
+
+
+class EscalationChunk(models.Model):
+    """
+    A keyset slice of a run: submissions with ``start_after < id <= end_at``.
+    ``last_processed_id`` is the checkpoint, committed with each batch.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run = models.ForeignKey(EscalationRun, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    start_after = models.UUIDField(null=True, blank=True)
+    end_at = models.UUIDField()
+    last_processed_id = models.UUIDField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    escalated_count = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['run', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'index'], name='uniq_escalation_chunk_index'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Chunk {self.index} of {self.run}"
+
+
+class EscalationReminder(models.Model):
+    """
+    Idempotency key: at most one reminder per (submission, level), ever.
+    Written in the same transaction as the escalation it guards.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submission = models.ForeignKey('forms.Submission', on_delete=models.CASCADE, related_name='escalation_reminders')
+    level = models.PositiveSmallIntegerField()
+    run = models.ForeignKey(EscalationRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='reminders')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['submission', 'level'], name='uniq_escalation_reminder'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Level {self.level} reminder for {self.submission_id}"
+
+
+class QueuedEmail(models.Model):
+    """
+    An outgoing email waiting for the batching dispatcher (notifications/mail.py).
+    Each row is retried on its own; one bad address never fails a whole batch.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=998)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='queued_email_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
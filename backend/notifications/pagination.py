@@ -0,0 +1,143 @@
+# backend/notifications/pagination.py
+"""
+Keyset pagination for notification receipts.
+
+Pages are ordered by position, ``(txid, seq)``, and a cursor is the
+position of the last row served, so each page is one index range scan on
+``notif_user_position_idx`` no matter how deep the client has scrolled (no
+OFFSET). Only settled receipts are served (``NotificationQuerySet.settled``),
+so nothing can appear behind a cursor once the client has moved past it.
+Two directions:
+
+    ?cursor=<token>   older than the cursor, newest first (scrolling back)
+    ?since=<token>    newer than the cursor, oldest first (polling for news)
+
+Every response carries ``latest``, the cursor of the newest row the client has
+seen. Polling with ``?since=<latest>&page_size=1`` is the cheap "anything
+new?" check.
+"""
+import base64
+import binascii
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(position: tuple[int, int]) -> str:
+    txid, seq = position
+    return base64.urlsafe_b64encode(f'pos:{txid}:{seq}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[int, int]:
+    """Return the ``(txid, seq)`` position; raise NotFound for a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        prefix, _, rest = raw.partition(':')
+        parts = rest.split(':')
+        if prefix == 'pos' and len(parts) == 2 and all(part.isdigit() for part in parts):
+            return int(parts[0]), int(parts[1])
+        if prefix == 'seq' and rest.isdigit():
+            return 0, int(rest)  # issued before positions had a txid; every such receipt has txid 0
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        pass
+    raise NotFound('Invalid cursor')
+
+
+class NotificationCursorPagination(BasePagination):
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    since_query_param = 'since'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        since = request.query_params.get(self.since_query_param)
+        before = request.query_params.get(self.cursor_query_param)
+
+        self.polling = since is not None
+        queryset = queryset.settled()
+        if self.polling:
+            queryset = queryset.after(decode_cursor(since)).oldest_first()
+        else:
+            queryset = queryset.newest_first()
+            if before is not None:
+                queryset = queryset.before(decode_cursor(before))
+
+        # One extra row tells us whether another page exists
+        rows = list(queryset[:size + 1])
+        self.has_more = len(rows) > size
+        self.rows = rows[:size]
+        self.since = since
+        self.first_page = not self.polling and before is None
+        return self.rows
+
+    def _cursor(self, row) -> str:
+        return encode_cursor((row.txid, row.seq))
+
+    def get_next_link(self) -> str | None:
+        if not self.has_more:
+            return None
+        url = remove_query_param(self.base_url, self.since_query_param)
+        url = remove_query_param(url, self.cursor_query_param)
+        param = self.since_query_param if self.polling else self.cursor_query_param
+        return replace_query_param(url, param, self._cursor(self.rows[-1]))
+
+    def get_latest(self) -> str | None:
+        if self.polling:
+            return self._cursor(self.rows[-1]) if self.rows else self.since
+        if self.first_page and self.rows:
+            return self._cursor(self.rows[0])
+        return None
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('latest', self.get_latest()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'latest': {
+                    'type': 'string', 'nullable': True,
+                    'description': 'Cursor of the newest notification seen; pass it back as `since` to poll.',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param, 'required': False, 'in': 'query',
+                'description': 'Return notifications older than this cursor.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.since_query_param, 'required': False, 'in': 'query',
+                'description': 'Return notifications newer than this cursor, oldest first.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param, 'required': False, 'in': 'query',
+                'description': f'Results per page (max {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,202 @@
+# backend/notifications/pubsub.py
+"""
+Wake-up signals for live notification streams (see streams.py).
+
+Fan-out publishes the ids of users who just received something; each open
+stream for one of those users is woken and reads its new receipts from the
+database (the keyset ``since`` query from pagination.py). The database stays
+the source of truth, so a signal carries no payload and repeated signals
+collapse into one: a subscriber holds a single "dirty" flag rather than a
+queue, and a slow client can never build up a backlog in server memory.
+
+    LocalBroker  in-process only; used in tests and single-process dev, where
+                 eager Celery fans out inside the web process
+    RedisBroker  PUBLISHes each signal on ``NOTIFICATION_PUBSUB_CHANNEL``; one
+                 listener task per ASGI process relays it to local subscribers
+
+``get_broker()`` returns RedisBroker when ``REDIS_URL`` is set.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = 'actserv:notifications'
+
+
+class Subscription:
+    """One stream's interest in one user's notifications."""
+
+    def __init__(self, broker, user_id: str):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self._pending = asyncio.Event()
+
+    def notify(self) -> None:
+        # Called from any thread; setting an already-set flag is a no-op
+        self.loop.call_soon_threadsafe(self._pending.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a signal; True if one arrived."""
+        try:
+            await asyncio.wait_for(self._pending.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._pending.clear()
+        return True
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, user_id) -> Subscription:
+        """Register the calling stream; must run inside its event loop."""
+        subscription = Subscription(self, str(user_id))
+        with self._lock:
+            self._subscriptions[subscription.user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+    def deliver(self, user_ids) -> None:
+        """Wake this process's streams for ``user_ids``."""
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in {str(user_id) for user_id in user_ids}
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            try:
+                subscription.notify()
+            except RuntimeError:
+                # Its event loop has shut down; the stream is gone
+                self.unsubscribe(subscription)
+
+    def deliver_all(self) -> None:
+        """Wake every stream in this process, e.g. after signals may have been missed."""
+        with self._lock:
+            user_ids = list(self._subscriptions)
+        self.deliver(user_ids)
+
+    def publish(self, user_ids) -> None:
+        self.deliver(user_ids)
+
+
+class RedisBroker(LocalBroker):
+    """LocalBroker whose signals travel through Redis to every ASGI process."""
+
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 30.0
+
+    def __init__(self, url: str, channel: str = DEFAULT_CHANNEL):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self._client = None
+        self._listeners = {}
+
+    def publish(self, user_ids) -> None:
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        payload = json.dumps({'users': [str(user_id) for user_id in user_ids]})
+        self._client.publish(self.channel, payload)
+
+    def subscribe(self, user_id) -> Subscription:
+        subscription = super().subscribe(user_id)
+        self._ensure_listener(subscription.loop)
+        return subscription
+
+    def _ensure_listener(self, loop) -> None:
+        with self._lock:
+            listener = self._listeners.get(loop)
+            if listener is None or listener.done():
+                self._listeners[loop] = loop.create_task(self._listen())
+
+    def handle_message(self, data) -> None:
+        try:
+            user_ids = json.loads(data)['users']
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed notification signal: %r", data)
+            return
+        self.deliver(user_ids)
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        delay = self.RECONNECT_DELAY
+        reconnecting = False
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if reconnecting:
+                        # Signals published while the listener was down are gone
+                        self.deliver_all()
+                    delay = self.RECONNECT_DELAY
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.handle_message(message['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                reconnecting = True
+                logger.exception("Notification pub/sub listener lost Redis; retrying in %.0fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> LocalBroker:
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            url = getattr(settings, 'NOTIFICATION_PUBSUB_URL', '')
+            if url:
+                channel = getattr(settings, 'NOTIFICATION_PUBSUB_CHANNEL', DEFAULT_CHANNEL)
+                _broker = RedisBroker(url, channel)
+            else:
+                _broker = LocalBroker()
+        return _broker
+
+
+def publish_new_notifications(user_ids) -> None:
+    """Signal streams for ``user_ids``; never fails the caller."""
+    if not user_ids:
+        return
+    try:
+        get_broker().publish(user_ids)
+    except Exception:
+        # Streams pick the receipts up at their next periodic re-check
+        # (NOTIFICATION_STREAM_RECHECK_EVERY heartbeats); nothing is lost
+        logger.exception("Could not publish notification signal for %d user(s)", len(user_ids))
@@ -5,6 +5,15 @@ from .models import Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
+    """
+    A user's receipt flattened with its shared message, so the payload keeps
+    its original shape. Querysets must ``select_related('message')``.
+    """
+    type = serializers.CharField(source='message.type', read_only=True)
+    title = serializers.CharField(source='message.title', read_only=True)
+    message = serializers.CharField(source='message.body', read_only=True)
+    related_submission = serializers.UUIDField(source='message.related_submission_id', read_only=True)
+
     class Meta:  # pyrefly: ignore[bad-override]
         model = Notification
         fields = [
@@ -18,4 +27,8 @@ class NotificationSerializer(serializers.ModelSerializer):
 
 
 class MarkAllReadResponseSerializer(serializers.Serializer):
-    marked_read = serializers.IntegerField()
\ No newline at end of file
+    marked_read = serializers.IntegerField()
+
+
+class UnreadCountResponseSerializer(serializers.Serializer):
+    unread = serializers.IntegerField()
@@ -0,0 +1,101 @@
+# backend/notifications/services.py
+"""
+Notification fan-out.
+
+A notification's content is written once as a ``NotificationMessage``; each
+recipient gets a ``Notification`` receipt carrying only the user, the message
+id, the read flag and a timestamp. Every producer (new-submission alerts,
+escalations, ...) goes through ``fan_out`` / ``fan_out_many`` so receipts are
+always created in bulk.
+
+Each receipt gets a position, ``(txid, seq)``, which the REST cursor and the
+live stream page by. On PostgreSQL ``txid`` is the writing transaction's id
+and ``seq`` comes from the ``notification_receipt_seq`` sequence, so
+concurrent fan-outs (e.g. parallel escalation chunks) never wait for one
+another. Readers only serve receipts below the visibility horizon
+(``NotificationQuerySet.settled``), so a fan-out that commits late still
+appears after any cursor already handed out.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils.timezone import now
+
+from .counters import increment_unread
+from .models import Notification, NotificationMessage, ReceiptSequence
+from .pubsub import publish_new_notifications
+
+RECEIPT_BATCH_SIZE = 1000
+
+
+@dataclass
+class Outgoing:
+    """One message and the users who should receive it."""
+    type: str
+    title: str
+    body: str
+    user_ids: list = field(default_factory=list)
+    related_submission_id: object = None
+
+
+def _allocate_positions(count: int) -> list[tuple[int, int]]:
+    """``count`` receipt positions, in order, for the current transaction."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_current_xact_id()::text::bigint, nextval('notification_receipt_seq') "
+                "FROM generate_series(1, %s) ORDER BY 2",
+                [count],
+            )
+            return cursor.fetchall()
+    # SQLite: the write lock already lets one fan-out commit at a time
+    sequence = ReceiptSequence.objects.filter(pk=1)
+    if not sequence.update(last_value=F('last_value') + count):
+        # Only missing if something removed the row the migration created
+        highest = Notification.objects.aggregate(highest=Max('seq'))['highest'] or 0
+        ReceiptSequence.objects.get_or_create(pk=1, defaults={'last_value': highest})
+        sequence.update(last_value=F('last_value') + count)
+    first = sequence.values_list('last_value', flat=True).get() - count + 1
+    return [(0, seq) for seq in range(first, first + count)]
+
+
+def fan_out_many(outgoing: list[Outgoing]) -> list[NotificationMessage]:
+    """Store each message once and bulk-create a receipt per recipient (two INSERTs)."""
+    timestamp = now()
+    with transaction.atomic(savepoint=False):
+        messages = NotificationMessage.objects.bulk_create([
+            NotificationMessage(
+                type=item.type,
+                title=item.title,
+                body=item.body,
+                related_submission_id=item.related_submission_id,
+            )
+            for item in outgoing
+        ])
+        receipts = [
+            Notification(user_id=user_id, message=message, created_at=timestamp)
+            for message, item in zip(messages, outgoing)
+            # A user listed twice (e.g. a staff member who is also the submitter) gets one receipt
+            for user_id in dict.fromkeys(item.user_ids)
+        ]
+        if receipts:
+            for receipt, (txid, seq) in zip(receipts, _allocate_positions(len(receipts))):
+                receipt.txid, receipt.seq = txid, seq
+        Notification.objects.bulk_create(receipts, batch_size=RECEIPT_BATCH_SIZE)
+        counts = Counter(receipt.user_id for receipt in receipts)
+        increment_unread(counts)
+        if counts:
+            # Wake the recipients' live streams once the receipts are visible
+            transaction.on_commit(lambda: publish_new_notifications(list(counts)))
+    return messages
+
+
+def fan_out(*, user_ids, type: str, title: str, body: str, related_submission_id=None) -> NotificationMessage:
+    """Send one message to ``user_ids``."""
+    (message,) = fan_out_many([Outgoing(
+        type=type, title=title, body=body,
+        user_ids=list(user_ids), related_submission_id=related_submission_id,
+    )])
+    return message
@@ -0,0 +1,146 @@
+# backend/notifications/streams.py
+"""
+Server-Sent Events for new notifications (GET /api/notifications/stream/).
+
+Each event is one receipt, serialized like the REST list. Its SSE ``id`` is
+the receipt's pagination cursor, so a reconnecting EventSource sends it back
+as ``Last-Event-ID`` and picks up exactly where it stopped:
+
+    id: <cursor>
+    event: notification
+    data: {"id": "...", "title": "...", ...}
+
+The stream reads what is new with the keyset ``since`` query, at most
+``batch_size`` rows at a time: once on connect (the backlog after
+``Last-Event-ID``), whenever its pubsub.Subscription is signalled, and after
+every ``recheck_every`` idle heartbeats. The periodic re-check is the safety
+net for signals that never arrive: a failed publish, or a signal sent
+before the receipt was settled (see NotificationQuerySet.settled). A Redis
+listener that reconnects wakes every stream itself (pubsub.py). Idle streams therefore cost one small
+indexed query a minute by default. Nothing is skipped either way, because
+the position only moves past rows actually sent.
+
+Queries run in the executor's thread pool (``thread_sensitive=False``)
+rather than the single thread shared by every sync call, so many streams
+do not queue behind one another. Each query ends with
+``close_old_connections()``, as a request does, so a stream that lives for
+hours never keeps a connection past ``CONN_MAX_AGE`` or after an error.
+
+Backpressure comes from two places. Signals coalesce, so the server never
+queues events per client. And the generator does not read the next batch until the ASGI server
+has accepted the previous one, so a slow client simply stays behind until
+its socket drains.
+"""
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.exceptions import NotFound
+
+from .models import Notification
+from .pagination import decode_cursor, encode_cursor
+from .pubsub import get_broker
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT = 15  # seconds; well under common proxy idle timeouts
+DEFAULT_RECHECK_EVERY = 4  # heartbeats between database re-checks on an idle stream
+DEFAULT_BATCH_SIZE = 50
+RETRY_MS = 5000  # client reconnect delay suggested to EventSource
+
+
+def heartbeat_setting() -> float:
+    return getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT', DEFAULT_HEARTBEAT)
+
+
+def recheck_setting() -> int:
+    return getattr(settings, 'NOTIFICATION_STREAM_RECHECK_EVERY', DEFAULT_RECHECK_EVERY)
+
+
+def format_event(data: str, *, event: str | None = None, event_id: str | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+def parse_last_event_id(value: str | None):
+    """The resume position sent by the client, or None if absent or unusable."""
+    if not value:
+        return None
+    try:
+        return decode_cursor(value)
+    except NotFound:
+        logger.info("Ignoring unusable Last-Event-ID %r", value)
+        return None
+
+
+def _receipts(user_id):
+    return Notification.objects.filter(user_id=user_id).select_related('message')
+
+
+def newest_position(user_id) -> tuple[int, int] | None:
+    return (
+        Notification.objects.filter(user_id=user_id).settled().newest_first()
+        .values_list('txid', 'seq').first()
+    )
+
+
+def receipts_after(user_id, position: tuple[int, int] | None, limit: int) -> list[tuple[tuple[int, int], dict]]:
+    """Up to ``limit`` settled receipts after ``position``, oldest first, as (position, data)."""
+    queryset = _receipts(user_id).settled().oldest_first()
+    if position is not None:
+        queryset = queryset.after(position)
+    rows = list(queryset[:limit])
+    data = NotificationSerializer(rows, many=True).data
+    return [((row.txid, row.seq), item) for row, item in zip(rows, data)]
+
+
+def _read(func, *args):
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def _query(func, *args):
+    return await sync_to_async(_read, thread_sensitive=False)(func, *args)
+
+
+async def notification_events(user_id, *, last_event_id: str | None = None,
+                              heartbeat: float | None = None, recheck_every: int | None = None,
+                              batch_size: int = DEFAULT_BATCH_SIZE, broker=None):
+    """Async generator of SSE frames for ``user_id``; runs until the client disconnects."""
+    heartbeat = heartbeat_setting() if heartbeat is None else heartbeat
+    recheck_every = recheck_setting() if recheck_every is None else recheck_every
+    subscription = (broker or get_broker()).subscribe(user_id)
+    try:
+        position = parse_last_event_id(last_event_id)
+        if position is None:
+            # A fresh stream only carries what arrives from now on; the REST list covers the past
+            position = await _query(newest_position, user_id)
+        ready_id = encode_cursor(position) if position is not None else None
+        yield f'retry: {RETRY_MS}\n' + format_event('{}', event='ready', event_id=ready_id)
+
+        while True:
+            batch = await _query(receipts_after, user_id, position, batch_size)
+            for position, item in batch:
+                yield format_event(json.dumps(item, default=str), event='notification',
+                                   event_id=encode_cursor(position))
+            if len(batch) == batch_size:
+                continue  # more backlog: drain before waiting
+            idle = 0
+            while not await subscription.wait(heartbeat):
+                # Comment frame: keeps proxies from closing the idle connection
+                yield ': heartbeat\n\n'
+                idle += 1
+                if idle >= recheck_every:
+                    break  # re-check in case a signal was lost
+    finally:
+        subscription.close()
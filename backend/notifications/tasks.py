@@ -4,8 +4,9 @@ from datetime import timedelta
 
 from celery import shared_task
 from django.conf import settings
-from django.core.mail import send_mail
-from django.utils.timezone import now, localtime
+from django.utils.timezone import now
+
+from .mail import queue_email, request_dispatch
 
 logger = logging.getLogger(__name__)
 
@@ -23,61 +24,77 @@ ESCALATION_THRESHOLDS = [
      'This is your final notice. Your submission is significantly overdue and further penalties may apply.'),
 ]
 
+NEW_SUBMISSION_TITLE = 'New Form Submission'
+NEW_BATCH_TITLE = 'New Submissions Imported'
+# Submitter-facing status changes (forms/transitions.py NOTIFY_SUBMITTER_ON)
+STATUS_CHANGE_NOTICES = {
+    'approved': ('system', 'Submission Approved', 'Your submission for "{form}" has been approved.'),
+    'rejected': ('rejection', 'Submission Rejected', 'Your submission for "{form}" has been rejected.'),
+}
+
 
 @shared_task(bind=True, max_retries=3)
 def notify_admin_new_submission(self, submission_id: str) -> str:
     try:
         from django.contrib.auth import get_user_model
+        from django.db import transaction
         from forms.models import Submission
-        from .models import Notification
+        from .models import NotificationMessage
+        from .services import fan_out
 
         User = get_user_model()
 
-        try:
-            submission = Submission.objects.select_related('form').get(id=submission_id)
-        except Submission.DoesNotExist:
-            logger.warning("Submission %s not found — skipping notification", submission_id)
-            return f"Submission {submission_id} not found"
-
-        form = submission.form
-        # submission.files is a reverse RelatedManager added by FileUpload(ForeignKey).
-        # django-stubs doesn't model reverse accessors — the ignore below is correct.
-        file_count = submission.files.count()  # pyrefly: ignore[missing-attribute]
-
-        admin_users = User.objects.filter(is_staff=True)
-        notifications = [
-            Notification(
-                user=user,
+        with transaction.atomic():
+            # Published through the outbox, which delivers at least once. The
+            # row lock makes a concurrent repeat wait, then see this delivery's
+            # notifications; a failure rolls back both notifications and email.
+            submission = (
+                Submission.objects.select_for_update(of=('self',)).select_related('form')
+                .filter(id=submission_id).first()
+            )
+            if submission is None:
+                logger.warning("Submission %s not found — skipping notification", submission_id)
+                return f"Submission {submission_id} not found"
+            if NotificationMessage.objects.filter(related_submission=submission, title=NEW_SUBMISSION_TITLE).exists():
+                logger.info("Submission %s already notified — skipping repeat delivery", submission_id)
+                return f"Submission {submission_id} already notified"
+
+            form = submission.form
+            # submission.files is a reverse RelatedManager added by FileUpload(ForeignKey).
+            # django-stubs doesn't model reverse accessors — the ignore below is correct.
+            file_count = submission.files.count()  # pyrefly: ignore[missing-attribute]
+
+            admin_ids = list(User.objects.filter(is_staff=True).values_list('pk', flat=True))
+            fan_out(
+                user_ids=admin_ids,
                 type='submission',
-                title='New Form Submission',
-                message=f'A new submission for "{form.name}" requires review.',
-                related_submission=submission,
+                title=NEW_SUBMISSION_TITLE,
+                body=f'A new submission for "{form.name}" requires review.',
+                related_submission_id=submission.pk,
             )
-            for user in admin_users
-        ]
-        Notification.objects.bulk_create(notifications)
-
-        subject = f"New {form.name} Submission Received"
-        message = (
-            f"A new form submission has been received.\n\n"
-            f"Form:           {form.name}\n"
-            f"Submission ID:  {submission.id}\n"
-            f"Client:         {submission.client_identifier or 'Not provided'}\n"
-            f"Submitted by:   {submission.submitted_by or 'Anonymous'}\n"
-            f"Submitted at:   {submission.created_at:%Y-%m-%d %H:%M UTC}\n"
-            f"Files attached: {file_count}\n"
-            f"Schema version: {submission.schema_version}\n\n"
-            f"Responses:\n{format_responses(submission.responses)}\n\n"
-            f"Please review the submission in the admin dashboard."
-        )
 
-        admin_emails = getattr(settings, 'ADMIN_NOTIFICATION_EMAILS', ['admin@actserv.local'])
-        # Offload email sending to a separate Celery task to avoid blocking the current task
-        send_admin_email.delay(subject, message, admin_emails)
+            subject = f"New {form.name} Submission Received"
+            message = (
+                f"A new form submission has been received.\n\n"
+                f"Form:           {form.name}\n"
+                f"Submission ID:  {submission.id}\n"
+                f"Client:         {submission.client_identifier or 'Not provided'}\n"
+                f"Submitted by:   {submission.submitted_by or 'Anonymous'}\n"
+                f"Submitted at:   {submission.created_at:%Y-%m-%d %H:%M UTC}\n"
+                f"Files attached: {file_count}\n"
+                f"Schema version: {submission.schema_version}\n\n"
+                f"Responses:\n{format_responses(submission.responses)}\n\n"
+                f"Please review the submission in the admin dashboard."
+            )
+
+            admin_emails = getattr(settings, 'ADMIN_NOTIFICATION_EMAILS', ['admin@actserv.local'])
+            # Queued for the batching dispatcher rather than sent inline
+            queue_email(subject=subject, body=message, recipients=admin_emails)
+        request_dispatch()
 
         logger.info(
             "Notifications sent for submission %s (%d admin(s) notified)",
-            submission_id, len(notifications),
+            submission_id, len(admin_ids),
         )
         return f"Notification sent successfully for submission {submission_id}"
 
@@ -86,17 +103,125 @@ def notify_admin_new_submission(self, submission_id: str) -> str:
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def notify_admin_submission_batch(self, batch_id: str) -> str:
+    """One notification and one email for a whole bulk ingest (forms/ingest.py)."""
+    try:
+        from django.contrib.auth import get_user_model
+        from django.db import transaction
+        from forms.models import SubmissionBatch
+        from .services import fan_out
+
+        User = get_user_model()
+
+        with transaction.atomic():
+            # Claiming the batch makes a repeated outbox delivery a no-op
+            claimed = SubmissionBatch.objects.filter(pk=batch_id, notified_at__isnull=True).update(notified_at=now())
+            if not claimed:
+                logger.info("Submission batch %s missing or already notified — skipping", batch_id)
+                return f"Submission batch {batch_id} skipped"
+            batch = SubmissionBatch.objects.select_related('form', 'submitted_by').get(pk=batch_id)
+            form = batch.form
+
+            admin_ids = list(User.objects.filter(is_staff=True).values_list('pk', flat=True))
+            fan_out(
+                user_ids=admin_ids,
+                type='submission',
+                title=NEW_BATCH_TITLE,
+                body=f'{batch.created_count} new submissions for "{form.name}" were imported and require review.',
+            )
+
+            subject = f"{batch.created_count} New {form.name} Submissions Imported"
+            message = (
+                f"A batch of submissions has been imported.\n\n"
+                f"Form:          {form.name}\n"
+                f"Batch ID:      {batch.id}\n"
+                f"Source:        {batch.source or 'Not provided'}\n"
+                f"Submitted by:  {batch.submitted_by or 'Anonymous'}\n"
+                f"Imported at:   {batch.created_at:%Y-%m-%d %H:%M UTC}\n"
+                f"Created:       {batch.created_count}\n"
+                f"Rejected:      {batch.rejected_count}\n\n"
+                f"Please review the submissions in the admin dashboard."
+            )
+            admin_emails = getattr(settings, 'ADMIN_NOTIFICATION_EMAILS', ['admin@actserv.local'])
+            queue_email(subject=subject, body=message, recipients=admin_emails)
+        request_dispatch()
+
+        logger.info("Notifications sent for submission batch %s (%d admin(s) notified)", batch_id, len(admin_ids))
+        return f"Notification sent successfully for submission batch {batch_id}"
+
+    except Exception as exc:
+        logger.exception("Failed to send notifications for submission batch %s", batch_id)
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def notify_status_changes(self, event_ids: list[str]) -> str:
+    """Tell submitters about approvals/rejections from one status write, with one fan-out."""
+    try:
+        from django.db import transaction
+        from forms.models import SubmissionStatusEvent
+        from .models import NotificationMessage
+        from .services import Outgoing, fan_out_many
+
+        events = list(
+            SubmissionStatusEvent.objects
+            .filter(pk__in=event_ids, to_status__in=STATUS_CHANGE_NOTICES,
+                    submission__submitted_by__isnull=False)
+            .select_related('submission__form')
+        )
+        if not events:
+            return "No submitters to notify"
+
+        # Published through the outbox, which delivers at least once: skip
+        # changes that already have their notice
+        already = set(
+            NotificationMessage.objects.filter(
+                related_submission_id__in=[event.submission_id for event in events],
+                title__in=[title for _, title, _ in STATUS_CHANGE_NOTICES.values()],
+                created_at__gte=min(event.created_at for event in events),
+            ).values_list('related_submission_id', 'title')
+        )
+        outgoing = []
+        for event in events:
+            type_, title, body = STATUS_CHANGE_NOTICES[event.to_status]
+            if (event.submission_id, title) in already:
+                continue
+            outgoing.append(Outgoing(
+                type=type_, title=title, body=body.format(form=event.submission.form.name),
+                user_ids=[event.submission.submitted_by_id], related_submission_id=event.submission_id,
+            ))
+        with transaction.atomic():
+            fan_out_many(outgoing)
+
+        logger.info("Status change notices: %d sent, %d already sent", len(outgoing), len(events) - len(outgoing))
+        return f"Sent {len(outgoing)} status change notification(s)"
+
+    except Exception as exc:
+        logger.exception("Failed to send status change notifications for %d event(s)", len(event_ids))
+        raise self.retry(exc=exc, countdown=60)
+
+
 @shared_task
 def cleanup_old_notifications(days_to_keep: int = 90) -> str:
     """Delete read notifications older than the specified number of days."""
     from datetime import timedelta
-    from .models import Notification
+    from .models import Notification, NotificationMessage, QueuedEmail
 
     cutoff = now() - timedelta(days=days_to_keep)
     deleted_count, _ = Notification.objects.filter(
         is_read=True, created_at__lt=cutoff
     ).delete()
     logger.info("Cleaned up %d old read notifications (older than %d days)", deleted_count, days_to_keep)
+
+    # Shared messages nobody holds a receipt for any more
+    orphaned, _ = NotificationMessage.objects.filter(created_at__lt=cutoff, receipts__isnull=True).delete()
+    if orphaned:
+        logger.info("Cleaned up %d unreferenced notification messages", orphaned)
+
+    sent_emails, _ = QueuedEmail.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    if sent_emails:
+        logger.info("Cleaned up %d sent emails (older than %d days)", sent_emails, days_to_keep)
     return f"Deleted {deleted_count} notifications"
 
 
@@ -107,28 +232,36 @@ def format_responses(responses: dict | None) -> str:
     return "\n".join(f"  {key}: {value}" for key, value in responses.items())
 
 
+@shared_task
+def send_admin_email(subject: str, message: str, recipient_list: list[str]) -> str:
+    """Queue an admin email for the batching dispatcher (kept for already-enqueued calls)."""
+    queue_email(subject=subject, body=message, recipients=recipient_list)
+    request_dispatch()
+    return "email_queued"
+
+
 @shared_task(bind=True, max_retries=3)
-def send_admin_email(self, subject: str, message: str, recipient_list: list[str]):
-    """Send email to admins via Celery. Retries on failure with exponential backoff."""
+def dispatch_email_queue(self, batch_size: int | None = None) -> str:
+    """Drain due QueuedEmail rows, one SMTP connection per batch (see notifications/mail.py)."""
+    from .mail import dispatch_queued_emails
+
     try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@actserv.local'),
-            recipient_list=recipient_list,
-            fail_silently=False,
-        )
-        logger.info("Admin notification email sent at %s", now())
-        return "email_sent"
+        result = dispatch_queued_emails(batch_size=batch_size)
     except Exception as exc:
-        logger.exception("Failed to send admin email")
+        logger.exception("Email dispatch failed")
         raise self.retry(exc=exc, countdown=60)
+    if result.batches:
+        logger.info(
+            "Email dispatch: %d sent, %d retrying, %d failed in %d batch(es)",
+            result.sent, result.retrying, result.failed, result.batches,
+        )
+    return f"Sent {result.sent} email(s) in {result.batches} batch(es)"
 
 
 # ── Escalating SMS / notification alerts ────────────────────────────────────
 
 @shared_task
-def check_escalating_alerts() -> str:
+def check_escalating_alerts(chunk_size: int | None = None) -> str:
     """Daily task: scan submissions with due_dates and send escalating alerts.
 
     Escalation timeline (days past due):
@@ -136,103 +269,69 @@ def check_escalating_alerts() -> str:
         8  → Urgent warning
         10 → Penalty applied
         15 → Final notice
+
+    Plans (or resumes) today's EscalationRun and fans its unfinished chunks
+    out across workers as a chord; see notifications/escalation.py.
     """
-    from django.contrib.auth import get_user_model
-    from forms.models import Submission
-    from .models import Notification
-
-    User = get_user_model()
-    today = localtime().date()
-    processed = 0
-
-    # Only check active submissions that have a due_date and aren't deleted/rejected
-    submissions = Submission.objects.filter(
-        due_date__isnull=False,
-        is_deleted=False,
-    ).exclude(status__in=['rejected', 'approved']).select_related('form', 'submitted_by')
-
-    for sub in submissions:
-        days_overdue = (today - sub.due_date).days
-        if days_overdue < 5:
-            continue  # not yet due for escalation
-
-        # Find the highest threshold we've crossed
-        chosen_level = 0
-        chosen_title = ''
-        chosen_body = ''
-        for threshold_days, level, title, body in ESCALATION_THRESHOLDS:
-            if days_overdue >= threshold_days:
-                chosen_level = level
-                chosen_title = title
-                chosen_body = body
-
-        # Skip if we already sent this level (or a higher one)
-        if sub.escalation_level >= chosen_level:
-            continue
-
-        # ── Apply penalty at level 3 ──────────────────────────────────────
-        if chosen_level >= 3 and sub.penalty_applied_at is None:
-            sub.penalty_applied_at = now()
-            sub.save(update_fields=['penalty_applied_at', 'updated_at'])
-            logger.info("Penalty applied to submission %s", sub.id)
-
-        # ── Create in-app notification ────────────────────────────────────
-        recipients = []
-        if sub.submitted_by:
-            recipients.append(sub.submitted_by)
-        # Also notify admin staff
-        admin_users = User.objects.filter(is_staff=True)
-        recipients.extend(admin_users)
-
-        notifications = [
-            Notification(
-                user=user,
-                type='submission',
-                title=f'[Escalation] {chosen_title}',
-                message=(
-                    f'Form: {sub.form.name}\n'
-                    f'Submission: {sub.id}\n'
-                    f'Due date: {sub.due_date}\n'
-                    f'Days overdue: {days_overdue}\n\n'
-                    f'{chosen_body}'
-                ),
-                related_submission=sub,
-            )
-            for user in recipients
-        ]
-        Notification.objects.bulk_create(notifications)
-
-        # ── Update escalation state ───────────────────────────────────────
-        sub.escalation_level = chosen_level
-        sub.last_reminder_sent_at = now()
-        sub.save(update_fields=[
-            'escalation_level', 'last_reminder_sent_at', 'updated_at',
-        ])
-
-        # ── Send email to submitter ───────────────────────────────────────
-        if sub.submitted_by and sub.submitted_by.email:
-            send_escalation_email.delay(
-                sub.submitted_by.email,
-                sub.form.name,
-                str(sub.id),
-                chosen_title,
-                chosen_body,
-                str(sub.due_date),
-                days_overdue,
-            )
+    from celery import chord
+    from .escalation import start_run
 
-        processed += 1
-        logger.info(
-            "Escalation level %d sent for submission %s (%d days overdue)",
-            chosen_level, sub.id, days_overdue,
-        )
+    run, pending = start_run(chunk_size=chunk_size)
+    if not pending:
+        finalize_escalation_run(str(run.pk))
+        return f"Escalation run {run.run_date}: nothing to dispatch"
 
-    return f"Processed {processed} escalation(s)"
+    header = [process_escalation_chunk.s(str(chunk_id)) for chunk_id in pending]
+    chord(header)(finalize_escalation_run.si(str(run.pk)))
+    logger.info("Escalation run %s: dispatched %d chunk(s)", run.run_date, len(pending))
+    return f"Escalation run {run.run_date}: dispatched {len(pending)} chunk(s)"
 
 
-@shared_task(bind=True, max_retries=3)
+# acks_late: a chunk whose worker dies is redelivered and resumes from its checkpoint
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def process_escalation_chunk(self, chunk_id: str) -> int:
+    from .escalation import process_chunk
+
+    try:
+        return process_chunk(chunk_id)
+    except Exception as exc:
+        logger.exception("Escalation chunk %s failed", chunk_id)
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task
+def finalize_escalation_run(run_id: str) -> str:
+    from .escalation import finish_run
+
+    run = finish_run(run_id)
+    return f"Processed {run.escalated_count} escalation(s)"
+
+
+def escalation_email(
+    form_name: str,
+    submission_id: str,
+    title: str,
+    body: str,
+    due_date_str: str,
+    days_overdue: int,
+) -> tuple[str, str]:
+    """Subject and body of the escalation email sent to the submitter."""
+    subject = f"[TOPMARK SACCO] {title} — {form_name}"
+    message = (
+        f"Dear Member,\n\n"
+        f"{body}\n\n"
+        f"Form:           {form_name}\n"
+        f"Submission ID:  {submission_id}\n"
+        f"Due date:       {due_date_str}\n"
+        f"Days overdue:   {days_overdue}\n\n"
+        f"Please log in to the portal to complete your submission.\n\n"
+        f"Thank you,\nTOPMARK SACCO Team"
+    )
+    return subject, message
+
+
+@shared_task
 def send_escalation_email(
-    self,
     recipient_email: str,
     form_name: str,
     submission_id: str,
@@ -240,28 +339,9 @@ def send_escalation_email(
     body: str,
     due_date_str: str,
     days_overdue: int,
-):
-    """Send escalation email to the submitter."""
-    try:
-        subject = f"[TOPMARK SACCO] {title} — {form_name}"
-        message = (
-            f"Dear Member,\n\n"
-            f"{body}\n\n"
-            f"Form:           {form_name}\n"
-            f"Submission ID:  {submission_id}\n"
-            f"Due date:       {due_date_str}\n"
-            f"Days overdue:   {days_overdue}\n\n"
-            f"Please log in to the portal to complete your submission.\n\n"
-            f"Thank you,\nTOPMARK SACCO Team"
-        )
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@actserv.local'),
-            recipient_list=[recipient_email],
-            fail_silently=False,
-        )
-        logger.info("Escalation email sent to %s for submission %s", recipient_email, submission_id)
-    except Exception as exc:
-        logger.exception("Failed to send escalation email to %s", recipient_email)
-        raise self.retry(exc=exc, countdown=60)
+) -> str:
+    """Queue one escalation email (the sweep itself queues them in bulk)."""
+    subject, message = escalation_email(form_name, submission_id, title, body, due_date_str, days_overdue)
+    queue_email(subject=subject, body=message, recipients=[recipient_email])
+    request_dispatch()
+    return "email_queued"
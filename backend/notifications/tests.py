@@ -1,15 +1,16 @@
 import pytest
 from django.urls import reverse
 from notifications.models import Notification
+from notifications.services import fan_out
 
 @pytest.mark.django_db
 def test_mark_all_read(auth_client, client_user):
     # Create two unread notifications for the client_user
-    Notification.objects.create(user=client_user, type='system', title='Test 1', message='msg 1')
-    Notification.objects.create(user=client_user, type='system', title='Test 2', message='msg 2')
+    fan_out(user_ids=[client_user.pk], type='system', title='Test 1', body='msg 1')
+    fan_out(user_ids=[client_user.pk], type='system', title='Test 2', body='msg 2')
     # Another user’s notification should not be affected
     other = client_user.__class__.objects.create_user(username='other@test.com', email='other@test.com', password='Pass123!', role='client')
-    Notification.objects.create(user=other, type='system', title='Other', message='other')
+    fan_out(user_ids=[other.pk], type='system', title='Other', body='other')
     url = reverse('notification-mark-all-read')
     resp = auth_client.post(url)
     assert resp.status_code == 200
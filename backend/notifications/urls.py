@@ -12,6 +12,14 @@ urlpatterns = [
            views.MarkAllReadView.as_view(),
            name='notification-mark-all-read'),
 
+    path('notifications/unread-count/',
+         views.UnreadCountView.as_view(),
+         name='notification-unread-count'),
+
+    path('notifications/stream/',
+         views.notification_stream,
+         name='notification-stream'),
+
     path('notifications/<uuid:pk>/',
          views.NotificationDetailView.as_view(),
          name='notification-detail'),
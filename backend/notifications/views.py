@@ -1,11 +1,24 @@
 # backend/notifications/views.py
 import logging
 
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from .counters import invalidate_unread, reset_unread, unread_count
 from .models import Notification
-from .serializers import NotificationSerializer, MarkAllReadResponseSerializer
+from .pagination import NotificationCursorPagination
+from .serializers import (
+    MarkAllReadResponseSerializer,
+    NotificationSerializer,
+    UnreadCountResponseSerializer,
+)
+from .streams import notification_events
 
 logger = logging.getLogger(__name__)
 
@@ -13,22 +26,23 @@ logger = logging.getLogger(__name__)
 class NotificationListView(generics.ListAPIView):
     """
     GET /api/notifications/
-    Returns all notifications for the authenticated user,
-    most recent first.
+    Returns the authenticated user's notifications, most recent first,
+    one cursor page at a time (see pagination.py). ``?since=<latest>``
+    returns only what arrived after a previous response.
 
     Notifications are created exclusively by Celery tasks —
     clients cannot POST to this endpoint.
     """
-    # Return plain list without pagination for API consistency
-    pagination_class = None
+    pagination_class = NotificationCursorPagination
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        # One join: the receipt row plus its shared message
         return (
             Notification.objects
             .filter(user=self.request.user)
-            .select_related('related_submission')
+            .select_related('message')
         )
 
 
@@ -45,7 +59,13 @@ class NotificationDetailView(generics.RetrieveUpdateAPIView):
     http_method_names = ['get', 'patch', 'head', 'options']
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        return Notification.objects.filter(user=self.request.user).select_related('message')
+
+    def perform_update(self, serializer):
+        was_read = serializer.instance.is_read
+        notification = serializer.save()
+        if notification.is_read != was_read:
+            invalidate_unread(notification.user_id)
 
 
 from drf_spectacular.utils import extend_schema
@@ -62,5 +82,55 @@ class MarkAllReadView(APIView):
             .filter(user=request.user, is_read=False)
             .update(is_read=True)
         )
+        reset_unread(request.user.pk)
         logger.info("User %s marked %d notifications as read", request.user, updated)
-        return Response({"marked_read": updated}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({"marked_read": updated}, status=status.HTTP_200_OK)
+
+
+@extend_schema(responses=UnreadCountResponseSerializer)
+class UnreadCountView(APIView):
+    """
+    GET /api/notifications/unread-count/
+    Served from a per-user cache counter; cheap enough to poll.
+    """
+    serializer_class = UnreadCountResponseSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread_count(request.user.pk)}, status=status.HTTP_200_OK)
+
+
+def _authenticated_user(request):
+    """Authenticate with the API's configured classes (JWT header or session)."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = drf_request.user
+    except APIException:  # invalid or expired token
+        return None
+    return user if user.is_authenticated else None
+
+
+@require_GET
+async def notification_stream(request):
+    """
+    GET /api/notifications/stream/
+    Server-Sent Events: pushes each new notification as it arrives (see
+    streams.py). Needs an ASGI server — under WSGI the stream never flushes.
+    """
+    user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    response = StreamingHttpResponse(
+        notification_events(user.pk, last_event_id=request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: flush each event, don't buffer
+    return response
@@ -8,4 +8,5 @@ echo "Creating default admin if needed..."
 python manage.py create_default_admin
 
 echo "Starting server..."
-exec gunicorn actserv_backend.wsgi:application --bind 0.0.0.0:8000 --workers 4 --timeout 120
+# ASGI (uvicorn workers): the notification stream holds long-lived connections
+exec gunicorn actserv_backend.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:8000 --workers 4 --timeout 120
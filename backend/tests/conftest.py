@@ -1,5 +1,6 @@
 # backend/tests/conftest.py
 import pytest
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 from forms.models import Field, Form
@@ -8,6 +9,14 @@ from users.models import CustomUser
 User = CustomUser
 
 
+@pytest.fixture(autouse=True)
+def _isolated_cache():
+    """Cached schemas and throttle counters must not leak between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
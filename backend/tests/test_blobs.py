@@ -0,0 +1,110 @@
+# backend/tests/test_blobs.py
+import hashlib
+from io import StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from forms.blobs import collect_blobs
+from forms.models import FileUpload, StoredBlob
+from forms.services import create_submission
+
+SCAN = b'%PDF-1.4 national id scan ' * 200
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+    return tmp_path
+
+
+@pytest.fixture
+def submissions(kyc_form, client_user):
+    return [
+        create_submission(form=kyc_form, responses={'full_name': f'Client {i}', 'id_number': str(i)},
+                          submitted_by=client_user)
+        for i in range(2)
+    ]
+
+
+def _upload(client, submission, content=SCAN, name='id.pdf'):
+    return client.post(f'/api/submissions/{submission.pk}/upload/', {
+        'field_key': 'id_scan', 'file': SimpleUploadedFile(name, content, content_type='application/pdf'),
+    }, format='multipart')
+
+
+def _stored_files(root):
+    return sorted(path for path in (root / 'media').rglob('*') if path.is_file())
+
+
+@pytest.mark.django_db
+class TestContentAddressedUploads:
+
+    def test_same_content_is_stored_once(self, auth_client, submissions, upload_dirs):
+        first = _upload(auth_client, submissions[0])
+        second = _upload(auth_client, submissions[1], name='copy-of-id.pdf')
+        assert (first.status_code, second.status_code) == (201, 201)
+
+        blob = StoredBlob.objects.get()
+        assert blob.sha256 == hashlib.sha256(SCAN).hexdigest()
+        assert (blob.size, blob.ref_count) == (len(SCAN), 2)
+        uploads = FileUpload.objects.order_by('uploaded_at')
+        assert {upload.file.name for upload in uploads} == {blob.file.name}
+        assert [upload.original_filename for upload in uploads] == ['id.pdf', 'copy-of-id.pdf']
+        assert _stored_files(upload_dirs) == [upload_dirs / 'media' / blob.file.name]
+
+    def test_chunked_upload_of_known_content_writes_nothing(self, auth_client, submissions, upload_dirs):
+        _upload(auth_client, submissions[0])
+        session = auth_client.post(f'/api/submissions/{submissions[1].pk}/uploads/', {
+            'field_key': 'id_scan', 'filename': 'id.pdf', 'content_type': 'application/pdf', 'size': len(SCAN),
+        }, format='json').json()
+        auth_client.put(f'/api/uploads/{session["id"]}/chunk/?offset=0', SCAN,
+                        content_type='application/offset+octet-stream')
+
+        response = auth_client.post(f'/api/uploads/{session["id"]}/complete/')
+        assert response.status_code == 201
+        assert StoredBlob.objects.get().ref_count == 2
+        assert len(_stored_files(upload_dirs)) == 1
+        assert not any((upload_dirs / 'spool').iterdir())
+
+    def test_blob_outlives_all_but_its_last_reference(self, auth_client, submissions, upload_dirs,
+                                                       django_capture_on_commit_callbacks):
+        _upload(auth_client, submissions[0])
+        _upload(auth_client, submissions[1])
+        blob = StoredBlob.objects.get()
+
+        FileUpload.objects.filter(submission=submissions[0]).delete()
+        assert collect_blobs() == 0
+        assert StoredBlob.objects.get().ref_count == 1
+
+        submissions[1].delete()  # cascades to its FileUpload
+        assert StoredBlob.objects.get().ref_count == 0
+        with django_capture_on_commit_callbacks(execute=True):  # files go once the row delete commits
+            assert collect_blobs() == 1
+        assert not StoredBlob.objects.exists()
+        assert not default_storage.exists(blob.file.name)
+
+    def test_dedupe_command_adopts_legacy_copies(self, submissions, upload_dirs,
+                                                 django_capture_on_commit_callbacks):
+        for i, submission in enumerate(submissions):
+            name = default_storage.save(f'uploads/2025/01/0{i + 1}/id.pdf', ContentFile(SCAN))
+            FileUpload.objects.create(submission=submission, field_key='id_scan', file=name, file_size=len(SCAN))
+        unique = default_storage.save('uploads/2025/01/03/payslip.pdf', ContentFile(b'payslip'))
+        FileUpload.objects.create(submission=submissions[0], field_key='payslip', file=unique, file_size=7)
+
+        out = StringIO()
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('dedupe_uploads', stdout=out)
+
+        assert f'1 duplicate copies removed ({len(SCAN)} bytes)' in out.getvalue()
+        assert StoredBlob.objects.count() == 2
+        assert not FileUpload.objects.filter(blob__isnull=True).exists()
+        scans = FileUpload.objects.filter(field_key='id_scan')
+        assert len({upload.file.name for upload in scans}) == 1
+        assert len(_stored_files(upload_dirs)) == 2
+        with scans[1].file.open('rb') as stored:
+            assert stored.read() == SCAN
@@ -0,0 +1,129 @@
+# backend/tests/test_bulk_status.py
+import uuid
+
+import pytest
+from django.test import Client
+
+from forms.models import Submission, SubmissionStatusEvent
+from forms.services import bulk_update_submission_status
+from forms.transitions import submission_states
+
+BULK_STATUS_URL = '/api/submissions/bulk-status/'
+
+
+@pytest.fixture
+def submissions(kyc_form):
+    rows = Submission.objects.bulk_create([
+        Submission(form=kyc_form, schema_version=1, responses={'full_name': f'Client {i}'}) for i in range(4)
+    ])
+    return [row.pk for row in rows]
+
+
+def _set_status(pk, value):
+    Submission.objects.filter(pk=pk).update(status=value)
+
+
+def test_transition_table():
+    assert submission_states.can_transition('submitted', 'approved')
+    assert not submission_states.can_transition('approved', 'submitted')
+    assert submission_states.allowed['rejected'] == {'reviewed'}
+    assert submission_states.allowed['approved'] == set()
+
+
+@pytest.mark.django_db
+class TestBulkStatusApi:
+
+    def test_by_ids(self, admin_client, admin_user, submissions):
+        _set_status(submissions[1], 'approved')
+        _set_status(submissions[2], 'reviewed')
+        missing = uuid.uuid4()
+
+        response = admin_client.post(BULK_STATUS_URL, {
+            'status': 'reviewed', 'ids': [str(pk) for pk in submissions[:3]] + [str(missing)],
+        }, format='json')
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body['updated'] == [str(submissions[0])]
+        assert body['unchanged'] == [str(submissions[2])]
+        assert body['not_allowed'] == [{
+            'id': str(submissions[1]), 'status': 'approved',
+            'reason': 'Cannot move a submission from approved to reviewed.',
+        }]
+        assert body['not_found'] == [str(missing)]
+
+        event = SubmissionStatusEvent.objects.get()
+        assert (event.submission_id, event.from_status, event.to_status, event.changed_by) == (
+            submissions[0], 'submitted', 'reviewed', admin_user,
+        )
+
+    def test_by_filter(self, admin_client, kyc_form, basic_form, submissions):
+        other = Submission.objects.create(form=basic_form, schema_version=1, responses={})
+        _set_status(submissions[0], 'reviewed')
+
+        response = admin_client.post(BULK_STATUS_URL, {
+            'status': 'approved', 'filter': {'form': 'kyc-form', 'status': 'reviewed'},
+        }, format='json')
+
+        assert response.json()['updated'] == [str(submissions[0])]
+        assert Submission.objects.get(pk=other.pk).status == 'submitted'
+        assert Submission.objects.filter(status='approved').count() == 1
+
+    def test_one_update_and_one_audit_insert(self, admin_client, submissions, django_assert_num_queries):
+        ids = [str(pk) for pk in submissions]
+        # locking SELECT, UPDATE, audit INSERT, one outbox message (get_or_create: 4), savepoint + release
+        with django_assert_num_queries(9):
+            response = admin_client.post(BULK_STATUS_URL, {'status': 'approved', 'ids': ids}, format='json')
+        assert len(response.json()['updated']) == 4
+        assert SubmissionStatusEvent.objects.count() == 4
+
+    @pytest.mark.parametrize('body', [
+        {'status': 'archived', 'ids': [str(uuid.uuid4())]},
+        {'status': 'approved'},
+        {'status': 'approved', 'ids': [str(uuid.uuid4())], 'filter': {'form': 'kyc-form'}},
+        {'status': 'approved', 'filter': {'created_after': 'last week'}},
+    ])
+    def test_rejects_bad_requests(self, admin_client, body):
+        assert admin_client.post(BULK_STATUS_URL, body, format='json').status_code == 400
+
+    def test_selection_limit(self, admin_client, submissions, settings):
+        settings.BULK_STATUS_MAX_ROWS = 3
+        response = admin_client.post(BULK_STATUS_URL, {'status': 'approved', 'filter': {}}, format='json')
+        assert response.status_code == 400
+        assert not Submission.objects.filter(status='approved').exists()
+
+    def test_requires_staff(self, auth_client, submissions):
+        response = auth_client.post(BULK_STATUS_URL, {'status': 'approved', 'ids': [str(submissions[0])]},
+                                    format='json')
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestAdminActions:
+
+    def test_actions_go_through_the_transition_table(self, admin_user, submissions, settings):
+        # The manifest storage needs collectstatic, which tests do not run
+        settings.STORAGES = {
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        _set_status(submissions[0], 'approved')
+        client = Client()
+        client.force_login(admin_user)
+
+        response = client.post('/admin/forms/submission/', {
+            'action': 'mark_rejected', '_selected_action': [str(pk) for pk in submissions],
+        }, follow=True)
+
+        notices = [str(message) for message in response.context['messages']]
+        assert '3 submission(s) marked as rejected.' in notices
+        assert any('Cannot move a submission from approved to rejected.' in notice for notice in notices)
+        assert Submission.objects.get(pk=submissions[0]).status == 'approved'
+        assert SubmissionStatusEvent.objects.filter(changed_by=admin_user, to_status='rejected').count() == 3
+
+
+@pytest.mark.django_db
+def test_service_skips_soft_deleted(kyc_form, submissions):
+    Submission.objects.get(pk=submissions[0]).soft_delete()
+    result = bulk_update_submission_status(submissions=Submission.objects.all(), new_status='reviewed')
+    assert len(result.updated) == 3
@@ -0,0 +1,177 @@
+# backend/tests/test_direct_uploads.py
+import hashlib
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from forms.models import FileUpload, StoredBlob, UploadSession
+from forms.services import create_submission
+from forms.transfers import LocalSignedTransfers, get_transfers
+from forms.uploads import expire_upload_sessions, staged_name, verify_direct_upload
+
+SCAN = b'%PDF-1.4\n3 0 obj << /Type /Page >> endobj\n' + b'national id scan ' * 300
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+    return tmp_path
+
+
+@pytest.fixture
+def submission(kyc_form, client_user):
+    return create_submission(form=kyc_form, responses={'full_name': 'Wanjiru Kamau', 'id_number': '1'},
+                             submitted_by=client_user)
+
+
+def _start(client, submission, size=len(SCAN), content_type='application/pdf'):
+    return client.post(f'/api/submissions/{submission.pk}/uploads/', {
+        'field_key': 'id_scan', 'filename': 'ID.pdf', 'content_type': content_type, 'size': size,
+        'method': 'direct',
+    }, format='json')
+
+
+def _send(target, data):
+    # A fresh, unauthenticated client: the signature is the only credential
+    return APIClient().generic(target['method'], target['url'], data, content_type=target['headers']['Content-Type'])
+
+
+@pytest.mark.django_db
+class TestDirectUploads:
+
+    def test_bytes_go_to_storage_and_the_api_registers_metadata(self, auth_client, submission,
+                                                                  django_capture_on_commit_callbacks):
+        started = _start(auth_client, submission)
+        assert started.status_code == 201
+        session = started.json()
+        assert (session['method'], session['upload']['method']) == ('direct', 'PUT')
+        assert session['upload']['url'].startswith('http://testserver/api/transfers/')
+
+        assert _send(session['upload'], SCAN).status_code == 204
+        with django_capture_on_commit_callbacks(execute=True):
+            completed = auth_client.post(f'/api/uploads/{session["id"]}/complete/')
+        assert completed.status_code == 201
+
+        upload = FileUpload.objects.get(pk=completed.json()['id'])
+        blob = StoredBlob.objects.get()
+        assert blob.sha256 == hashlib.sha256(SCAN).hexdigest()
+        assert (upload.blob, upload.file.name, upload.content_type) == (blob, blob.file.name, 'application/pdf')
+        assert upload.meta['pages'] == 1 and upload.meta['stages']['checksum']['status'] == 'done'
+        assert not default_storage.exists(staged_name(UploadSession.objects.get(pk=session['id'])))
+
+        download = APIClient().get(auth_client.get(f'/api/uploads/{session["id"]}/').json()['file']['download_url'])
+        assert download.status_code == 200
+        assert download['Content-Disposition'] == 'attachment; filename="ID.pdf"'
+        assert b''.join(download.streaming_content) == SCAN
+
+    def test_completion_checks_what_storage_holds(self, auth_client, submission):
+        session = _start(auth_client, submission).json()
+        complete = f'/api/uploads/{session["id"]}/complete/'
+        assert auth_client.post(complete).status_code == 409
+
+        _send(session['upload'], SCAN)
+        first = auth_client.post(complete)
+        again = auth_client.post(complete)
+        assert (first.status_code, again.status_code) == (201, 201)
+        assert first.json()['id'] == again.json()['id']
+        assert FileUpload.objects.get().blob is None  # verified later, by a worker
+        assert first.json()['download_url'] is None
+
+        verify_direct_upload(first.json()['id'])
+        assert auth_client.get(f'/api/uploads/{session["id"]}/').json()['file']['download_url']
+
+    def test_unverified_upload_exposes_no_url(self, auth_client, submission):
+        session = _start(auth_client, submission).json()
+        _send(session['upload'], SCAN)
+        completed = auth_client.post(f'/api/uploads/{session["id"]}/complete/')
+        staged = staged_name(UploadSession.objects.get(pk=session['id']))
+
+        for body in (completed.json(), auth_client.get(f'/api/uploads/{session["id"]}/').json()['file']):
+            assert 'file' not in body
+            assert (body['download_url'], body['preview_url']) == (None, None)
+            assert staged not in str(body)
+
+    @pytest.mark.parametrize('tamper', ['signature', 'method', 'size', 'expiry'])
+    def test_signed_url_is_checked(self, auth_client, submission, tamper):
+        session = _start(auth_client, submission).json()
+        target, name = session['upload'], staged_name(UploadSession.objects.get(pk=session['id']))
+        if tamper == 'signature':
+            target['url'] = target['url'][:-2] + ('A' if target['url'][-2] != 'A' else 'B') + '/'
+        elif tamper == 'method':
+            target['url'] = get_transfers().download_url(name)
+        elif tamper == 'expiry':
+            UploadSession.objects.filter(pk=session['id']).update(expires_at=now() - timedelta(seconds=1))
+            assert auth_client.get(f'/api/uploads/{session["id"]}/').json()['upload'] is None
+            target['url'] = get_transfers().upload_target(name, size=len(SCAN), content_type='', expires_in=-1)['url']
+
+        response = _send(target, SCAN + b'extra' if tamper == 'size' else SCAN)
+        assert response.status_code == (400 if tamper == 'size' else 403)
+        assert not default_storage.exists(name)
+
+    @pytest.mark.parametrize('ended', ['completed', 'cancelled'])
+    def test_upload_url_only_works_while_the_session_is_active(self, auth_client, submission, ended,
+                                                               django_capture_on_commit_callbacks):
+        session = _start(auth_client, submission).json()
+        name = staged_name(UploadSession.objects.get(pk=session['id']))
+        if ended == 'completed':
+            _send(session['upload'], SCAN)
+            upload_id = auth_client.post(f'/api/uploads/{session["id"]}/complete/').json()['id']
+            with django_capture_on_commit_callbacks(execute=True):
+                verify_direct_upload(upload_id)
+        else:
+            assert auth_client.delete(f'/api/uploads/{session["id"]}/').status_code == 204
+
+        response = _send(session['upload'], SCAN)
+        assert response.status_code == 409
+        assert response.json()['detail'] == f'Upload is {ended}.'
+        assert not default_storage.exists(name)
+
+    def test_bytes_arriving_as_the_session_ends_are_deleted(self, auth_client, submission, monkeypatch):
+        session = _start(auth_client, submission).json()
+        receive = LocalSignedTransfers.receive
+
+        def cancelled_meanwhile(transfers, grant, stream, length):
+            receive(transfers, grant, stream, length)
+            UploadSession.objects.filter(pk=session['id']).update(status='cancelled')
+
+        monkeypatch.setattr(LocalSignedTransfers, 'receive', cancelled_meanwhile)
+        assert _send(session['upload'], SCAN).status_code == 409
+        assert not default_storage.exists(staged_name(UploadSession.objects.get(pk=session['id'])))
+
+    def test_disallowed_content_is_rejected_by_the_worker(self, auth_client, submission):
+        payload = b'<html><script>alert(1)</script></html>'
+        session = _start(auth_client, submission, size=len(payload)).json()
+        _send(session['upload'], payload)
+        upload_id = auth_client.post(f'/api/uploads/{session["id"]}/complete/').json()['id']
+
+        assert verify_direct_upload(upload_id) == 'rejected'
+        assert not FileUpload.objects.exists() and not StoredBlob.objects.exists()
+        assert UploadSession.objects.get(pk=session['id']).status == 'rejected'
+        assert verify_direct_upload(upload_id) == 'unchanged'
+
+    def test_known_content_is_not_stored_twice(self, auth_client, submission):
+        auth_client.post(f'/api/submissions/{submission.pk}/upload/', {
+            'field_key': 'id_scan', 'file': ContentFile(SCAN, name='id.pdf'),
+        }, format='multipart')
+        session = _start(auth_client, submission).json()
+        _send(session['upload'], SCAN)
+        upload_id = auth_client.post(f'/api/uploads/{session["id"]}/complete/').json()['id']
+
+        assert verify_direct_upload(upload_id) == 'done'
+        assert StoredBlob.objects.get().ref_count == 2
+
+    def test_chunks_and_expiry(self, auth_client, submission):
+        session = _start(auth_client, submission).json()
+        chunk = auth_client.put(f'/api/uploads/{session["id"]}/chunk/?offset=0', SCAN[:100],
+                                content_type='application/offset+octet-stream')
+        assert chunk.status_code == 400
+
+        _send(session['upload'], SCAN)
+        UploadSession.objects.filter(pk=session['id']).update(expires_at=now() - timedelta(minutes=1))
+        assert expire_upload_sessions() == 1
+        assert not default_storage.exists(staged_name(UploadSession.objects.get(pk=session['id'])))
@@ -0,0 +1,119 @@
+# backend/tests/test_email_dispatch.py
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.utils.timezone import now
+
+from notifications.mail import dispatch_queued_emails, queue_email, queue_emails, send_batch
+from notifications.mail_backends import RecordingEmailBackend
+from notifications.models import QueuedEmail
+from notifications.tasks import dispatch_email_queue, send_escalation_email
+
+
+@pytest.fixture
+def recording_backend(settings):
+    settings.EMAIL_BACKEND = 'notifications.mail_backends.RecordingEmailBackend'
+    RecordingEmailBackend.reset()
+    yield RecordingEmailBackend
+    RecordingEmailBackend.reset()
+
+
+def _queue(count, domain='example.com'):
+    return queue_emails((f'Subject {i}', 'Body', [f'user{i}@{domain}']) for i in range(count))
+
+
+@pytest.mark.django_db
+class TestDispatchQueuedEmails:
+
+    def test_sends_each_batch_over_one_connection(self, recording_backend):
+        _queue(25)
+        result = dispatch_queued_emails(batch_size=10)
+
+        assert (result.batches, result.sent) == (3, 25)
+        assert recording_backend.connections_opened == 3
+        assert len(mail.outbox) == 25
+        assert not QueuedEmail.objects.exclude(status='sent').exists()
+
+    def test_failure_is_retried_per_message(self, recording_backend, settings):
+        settings.EMAIL_RETRY_BACKOFF = 30
+        _queue(5)
+        recording_backend.fail_recipients = {'user2@example.com'}
+
+        result = dispatch_queued_emails()
+        assert (result.sent, result.retrying, result.failed) == (4, 1, 0)
+        failed = QueuedEmail.objects.get(status='queued')
+        assert failed.recipients == ['user2@example.com']
+        assert failed.attempts == 1
+        assert failed.next_attempt_at > now() + timedelta(seconds=25)
+
+        # Not due yet: a second dispatch leaves it alone
+        assert dispatch_queued_emails().sent == 0
+
+        recording_backend.fail_recipients = set()
+        QueuedEmail.objects.filter(pk=failed.pk).update(next_attempt_at=now())
+        assert dispatch_queued_emails().sent == 1
+        assert len(mail.outbox) == 5
+
+    def test_gives_up_after_max_attempts(self, recording_backend, settings):
+        settings.EMAIL_MAX_ATTEMPTS = 2
+        email = queue_email(subject='Hi', body='Body', recipients=['bad@example.com'])
+        recording_backend.fail_recipients = {'bad@example.com'}
+
+        dispatch_queued_emails()
+        QueuedEmail.objects.filter(pk=email.pk).update(next_attempt_at=now())
+        result = dispatch_queued_emails()
+
+        email.refresh_from_db()
+        assert result.failed == 1
+        assert (email.status, email.attempts) == ('failed', 2)
+
+    def test_reclaims_rows_abandoned_by_a_dead_worker(self, recording_backend):
+        email = queue_email(subject='Hi', body='Body', recipients=['a@example.com'])
+        QueuedEmail.objects.filter(pk=email.pk).update(status='sending', claimed_at=now() - timedelta(hours=1))
+        assert dispatch_queued_emails().sent == 1
+
+    def test_task_drains_the_queue(self, recording_backend):
+        _queue(3)
+        assert dispatch_email_queue() == 'Sent 3 email(s) in 1 batch(es)'
+
+
+class _DroppingConnection:
+    """Loses the session on the first message, like a server-side timeout."""
+
+    def __init__(self):
+        self.opened = 0
+        self.sent = []
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if not self.sent and self.opened == 1:
+            self.sent.append(None)
+            raise SMTPServerDisconnected('gone')
+        self.sent.extend(messages)
+        return len(messages)
+
+
+@pytest.mark.django_db
+def test_send_batch_reconnects_after_losing_the_session():
+    emails = _queue(3)
+    connection = _DroppingConnection()
+    sent, errors = send_batch(emails, connection=connection)
+
+    assert connection.opened == 2
+    assert list(errors) == [emails[0].pk]
+    assert sent == [emails[1].pk, emails[2].pk]
+
+
+@pytest.mark.django_db
+def test_escalation_email_task_queues_instead_of_sending(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        send_escalation_email('member@example.com', 'KYC', 'abc', 'Final Notice', 'Body', '2026-01-01', 20)
+    assert QueuedEmail.objects.get().status == 'sent'
+    assert mail.outbox[0].subject == '[TOPMARK SACCO] Final Notice — KYC'
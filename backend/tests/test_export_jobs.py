@@ -0,0 +1,156 @@
+# backend/tests/test_export_jobs.py
+import csv
+import io
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.utils.timezone import now
+
+from forms import export_jobs, exports
+from forms.export_jobs import cancel_export_job, expire_export_jobs, run_export_job, start_export_job
+from forms.models import ExportJob
+from forms.services import create_submission
+from notifications.models import Notification
+from users.models import CustomUser
+
+EXPORTS_URL = '/api/exports/'
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def submissions(kyc_form):
+    return [create_submission(form=kyc_form, responses={'full_name': f'Client {i}'}) for i in range(3)]
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(collect)()
+
+
+def _queue(form, user, **params):
+    return start_export_job(form=form, requested_by=user, params=params)
+
+
+@pytest.mark.django_db
+class TestExportJobApi:
+
+    def test_job_runs_in_background_and_is_downloadable(self, admin_client, admin_user, kyc_form, submissions,
+                                                         settings, django_capture_on_commit_callbacks):
+        settings.OUTBOX_RELAY_ON_COMMIT = True
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post(EXPORTS_URL, {
+                'form': 'kyc-form', 'file_format': 'csv', 'filters': {'status': 'submitted'},
+            }, format='json')
+        assert response.status_code == 202
+        assert response.json()['status'] == 'queued'
+
+        job = admin_client.get(f'{EXPORTS_URL}{response.json()["id"]}/').json()
+        assert (job['status'], job['progress'], job['rows_written'], job['total_rows']) == ('completed', 100, 3, 3)
+        assert job['download_url'].endswith(f'/api/exports/{job["id"]}/download/')
+
+        download = admin_client.get(job['download_url'])
+        assert download['Content-Disposition'].startswith('attachment; filename="kyc-form-submissions-')
+        rows = list(csv.DictReader(io.StringIO(_body(download).decode())))
+        assert [row['full_name'] for row in rows] == ['Client 0', 'Client 1', 'Client 2']
+
+        assert Notification.objects.filter(user=admin_user, message__title='Export ready').count() == 1
+
+    def test_rejects_invalid_filters(self, admin_client, kyc_form):
+        response = admin_client.post(EXPORTS_URL, {'form': 'kyc-form', 'filters': {'status': 'archived'}},
+                                     format='json')
+        assert response.status_code == 400
+        assert not ExportJob.objects.exists()
+
+    def test_download_before_completion_conflicts(self, admin_client, admin_user, kyc_form):
+        job = _queue(kyc_form, admin_user)
+        assert admin_client.get(f'{EXPORTS_URL}{job.pk}/download/').status_code == 409
+
+    def test_cancel(self, admin_client, admin_user, kyc_form):
+        job = _queue(kyc_form, admin_user)
+        response = admin_client.post(f'{EXPORTS_URL}{job.pk}/cancel/')
+        assert response.json()['status'] == 'cancelled'
+        assert admin_client.post(f'{EXPORTS_URL}{job.pk}/cancel/').status_code == 409
+        assert run_export_job(job.pk) is None
+
+    def test_jobs_are_private_to_their_requester(self, admin_client, kyc_form):
+        other = CustomUser.objects.create_user(username='ops@test.com', email='ops@test.com',
+                                               password='x', is_staff=True)
+        job = _queue(kyc_form, other)
+        assert admin_client.get(f'{EXPORTS_URL}{job.pk}/').status_code == 404
+        assert admin_client.get(EXPORTS_URL).json()['results'] == []
+
+    def test_requires_staff(self, auth_client, kyc_form):
+        assert auth_client.post(EXPORTS_URL, {'form': 'kyc-form'}, format='json').status_code == 403
+
+
+@pytest.mark.django_db
+class TestRunExportJob:
+
+    def test_records_progress_while_writing(self, admin_user, kyc_form, submissions):
+        job = _queue(kyc_form, admin_user)
+        seen = []
+        real = export_jobs._record_progress
+
+        def spy(job_id):
+            record = real(job_id)
+
+            def wrapped(count):
+                record(count)
+                seen.append(ExportJob.objects.get(pk=job_id).progress)
+            return wrapped
+
+        with patch.object(exports, 'PROGRESS_EVERY', 1), patch.object(export_jobs, '_record_progress', spy):
+            run_export_job(job.pk)
+        assert seen == [33, 66, 100, 100]
+
+    def test_cancel_mid_run_discards_the_file(self, admin_user, kyc_form, submissions, media_root):
+        job = _queue(kyc_form, admin_user)
+        real = export_jobs._record_progress
+
+        def cancel_on_first_tick(job_id):
+            record = real(job_id)
+
+            def wrapped(count):
+                cancel_export_job(ExportJob.objects.get(pk=job_id))
+                record(count)
+            return wrapped
+
+        with patch.object(exports, 'PROGRESS_EVERY', 1), \
+                patch.object(export_jobs, '_record_progress', cancel_on_first_tick):
+            job = run_export_job(job.pk)
+
+        assert job.status == 'cancelled'
+        assert not job.file
+        assert not list(media_root.rglob('*.csv'))
+
+    def test_repeated_delivery_is_a_no_op(self, admin_user, kyc_form, submissions):
+        job = _queue(kyc_form, admin_user)
+        assert run_export_job(job.pk).status == 'completed'
+        assert run_export_job(job.pk) is None
+
+    def test_failure_is_recorded_and_reported(self, admin_user, kyc_form, submissions):
+        job = _queue(kyc_form, admin_user)
+        with patch.object(exports.SubmissionExport, 'chunks', side_effect=RuntimeError('disk full')):
+            job = run_export_job(job.pk)
+
+        assert (job.status, job.error) == ('failed', 'RuntimeError: disk full')
+        assert Notification.objects.filter(user=admin_user, message__title='Export failed').exists()
+
+    def test_expired_jobs_lose_their_file(self, admin_user, kyc_form, submissions, media_root):
+        job = run_export_job(_queue(kyc_form, admin_user).pk)
+        assert list(media_root.rglob('*.csv'))
+
+        ExportJob.objects.filter(pk=job.pk).update(expires_at=now() - timedelta(seconds=1))
+        assert expire_export_jobs() == 1
+        job.refresh_from_db()
+        assert (job.status, job.file.name) == ('expired', '')
+        assert not list(media_root.rglob('*.csv'))
+        assert expire_export_jobs() == 0
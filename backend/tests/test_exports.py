@@ -0,0 +1,159 @@
+# backend/tests/test_exports.py
+import csv
+import gzip
+import io
+import json
+import zipfile
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.utils.timezone import now
+
+from forms import exports, xlsx
+from forms.exports import SubmissionExport
+from forms.models import Field, Submission
+from forms.services import create_submission
+
+EXPORT_URL = '/api/forms/kyc-form/submissions/export/'
+
+
+def _body(response) -> bytes:
+    async def collect():
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return async_to_sync(collect)()
+
+
+def _csv_rows(response):
+    return list(csv.DictReader(io.StringIO(_body(response).decode())))
+
+
+@pytest.fixture
+def submissions(kyc_form, client_user):
+    return [
+        create_submission(form=kyc_form, responses={'full_name': f'Client {i}', 'id_number': str(i)},
+                          submitted_by=client_user)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestSubmissionExportApi:
+
+    def test_streams_csv_with_field_columns(self, admin_client, submissions):
+        response = admin_client.get(EXPORT_URL)
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert 'attachment; filename="kyc-form-submissions-' in response['Content-Disposition']
+        rows = _csv_rows(response)
+        assert [row['full_name'] for row in rows] == ['Client 0', 'Client 1', 'Client 2']
+        assert rows[0]['submitted_by'] == 'client@test.com'
+        assert list(rows[0])[-3:] == ['full_name', 'id_number', 'notes']
+
+    def test_columns_include_fields_removed_since(self, admin_client, kyc_form, submissions):
+        Field.objects.get(form=kyc_form, key='id_number').delete()
+        Field.objects.create(form=kyc_form, key='phone', label='Phone', field_type='phone', order=4)
+        create_submission(form=kyc_form, responses={'full_name': 'Late', 'phone': '0700'})
+
+        rows = _csv_rows(admin_client.get(EXPORT_URL))
+        assert list(rows[0])[-4:] == ['full_name', 'notes', 'phone', 'id_number']
+        assert rows[0]['id_number'] == '0'
+        assert (rows[-1]['phone'], rows[-1]['id_number']) == ('0700', '')
+
+    def test_filters_by_status_and_date(self, admin_client, submissions):
+        Submission.objects.filter(pk=submissions[0].pk).update(status='approved')
+        Submission.objects.filter(pk=submissions[1].pk).update(created_at=now() - timedelta(days=10))
+
+        approved = _csv_rows(admin_client.get(EXPORT_URL, {'status': 'approved,rejected'}))
+        assert [row['submission_id'] for row in approved] == [str(submissions[0].pk)]
+
+        recent = _csv_rows(admin_client.get(EXPORT_URL, {'created_after': (now() - timedelta(days=1)).date()}))
+        assert {row['submission_id'] for row in recent} == {str(submissions[0].pk), str(submissions[2].pk)}
+
+    def test_skips_soft_deleted(self, admin_client, submissions):
+        submissions[0].soft_delete()
+        assert len(_csv_rows(admin_client.get(EXPORT_URL))) == 2
+
+    @pytest.mark.parametrize('params', [
+        {'status': 'archived'}, {'created_before': 'yesterday'}, {'file_format': 'pdf'},
+    ])
+    def test_rejects_bad_parameters(self, admin_client, kyc_form, params):
+        assert admin_client.get(EXPORT_URL, params).status_code == 400
+
+    def test_requires_staff(self, auth_client, kyc_form):
+        assert auth_client.get(EXPORT_URL).status_code == 403
+
+    @pytest.mark.parametrize('file_format', ['csv', 'xlsx'])
+    def test_formulas_are_written_as_text(self, admin_client, kyc_form, file_format):
+        create_submission(form=kyc_form, client_identifier='@SUM(A1:A9)', responses={
+            'full_name': '=HYPERLINK("http://evil.example","Open")', 'id_number': '-42', 'notes': '-2+3',
+        })
+        response = admin_client.get(EXPORT_URL, {'file_format': file_format})
+
+        if file_format == 'csv':
+            row = _csv_rows(response)[0]
+            assert (row['full_name'], row['notes'], row['client_identifier']) == (
+                '\'=HYPERLINK("http://evil.example","Open")', "'-2+3", "'@SUM(A1:A9)",
+            )
+            assert row['id_number'] == '-42'  # a plain number is left alone
+        else:
+            with zipfile.ZipFile(io.BytesIO(_body(response))) as workbook:
+                sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+            assert "'=HYPERLINK(" in sheet and "'@SUM(A1:A9)" in sheet and '<f>' not in sheet
+
+    def test_ndjson(self, admin_client, submissions):
+        response = admin_client.get(EXPORT_URL, {'file_format': 'ndjson'})
+        records = [json.loads(line) for line in _body(response).decode().splitlines()]
+
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert [record['responses']['full_name'] for record in records] == ['Client 0', 'Client 1', 'Client 2']
+
+    def test_gzip_when_accepted(self, admin_client, submissions):
+        response = admin_client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(_body(response)).decode().count('Client ') == 3
+
+    def test_xlsx(self, admin_client, submissions):
+        response = admin_client.get(EXPORT_URL, {'file_format': 'xlsx'}, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert not response.has_header('Content-Encoding')
+        with zipfile.ZipFile(io.BytesIO(_body(response))) as workbook:
+            assert workbook.testzip() is None
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+            assert 'name="Submissions"' in workbook.read('xl/workbook.xml').decode()
+        assert sheet.count('<row>') == 4
+        assert 'Client 2' in sheet
+
+
+@pytest.mark.django_db
+class TestSubmissionExport:
+
+    def test_output_is_flushed_in_pieces(self, kyc_form, submissions):
+        export = SubmissionExport(form=kyc_form, file_format='csv', filters={})
+        with patch.object(exports, 'FLUSH_BYTES', 100):
+            chunks = list(export.chunks())
+        assert len(chunks) > 2
+        assert b''.join(chunks).decode().count('Client ') == 3
+
+    def test_rows_use_a_chunked_cursor(self, kyc_form, settings):
+        settings.EXPORT_CHUNK_SIZE = 7
+        export = SubmissionExport(form=kyc_form, file_format='csv', filters={})
+        with patch('django.db.models.query.QuerySet.iterator', autospec=True, return_value=iter(())) as iterator:
+            list(export.chunks())
+        assert iterator.call_args.kwargs == {'chunk_size': 7}
+
+    def test_xlsx_continues_on_a_new_sheet_at_the_row_limit(self):
+        with patch.object(xlsx, 'MAX_ROWS', 3):
+            writer = xlsx.XlsxStreamWriter(['a', 'b'], sheet_name='Data')
+            for i in range(5):
+                writer.write_row([i, f'<{i}>'])
+            data = writer.take() + writer.close()
+
+        with zipfile.ZipFile(io.BytesIO(data)) as workbook:
+            sheets = [workbook.read(f'xl/worksheets/sheet{n}.xml').decode() for n in (1, 2, 3)]
+            assert 'name="Data 3"' in workbook.read('xl/workbook.xml').decode()
+        assert [sheet.count('<row>') for sheet in sheets] == [3, 3, 2]  # header repeated on each
+        assert '&lt;4&gt;' in sheets[2]
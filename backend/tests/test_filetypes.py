@@ -0,0 +1,141 @@
+# backend/tests/test_filetypes.py
+import io
+import struct
+import zlib
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http.multipartparser import MultiPartParser
+from django.test import RequestFactory
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+from forms import filetypes
+from forms.filetypes import describe, sniff
+from forms.models import FileUpload, StoredBlob, UploadSession
+from forms.parsers import CheckedUploadHandler, FileTooLarge, FileTypeNotAllowed
+from forms.services import create_submission
+
+
+def _png(width, height):
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+    return b'\x89PNG\r\n\x1a\n' + chunk + b'\x00' * 64
+
+
+def _jpeg(width, height):
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00' + b'\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    exif = b'\xff\xe1' + struct.pack('>H', 2 + 5000) + b'\x00' * 5000  # big segment before the frame header
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 11, 8, height, width, 1) + b'\x01\x11\x00'
+    return b'\xff\xd8' + app0 + exif + sof0 + b'\xff\xda' + b'\x00' * 32
+
+
+def _pdf(pages):
+    objects = b''.join(b'%d 0 obj << /Type /Page /Parent 2 0 R >> endobj\n' % (i + 3) for i in range(pages))
+    return b'%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\n2 0 obj << /Type /Pages /Count ' \
+        + str(pages).encode() + b' >> endobj\n' + objects + b'%%EOF\n'
+
+
+@pytest.mark.parametrize('head, expected', [
+    (b'%PDF-1.7\n%\xe2\xe3\xcf\xd3', 'application/pdf'),
+    (_png(1, 1), 'image/png'),
+    (_jpeg(1, 1), 'image/jpeg'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + b'\x00' * 16, 'application/vnd.ms-excel'),
+    ('name,phone\nWanjiru Kamau,0712345678\nAchieng’,0722\n'.encode(), 'text/csv'),
+    (b'\xef\xbb\xbf  <html><script>alert(1)</script>', 'text/html'),
+    (b'MZ\x90\x00\x03\x00\x00\x00', 'application/octet-stream'),
+    (b'', 'application/octet-stream'),
+])
+def test_sniff(head, expected):
+    assert sniff(head) == expected
+
+
+def test_describe_images_and_pdfs(monkeypatch):
+    assert describe(io.BytesIO(_png(1200, 800)), 'image/png') == {'width': 1200, 'height': 800}
+    assert describe(io.BytesIO(_jpeg(2480, 3508)), 'image/jpeg') == {'width': 2480, 'height': 3508}
+    assert describe(io.BytesIO(b'\xff\xd8\xff\xe0'), 'image/jpeg') == {}
+
+    monkeypatch.setattr(filetypes, 'SCAN_BLOCK_SIZE', 40)  # markers straddle block boundaries
+    assert describe(io.BytesIO(_pdf(7)), 'application/pdf') == {'pages': 7}
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+    return tmp_path
+
+
+def _parse(content, name='scan.pdf'):
+    body = encode_multipart(BOUNDARY, {
+        'field_key': 'id_scan', 'file': SimpleUploadedFile(name, content, content_type='application/pdf'),
+    })
+    stream = io.BytesIO(body)
+    meta = {'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': str(len(body))}
+    parser = MultiPartParser(meta, stream, [CheckedUploadHandler(RequestFactory().post('/'))])
+    return parser, stream, len(body)
+
+
+class TestCheckedUploadHandler:
+
+    def test_oversize_file_stops_the_read(self, settings):
+        settings.MAX_UPLOAD_SIZE = 1024 * 1024
+        parser, stream, length = _parse(b'%PDF-1.4\n' + b'0' * (4 * 1024 * 1024))
+
+        with pytest.raises(FileTooLarge):
+            parser.parse()
+        assert stream.tell() < length / 2
+
+    def test_disguised_file_is_refused_after_the_first_chunk(self):
+        parser, stream, length = _parse(b'<html>' + b' ' * (2 * 1024 * 1024))
+
+        with pytest.raises(FileTypeNotAllowed, match='text/html'):
+            parser.parse()
+        assert stream.tell() < 256 * 1024
+
+    def test_detected_type_and_metadata(self):
+        parser, _, _ = _parse(_png(640, 480), name='photo.png')
+        _, files = parser.parse()
+
+        uploaded = files['file']
+        assert uploaded.content_type == 'image/png'
+        assert uploaded.meta == {'detected_type': 'image/png', 'declared_type': 'application/pdf',
+                                 'width': 640, 'height': 480}
+
+
+@pytest.mark.django_db
+class TestSniffedUploads:
+
+    @pytest.fixture
+    def submission(self, kyc_form, client_user):
+        return create_submission(form=kyc_form, responses={'full_name': 'A', 'id_number': '1'},
+                                 submitted_by=client_user)
+
+    def test_meta_is_stored(self, auth_client, submission):
+        response = auth_client.post(f'/api/submissions/{submission.pk}/upload/', {
+            'field_key': 'payslip', 'file': SimpleUploadedFile('payslip.pdf', _pdf(3), content_type='image/jpg'),
+        }, format='multipart')
+
+        assert response.status_code == 201
+        upload = FileUpload.objects.get()
+        assert upload.content_type == 'application/pdf'
+        assert upload.meta == {'detected_type': 'application/pdf', 'declared_type': 'image/jpg', 'pages': 3}
+
+    def test_spoofed_content_type_is_rejected(self, auth_client, submission):
+        response = auth_client.post(f'/api/submissions/{submission.pk}/upload/', {
+            'field_key': 'id_scan',
+            'file': SimpleUploadedFile('id.pdf', b'<svg onload="alert(1)"/>', content_type='application/pdf'),
+        }, format='multipart')
+
+        assert response.status_code == 400
+        assert 'text/html' in response.json()['detail']
+        assert not FileUpload.objects.exists() and not StoredBlob.objects.exists()
+
+    def test_chunked_upload_is_sniffed_on_the_first_chunk(self, auth_client, submission):
+        session = auth_client.post(f'/api/submissions/{submission.pk}/uploads/', {
+            'field_key': 'id_scan', 'filename': 'id.png', 'content_type': 'image/png', 'size': 1000,
+        }, format='json').json()
+
+        response = auth_client.put(f'/api/uploads/{session["id"]}/chunk/?offset=0', b'\x00ELF' + b'\x00' * 496,
+                                   content_type='application/offset+octet-stream')
+        assert response.status_code == 400
+        assert UploadSession.objects.get(pk=session['id']).status == 'cancelled'
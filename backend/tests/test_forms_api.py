@@ -37,6 +37,27 @@ def test_list_returns_field_count(api_client, kyc_form):
     assert len(form_data['fields']) == 3
 
 
+@pytest.mark.django_db
+def test_list_uses_denormalized_count(api_client, basic_form, django_assert_max_num_queries):
+    from forms.services import create_submission
+    create_submission(form=basic_form, responses={})
+    with django_assert_max_num_queries(3) as ctx:
+        response = api_client.get(FORMS_URL)
+    assert not any('COUNT(' in q['sql'] and 'forms_submission' in q['sql'] for q in ctx.captured_queries)
+    form_data = next(f for f in response.json()['results'] if f['slug'] == 'basic-form')
+    assert form_data['submission_count'] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.filterwarnings('error::django.core.paginator.UnorderedObjectListWarning')
+def test_staff_can_request_exact_counts(admin_client, basic_form):
+    from forms.models import Submission
+    Submission.objects.create(form=basic_form, schema_version=1, responses={})  # counter not bumped
+    response = admin_client.get(FORMS_URL, {'exact_counts': 'true'})
+    form_data = next(f for f in response.json()['results'] if f['slug'] == 'basic-form')
+    assert form_data['submission_count'] == 1
+
+
 # ── Retrieve ──────────────────────────────────────────────────────────────────
 
 @pytest.mark.django_db
@@ -52,6 +73,76 @@ def test_retrieve_nonexistent_form_returns_404(api_client):
     assert response.status_code == 404
 
 
+# ── Cached public schema ──────────────────────────────────────────────────────
+
+@pytest.mark.django_db
+def test_retrieve_returns_strong_etag_and_304(api_client, kyc_form):
+    first = api_client.get(form_detail_url('kyc-form'))
+    etag = first['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert first['X-Schema-Version'] == str(kyc_form.schema_version)
+
+    second = api_client.get(form_detail_url('kyc-form'), HTTP_IF_NONE_MATCH=etag)
+    assert second.status_code == 304
+    assert second['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_warm_schema_read_skips_database(api_client, kyc_form, django_assert_num_queries):
+    api_client.get(form_detail_url('kyc-form'))
+    with django_assert_num_queries(0):
+        response = api_client.get(form_detail_url('kyc-form'))
+    assert response.status_code == 200
+    assert len(response.json()['fields']) == 3
+
+
+@pytest.mark.django_db
+def test_field_change_invalidates_cached_schema(api_client, kyc_form):
+    from forms.models import Field
+    etag = api_client.get(form_detail_url('kyc-form'))['ETag']
+    Field.objects.create(form=kyc_form, key='phone', label='Phone', field_type='phone', order=4)
+
+    response = api_client.get(form_detail_url('kyc-form'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert 'phone' in {f['key'] for f in response.json()['fields']}
+
+
+@pytest.mark.django_db
+def test_build_racing_an_edit_is_not_cached(api_client, kyc_form, monkeypatch):
+    from forms import schema_cache
+    make_etag = schema_cache.make_etag
+
+    def edited_meanwhile(body):
+        # Another request renames the form after this build has read it
+        monkeypatch.setattr(schema_cache, 'make_etag', make_etag)
+        kyc_form.name = 'KYC Form (renamed)'
+        kyc_form.save()
+        return make_etag(body)
+
+    monkeypatch.setattr(schema_cache, 'make_etag', edited_meanwhile)
+    raced = api_client.get(form_detail_url('kyc-form'))
+    assert raced.json()['name'] != 'KYC Form (renamed)'
+
+    response = api_client.get(form_detail_url('kyc-form'), HTTP_IF_NONE_MATCH=raced['ETag'])
+    assert response.status_code == 200
+    assert response.json()['name'] == 'KYC Form (renamed)'
+
+
+@pytest.mark.django_db
+def test_deactivated_form_is_no_longer_served(api_client, kyc_form):
+    api_client.get(form_detail_url('kyc-form'))
+    kyc_form.is_active = False
+    kyc_form.save()
+    assert api_client.get(form_detail_url('kyc-form')).status_code == 404
+
+
+@pytest.mark.django_db
+def test_admin_retrieve_bypasses_schema_cache(admin_client, kyc_form):
+    response = admin_client.get(form_detail_url('kyc-form'))
+    assert response.status_code == 200
+    assert 'submission_count' in response.json()
+
+
 # ── Create ────────────────────────────────────────────────────────────────────
 
 @pytest.mark.django_db
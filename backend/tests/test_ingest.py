@@ -0,0 +1,124 @@
+# backend/tests/test_ingest.py
+import json
+from unittest.mock import patch
+
+import pytest
+
+from forms.ingest import ingest_submissions
+from forms.models import Form, OutboxMessage, Submission, SubmissionBatch
+from forms.validation import get_validation_plan
+from notifications.models import Notification, QueuedEmail
+from notifications.tasks import notify_admin_submission_batch
+
+BULK_URL = '/api/forms/kyc-form/submissions/bulk/'
+
+
+def _rows(count, start=0):
+    return [
+        {'responses': {'full_name': f'Client {i}', 'id_number': str(i)}, 'client_identifier': f'P-{i}'}
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.django_db
+class TestBulkIngestApi:
+
+    def test_json_array_with_per_row_results(self, admin_client, kyc_form):
+        rows = _rows(2) + [{'responses': {'full_name': 'No ID'}}, 'not an object']
+        response = admin_client.post(f'{BULK_URL}?source=partner-a.ndjson', rows, format='json')
+
+        assert response.status_code == 201
+        body = response.json()
+        assert (body['created'], body['rejected']) == (2, 2)
+        assert [row['index'] for row in body['results']] == [0, 1, 2, 3]
+        assert body['results'][2]['errors'] == {'id_number': ['This field is required.']}
+        assert 'non_field_errors' in body['results'][3]['errors']
+
+        stored = Submission.objects.get(pk=body['results'][0]['id'])
+        assert (stored.client_identifier, stored.schema_version) == ('P-0', kyc_form.schema_version)
+        batch = SubmissionBatch.objects.get(pk=body['batch'])
+        assert (batch.source, batch.created_count, batch.rejected_count) == ('partner-a.ndjson', 2, 2)
+
+    def test_ndjson_body(self, admin_client, kyc_form):
+        body = '\n'.join(json.dumps(row) for row in _rows(3)) + '\n\n'
+        response = admin_client.post(BULK_URL, body, content_type='application/x-ndjson')
+
+        assert response.status_code == 201
+        assert response.json()['created'] == 3
+
+    def test_malformed_ndjson_names_the_line(self, admin_client, kyc_form):
+        body = json.dumps(_rows(1)[0]) + '\n{oops\n'
+        response = admin_client.post(BULK_URL, body, content_type='application/x-ndjson')
+
+        assert response.status_code == 400
+        assert 'Line 2' in response.json()['detail']
+        assert not Submission.objects.exists()
+
+    def test_all_rows_rejected_is_a_400_report(self, admin_client, kyc_form):
+        response = admin_client.post(BULK_URL, [{'responses': {}}], format='json')
+
+        assert response.status_code == 400
+        assert (response.json()['batch'], response.json()['rejected']) == (None, 1)
+        assert not SubmissionBatch.objects.exists()
+
+    @pytest.mark.parametrize('body', [{'responses': {}}, []])
+    def test_rejects_non_list_or_empty_body(self, admin_client, kyc_form, body):
+        assert admin_client.post(BULK_URL, body, format='json').status_code == 400
+
+    def test_enforces_the_row_limit(self, admin_client, kyc_form, settings):
+        settings.BULK_INGEST_MAX_ROWS = 2
+        response = admin_client.post(BULK_URL, _rows(3), format='json')
+        assert response.status_code == 400
+        assert 'at most 2 rows' in response.json()['detail']
+
+    def test_ndjson_stops_reading_past_the_row_limit(self, admin_client, kyc_form, settings):
+        settings.BULK_INGEST_MAX_ROWS = 2
+        # Had the whole body been parsed, the broken last line would be reported instead
+        body = '\n'.join(json.dumps(row) for row in _rows(3)) + '\n{oops\n'
+        response = admin_client.post(BULK_URL, body, content_type='application/x-ndjson')
+
+        assert response.status_code == 400
+        assert response.json()['detail'] == 'A batch may contain at most 2 rows.'
+
+    def test_requires_staff(self, auth_client, kyc_form):
+        assert auth_client.post(BULK_URL, _rows(1), format='json').status_code == 403
+
+
+@pytest.mark.django_db
+class TestIngestSubmissions:
+
+    def test_inserts_in_chunks_with_one_outbox_message(self, kyc_form, admin_user, settings,
+                                                       django_assert_max_num_queries):
+        settings.BULK_INGEST_CHUNK_SIZE = 50
+        get_validation_plan(kyc_form)  # warm, as it is for every request after the first
+
+        # batch row, 4 INSERT chunks, search documents and terms, counter bump,
+        # outbox get_or_create, savepoints
+        with django_assert_max_num_queries(20):
+            result = ingest_submissions(form=kyc_form, rows=_rows(200), submitted_by=admin_user)
+
+        assert result.created == 200
+        assert Submission.objects.filter(form=kyc_form).count() == 200
+        assert Form.objects.get(pk=kyc_form.pk).submission_count == 200
+        assert list(OutboxMessage.objects.values_list('task', flat=True)) == [
+            'notifications.tasks.notify_admin_submission_batch',
+        ]
+
+    def test_failed_insert_stores_nothing(self, kyc_form):
+        with patch.object(Submission.objects, 'bulk_create', side_effect=RuntimeError('db down')):
+            with pytest.raises(RuntimeError):
+                ingest_submissions(form=kyc_form, rows=_rows(2))
+        assert not SubmissionBatch.objects.exists()
+        assert not OutboxMessage.objects.exists()
+
+    def test_one_notification_per_batch(self, kyc_form, admin_user):
+        result = ingest_submissions(form=kyc_form, rows=_rows(5), source='nightly.json')
+
+        notify_admin_submission_batch(str(result.batch.pk))
+        assert 'skipped' in notify_admin_submission_batch(str(result.batch.pk))
+
+        notices = Notification.objects.filter(user=admin_user).select_related('message')
+        assert [notice.message.title for notice in notices] == ['New Submissions Imported']
+        assert '5 new submissions for "KYC Form"' in notices[0].message.body
+        email = QueuedEmail.objects.get()
+        assert 'nightly.json' in email.body and 'Created:       5' in email.body
@@ -96,4 +96,170 @@ class TestFileUploadModel:
         fu = FileUpload.objects.create(
             submission=sub, field_key='passport', file='uploads/test.pdf'
         )
-        assert str(fu) == f'File for {sub.id} (passport)'
\ No newline at end of file
+        assert str(fu) == f'File for {sub.id} (passport)'
+
+@pytest.mark.django_db
+class TestFormSchemaSnapshots:
+    def _submit(self, form):
+        from forms.services import create_submission
+        return create_submission(form=form, responses={})
+
+    def test_new_form_gets_first_snapshot(self, basic_form):
+        snapshot = basic_form.schema_snapshots.get()
+        assert snapshot.schema_version == 1
+        assert snapshot.fields == []
+        assert basic_form.current_snapshot_id == snapshot.pk
+
+    def test_draft_edits_do_not_bump_version(self, kyc_form):
+        kyc_form.refresh_from_db()
+        assert kyc_form.schema_version == 1
+        snapshot = kyc_form.schema_snapshots.get()
+        assert [f['key'] for f in snapshot.fields] == ['full_name', 'id_number', 'notes']
+
+    def test_change_after_submission_bumps_version(self, kyc_form):
+        submission = self._submit(kyc_form)
+        Field.objects.create(form=kyc_form, key='phone', label='Phone', field_type='phone', order=4)
+
+        kyc_form.refresh_from_db()
+        assert kyc_form.schema_version == 2
+        assert kyc_form.schema_snapshots.count() == 2
+        # The snapshot the old submission points at is untouched
+        submission.refresh_from_db()
+        assert submission.schema_snapshot.schema_version == 1
+        assert 'phone' not in {f['key'] for f in submission.schema_snapshot.fields}
+
+    def test_no_op_save_is_skipped(self, kyc_form):
+        self._submit(kyc_form)
+        kyc_form.fields.get(key='notes').save()
+        kyc_form.refresh_from_db()
+        assert kyc_form.schema_version == 1
+
+    def test_saving_several_fields_makes_one_version(self, kyc_form, django_capture_on_commit_callbacks,
+                                                      monkeypatch):
+        from forms import signals
+        invalidated = []
+        monkeypatch.setattr(signals, 'invalidate_validation_plan', invalidated.append)
+        self._submit(kyc_form)
+        with django_capture_on_commit_callbacks(execute=True):
+            for field in kyc_form.fields.all():  # e.g. an admin save with inline fields
+                field.label = field.label.upper()
+                field.save()
+            assert len(invalidated) == 3
+        assert len(invalidated) == 4  # and once more after the commit
+        kyc_form.refresh_from_db()
+        assert kyc_form.schema_version == 2
+        assert kyc_form.schema_snapshots.count() == 2
+        assert [f['label'] for f in kyc_form.schema_snapshots.get(schema_version=2).fields] == [
+            'FULL NAME', 'ID NUMBER', 'ADDITIONAL NOTES',
+        ]
+
+    def test_rolled_back_edit_is_invalidated_after_a_later_commit(self, kyc_form,
+                                                                   django_capture_on_commit_callbacks, monkeypatch):
+        from django.db import transaction
+
+        from forms import signals
+        invalidated = []
+        monkeypatch.setattr(signals, 'invalidate_validation_plan', invalidated.append)
+        self._submit(kyc_form)
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(RuntimeError), transaction.atomic():
+                Field.objects.create(form=kyc_form, key='phone', label='Phone', field_type='phone', order=4)
+                raise RuntimeError
+            kyc_form.fields.get(key='notes').save()
+        assert invalidated == [kyc_form.pk] * 3  # the second save registered its own callback
+        kyc_form.refresh_from_db()
+        assert kyc_form.schema_version == 1
+
+    def test_submission_references_current_snapshot(self, kyc_form):
+        submission = self._submit(kyc_form)
+        assert submission.schema_snapshot_id == kyc_form.current_snapshot_id
+
+    def test_stale_client_schema_version_rejected(self, api_client, kyc_form):
+        self._submit(kyc_form)
+        Field.objects.create(form=kyc_form, key='phone', label='Phone', field_type='phone', order=4)
+        response = api_client.post('/api/submissions/', {
+            'form': str(kyc_form.id), 'schema_version': 1,
+            'responses': {'full_name': 'Jane', 'id_number': '123'},
+        }, format='json')
+        assert response.status_code == 400
+        assert 'schema_version' in response.json()
+
+
+@pytest.mark.django_db
+class TestSubmissionCounter:
+    def _count(self, form):
+        form.refresh_from_db(fields=['submission_count'])
+        return form.submission_count
+
+    def test_create_submission_increments(self, basic_form):
+        from forms.services import create_submission
+        create_submission(form=basic_form, responses={})
+        create_submission(form=basic_form, responses={})
+        assert self._count(basic_form) == 2
+
+    def test_soft_delete_decrements_once(self, basic_form):
+        from forms.services import create_submission
+        submission = create_submission(form=basic_form, responses={})
+        submission.soft_delete()
+        submission.soft_delete()
+        assert self._count(basic_form) == 0
+
+    def test_hard_delete_decrements(self, basic_form):
+        from forms.services import create_submission
+        create_submission(form=basic_form, responses={}).delete()
+        assert self._count(basic_form) == 0
+
+    def test_reconcile_command_fixes_drift(self, basic_form):
+        from io import StringIO
+
+        from django.core.management import call_command
+        Submission.objects.create(form=basic_form, schema_version=1, responses={})  # bypasses the service
+        Submission.objects.create(form=basic_form, schema_version=1, responses={}, is_deleted=True)
+
+        out = StringIO()
+        call_command('reconcile_submission_counts', stdout=out)
+        assert 'stored 0, actual 1' in out.getvalue()
+        assert self._count(basic_form) == 1
+
+
+@pytest.mark.django_db
+class TestSubmissionStatusTracking:
+    def _submission(self, form):
+        Submission.objects.create(form=form, schema_version=1, responses={})
+        return Submission.objects.get()  # loaded from the DB, like every write path
+
+    def test_non_status_save_is_a_single_statement(self, basic_form, django_assert_num_queries):
+        submission = self._submission(basic_form)
+        submission.escalation_level = 1
+        with django_assert_num_queries(1):
+            submission.save(update_fields=['escalation_level', 'updated_at'])
+        assert not submission.status_events.exists()
+
+    def test_status_change_writes_one_audit_row(self, basic_form, admin_user, django_assert_num_queries):
+        from forms.services import update_submission_status
+        submission = self._submission(basic_form)
+        # UPDATE + audit INSERT — no SELECT of the old row
+        with django_assert_num_queries(2):
+            update_submission_status(submission=submission, new_status='reviewed', changed_by=admin_user)
+        event = submission.status_events.get()
+        assert (event.from_status, event.to_status, event.changed_by) == ('submitted', 'reviewed', admin_user)
+
+    def test_consecutive_transitions_use_new_baseline(self, basic_form):
+        from forms.services import update_submission_status
+        submission = self._submission(basic_form)
+        update_submission_status(submission=submission, new_status='reviewed')
+        update_submission_status(submission=submission, new_status='reviewed')
+        update_submission_status(submission=submission, new_status='approved')
+        assert list(submission.status_events.values_list('from_status', 'to_status')) == [
+            ('submitted', 'reviewed'), ('reviewed', 'approved'),
+        ]
+
+    def test_events_are_append_only(self, basic_form):
+        from forms.models import SubmissionStatusEvent
+        from forms.services import update_submission_status
+        submission = self._submission(basic_form)
+        update_submission_status(submission=submission, new_status='reviewed')
+        event = SubmissionStatusEvent.objects.get()
+        event.to_status = 'approved'
+        with pytest.raises(ValueError):
+            event.save()
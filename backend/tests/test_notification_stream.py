@@ -0,0 +1,200 @@
+# backend/tests/test_notification_stream.py
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from notifications.models import Notification
+from notifications.pagination import encode_cursor
+from notifications.pubsub import LocalBroker, RedisBroker
+from notifications.services import Outgoing, fan_out, fan_out_many
+from notifications.streams import notification_events, receipts_after
+
+STREAM_URL = '/api/notifications/stream/'
+
+
+def _send(user, count=1):
+    fan_out_many([
+        Outgoing(type='system', title=f'Notice {i}', body='Body', user_ids=[user.pk])
+        for i in range(count)
+    ])
+
+
+def _field(frame, name):
+    for line in frame.splitlines():
+        if line.startswith(f'{name}: '):
+            return line[len(name) + 2:]
+    return None
+
+
+# Stream queries run in pool threads with their own connections: the data must be committed
+@pytest.mark.django_db(transaction=True)
+class TestNotificationEvents:
+
+    def test_fresh_stream_starts_at_newest_and_pushes_new_receipts(self, client_user):
+        _send(client_user, 2)
+        broker = LocalBroker()
+
+        async def run():
+            events = notification_events(client_user.pk, heartbeat=5, broker=broker)
+            ready = await events.__anext__()
+            await sync_to_async(fan_out)(user_ids=[client_user.pk], type='system', title='Live', body='Body')
+            broker.publish([client_user.pk])
+            pushed = await asyncio.wait_for(events.__anext__(), 2)
+            await events.aclose()
+            return ready, pushed
+
+        ready, pushed = async_to_sync(run)()
+        newest = Notification.objects.filter(user=client_user).order_by('seq')
+        assert _field(ready, 'event') == 'ready'
+        assert _field(ready, 'id') == encode_cursor((newest[1].txid, newest[1].seq))
+        assert _field(pushed, 'event') == 'notification'
+        assert '"title": "Live"' in _field(pushed, 'data')
+        assert broker.subscriber_count() == 0
+
+    def test_resumes_after_last_event_id(self, client_user):
+        _send(client_user, 3)
+        ordered = list(Notification.objects.filter(user=client_user).order_by('seq'))
+        resume_from = encode_cursor((ordered[0].txid, ordered[0].seq))
+
+        async def run():
+            events = notification_events(client_user.pk, last_event_id=resume_from, heartbeat=5,
+                                         broker=LocalBroker())
+            frames = [await events.__anext__() for _ in range(3)]
+            await events.aclose()
+            return frames
+
+        ready, *pushed = async_to_sync(run)()
+        assert _field(ready, 'id') == resume_from
+        assert [_field(frame, 'id') for frame in pushed] == [
+            encode_cursor((row.txid, row.seq)) for row in ordered[1:]
+        ]
+
+    def test_heartbeat_when_idle_without_queries(self, client_user):
+        async def run():
+            events = notification_events(client_user.pk, heartbeat=0.01, recheck_every=10,
+                                         broker=LocalBroker())
+            frames = [await events.__anext__() for _ in range(4)]
+            await events.aclose()
+            return frames
+
+        with patch('notifications.streams.receipts_after', wraps=receipts_after) as read:
+            ready, *idle = async_to_sync(run)()
+        assert ready.startswith('retry: ')
+        assert idle == [': heartbeat\n\n'] * 3
+        assert read.call_count == 1  # on connect only
+
+    def test_lost_signal_is_picked_up_by_the_recheck(self, client_user):
+        async def run():
+            events = notification_events(client_user.pk, heartbeat=0.01, recheck_every=3,
+                                         broker=LocalBroker())
+            frames = [await events.__anext__() for _ in range(2)]  # ready, then idle
+            # The signal for this fan-out is lost before it reaches the stream
+            with patch('notifications.services.publish_new_notifications'):
+                await sync_to_async(fan_out)(user_ids=[client_user.pk], type='system', title='Late', body='Body')
+            frames += [await asyncio.wait_for(events.__anext__(), 2) for _ in range(3)]
+            await events.aclose()
+            return frames
+
+        with patch('notifications.streams.receipts_after', wraps=receipts_after) as read:
+            _ready, *idle, pushed = async_to_sync(run)()
+        assert idle == [': heartbeat\n\n'] * 3
+        assert '"title": "Late"' in _field(pushed, 'data')
+        assert read.call_count == 2  # on connect, then after three heartbeats
+
+    def test_backlog_is_sent_in_bounded_batches(self, client_user):
+        _send(client_user, 1)
+        first = Notification.objects.get(user=client_user)
+        _send(client_user, 7)
+
+        async def run():
+            events = notification_events(
+                client_user.pk, last_event_id=encode_cursor((first.txid, first.seq)),
+                heartbeat=5, batch_size=3, broker=LocalBroker(),
+            )
+            frames = [await events.__anext__() for _ in range(8)]
+            await events.aclose()
+            return frames
+
+        with patch('notifications.streams.receipts_after', wraps=receipts_after) as read:
+            frames = async_to_sync(run)()
+        assert len({_field(frame, 'id') for frame in frames[1:]}) == 7
+        assert read.call_count == 3  # one query per batch of 3
+
+
+class TestBroker:
+
+    def test_signals_coalesce_into_one_wake_up(self):
+        broker = LocalBroker()
+
+        async def run():
+            subscription = broker.subscribe('user-1')
+            for _ in range(1000):
+                broker.publish(['user-1', 'user-2'])
+            woken = [await subscription.wait(0.01) for _ in range(2)]
+            subscription.close()
+            return woken
+
+        assert async_to_sync(run)() == [True, False]
+        assert broker.subscriber_count() == 0
+
+    def test_deliver_all_wakes_every_subscriber(self):
+        broker = LocalBroker()
+
+        async def run():
+            subscriptions = [broker.subscribe('user-1'), broker.subscribe('user-2')]
+            broker.deliver_all()
+            woken = [await subscription.wait(0.01) for subscription in subscriptions]
+            for subscription in subscriptions:
+                subscription.close()
+            return woken
+
+        assert async_to_sync(run)() == [True, True]
+
+    def test_redis_messages_wake_local_subscribers(self):
+        broker = RedisBroker('redis://unused')
+
+        async def run():
+            with patch.object(broker, '_ensure_listener'):
+                subscription = broker.subscribe('user-1')
+            broker.handle_message(b'not json')
+            quiet = await subscription.wait(0.01)
+            broker.handle_message(b'{"users": ["user-1"]}')
+            return quiet, await subscription.wait(0.01)
+
+        assert async_to_sync(run)() == (False, True)
+
+
+@pytest.mark.django_db
+def test_fan_out_signals_recipients_on_commit(client_user, django_capture_on_commit_callbacks):
+    with patch('notifications.services.publish_new_notifications') as publish:
+        with django_capture_on_commit_callbacks(execute=True):
+            fan_out(user_ids=[client_user.pk, client_user.pk], type='system', title='Hi', body='Body')
+            publish.assert_not_called()
+    publish.assert_called_once_with([client_user.pk])
+
+
+@pytest.mark.django_db
+class TestStreamEndpoint:
+
+    def test_requires_authentication(self):
+        response = async_to_sync(AsyncClient().get)(STREAM_URL)
+        assert response.status_code == 401
+
+    def test_streams_events_to_jwt_user(self, client_user):
+        token = str(RefreshToken.for_user(client_user).access_token)
+
+        async def run():
+            response = await AsyncClient().get(STREAM_URL, headers={'Authorization': f'Bearer {token}'})
+            content = response.streaming_content
+            first = await content.__anext__()
+            await content.aclose()
+            return response, first
+
+        response, first = async_to_sync(run)()
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'text/event-stream'
+        assert b'event: ready' in first
@@ -1,12 +1,31 @@
 # backend/tests/test_notifications.py
+import base64
+import threading
 import uuid
+from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
+from django.core import mail
+from django.db import connection, connections, transaction
+from django.utils.timezone import localtime
 
 from forms.models import Form, Submission
-from notifications.models import Notification
+from notifications import escalation
+from notifications.escalation import process_chunk, start_run
+from notifications.mail_backends import RecordingEmailBackend
+from notifications.models import (
+    EscalationChunk,
+    EscalationReminder,
+    EscalationRun,
+    Notification,
+    NotificationMessage,
+    QueuedEmail,
+    ReceiptSequence,
+)
+from notifications.services import Outgoing, fan_out, fan_out_many
 from notifications.tasks import (
+    check_escalating_alerts,
     format_responses,
     notify_admin_new_submission,
 )
@@ -34,27 +53,26 @@ class TestFormatResponses:
 @pytest.mark.django_db
 class TestNotifyAdminNewSubmission:
 
-    @patch('notifications.tasks.send_mail')
-    def test_creates_notification_for_each_staff_user(self, mock_mail, admin_user, basic_form):
+    def test_creates_notification_for_each_staff_user(self, admin_user, basic_form):
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={'full_name': 'John Doe'})
         notify_admin_new_submission(str(sub.id))
-        assert Notification.objects.filter(user=admin_user, type='submission', related_submission=sub).exists()
+        assert Notification.objects.filter(user=admin_user, message__type='submission', message__related_submission=sub).exists()
 
-    @patch('notifications.tasks.send_mail')
-    def test_sends_email_to_admin_list(self, mock_mail, admin_user, basic_form):
+    def test_sends_email_to_admin_list(self, admin_user, basic_form, settings, django_capture_on_commit_callbacks):
+        settings.ADMIN_NOTIFICATION_EMAILS = ['ops@actserv.local']
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={'a': 'b'})
-        notify_admin_new_submission(str(sub.id))
-        mock_mail.assert_called_once()
+        with django_capture_on_commit_callbacks(execute=True):
+            notify_admin_new_submission(str(sub.id))
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['ops@actserv.local']
 
-    @patch('notifications.tasks.send_mail')
-    def test_email_subject_contains_form_name(self, mock_mail, admin_user, basic_form):
+    def test_email_subject_contains_form_name(self, admin_user, basic_form, django_capture_on_commit_callbacks):
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={})
-        notify_admin_new_submission(str(sub.id))
-        subject = mock_mail.call_args[1]['subject']
-        assert 'Basic Form' in subject
+        with django_capture_on_commit_callbacks(execute=True):
+            notify_admin_new_submission(str(sub.id))
+        assert 'Basic Form' in mail.outbox[0].subject
 
-    @patch('notifications.tasks.send_mail')
-    def test_returns_success_string(self, mock_mail, admin_user, basic_form):
+    def test_returns_success_string(self, admin_user, basic_form):
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={})
         result = notify_admin_new_submission(str(sub.id))
         assert 'Notification sent successfully' in result
@@ -64,15 +82,21 @@ class TestNotifyAdminNewSubmission:
         result = notify_admin_new_submission(str(uuid.uuid4()))
         assert 'not found' in result.lower()
 
-    @patch('notifications.tasks.send_mail')
-    def test_failed_email_raises_for_retry(self, mock_mail, admin_user, basic_form):
-        mock_mail.side_effect = Exception('SMTP timeout')
+    def test_failed_email_stays_queued_for_retry(self, admin_user, basic_form, settings,
+                                                 django_capture_on_commit_callbacks):
+        settings.EMAIL_BACKEND = 'notifications.mail_backends.RecordingEmailBackend'
+        RecordingEmailBackend.reset()
+        RecordingEmailBackend.fail_recipients = {'admin@actserv.local'}
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={})
-        with pytest.raises(Exception):
-            notify_admin_new_submission(str(sub.id))
+        with django_capture_on_commit_callbacks(execute=True):
+            result = notify_admin_new_submission(str(sub.id))
+
+        assert 'Notification sent successfully' in result
+        queued = QueuedEmail.objects.get()
+        assert (queued.status, queued.attempts) == ('queued', 1)
+        assert 'SMTPRecipientsRefused' in queued.last_error
 
-    @patch('notifications.tasks.send_mail')
-    def test_bulk_creates_notifications_efficiently(self, mock_mail, db):
+    def test_bulk_creates_notifications_efficiently(self, db):
         for i in range(3):
             User.objects.create_user(
                 username=f'staff{i}@test.com', email=f'staff{i}@test.com',
@@ -81,7 +105,7 @@ class TestNotifyAdminNewSubmission:
         form = Form.objects.create(name='Bulk Test', slug='bulk-test', schema={})
         sub = Submission.objects.create(form=form, schema_version=1, responses={})
         notify_admin_new_submission(str(sub.id))
-        assert Notification.objects.filter(related_submission=sub).count() == 3
+        assert Notification.objects.filter(message__related_submission=sub).count() == 3
 
 
 @pytest.mark.django_db
@@ -89,10 +113,11 @@ class TestNotificationsApi:
 
     def _create_notification(self, user, basic_form):
         sub = Submission.objects.create(form=basic_form, schema_version=1, responses={})
-        return Notification.objects.create(
-            user=user, type='submission', title='New Submission',
-            message='A form was submitted.', related_submission=sub,
+        message = fan_out(
+            user_ids=[user.pk], type='submission', title='New Submission',
+            body='A form was submitted.', related_submission_id=sub.pk,
         )
+        return message.receipts.get()
 
     def test_unauthenticated_cannot_list_notifications(self, api_client):
         assert api_client.get(NOTIFICATIONS_URL).status_code == 401
@@ -102,7 +127,7 @@ class TestNotificationsApi:
         self._create_notification(admin_user, basic_form)
         response = auth_client.get(NOTIFICATIONS_URL)
         assert response.status_code == 200
-        assert len(response.json()) == 1
+        assert len(response.json()['results']) == 1
 
     def test_mark_notification_as_read(self, auth_client, client_user, basic_form):
         notif = self._create_notification(client_user, basic_form)
@@ -123,4 +148,305 @@ class TestNotificationsApi:
 
     def test_user_cannot_access_another_users_notification(self, auth_client, admin_user, basic_form):
         notif = self._create_notification(admin_user, basic_form)
-        assert auth_client.get(f'{NOTIFICATIONS_URL}{notif.id}/').status_code == 404
\ No newline at end of file
+        assert auth_client.get(f'{NOTIFICATIONS_URL}{notif.id}/').status_code == 404
+
+
+@pytest.mark.django_db
+class TestNotificationCursorPagination:
+
+    def _send(self, user, count):
+        # One fan-out: every receipt shares a created_at; seq keeps them in order
+        fan_out_many([
+            Outgoing(type='system', title=f'Notice {i}', body='Body', user_ids=[user.pk])
+            for i in range(count)
+        ])
+
+    def _walk(self, client, url):
+        seen = []
+        while url:
+            body = client.get(url).json()
+            seen.extend(item['id'] for item in body['results'])
+            url = body['next']
+        return seen
+
+    def test_pages_cover_every_receipt_once(self, auth_client, client_user):
+        self._send(client_user, 7)
+        seen = self._walk(auth_client, f'{NOTIFICATIONS_URL}?page_size=3')
+
+        expected = Notification.objects.filter(user=client_user).order_by('-seq')
+        assert seen == [str(pk) for pk in expected.values_list('id', flat=True)]
+
+    def test_since_returns_only_newer_receipts_oldest_first(self, auth_client, client_user):
+        self._send(client_user, 2)
+        latest = auth_client.get(NOTIFICATIONS_URL).json()['latest']
+
+        assert auth_client.get(NOTIFICATIONS_URL, {'since': latest}).json() == {
+            'next': None, 'latest': latest, 'results': [],
+        }
+
+        self._send(client_user, 3)
+        body = auth_client.get(NOTIFICATIONS_URL, {'since': latest}).json()
+        newer = Notification.objects.filter(user=client_user).order_by('seq')[2:]
+        assert [item['id'] for item in body['results']] == [str(row.pk) for row in newer]
+        assert body['latest'] != latest
+
+    def test_since_pages_forward(self, auth_client, client_user):
+        self._send(client_user, 1)
+        latest = auth_client.get(NOTIFICATIONS_URL).json()['latest']
+        self._send(client_user, 5)
+        seen = self._walk(auth_client, f'{NOTIFICATIONS_URL}?since={latest}&page_size=2')
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_receipts_of_one_fan_out_keep_their_order(self, auth_client, client_user):
+        self._send(client_user, 7)
+        seen = auth_client.get(NOTIFICATIONS_URL, {'page_size': 3}).json()['results']
+        assert [item['title'] for item in seen] == ['Notice 6', 'Notice 5', 'Notice 4']
+
+    def test_since_does_not_depend_on_timestamps(self, auth_client, client_user):
+        self._send(client_user, 1)
+        latest = auth_client.get(NOTIFICATIONS_URL).json()['latest']
+        # Stamped before the cursor, committed after it (a slow transaction)
+        self._send(client_user, 1)
+        late = Notification.objects.filter(user=client_user).order_by('seq').last()
+        Notification.objects.filter(pk=late.pk).update(created_at=late.created_at - timedelta(minutes=5))
+
+        body = auth_client.get(NOTIFICATIONS_URL, {'since': latest}).json()
+        assert [item['id'] for item in body['results']] == [str(late.pk)]
+
+    def test_fan_outs_take_consecutive_numbers(self, client_user, admin_user):
+        fan_out(user_ids=[client_user.pk, admin_user.pk], type='system', title='A', body='Body')
+        fan_out(user_ids=[client_user.pk], type='system', title='B', body='Body')
+        seqs = list(Notification.objects.oldest_first().values_list('seq', flat=True))
+        assert seqs == list(range(seqs[0], seqs[0] + 3))
+        if connection.vendor != 'postgresql':
+            assert ReceiptSequence.objects.get().last_value == seqs[-1]
+
+    def test_cursor_issued_before_positions_still_works(self, auth_client, client_user):
+        self._send(client_user, 3)
+        first = Notification.objects.filter(user=client_user).oldest_first().first()
+        legacy = base64.urlsafe_b64encode(f'seq:{first.seq}'.encode()).decode().rstrip('=')
+
+        body = auth_client.get(NOTIFICATIONS_URL, {'since': legacy}).json()
+        assert len(body['results']) == (2 if first.txid == 0 else 3)
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='the visibility horizon needs PostgreSQL')
+    @pytest.mark.django_db(transaction=True)
+    def test_fan_outs_do_not_wait_for_each_other(self, auth_client, client_user):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_fan_out():
+            try:
+                with transaction.atomic():
+                    fan_out(user_ids=[client_user.pk], type='system', title='Slow', body='Body')
+                    started.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=slow_fan_out)
+        thread.start()
+        try:
+            assert started.wait(10)
+            fan_out(user_ids=[client_user.pk], type='system', title='Fast', body='Body')  # commits first
+            # Committed, but a fan-out that started earlier may still take a lower position
+            assert auth_client.get(NOTIFICATIONS_URL).json()['results'] == []
+            assert Notification.objects.filter(user=client_user).count() == 1
+        finally:
+            release.set()
+            thread.join()
+
+        body = auth_client.get(NOTIFICATIONS_URL).json()
+        assert [item['title'] for item in body['results']] == ['Fast', 'Slow']
+
+    def test_invalid_cursor_is_404(self, auth_client):
+        assert auth_client.get(NOTIFICATIONS_URL, {'cursor': 'not-a-cursor'}).status_code == 404
+
+    def test_page_is_one_query_regardless_of_depth(self, auth_client, client_user, django_assert_max_num_queries):
+        self._send(client_user, 30)
+        url = auth_client.get(NOTIFICATIONS_URL).json()['next']
+        with django_assert_max_num_queries(1):
+            assert len(auth_client.get(url).json()['results']) == 10
+
+
+UNREAD_URL = f'{NOTIFICATIONS_URL}unread-count/'
+
+
+@pytest.mark.django_db
+class TestUnreadCount:
+
+    def _send(self, user, capture):
+        with capture(execute=True):
+            return fan_out(user_ids=[user.pk], type='system', title='Notice', body='Body').receipts.get()
+
+    def test_counts_from_database_on_first_read(self, auth_client, client_user, django_capture_on_commit_callbacks):
+        self._send(client_user, django_capture_on_commit_callbacks)
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 1}
+
+    def test_fan_out_increments_cached_counter(self, auth_client, client_user, django_capture_on_commit_callbacks,
+                                               django_assert_num_queries):
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 0}
+        self._send(client_user, django_capture_on_commit_callbacks)
+        self._send(client_user, django_capture_on_commit_callbacks)
+        with django_assert_num_queries(0):
+            assert auth_client.get(UNREAD_URL).json() == {'unread': 2}
+
+    def test_mark_all_read_resets_counter(self, auth_client, client_user, django_capture_on_commit_callbacks):
+        self._send(client_user, django_capture_on_commit_callbacks)
+        auth_client.get(UNREAD_URL)
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.post(f'{NOTIFICATIONS_URL}mark-all-read/')
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 0}
+
+    def test_marking_one_read_refreshes_counter(self, auth_client, client_user, django_capture_on_commit_callbacks):
+        receipts = [self._send(client_user, django_capture_on_commit_callbacks) for _ in range(2)]
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 2}
+        with django_capture_on_commit_callbacks(execute=True):
+            auth_client.patch(f'{NOTIFICATIONS_URL}{receipts[0].id}/', {'is_read': True}, format='json')
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 1}
+
+    def test_rolled_back_fan_out_does_not_count(self, auth_client, client_user, django_capture_on_commit_callbacks):
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 0}
+        with django_capture_on_commit_callbacks(execute=False):  # never committed
+            fan_out(user_ids=[client_user.pk], type='system', title='Notice', body='Body')
+        Notification.objects.filter(user=client_user).delete()
+        assert auth_client.get(UNREAD_URL).json() == {'unread': 0}
+
+@pytest.mark.django_db
+class TestCheckEscalatingAlerts:
+
+    def _overdue(self, form, days, user=None, **kwargs):
+        return Submission.objects.create(
+            form=form, schema_version=1, responses={}, submitted_by=user,
+            due_date=localtime().date() - timedelta(days=days), **kwargs,
+        )
+
+    def _run(self, django_capture_on_commit_callbacks, **kwargs):
+        with django_capture_on_commit_callbacks(execute=True):
+            check_escalating_alerts(**kwargs)
+        return EscalationRun.objects.get(run_date=localtime().date())
+
+    def test_sets_highest_crossed_level(self, admin_user, client_user, basic_form,
+                                        django_capture_on_commit_callbacks):
+        subs = {days: self._overdue(basic_form, days, client_user) for days in (2, 6, 9, 11, 16)}
+        run = self._run(django_capture_on_commit_callbacks)
+
+        assert run.status == 'completed'
+        assert run.escalated_count == 4
+        levels = {days: Submission.objects.get(pk=sub.pk).escalation_level for days, sub in subs.items()}
+        assert levels == {2: 0, 6: 1, 9: 2, 11: 3, 16: 4}
+
+    def test_penalty_only_from_level_three(self, admin_user, basic_form,
+                                           django_capture_on_commit_callbacks):
+        urgent = self._overdue(basic_form, 9)
+        penalised = self._overdue(basic_form, 11)
+        self._run(django_capture_on_commit_callbacks)
+
+        urgent.refresh_from_db()
+        penalised.refresh_from_db()
+        assert urgent.penalty_applied_at is None
+        assert penalised.penalty_applied_at is not None
+        assert penalised.last_reminder_sent_at is not None
+
+    def test_notifies_staff_and_submitter_and_emails_submitter(self, admin_user, client_user,
+                                                               basic_form, django_capture_on_commit_callbacks):
+        sub = self._overdue(basic_form, 6, client_user)
+        self._run(django_capture_on_commit_callbacks)
+
+        recipients = set(Notification.objects.filter(message__related_submission=sub).values_list('user_id', flat=True))
+        assert recipients == {admin_user.id, client_user.id}
+        assert 'Days overdue: 6' in NotificationMessage.objects.get(related_submission=sub).body
+        assert [message.to for message in mail.outbox] == [[client_user.email]]
+
+    def test_skips_closed_and_deleted_submissions(self, admin_user, basic_form,
+                                                  django_capture_on_commit_callbacks):
+        self._overdue(basic_form, 16, status='approved')
+        self._overdue(basic_form, 16, status='rejected')
+        self._overdue(basic_form, 16, is_deleted=True)
+        run = self._run(django_capture_on_commit_callbacks)
+        assert (run.chunk_count, run.escalated_count) == (0, 0)
+
+    def test_query_count_does_not_grow_with_submissions(self, admin_user, basic_form,
+                                                        django_assert_max_num_queries,
+                                                        django_capture_on_commit_callbacks):
+        for days in (6, 9, 11, 16) * 10:
+            self._overdue(basic_form, days)
+        with django_assert_max_num_queries(42):
+            assert self._run(django_capture_on_commit_callbacks).escalated_count == 40
+
+    def test_splits_run_into_keyset_chunks(self, admin_user, basic_form,
+                                           django_capture_on_commit_callbacks):
+        subs = sorted((self._overdue(basic_form, 6) for _ in range(7)), key=lambda sub: sub.pk)
+        run = self._run(django_capture_on_commit_callbacks, chunk_size=3)
+
+        chunks = list(run.chunks.all())
+        assert [(c.start_after, c.end_at) for c in chunks] == [
+            (None, subs[2].pk), (subs[2].pk, subs[5].pk), (subs[5].pk, subs[6].pk),
+        ]
+        assert {c.status for c in chunks} == {'completed'}
+        assert run.escalated_count == 7
+
+    def test_interrupted_run_resumes_pending_chunks(self, admin_user, basic_form,
+                                                    django_capture_on_commit_callbacks):
+        for _ in range(5):
+            self._overdue(basic_form, 6)
+        run, pending = start_run(chunk_size=2)
+        process_chunk(pending[0])  # the worker dies after the first chunk
+
+        run = self._run(django_capture_on_commit_callbacks)
+        assert run.status == 'completed'
+        assert run.escalated_count == 5
+        assert list(run.chunks.values_list('attempts', flat=True)) == [1, 1, 1]
+
+    def test_chunk_resumes_from_checkpoint(self, admin_user, basic_form,
+                                           django_capture_on_commit_callbacks):
+        for _ in range(5):
+            self._overdue(basic_form, 6)
+        run, (chunk_id,) = start_run(chunk_size=10)
+
+        real_escalate = escalation.escalate_chunk
+        calls = []
+
+        def crash_on_second_batch(rows, context):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError('worker lost')
+            return real_escalate(rows, context)
+
+        with patch.object(escalation, 'escalate_chunk', side_effect=crash_on_second_batch):
+            with pytest.raises(RuntimeError):
+                process_chunk(chunk_id, batch_size=2)
+
+        chunk = EscalationChunk.objects.get(pk=chunk_id)
+        assert chunk.status == 'pending'
+        assert chunk.escalated_count == 2
+        assert chunk.last_processed_id is not None
+
+        process_chunk(chunk_id, batch_size=2)
+        chunk.refresh_from_db()
+        assert (chunk.status, chunk.escalated_count, chunk.attempts) == ('completed', 5, 2)
+        assert Notification.objects.count() == 5
+
+    def test_reminder_key_prevents_duplicate_notifications(self, admin_user, client_user,
+                                                           basic_form, django_capture_on_commit_callbacks):
+        sub = self._overdue(basic_form, 11, client_user)
+        self._run(django_capture_on_commit_callbacks)
+        assert EscalationReminder.objects.filter(submission=sub, level=3).exists()
+
+        # A fresh run over the same state (e.g. the level was reset by hand)
+        EscalationRun.objects.all().delete()
+        Submission.objects.filter(pk=sub.pk).update(escalation_level=0)
+        run = self._run(django_capture_on_commit_callbacks)
+
+        assert run.escalated_count == 1
+        assert Submission.objects.get(pk=sub.pk).escalation_level == 3
+        assert Notification.objects.filter(message__related_submission=sub).count() == 2
+        assert len(mail.outbox) == 1
+
+    def test_second_trigger_on_the_same_day_is_a_no_op(self, admin_user, basic_form,
+                                                       django_capture_on_commit_callbacks):
+        self._overdue(basic_form, 11)
+        self._run(django_capture_on_commit_callbacks)
+        count = Notification.objects.count()
+
+        assert check_escalating_alerts() == f'Escalation run {localtime().date()}: nothing to dispatch'
+        assert Notification.objects.count() == count
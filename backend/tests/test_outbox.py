@@ -0,0 +1,152 @@
+# backend/tests/test_outbox.py
+import re
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from django.core.management import call_command
+from django.db import transaction
+from django.utils.timezone import now
+
+from forms.checks import RELAY_TASK, check_outbox_relay
+from forms.models import OutboxMessage, Submission
+from forms.outbox import enqueue, purge_sent, relay_outbox
+from forms.services import create_submission
+from notifications.models import Notification
+from notifications.tasks import notify_admin_new_submission
+
+NOTIFY_TASK = 'notifications.tasks.notify_admin_new_submission'
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+
+    def test_submission_writes_outbox_row_without_touching_the_broker(self, basic_form):
+        with patch(f'{NOTIFY_TASK}.apply_async') as mock_publish, patch(f'{NOTIFY_TASK}.delay') as mock_delay:
+            submission = create_submission(form=basic_form, responses={})
+
+        message = OutboxMessage.objects.get()
+        assert (message.task, message.args, message.status) == (NOTIFY_TASK, [str(submission.id)], 'pending')
+        assert message.dedup_key == f'submission-created:{submission.id}'
+        mock_publish.assert_not_called()
+        mock_delay.assert_not_called()
+
+    def test_rolled_back_submission_leaves_no_message(self, basic_form):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                create_submission(form=basic_form, responses={})
+                raise RuntimeError('request failed later on')
+        assert not Submission.objects.exists()
+        assert not OutboxMessage.objects.exists()
+
+    def test_same_dedup_key_is_recorded_once(self):
+        first = enqueue(NOTIFY_TASK, 'abc', dedup_key='event-1')
+        second = enqueue(NOTIFY_TASK, 'abc', dedup_key='event-1')
+        assert first.pk == second.pk
+        assert OutboxMessage.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestRelay:
+
+    def test_publishes_in_batches_and_marks_sent(self):
+        for i in range(5):
+            enqueue(NOTIFY_TASK, f'sub-{i}', dedup_key=f'event-{i}')
+        with patch(f'{NOTIFY_TASK}.apply_async') as mock_publish:
+            result = relay_outbox(batch_size=2)
+
+        assert (result.batches, result.published, result.failed) == (3, 5, 0)
+        assert mock_publish.call_count == 5
+        message = OutboxMessage.objects.get(dedup_key='event-0')
+        mock_publish.assert_any_call(args=['sub-0'], task_id=str(message.pk))
+        assert not OutboxMessage.objects.filter(status='pending').exists()
+
+    def test_failed_publish_is_retried_later_without_blocking_the_batch(self):
+        enqueue(NOTIFY_TASK, 'bad', dedup_key='event-bad')
+        enqueue(NOTIFY_TASK, 'good', dedup_key='event-good')
+
+        def broker(args, task_id):
+            if args == ['bad']:
+                raise ConnectionError('broker unavailable')
+
+        with patch(f'{NOTIFY_TASK}.apply_async', side_effect=broker):
+            result = relay_outbox()
+        assert (result.published, result.failed) == (1, 1)
+
+        bad = OutboxMessage.objects.get(dedup_key='event-bad')
+        assert (bad.status, bad.attempts) == ('pending', 1)
+        assert 'ConnectionError' in bad.last_error
+        assert bad.available_at > now()
+
+        # Not due yet
+        with patch(f'{NOTIFY_TASK}.apply_async') as mock_publish:
+            assert relay_outbox().published == 0
+            OutboxMessage.objects.filter(pk=bad.pk).update(available_at=now())
+            assert relay_outbox().published == 1
+        mock_publish.assert_called_once()
+
+    def test_relay_on_commit_delivers_end_to_end(self, settings, admin_user, basic_form,
+                                                 django_capture_on_commit_callbacks):
+        settings.OUTBOX_RELAY_ON_COMMIT = True
+        with django_capture_on_commit_callbacks(execute=True):
+            submission = create_submission(form=basic_form, responses={})
+
+        assert OutboxMessage.objects.get().status == 'sent'
+        assert Notification.objects.filter(user=admin_user, message__related_submission=submission).exists()
+
+    def test_repeat_delivery_does_not_notify_twice(self, admin_user, basic_form):
+        submission = Submission.objects.create(form=basic_form, schema_version=1, responses={})
+        notify_admin_new_submission(str(submission.id))
+        assert 'already notified' in notify_admin_new_submission(str(submission.id))
+        assert Notification.objects.filter(message__related_submission=submission).count() == 1
+
+    def test_failed_email_rolls_back_the_notifications(self, admin_user, basic_form):
+        from notifications.models import QueuedEmail
+        submission = Submission.objects.create(form=basic_form, schema_version=1, responses={})
+        with patch('notifications.tasks.queue_email', side_effect=OSError('mail queue down')):
+            with pytest.raises(Retry):
+                notify_admin_new_submission.apply(args=(str(submission.id),))
+        assert not Notification.objects.filter(message__related_submission=submission).exists()
+
+        # The retry is not mistaken for a repeat delivery
+        assert 'successfully' in notify_admin_new_submission(str(submission.id))
+        assert QueuedEmail.objects.count() == 1
+
+    def test_purge_sent_only_removes_old_sent_rows(self):
+        old = enqueue(NOTIFY_TASK, 'a', dedup_key='old')
+        enqueue(NOTIFY_TASK, 'b', dedup_key='pending')
+        OutboxMessage.objects.filter(pk=old.pk).update(status='sent', sent_at=now() - timedelta(days=10))
+        assert purge_sent(older_than_days=7) == 1
+        assert list(OutboxMessage.objects.values_list('dedup_key', flat=True)) == ['pending']
+
+    def test_management_command(self):
+        enqueue(NOTIFY_TASK, 'a', dedup_key='event-a')
+        out = StringIO()
+        with patch(f'{NOTIFY_TASK}.apply_async'):
+            call_command('relay_outbox', stdout=out)
+        assert 'Published 1 message(s), 0 failed' in out.getvalue()
+
+
+class TestRelayIsConfigured:
+
+    def test_check_passes_with_the_project_settings(self, settings):
+        settings.OUTBOX_RELAY_ON_COMMIT = False
+        assert check_outbox_relay(None) == []
+
+    def test_check_fails_without_a_relay(self, settings):
+        settings.OUTBOX_RELAY_ON_COMMIT = False
+        settings.CELERY_BEAT_SCHEDULE = {
+            name: entry for name, entry in settings.CELERY_BEAT_SCHEDULE.items() if entry['task'] != RELAY_TASK
+        }
+        assert [error.id for error in check_outbox_relay(None)] == ['forms.E001']
+
+    @pytest.mark.parametrize('name', ['docker-compose.yml', 'render.yaml'])
+    def test_deployments_run_beat(self, name):
+        path = REPO_ROOT / name
+        if not path.exists():
+            pytest.skip(f'{name} is not part of this checkout')
+        assert re.search(r'celery -A actserv_backend (beat|worker .*--beat)', path.read_text())
@@ -0,0 +1,165 @@
+# backend/tests/test_processing.py
+import hashlib
+import io
+from io import StringIO
+
+import pytest
+from celery.exceptions import Retry
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from forms import processing
+from forms.models import FileUpload, OutboxMessage
+from forms.processing import preview_name, run_stage
+from forms.serializers import FileUploadSerializer
+from forms.services import create_submission
+from forms.tasks import process_upload_stage
+
+PDF = b'%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\n2 0 obj << /Type /Pages /Count 2 >> endobj\n' \
+    b'3 0 obj << /Type /Page >> endobj\n4 0 obj << /Type /Page >> endobj\n%%EOF\n'
+# Stand-in for poppler's pdftoppm: writes "<prefix>.jpg" like the real tool
+FAKE_PDFTOPPM = '#!/bin/sh\nfor last; do :; done\nprintf "\\377\\330\\377 first page" > "$last.jpg"\n'
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    monkeypatch.setenv('PATH', str(bin_dir))  # no poppler unless a test installs a stand-in
+    return tmp_path
+
+
+@pytest.fixture
+def pdftoppm(upload_dirs):
+    script = upload_dirs / 'bin' / 'pdftoppm'
+    script.write_text(FAKE_PDFTOPPM)
+    script.chmod(0o755)
+    return script
+
+
+@pytest.fixture
+def submissions(kyc_form, client_user):
+    return [
+        create_submission(form=kyc_form, responses={'full_name': f'Client {i}', 'id_number': str(i)},
+                          submitted_by=client_user)
+        for i in range(2)
+    ]
+
+
+def _upload(client, submission, content=PDF, name='id.pdf', content_type='application/pdf'):
+    response = client.post(f'/api/submissions/{submission.pk}/upload/', {
+        'field_key': 'id_scan', 'file': SimpleUploadedFile(name, content, content_type=content_type),
+    }, format='multipart')
+    assert response.status_code == 201
+    return FileUpload.objects.get(pk=response.json()[0]['id'])
+
+
+@pytest.mark.django_db
+class TestUploadProcessing:
+
+    def test_stages_are_queued_with_the_upload(self, auth_client, submissions):
+        upload = _upload(auth_client, submissions[0])
+
+        messages = OutboxMessage.objects.order_by('dedup_key').filter(task=processing.PROCESS_TASK)
+        assert [message.args for message in messages] == [
+            [str(upload.pk), 'checksum'], [str(upload.pk), 'pages'], [str(upload.pk), 'preview'],
+        ]
+        assert 'stages' not in upload.meta  # nothing ran in the request
+
+    def test_pdf_is_processed_after_commit(self, auth_client, submissions, pdftoppm,
+                                           django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            upload = _upload(auth_client, submissions[0])
+
+        upload.refresh_from_db()
+        assert upload.meta['sha256'] == hashlib.sha256(PDF).hexdigest()
+        assert upload.meta['pages'] == 2
+        assert upload.meta['preview'] == preview_name(upload.meta['sha256'])
+        assert {stage: outcome['status'] for stage, outcome in upload.meta['stages'].items()} == {
+            'checksum': 'done', 'pages': 'done', 'preview': 'done',
+        }
+        preview = auth_client.get(FileUploadSerializer(upload).data['preview_url'])
+        assert b''.join(preview.streaming_content).startswith(b'\xff\xd8\xff')
+
+    def test_missing_tool_skips_only_its_stage(self, auth_client, submissions, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            upload = _upload(auth_client, submissions[0])
+
+        upload.refresh_from_db()
+        assert upload.meta['stages']['preview'] == {
+            'status': 'skipped', 'at': upload.meta['stages']['preview']['at'], 'detail': 'pdftoppm is not installed',
+        }
+        assert upload.meta['stages']['pages']['status'] == 'done' and upload.meta['pages'] == 2
+        assert 'preview' not in upload.meta
+
+    def test_stages_run_once_and_previews_are_shared(self, auth_client, submissions, pdftoppm, monkeypatch):
+        first, second = _upload(auth_client, submissions[0]), _upload(auth_client, submissions[1])
+        assert run_stage(first.pk, 'preview') == 'done'
+
+        pdftoppm.unlink()  # neither a repeat nor the same content needs rendering again
+        assert run_stage(first.pk, 'preview') == 'unchanged'
+        assert run_stage(second.pk, 'preview') == 'done'
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert first.meta['preview'] == second.meta['preview']
+
+    def test_failing_stage_is_retried_alone_then_recorded(self, auth_client, submissions, monkeypatch):
+        upload = _upload(auth_client, submissions[0])
+        calls = []
+
+        def broken(upload, path):
+            calls.append(path)
+            raise OSError('disk went away')
+
+        monkeypatch.setitem(processing.STAGES, 'pages', broken)
+        assert process_upload_stage.apply(args=(str(upload.pk), 'checksum')).get().endswith('checksum done')
+        with pytest.raises(Retry):
+            process_upload_stage.apply(args=(str(upload.pk), 'pages'))
+        upload.refresh_from_db()
+        assert 'pages' not in upload.meta['stages']
+
+        last_try = process_upload_stage.apply(args=(str(upload.pk), 'pages'), retries=process_upload_stage.max_retries)
+        assert last_try.get().endswith('pages failed') and len(calls) == 2
+        upload.refresh_from_db()
+        assert upload.meta['stages']['checksum']['status'] == 'done'
+        assert upload.meta['stages']['pages']['status'] == 'failed'
+        assert upload.meta['stages']['pages']['detail'] == 'OSError: disk went away'
+
+    def test_damaged_file_fails_the_checksum(self, auth_client, submissions):
+        upload = _upload(auth_client, submissions[0])
+        with open(upload.file.path, 'wb') as stored:
+            stored.write(b'%PDF-1.4 truncated')
+
+        with pytest.raises(ValueError, match='does not match digest'):
+            run_stage(upload.pk, 'checksum')
+
+    def test_image_preview(self, auth_client, submissions, settings, django_capture_on_commit_callbacks):
+        image_module = pytest.importorskip('PIL.Image')
+        settings.UPLOAD_PREVIEW_MAX_SIZE = 200
+        buffer = io.BytesIO()
+        image_module.new('RGB', (1600, 1200), 'navy').save(buffer, 'PNG')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            upload = _upload(auth_client, submissions[0], buffer.getvalue(), 'id.png', 'image/png')
+
+        upload.refresh_from_db()
+        assert set(upload.meta['stages']) == {'checksum', 'preview'}
+        with default_storage.open(upload.meta['preview'], 'rb') as preview:
+            assert image_module.open(preview).size == (200, 150)
+
+    def test_backfill_command(self, submissions, pdftoppm):
+        name = default_storage.save('uploads/2025/01/01/id.pdf', io.BytesIO(PDF))
+        legacy = FileUpload.objects.create(submission=submissions[0], field_key='id_scan', file=name,
+                                           file_size=len(PDF), content_type='application/pdf')
+
+        out = StringIO()
+        call_command('process_uploads', stdout=out)
+        assert 'Queued 3 processing stage(s)' in out.getvalue()
+        legacy.refresh_from_db()
+        assert (legacy.meta['pages'], legacy.meta['preview']) == (2, preview_name(hashlib.sha256(PDF).hexdigest()))
+
+        call_command('process_uploads', stdout=out)
+        assert 'Queued 0 processing stage(s)' in out.getvalue()
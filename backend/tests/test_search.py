@@ -0,0 +1,173 @@
+# backend/tests/test_search.py
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from forms.ingest import ingest_submissions
+from forms.models import Field, Submission, SubmissionSearchDocument, SubmissionSearchTerm
+from forms.search import search_submissions, terms, uses_tsvector
+from forms.services import create_submission
+
+SEARCH_URL = '/api/submissions/search/'
+
+postgresql_only = pytest.mark.skipif(connection.vendor != 'postgresql', reason='tsvector search needs PostgreSQL')
+term_fallback_only = pytest.mark.skipif(connection.vendor == 'postgresql', reason='PostgreSQL uses tsvector')
+
+
+@pytest.fixture
+def clients(kyc_form):
+    return [
+        create_submission(form=kyc_form, client_identifier='BANK-001', responses={
+            'full_name': 'Wanjiru Kamau', 'id_number': '28451936', 'notes': 'Phone 0712 345 678',
+        }),
+        create_submission(form=kyc_form, responses={'full_name': 'Otieno Kamau', 'id_number': '30117755'}),
+        create_submission(form=kyc_form, responses={'full_name': 'Achieng Odhiambo', 'id_number': '22004411'}),
+    ]
+
+
+def _relabel(form, key, label):
+    field = Field.objects.get(form=form, key=key)
+    field.label = label
+    field.save()  # bumps the schema version, so new submissions get a new snapshot
+    form.refresh_from_db()
+
+
+def test_terms():
+    assert terms('Phone: +254 (712) 345-678') == ['phone', '254', '712', '345', '678', '254712345678']
+    assert terms('ID_number é') == ['id', 'number', 'é']
+
+
+@pytest.mark.django_db
+class TestSearchApi:
+
+    def test_finds_by_national_id(self, admin_client, clients):
+        response = admin_client.get(SEARCH_URL, {'q': '28451936'})
+
+        assert response.status_code == 200
+        assert [row['id'] for row in response.json()] == [str(clients[0].pk)]
+        assert response.json()[0]['rank'] > 0
+
+    def test_phone_with_or_without_separators(self, admin_client, clients):
+        for q in ('0712345678', '0712 345'):
+            assert [row['id'] for row in admin_client.get(SEARCH_URL, {'q': q}).json()] == [str(clients[0].pk)]
+
+    def test_every_term_must_match_as_a_prefix(self, admin_client, clients):
+        both = admin_client.get(SEARCH_URL, {'q': 'kam'}).json()
+        assert {row['id'] for row in both} == {str(clients[0].pk), str(clients[1].pk)}
+
+        one = admin_client.get(SEARCH_URL, {'q': 'kamau otie'}).json()
+        assert [row['id'] for row in one] == [str(clients[1].pk)]
+
+    def test_short_words_match_whole_terms(self, admin_client, kyc_form, clients):
+        li = create_submission(form=kyc_form, responses={'full_name': 'Li Wei', 'id_number': '10203040'})
+
+        assert admin_client.get(SEARCH_URL, {'q': 'ka'}).json() == []
+        assert [row['id'] for row in admin_client.get(SEARCH_URL, {'q': 'li'}).json()] == [str(li.pk)]
+        assert [row['id'] for row in admin_client.get(SEARCH_URL, {'q': 'wan li'}).json()] == []
+
+    def test_values_outrank_labels(self, admin_client, kyc_form, clients):
+        _relabel(kyc_form, 'notes', 'Wanjiru notes')
+        labelled = create_submission(form=kyc_form, responses={'full_name': 'Someone', 'notes': 'x'})
+
+        ids = [row['id'] for row in admin_client.get(SEARCH_URL, {'q': 'wanjiru'}).json()]
+        assert ids == [str(clients[0].pk), str(labelled.pk)]
+
+    def test_labels_come_from_the_submission_snapshot(self, admin_client, kyc_form, clients):
+        assert admin_client.get(SEARCH_URL, {'q': 'additional'}).json()  # "Additional Notes" label
+        _relabel(kyc_form, 'notes', 'Remarks')
+        create_submission(form=kyc_form, responses={'full_name': 'Later', 'notes': 'x'})
+
+        assert len(admin_client.get(SEARCH_URL, {'q': 'additional'}).json()) == 1
+        assert len(admin_client.get(SEARCH_URL, {'q': 'remarks'}).json()) == 1
+
+    def test_filters_and_soft_deletes(self, admin_client, clients):
+        Submission.objects.filter(pk=clients[1].pk).update(status='approved')
+        clients[0].soft_delete()
+
+        assert [row['id'] for row in admin_client.get(SEARCH_URL, {'q': 'kamau'}).json()] == [str(clients[1].pk)]
+        assert admin_client.get(SEARCH_URL, {'q': 'kamau', 'status': 'submitted'}).json() == []
+        assert admin_client.get(SEARCH_URL, {'q': 'kamau', 'form': 'other'}).json() == []
+
+    @pytest.mark.parametrize('params', [{}, {'q': '  -- '}, {'q': 'kamau', 'status': 'archived'},
+                                        {'q': 'kamau', 'limit': 'ten'}])
+    def test_rejects_bad_queries(self, admin_client, clients, params):
+        assert admin_client.get(SEARCH_URL, params).status_code == 400
+
+    def test_requires_staff(self, auth_client, clients):
+        assert auth_client.get(SEARCH_URL, {'q': 'kamau'}).status_code == 403
+
+    def test_admin_edit_reindexes(self, admin_client, kyc_form, clients):
+        response = admin_client.patch(f'/api/submissions/{clients[2].pk}/', {
+            'form': str(kyc_form.pk), 'responses': {'full_name': 'Achieng Mwangi', 'id_number': '22004411'},
+        }, format='json')
+        assert response.status_code == 200
+        assert admin_client.get(SEARCH_URL, {'q': 'odhiambo'}).json() == []
+        assert len(admin_client.get(SEARCH_URL, {'q': 'mwangi'}).json()) == 1
+
+
+@pytest.mark.django_db
+class TestIndexing:
+
+    def test_bulk_ingest_is_indexed(self, kyc_form):
+        ingest_submissions(form=kyc_form, rows=[
+            {'responses': {'full_name': f'Member {i}', 'id_number': f'5500{i:04d}'}} for i in range(5)
+        ])
+        assert SubmissionSearchDocument.objects.count() == 5
+        (match, _), = search_submissions('55000003')
+        assert match.responses['full_name'] == 'Member 3'
+
+    @term_fallback_only
+    def test_search_query_count(self, clients, django_assert_num_queries):
+        # matching terms, the scope check, then the submissions themselves (+ prefetched files)
+        with django_assert_num_queries(4):
+            assert len(search_submissions('kamau')) == 2
+
+    def test_backfill_command(self, kyc_form):
+        Submission.objects.create(form=kyc_form, schema_version=1, responses={'full_name': 'Legacy Client'})
+        assert search_submissions('legacy') == []
+
+        out = StringIO()
+        call_command('index_submissions', '--missing', stdout=out)
+        assert 'Indexed 1 submission(s)' in out.getvalue()
+        assert len(search_submissions('legacy')) == 1
+
+        call_command('index_submissions', stdout=StringIO())
+        assert len(search_submissions('legacy')) == 1
+        if not uses_tsvector():
+            assert SubmissionSearchTerm.objects.filter(term='legacy').count() == 1
+
+
+@postgresql_only
+@pytest.mark.django_db
+class TestPostgresSearch:
+
+    def test_vector_column_and_index_exist(self):
+        table = SubmissionSearchDocument._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname = %s',
+                           [table, 'submission_search_vector_idx'])
+            (indexdef,), = cursor.fetchall()
+        assert 'USING gin (vector)' in indexdef
+
+    def test_matches_come_from_the_vector(self, clients):
+        assert uses_tsvector()
+        assert not SubmissionSearchTerm.objects.exists()
+
+        assert [s.pk for s, _ in search_submissions('kam otieno')] == [clients[1].pk]
+        assert [s.pk for s, _ in search_submissions('0712345678')] == [clients[0].pk]
+        assert search_submissions('ka') == []
+
+    def test_values_outrank_labels(self, kyc_form, clients):
+        _relabel(kyc_form, 'notes', 'Wanjiru notes')
+        labelled = create_submission(form=kyc_form, responses={'full_name': 'Someone', 'notes': 'x'})
+
+        (first, value_rank), (second, label_rank) = search_submissions('wanjiru')
+        assert (first.pk, second.pk) == (clients[0].pk, labelled.pk)
+        assert value_rank > label_rank > 0
+
+    def test_query_count(self, clients, django_assert_num_queries):
+        # ranked matches, then the submissions themselves (+ prefetched files)
+        with django_assert_num_queries(3):
+            assert len(search_submissions('kamau')) == 2
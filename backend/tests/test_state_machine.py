@@ -0,0 +1,109 @@
+# backend/tests/test_state_machine.py
+import uuid
+
+import pytest
+
+from forms.models import OutboxMessage, Submission, SubmissionStatusEvent
+from forms.services import bulk_update_submission_status, update_submission_status
+from forms.transitions import StateMachine, submission_states
+from notifications.models import Notification
+from notifications.tasks import notify_status_changes
+
+SUBMISSIONS_URL = '/api/submissions/'
+
+
+@pytest.fixture
+def submission(kyc_form, client_user):
+    Submission.objects.create(form=kyc_form, schema_version=1, responses={}, submitted_by=client_user)
+    return Submission.objects.get()  # loaded from the DB, like every write path
+
+
+@pytest.fixture
+def four_eyes(admin_user):
+    """A guard: nobody may approve a submission they submitted themselves."""
+    def guard(submission, changed_by):
+        if changed_by is not None and submission.submitted_by_id == changed_by.pk:
+            return 'You cannot approve your own submission.'
+        return None
+
+    submission_states.guard('approved')(guard)
+    yield guard
+    submission_states._guards['approved'].remove(guard)
+
+
+def test_machine_rejects_unknown_states():
+    with pytest.raises(ValueError, match='archived'):
+        StateMachine(['draft', 'done'], {'draft': ['archived']})
+
+
+@pytest.mark.django_db
+class TestTransitions:
+
+    def test_disallowed_move_is_rejected(self, submission):
+        update_submission_status(submission=submission, new_status='approved')
+        with pytest.raises(ValueError, match='from approved to submitted'):
+            update_submission_status(submission=submission, new_status='submitted')
+        assert Submission.objects.get().status == 'approved'
+
+    def test_patch_endpoint_enforces_the_machine(self, admin_client, submission):
+        url = f'{SUBMISSIONS_URL}{submission.pk}/status/'
+        response = admin_client.patch(url, {'status': 'rejected'}, format='json')
+        assert response.status_code == 200
+        assert response.json()['allowed_transitions'] == ['reviewed']
+
+        response = admin_client.patch(url, {'status': 'approved'}, format='json')
+        assert response.status_code == 400
+        assert admin_client.patch(f'{SUBMISSIONS_URL}{uuid.uuid4()}/status/', {'status': 'approved'},
+                                  format='json').status_code == 404
+
+    def test_allowed_transitions_are_embedded(self, admin_client, submission):
+        body = admin_client.get(f'{SUBMISSIONS_URL}{submission.pk}/').json()
+        assert body['allowed_transitions'] == ['reviewed', 'approved', 'rejected']
+
+
+@pytest.mark.django_db
+class TestGuards:
+
+    def test_guard_blocks_single_bulk_and_listing(self, submission, client_user, admin_user, four_eyes):
+        with pytest.raises(ValueError, match='your own submission'):
+            update_submission_status(submission=submission, new_status='approved', changed_by=client_user)
+
+        result = bulk_update_submission_status(
+            submissions=Submission.objects.all(), new_status='approved', changed_by=client_user,
+        )
+        assert result.not_allowed == [(submission.pk, 'submitted', 'You cannot approve your own submission.')]
+
+        assert submission_states.next_states(submission, changed_by=client_user) == ['reviewed', 'rejected']
+        assert 'approved' in submission_states.next_states(submission, changed_by=admin_user)
+
+
+@pytest.mark.django_db
+class TestEffects:
+
+    def test_single_change_notifies_the_submitter(self, submission, client_user, admin_user, settings,
+                                                  django_capture_on_commit_callbacks):
+        settings.OUTBOX_RELAY_ON_COMMIT = True
+        with django_capture_on_commit_callbacks(execute=True):
+            update_submission_status(submission=submission, new_status='approved', changed_by=admin_user)
+
+        notice = Notification.objects.select_related('message').get(user=client_user)
+        assert (notice.message.title, notice.message.related_submission_id) == ('Submission Approved', submission.pk)
+
+    def test_bulk_change_queues_one_message(self, kyc_form, client_user):
+        Submission.objects.bulk_create([
+            Submission(form=kyc_form, schema_version=1, responses={}, submitted_by=client_user) for _ in range(3)
+        ])
+        bulk_update_submission_status(submissions=Submission.objects.all(), new_status='rejected')
+
+        message = OutboxMessage.objects.get(task='notifications.tasks.notify_status_changes')
+        assert len(message.args[0]) == 3
+
+        notify_status_changes(*message.args)
+        notify_status_changes(*message.args)  # repeated delivery
+        titles = Notification.objects.filter(user=client_user).values_list('message__title', flat=True)
+        assert list(titles) == ['Submission Rejected'] * 3
+
+    def test_review_is_not_announced(self, submission):
+        update_submission_status(submission=submission, new_status='reviewed')
+        assert SubmissionStatusEvent.objects.count() == 1
+        assert not OutboxMessage.objects.filter(task='notifications.tasks.notify_status_changes').exists()
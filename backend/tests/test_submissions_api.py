@@ -4,6 +4,7 @@ from unittest.mock import patch
 import pytest
 
 from forms.models import Submission
+from forms.outbox import relay_outbox
 
 SUBMISSIONS_URL = '/api/submissions/'
 
@@ -23,13 +24,17 @@ def test_anonymous_can_submit_form(mock_task, api_client, basic_form):
 
 
 @pytest.mark.django_db
-@patch('notifications.tasks.notify_admin_new_submission.delay')
+@patch('notifications.tasks.notify_admin_new_submission.apply_async')
 def test_submission_triggers_celery_task(mock_task, api_client, basic_form):
     api_client.post(SUBMISSIONS_URL, {'form': str(basic_form.id), 'responses': {}}, format='json')
-    mock_task.assert_called_once()
+    # Recorded in the outbox, not sent to the broker from the request
+    mock_task.assert_not_called()
     submission = Submission.objects.first()
     assert submission is not None
-    mock_task.assert_called_with(str(submission.id))
+
+    relay_outbox()
+    mock_task.assert_called_once()
+    assert mock_task.call_args.kwargs['args'] == [str(submission.id)]
 
 
 @pytest.mark.django_db
@@ -0,0 +1,142 @@
+# backend/tests/test_uploads.py
+import io
+from datetime import timedelta
+
+import pytest
+from django.utils.timezone import now
+
+from forms.models import FileUpload, UploadSession
+from forms.services import create_submission
+from forms.uploads import expire_upload_sessions, spool_path, start_upload, write_chunk
+
+CHUNK = 1000
+PAYLOAD = b'%PDF-1.4\n' + bytes(range(256)) * 9  # 2313 bytes: two full chunks and a short one
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.UPLOAD_SPOOL_DIR = str(tmp_path / 'spool')
+    settings.UPLOAD_CHUNK_MAX_SIZE = CHUNK
+    return tmp_path
+
+
+@pytest.fixture
+def submission(kyc_form, client_user):
+    return create_submission(form=kyc_form, responses={'full_name': 'Wanjiru Kamau', 'id_number': '1'},
+                             submitted_by=client_user)
+
+
+def _start(client, submission, size=len(PAYLOAD), content_type='application/pdf'):
+    return client.post(f'/api/submissions/{submission.pk}/uploads/', {
+        'field_key': 'id_scan', 'filename': 'id.pdf', 'content_type': content_type, 'size': size,
+    }, format='json')
+
+
+def _put(client, session_id, offset, data):
+    return client.put(f'/api/uploads/{session_id}/chunk/?offset={offset}', data,
+                      content_type='application/offset+octet-stream')
+
+
+@pytest.mark.django_db
+class TestChunkedUploadApi:
+
+    def test_upload_in_chunks_then_complete(self, auth_client, submission, upload_dirs):
+        started = _start(auth_client, submission)
+        assert started.status_code == 201
+        session_id = started.json()['id']
+        assert (started.json()['received'], started.json()['chunk_size']) == (0, CHUNK)
+
+        for offset in range(0, len(PAYLOAD), CHUNK):
+            response = _put(auth_client, session_id, offset, PAYLOAD[offset:offset + CHUNK])
+            assert response.status_code == 200
+            assert response.json()['received'] == min(offset + CHUNK, len(PAYLOAD))
+
+        response = auth_client.post(f'/api/uploads/{session_id}/complete/')
+        assert response.status_code == 201
+        upload = FileUpload.objects.get(pk=response.json()['id'])
+        assert (upload.submission_id, upload.field_key, upload.file_size) == (submission.pk, 'id_scan', len(PAYLOAD))
+        with upload.file.open('rb') as stored:
+            assert stored.read() == PAYLOAD
+        assert not any((upload_dirs / 'spool').iterdir())
+        assert auth_client.get(f'/api/uploads/{session_id}/').json()['file']['id'] == str(upload.pk)
+
+    def test_limits_are_checked_before_any_bytes(self, auth_client, submission, settings):
+        settings.MAX_UPLOAD_SIZE = 2000
+        assert _start(auth_client, submission).status_code == 413
+        assert _start(auth_client, submission, size=10, content_type='text/html').status_code == 400
+        assert not UploadSession.objects.exists()
+
+    def test_resume_after_a_lost_response(self, auth_client, submission):
+        session_id = _start(auth_client, submission).json()['id']
+        _put(auth_client, session_id, 0, PAYLOAD[:CHUNK])
+
+        # The client never saw the 200 and sends the same chunk again
+        replay = _put(auth_client, session_id, 0, PAYLOAD[:CHUNK])
+        assert replay.status_code == 409
+        assert replay.json()['received'] == CHUNK
+        assert auth_client.get(f'/api/uploads/{session_id}/').json()['received'] == CHUNK
+
+    @pytest.mark.parametrize('offset, size', [(0, CHUNK + 1), (2000, 600)])
+    def test_rejects_oversize_chunks(self, auth_client, submission, offset, size):
+        session_id = _start(auth_client, submission).json()['id']
+        UploadSession.objects.filter(pk=session_id).update(received=offset)
+        assert _put(auth_client, session_id, offset, b'x' * size).status_code == 413
+
+    def test_complete_requires_every_byte_and_is_repeatable(self, auth_client, submission):
+        session_id = _start(auth_client, submission, size=10).json()['id']
+        _put(auth_client, session_id, 0, b'x' * 9)
+        assert auth_client.post(f'/api/uploads/{session_id}/complete/').status_code == 409
+
+        _put(auth_client, session_id, 9, b'y')
+        first = auth_client.post(f'/api/uploads/{session_id}/complete/').json()
+        again = auth_client.post(f'/api/uploads/{session_id}/complete/')
+        assert again.status_code == 201
+        assert again.json()['id'] == first['id']
+        assert FileUpload.objects.count() == 1
+
+    def test_cancel_deletes_received_bytes(self, auth_client, submission):
+        session_id = _start(auth_client, submission).json()['id']
+        _put(auth_client, session_id, 0, PAYLOAD[:CHUNK])
+        session = UploadSession.objects.get(pk=session_id)
+
+        assert auth_client.delete(f'/api/uploads/{session_id}/').status_code == 204
+        assert not spool_path(session).exists()
+        assert _put(auth_client, session_id, CHUNK, PAYLOAD[CHUNK:2 * CHUNK]).status_code == 400
+
+    def test_only_the_owner(self, api_client, auth_client, admin_user, submission):
+        session_id = _start(auth_client, submission).json()['id']
+
+        api_client.force_authenticate(user=admin_user)
+        assert api_client.get(f'/api/uploads/{session_id}/').status_code == 404
+        other = create_submission(form=submission.form, responses={'full_name': 'X', 'id_number': '2'},
+                                  submitted_by=admin_user)
+        api_client.force_authenticate(user=submission.submitted_by)
+        assert _start(api_client, other).status_code == 403
+
+
+@pytest.mark.django_db
+class TestUploadSessions:
+
+    def _session(self, submission, size=len(PAYLOAD)):
+        return start_upload(submission=submission, uploaded_by=submission.submitted_by, field_key='id_scan',
+                            filename='id.pdf', content_type='application/pdf', total_size=size)
+
+    def test_truncated_chunk_keeps_what_arrived(self, submission):
+        session = self._session(submission)
+
+        with pytest.raises(ValueError, match='resume from offset 600'):
+            write_chunk(session, offset=0, length=CHUNK, stream=io.BytesIO(PAYLOAD[:600]))
+        session = write_chunk(session, offset=600, length=400, stream=io.BytesIO(PAYLOAD[600:1000]))
+        assert session.received == CHUNK
+        assert spool_path(session).read_bytes() == PAYLOAD[:CHUNK]
+
+    def test_expiry_removes_abandoned_spools(self, submission):
+        stale, fresh = self._session(submission), self._session(submission)
+        UploadSession.objects.filter(pk=stale.pk).update(expires_at=now() - timedelta(minutes=1))
+
+        assert expire_upload_sessions() == 1
+        assert not spool_path(stale).exists() and spool_path(fresh).exists()
+        assert UploadSession.objects.get(pk=stale.pk).status == 'expired'
+        with pytest.raises(ValueError):
+            write_chunk(UploadSession.objects.get(pk=stale.pk), offset=0, length=1, stream=io.BytesIO(b'x'))
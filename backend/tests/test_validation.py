@@ -0,0 +1,230 @@
+# backend/tests/test_validation.py
+"""
+Unit tests for compiled submission validation plans (forms/validation.py)
+and the per-field-type validator registry (forms/validators.py).
+"""
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from forms import validation
+from forms.models import Field
+from forms.serializers import SubmissionSerializer
+from forms.validation import (
+    _generation_key, clear_validation_plans, get_validation_plan, invalidate_validation_plan,
+)
+from forms.validators import FIELD_VALIDATORS, build_field_validator
+
+
+def validate_value(field_type, value, options=None, **rules):
+    return build_field_validator(key='f', field_type=field_type, options=options, rules=rules)(value)
+
+
+@pytest.fixture(autouse=True)
+def _empty_plan_cache():
+    clear_validation_plans()
+    yield
+    clear_validation_plans()
+
+
+@pytest.fixture
+def typed_form(basic_form):
+    Field.objects.create(form=basic_form, key='age',   label='Age',   field_type='number', required=True,  order=1)
+    Field.objects.create(form=basic_form, key='email', label='Email', field_type='email',  required=False, order=2)
+    Field.objects.create(form=basic_form, key='dob',   label='DOB',   field_type='date',   required=False, order=3)
+    Field.objects.create(form=basic_form, key='id',    label='ID',    field_type='file',   required=True,  order=4)
+    return basic_form
+
+
+class TestFieldValidators:
+
+    def test_every_field_type_is_registered_or_skipped(self):
+        for field_type, _ in Field.FIELD_TYPES:
+            assert field_type in FIELD_VALIDATORS or build_field_validator(key='f', field_type=field_type) is None
+
+    def test_dropdown_membership_uses_option_values(self):
+        options = [{'value': 'nbo', 'label': 'Nairobi'}, {'value': 'msa', 'label': 'Mombasa'}]
+        assert validate_value('dropdown', 'nbo', options) == []
+        assert validate_value('dropdown', 'Nairobi', options) == ["Field 'f' must be one of the available options."]
+
+    def test_dropdown_options_are_frozen(self):
+        validator = build_field_validator(key='f', field_type='dropdown', options=[f'b{i}' for i in range(3000)])
+        assert isinstance(validator.options, frozenset)
+        assert validator('b2999') == []
+
+    def test_checkbox_boolean_and_multi_select(self):
+        assert validate_value('checkbox', True) == []
+        assert validate_value('checkbox', 'maybe') == ["Field 'f' must be true or false."]
+        assert validate_value('checkbox', ['a', 'b'], ['a', 'b', 'c']) == []
+        assert validate_value('checkbox', ['a', 'z'], ['a', 'b']) == ["Field 'f' must only contain available options."]
+        assert validate_value('checkbox', ['a'], ['a', 'b'], min_length=2) == ["Field 'f' requires at least 2 selection(s)."]
+
+    def test_currency_rejects_fractional_cents(self):
+        assert validate_value('currency', '1,250.50') == []
+        assert validate_value('currency', '10.505') == ["Field 'f' must have at most 2 decimal places."]
+
+    def test_phone_numbers(self):
+        assert validate_value('phone', '+254 712 345678') == []
+        assert validate_value('phone', '12ab') == ["Field 'f' must be a valid phone number."]
+
+    def test_rules_collect_every_violation(self):
+        errors = validate_value('text', 'abc', min_length=5, regex=r'\d+')
+        assert errors == [
+            "Field 'f' must have at least 5 characters.",
+            "Field 'f' has an invalid format.",
+        ]
+
+    def test_numeric_and_date_bounds(self):
+        assert validate_value('number', '17', min=18) == ["Field 'f' must be at least 18."]
+        assert validate_value('date', '2030-01-01', max='2025-12-31') == ["Field 'f' must be at most 2025-12-31."]
+
+    def test_custom_message_overrides_rule_message(self):
+        assert validate_value('text', 'x', regex=r'\d{8}', message='ID must be 8 digits') == ['ID must be 8 digits']
+
+
+@pytest.mark.django_db
+class TestFieldDefinitionChecks:
+
+    def test_model_clean_rejects_bad_regex(self, basic_form):
+        field = Field(form=basic_form, key='id', label='ID', field_type='text', validation={'regex': '('})
+        with pytest.raises(ValidationError):
+            field.clean()
+
+    def test_api_rejects_bad_bound(self, admin_client, basic_form):
+        response = admin_client.post(f'/api/forms/{basic_form.slug}/fields/', {
+            'key': 'age', 'label': 'Age', 'field_type': 'number', 'validation': {'min': 'ten'},
+        }, format='json')
+        assert response.status_code == 400
+        assert 'validation' in response.json()
+
+
+@pytest.mark.django_db
+class TestValidationPlan:
+
+    def test_required_keys_exclude_file_fields(self, typed_form):
+        plan = get_validation_plan(typed_form)
+        assert plan.required_keys == ('age',)
+
+    def test_plan_is_reused_for_same_schema_version(self, typed_form):
+        assert get_validation_plan(typed_form) is get_validation_plan(typed_form)
+
+    def test_warm_plan_needs_no_queries(self, typed_form, django_assert_num_queries):
+        get_validation_plan(typed_form)
+        with django_assert_num_queries(0):
+            plan = get_validation_plan(typed_form)
+            assert plan.validate({'age': 'abc', 'email': 'x@example.com'}) == {
+                'age': ["Field 'age' must be a number."],
+            }
+
+    def test_field_edit_invalidates_plan(self, typed_form):
+        before = get_validation_plan(typed_form)
+        Field.objects.create(form=typed_form, key='name', label='Name', field_type='text', required=True, order=5)
+        after = get_validation_plan(typed_form)
+        assert after is not before
+        assert 'name' in after.required_keys
+
+    def test_field_delete_invalidates_plan(self, typed_form):
+        get_validation_plan(typed_form)
+        typed_form.fields.get(key='age').delete()
+        assert get_validation_plan(typed_form).required_keys == ()
+
+    def test_evicted_generation_does_not_revive_a_stale_plan(self, typed_form):
+        stale = get_validation_plan(typed_form)
+        stale_lru = dict(validation._plans)
+        cache.delete(_generation_key(typed_form.pk))  # evicted
+        # Other workers keep editing the form; this worker still holds the old plan
+        for _ in range(5):
+            invalidate_validation_plan(typed_form.pk)
+            validation._plans.update(stale_lru)
+            assert get_validation_plan(typed_form) is not stale
+
+
+@pytest.mark.django_db
+class TestSubmissionSerializerUsesPlan:
+
+    def _serializer(self, form, responses):
+        return SubmissionSerializer(data={'form': str(form.id), 'responses': responses})
+
+    def test_invalid_email_rejected(self, typed_form):
+        serializer = self._serializer(typed_form, {'age': 30, 'email': 'not-an-email'})
+        assert not serializer.is_valid()
+        assert 'valid email' in str(serializer.errors['responses'])
+
+    def test_all_errors_reported_together(self, typed_form):
+        serializer = self._serializer(typed_form, {'email': 'nope', 'dob': 'nope'})
+        assert not serializer.is_valid()
+        assert set(serializer.errors['field_errors']) == {'age', 'email', 'dob'}
+        assert serializer.errors['responses'][0] == 'Missing required fields: age'
+
+    def test_invalid_date_rejected(self, typed_form):
+        serializer = self._serializer(typed_form, {'age': 30, 'dob': '31/01/1990'})
+        assert not serializer.is_valid()
+        assert 'ISO date' in str(serializer.errors['responses'])
+
+    def test_valid_payload_accepted(self, typed_form):
+        serializer = self._serializer(typed_form, {'age': '30', 'email': 'a@b.co', 'dob': '1990-01-31'})
+        assert serializer.is_valid(), serializer.errors
+
+    def test_warm_validation_only_loads_the_form(self, typed_form, django_assert_num_queries):
+        self._serializer(typed_form, {'age': 1}).is_valid()
+        # The single remaining query is the PrimaryKeyRelatedField lookup of the Form itself
+        with django_assert_num_queries(1):
+            assert self._serializer(typed_form, {'age': 2}).is_valid()
+
+
+@pytest.mark.django_db
+class TestConditionalRequired:
+
+    @pytest.fixture
+    def loan_form(self, basic_form):
+        Field.objects.create(form=basic_form, key='amount', label='Amount', field_type='number', required=True, order=1)
+        Field.objects.create(
+            form=basic_form, key='guarantor', label='Guarantor', field_type='text', order=2,
+            validation={'conditional_required': {
+                'depends_on': 'amount', 'operator': 'gt', 'value': 100000,
+                'message': 'Loans above 100,000 need a guarantor',
+            }},
+        )
+        Field.objects.create(
+            form=basic_form, key='guarantor_phone', label='Guarantor phone', field_type='phone', order=3,
+            validation={'conditional_required': [
+                {'depends_on': 'guarantor', 'operator': 'ne', 'value': ''},
+            ]},
+        )
+        return basic_form
+
+    def test_rule_applies_when_condition_holds(self, loan_form):
+        errors = get_validation_plan(loan_form).validate({'amount': '250000'})
+        assert errors == {'guarantor': ['Loans above 100,000 need a guarantor']}
+
+    def test_rule_ignored_when_condition_fails(self, loan_form):
+        assert get_validation_plan(loan_form).validate({'amount': '5000'}) == {}
+
+    def test_chained_rules_evaluated_in_dependency_order(self, loan_form):
+        plan = get_validation_plan(loan_form)
+        assert [rule.target for rule in plan.conditions] == ['guarantor', 'guarantor_phone']
+        errors = plan.validate({'amount': '250000', 'guarantor': 'Jane'})
+        assert list(errors) == ['guarantor_phone']
+
+    def test_api_submission_enforces_rule(self, api_client, loan_form):
+        response = api_client.post('/api/submissions/', {
+            'form': str(loan_form.id), 'responses': {'amount': 500000},
+        }, format='json')
+        assert response.status_code == 400
+        assert 'guarantor' in response.json()['field_errors']
+
+    def test_cycle_rejected_when_field_saved(self, admin_client, loan_form):
+        # guarantor_phone already depends on guarantor; closing the loop must fail
+        guarantor = loan_form.fields.get(key='guarantor')
+        response = admin_client.patch(f'/api/forms/{loan_form.slug}/fields/{guarantor.id}/', {
+            'validation': {'conditional_required': {'depends_on': 'guarantor_phone', 'operator': 'eq', 'value': 'x'}},
+        }, format='json')
+        assert response.status_code == 400
+        assert 'cycle' in str(response.json()['validation'])
+
+    def test_unknown_operator_rejected(self, admin_client, basic_form):
+        response = admin_client.post(f'/api/forms/{basic_form.slug}/fields/', {
+            'key': 'x', 'label': 'X', 'field_type': 'text',
+            'validation': {'conditional_required': {'depends_on': 'y', 'operator': 'contains', 'value': 1}},
+        }, format='json')
+        assert response.status_code == 400
@@ -24,6 +24,7 @@ import {
   getForms,
   submitForm,
   getSubmissions,
+  parseEventStream,
 } from "@/lib/api";
 
 // Helper to mock document.cookie in jsdom
@@ -140,4 +141,19 @@ describe("getSubmissions", () => {
     const subs = await getSubmissions();
     expect(subs[0].status).toBe("submitted");
   });
-});
\ No newline at end of file
+});
+describe("parseEventStream", () => {
+  it("parses complete events and keeps the unfinished tail", () => {
+    const { events, rest } = parseEventStream(
+      "retry: 5000\nid: c2VxOjE\nevent: ready\ndata: {}\n\n" +
+      ": heartbeat\n\n" +
+      'id: c2VxOjI\nevent: notification\ndata: {"title": "New"}\n\n' +
+      "id: c2VxOjM\nevent: notif"
+    );
+    expect(events).toEqual([
+      { id: "c2VxOjE", event: "ready", data: "{}", retry: 5000 },
+      { id: "c2VxOjI", event: "notification", data: '{"title": "New"}', retry: null },
+    ]);
+    expect(rest).toBe("id: c2VxOjM\nevent: notif");
+  });
+});
@@ -4,7 +4,8 @@
 import {
   getForms,
   getSubmissions,
-  getNotifications,
+  getUnreadNotificationCount,
+  subscribeToNotifications,
   updateSubmissionStatus,
   loadCurrentUser,
   isAdmin,
@@ -30,6 +31,8 @@ interface Submission {
   id: string;
   form: string;
   status: "submitted" | "reviewed" | "approved" | "rejected";
+  // Statuses the server allows next; sent with every submission
+  allowed_transitions: Submission["status"][];
   created_at: string;
   client_identifier: string | null;
   submitted_by: string | null;
@@ -50,26 +53,39 @@ export default function AdminDashboard() {
   const undoTimeoutRef = useRef<ReturnType<typeof setTimeout> | null>(null);
 
   useEffect(() => {
+    let unsubscribe: (() => void) | null = null;
+    let unmounted = false;
     loadCurrentUser().then((user) => {
+      if (unmounted) return;
       if (!user || !isAdmin()) {
         router.push(user ? "/forms" : "/login");
         return;
       }
       fetchAll();
+      // Pushed by the server as they arrive; no polling
+      unsubscribe = subscribeToNotifications((notification) => {
+        setUnread((count) => count + 1);
+        setToast({ message: notification.title, type: "success" });
+        setTimeout(() => setToast(null), 4000);
+      });
     });
+    return () => {
+      unmounted = true;
+      unsubscribe?.();
+    };
   }, []);
 
   const fetchAll = async () => {
     try {
-const [formsRes, subsRes, notifsData] = await Promise.all([
+const [formsRes, subsRes, unreadCount] = await Promise.all([
       getForms(1),
       getSubmissions(1),
-      getNotifications(),
+      getUnreadNotificationCount(),
     ]);
     setForms(formsRes as unknown as Form[]);
     setSubmissions(subsRes as unknown as Submission[]);
     setTotalSubs(subsRes.length);
-      setUnread(notifsData.filter((n: { is_read: boolean }) => !n.is_read).length);
+      setUnread(unreadCount);
     } catch (err: unknown) {
       setFetchError(true);
       const msg = err instanceof Error ? err.message : "Check your connection and try again.";
@@ -118,7 +134,8 @@ const [formsRes, subsRes, notifsData] = await Promise.all([
     undoTimeoutRef.current = setTimeout(() => setToast(null), 5000);
 
     try {
-      await updateSubmissionStatus(id, newStatus);
+      const updated: Submission = await updateSubmissionStatus(id, newStatus);
+      setSubmissions((prev) => prev.map((s) => (s.id === id ? { ...s, ...updated } : s)));
     } catch {
       // Revert on failure
       setSubmissions((prev) =>
@@ -361,10 +378,9 @@ const [formsRes, subsRes, notifsData] = await Promise.all([
                       cursor: "pointer",
                     }}
                   >
-                    <option value="submitted">submitted</option>
-                    <option value="reviewed">reviewed</option>
-                    <option value="approved">approved</option>
-                    <option value="rejected">rejected</option>
+                    {[sub.status, ...sub.allowed_transitions].map((option) => (
+                      <option key={option} value={option}>{option}</option>
+                    ))}
                   </select>
 
                   <span className="badge badge-submitted">submitted</span>
@@ -540,10 +556,9 @@ const [formsRes, subsRes, notifsData] = await Promise.all([
                       cursor: "pointer",
                     }}
                   >
-                    <option value="submitted">submitted</option>
-                    <option value="reviewed">reviewed</option>
-                    <option value="approved">approved</option>
-                    <option value="rejected">rejected</option>
+                    {[sub.status, ...sub.allowed_transitions].map((option) => (
+                      <option key={option} value={option}>{option}</option>
+                    ))}
                   </select>
 
                   <span className={`badge badge-${sub.status}`}>{sub.status}</span>
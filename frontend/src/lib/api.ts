@@ -367,6 +367,11 @@ export async function getNotifications() {
     : (response.data.results ?? []);
 }
 
+export async function getUnreadNotificationCount(): Promise<number> {
+  const response = await getApiInstance().get("/notifications/unread-count/");
+  return response.data.unread ?? 0;
+}
+
 export async function markNotificationRead(id: string) {
   const response = await getApiInstance().patch(`/notifications/${id}/`, { is_read: true });
   return response.data;
@@ -377,3 +382,95 @@ export async function markAllNotificationsRead() {
   return response.data;
 }
 
+// ── Live notifications (Server-Sent Events) ───────────────────────────────
+// EventSource can't send the Bearer header, so the stream is read with fetch.
+export interface StreamEvent {
+  id: string | null;
+  event: string;
+  data: string;
+  retry: number | null;
+}
+
+/** Parse complete SSE events out of `buffer`; `rest` is the unfinished tail. */
+export function parseEventStream(buffer: string): { events: StreamEvent[]; rest: string } {
+  const blocks = buffer.split("\n\n");
+  const rest = blocks.pop() ?? "";
+  const events: StreamEvent[] = [];
+  for (const block of blocks) {
+    const event: StreamEvent = { id: null, event: "message", data: "", retry: null };
+    const data: string[] = [];
+    for (const line of block.split("\n")) {
+      if (!line || line.startsWith(":")) continue; // comments, e.g. heartbeats
+      const colon = line.indexOf(":");
+      const field = colon === -1 ? line : line.slice(0, colon);
+      const value = colon === -1 ? "" : line.slice(colon + 1).replace(/^ /, "");
+      if (field === "data") data.push(value);
+      else if (field === "id") event.id = value;
+      else if (field === "event") event.event = value;
+      else if (field === "retry" && /^\d+$/.test(value)) event.retry = Number(value);
+    }
+    event.data = data.join("\n");
+    if (data.length || event.id !== null || event.retry !== null) events.push(event);
+  }
+  return { events, rest };
+}
+
+/**
+ * Call `onNotification` for every notification that arrives while subscribed.
+ * Reconnects with Last-Event-ID, so nothing is missed between connections.
+ * Returns a function that closes the stream.
+ */
+export function subscribeToNotifications(onNotification: (notification: any) => void): () => void {
+  const controller = new AbortController();
+  let lastEventId: string | null = null;
+  let retryMs = 5000;
+
+  const wait = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  const run = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        const headers: Record<string, string> = { Accept: "text/event-stream" };
+        const token = getCookie("access_token");
+        if (token) headers.Authorization = `Bearer ${token}`;
+        if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+
+        const response = await fetch(`${API_BASE_URL}/notifications/stream/`, {
+          headers,
+          signal: controller.signal,
+        });
+        if (response.status === 401) {
+          try {
+            await refreshAccessToken();
+          } catch {
+            return; // logged out
+          }
+          continue;
+        }
+        if (!response.ok || !response.body) throw new Error(`Notification stream: ${response.status}`);
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          const parsed = parseEventStream(buffer + decoder.decode(value, { stream: true }));
+          buffer = parsed.rest;
+          for (const event of parsed.events) {
+            if (event.retry !== null) retryMs = event.retry;
+            if (event.id !== null) lastEventId = event.id;
+            if (event.event === "notification") onNotification(JSON.parse(event.data));
+          }
+        }
+      } catch {
+        if (controller.signal.aborted) return;
+      }
+      await wait(retryMs);
+    }
+  };
+
+  run();
+  return () => controller.abort();
+}
+